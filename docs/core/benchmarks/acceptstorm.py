@@ -0,0 +1,209 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how bursts of new connections affect a TCP server and its
+established connections.
+
+A child process opens C{BURST} connections to the server every C{INTERVAL}
+seconds, closing those of the previous burst, while an established
+connection measures the latency of round trips to the server.  The server
+is run with the default accept budgets of L{twisted.internet.tcp.Port}, and
+with unbounded ones, accepting without accept4 and building every
+connection accepted at once, as it used to.
+
+For each, the numbers of connections accepted and shed per second, the
+median, 99th percentile and maximum processor time the port held the
+reactor for in one go, and the median and 99th percentile round trip
+latencies are reported.  On a machine with few processors, the storm
+process competes with the server, which makes the latencies noisy.
+"""
+
+from __future__ import print_function
+
+import multiprocessing
+import socket
+import sys
+import time
+
+from twisted.internet import protocol
+from twisted.internet.epollreactor import EPollReactor
+
+DURATION = 5
+BURST = 3000
+INTERVAL = 0.5
+MESSAGE = b"x" * 64
+
+
+
+class Echo(protocol.Protocol):
+    """
+    Send back every byte received.
+    """
+    def dataReceived(self, data):
+        self.transport.write(data)
+
+
+
+class ServerFactory(protocol.ServerFactory):
+    protocol = Echo
+    connections = 0
+
+    def buildProtocol(self, addr):
+        self.connections += 1
+        return protocol.ServerFactory.buildProtocol(self, addr)
+
+
+
+class Probe(protocol.Protocol):
+    """
+    Measure the latency of round trips, one at a time.
+    """
+    def connectionMade(self):
+        self.latencies = []
+        self.received = 0
+        self.send()
+
+
+    def send(self):
+        self.sent = time.time()
+        self.transport.write(MESSAGE)
+
+
+    def dataReceived(self, data):
+        self.received += len(data)
+        if self.received == len(MESSAGE):
+            self.received = 0
+            self.latencies.append(time.time() - self.sent)
+            self.send()
+
+
+
+class ProbeFactory(protocol.ClientFactory):
+    probe = None
+
+    def buildProtocol(self, addr):
+        self.probe = Probe()
+        return self.probe
+
+
+
+def storm(address, stop):
+    """
+    Open C{BURST} connections to C{address} every C{INTERVAL} seconds,
+    closing those of the previous burst, until C{stop} is set.
+    """
+    previous = []
+    while not stop.is_set():
+        current = []
+        for i in range(BURST):
+            skt = socket.socket()
+            skt.setblocking(False)
+            skt.connect_ex(address)
+            current.append(skt)
+        for skt in previous:
+            skt.close()
+        previous = current
+        stop.wait(INTERVAL)
+    for skt in previous:
+        skt.close()
+
+
+
+def timed(f, stalls, depth):
+    """
+    Wrap C{f} to append the processor time each outermost call to it, or to
+    other functions wrapped with the same C{depth}, takes to C{stalls}.
+
+    @param depth: A L{list} holding the number of calls in progress.
+    """
+    def wrapper(*args):
+        depth[0] += 1
+        start = time.process_time()
+        try:
+            return f(*args)
+        finally:
+            depth[0] -= 1
+            if not depth[0]:
+                stalls.append(time.process_time() - start)
+    return wrapper
+
+
+
+def percentile(values, percent):
+    """
+    @return: The C{percent}th percentile of the sorted C{values}.
+    """
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+
+def benchmark(unbounded):
+    """
+    Run the storm against a new server for C{DURATION} seconds.
+
+    @param unbounded: Whether to accept without accept4 and build every
+        connection accepted at once.
+
+    @return: The numbers of connections accepted and shed per second, and
+        the sorted stalls and round trip latencies measured.
+    """
+    reactor = EPollReactor()
+    factory = ServerFactory()
+    port = reactor.listenTCP(0, factory, backlog=1024, interface="127.0.0.1")
+    if unbounded:
+        port.maxAccepts = sys.maxsize
+        port.maxBuildsPerIteration = sys.maxsize
+        port.maxPendingConnections = sys.maxsize
+        port._accept = port.socket.accept
+    stalls = []
+    depth = [0]
+    port.doRead = timed(port.doRead, stalls, depth)
+    port._buildConnections = timed(port._buildConnections, stalls, depth)
+    shed = []
+    def shedConnection(skt, addr):
+        shed.append(addr)
+        skt.close()
+    port.shedConnection = shedConnection
+    address = ("127.0.0.1", port.getHost().port)
+
+    probeFactory = ProbeFactory()
+    reactor.connectTCP(address[0], address[1], probeFactory)
+    while probeFactory.probe is None or not probeFactory.probe.latencies:
+        reactor.iterate(0.01)
+    probe = probeFactory.probe
+
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(target=storm, args=(address, stop))
+    process.start()
+    probe.latencies = []
+    del stalls[:]
+    factory.connections = 0
+    start = time.time()
+    reactor.callLater(DURATION, reactor.stop)
+    reactor.run(installSignalHandlers=False)
+    elapsed = time.time() - start
+    stop.set()
+    process.join()
+    port.stopListening()
+    reactor.iterate(0)
+    return (factory.connections / elapsed, len(shed) / elapsed,
+            sorted(stalls), sorted(probe.latencies))
+
+
+
+def main():
+    for name, unbounded in [("unbounded", True), ("budgeted", False)]:
+        accepted, shed, stalls, latencies = benchmark(unbounded)
+        print("%-10s %6.0f accepted/s %5.0f shed/s" % (name, accepted, shed))
+        print("    port stalls (ms): median %5.2f  99%% %5.2f  max %5.2f" % (
+            percentile(stalls, 50) * 1000, percentile(stalls, 99) * 1000,
+            stalls[-1] * 1000))
+        print("    round trips (ms): median %5.2f  99%% %5.2f" % (
+            percentile(latencies, 50) * 1000,
+            percentile(latencies, 99) * 1000))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many AMP calls per second a client and a server in the same
+process complete over a loopback TCP connection.
+
+Each of C{CONNECTIONS} connections keeps C{WINDOW} calls of a command with
+a few typical arguments in flight, making a new call every time one has
+been answered.  The best rate of C{RUNS} consecutive periods of
+C{DURATION} seconds is reported.
+"""
+
+from __future__ import print_function
+
+from twisted.internet import reactor
+from twisted.internet.protocol import ClientFactory, ServerFactory
+from twisted.protocols import amp
+
+DURATION = 3
+RUNS = 3
+CONNECTIONS = 4
+WINDOW = 50
+
+
+
+class Store(amp.Command):
+    """
+    Store a value.
+    """
+    arguments = [(b'key', amp.String()),
+                 (b'value', amp.String()),
+                 (b'owner', amp.Unicode()),
+                 (b'ttl', amp.Integer()),
+                 (b'replicate-to', amp.Integer(optional=True))]
+    response = [(b'version', amp.Integer()),
+                (b'stored', amp.Boolean())]
+
+
+
+class Server(amp.AMP):
+    """
+    Answer L{Store} calls.
+    """
+    version = 0
+
+    @Store.responder
+    def store(self, key, value, owner, ttl, replicate_to):
+        self.version += 1
+        return {'version': self.version, 'stored': True}
+
+
+
+class Client(amp.AMP):
+    """
+    Keep C{WINDOW} L{Store} calls in flight.
+    """
+    def connectionMade(self):
+        amp.AMP.connectionMade(self)
+        for i in range(WINDOW):
+            self.call()
+
+
+    def call(self):
+        self.factory.inFlight += 1
+        self.callRemote(
+            Store, key=b'user:12345', value=b'x' * 100, owner=u'alice',
+            ttl=3600, replicate_to=2).addCallback(self.answered)
+
+
+    def answered(self, result):
+        self.factory.inFlight -= 1
+        self.factory.calls += 1
+        if self.factory.running:
+            self.call()
+        elif not self.factory.inFlight:
+            reactor.stop()
+
+
+
+class Factory(ClientFactory):
+    protocol = Client
+    calls = 0
+    inFlight = 0
+    running = True
+
+
+
+def main():
+    """
+    Make calls over C{CONNECTIONS} connections for C{RUNS} periods of
+    C{DURATION} seconds and report the best number of calls answered per
+    second.
+    """
+    serverFactory = ServerFactory()
+    serverFactory.protocol = Server
+    port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+    clientFactory = Factory()
+    for i in range(CONNECTIONS):
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+    rates = []
+    def measure(start, calls):
+        now = reactor.seconds()
+        if start is not None:
+            rates.append((clientFactory.calls - calls) / (now - start))
+        if len(rates) < RUNS:
+            reactor.callLater(DURATION, measure, now, clientFactory.calls)
+        else:
+            clientFactory.running = False
+    reactor.callLater(0.5, measure, None, 0)
+    reactor.run()
+    print("%8.0f calls/s" % (max(rates),))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the TCP echo throughput of the asyncio reactor, running on the
+default asyncio event loop and on uvloop's if it is installed, and of the
+epoll reactor for comparison.
+
+A number of connections each keep C{WINDOW} messages in flight, writing a
+new one every time one has been echoed back.  For each reactor, the best
+number of messages and megabytes echoed per second of C{RUNS} runs is
+reported.
+"""
+
+from __future__ import print_function
+
+import asyncio
+
+from twisted.internet import protocol
+from twisted.internet.asyncioreactor import AsyncioSelectorReactor
+from twisted.internet.epollreactor import EPollReactor
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+DURATION = 3
+RUNS = 3
+CONNECTIONS = 20
+WINDOW = 4
+MESSAGE = b"x" * 4096
+
+
+
+class Echo(protocol.Protocol):
+    """
+    Send back every byte received.
+    """
+    def dataReceived(self, data):
+        self.transport.write(data)
+
+
+
+class Client(protocol.Protocol):
+    """
+    Keep C{WINDOW} messages in flight.
+    """
+    received = 0
+
+    def connectionMade(self):
+        self.transport.write(MESSAGE * WINDOW)
+
+
+    def dataReceived(self, data):
+        self.received += len(data)
+        messages, self.received = divmod(self.received, len(MESSAGE))
+        self.factory.messages += messages
+        self.transport.write(MESSAGE * messages)
+
+
+
+class ClientFactory(protocol.ClientFactory):
+    protocol = Client
+    messages = 0
+
+
+
+def benchmark(reactorFactory):
+    """
+    Run C{CONNECTIONS} connections on a new reactor for C{DURATION} seconds.
+
+    @return: The number of messages echoed per second.
+    """
+    reactor = reactorFactory()
+    serverFactory = protocol.ServerFactory()
+    serverFactory.protocol = Echo
+    port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+    clientFactory = ClientFactory()
+    connectors = [
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+        for i in range(CONNECTIONS)]
+    start = []
+    reactor.callWhenRunning(lambda: start.append(reactor.seconds()))
+    reactor.callLater(DURATION, reactor.stop)
+    reactor.run(installSignalHandlers=False)
+    rate = clientFactory.messages / (reactor.seconds() - start[0])
+    for connector in connectors:
+        connector.disconnect()
+    port.stopListening()
+    return rate
+
+
+
+def main():
+    reactorFactories = [
+        ("asyncio", lambda: AsyncioSelectorReactor(asyncio.new_event_loop()))]
+    if uvloop is None:
+        print("uvloop is not installed, skipping it.")
+    else:
+        reactorFactories.append(
+            ("uvloop", lambda: AsyncioSelectorReactor(uvloop.new_event_loop())))
+    reactorFactories.append(("EPollReactor", EPollReactor))
+    for name, reactorFactory in reactorFactories:
+        rate = max(benchmark(reactorFactory) for i in range(RUNS))
+        print("%-14s %8.0f messages/s %8.1f MB/s" % (
+            name, rate, rate * len(MESSAGE) / 1e6))
+
+
+
+if __name__ == '__main__':
+    main()
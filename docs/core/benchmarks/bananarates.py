@@ -0,0 +1,98 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how fast L{Banana} encodes and decodes expressions like the large
+ones Perspective Broker sends.
+
+Each expression is encoded with L{Banana.sendEncoded} and its encoding is
+decoded in chunks of C{CHUNK} bytes, as a transport reading 64KiB at a time
+would deliver it.  The best rate of C{RUNS} runs is reported:
+
+    - strings: a list of 100 byte strings, like a page from
+      L{twisted.spread.util.Pager}.
+    - ints: a list of integers.
+    - rows: a list of small lists mixing strings, integers and floats, like
+      the rows of a query result.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.spread.banana import Banana
+from twisted.test.proto_helpers import StringTransport
+
+CHUNK = 65536
+ITEMS = 5000
+RUNS = 5
+
+
+
+class CountingBanana(Banana):
+    """
+    Count the expressions received.
+    """
+    expressions = 0
+
+    def expressionReceived(self, expression):
+        self.expressions += 1
+
+
+
+def connect():
+    """
+    @return: A L{CountingBanana} connected to a L{StringTransport} which
+        has selected the C{"none"} dialect.
+    """
+    protocol = CountingBanana()
+    protocol.makeConnection(StringTransport())
+    protocol._selectDialect("none")
+    return protocol
+
+
+
+def benchmark(expression):
+    """
+    @return: The best numbers of megabytes encoded and decoded per second
+        from C{expression}.
+    """
+    protocol = connect()
+    bestEncode = bestDecode = None
+    for i in range(RUNS):
+        protocol.transport.clear()
+        start = time.time()
+        protocol.sendEncoded(expression)
+        elapsed = time.time() - start
+        if bestEncode is None or elapsed < bestEncode:
+            bestEncode = elapsed
+
+    data = protocol.transport.value()
+    chunks = [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+    for i in range(RUNS):
+        protocol = connect()
+        start = time.time()
+        for chunk in chunks:
+            protocol.dataReceived(chunk)
+        elapsed = time.time() - start
+        assert protocol.expressions == 1
+        if bestDecode is None or elapsed < bestDecode:
+            bestDecode = elapsed
+    return len(data) / bestEncode / 1e6, len(data) / bestDecode / 1e6
+
+
+
+def main():
+    for name, expression in [
+            ("strings", ["x" * 100] * ITEMS),
+            ("ints", list(range(ITEMS * 10))),
+            ("rows", [["user%d" % (i,), i, -i, i * 0.5, ["tag", "other"]]
+                      for i in range(ITEMS)])]:
+        encoded, decoded = benchmark(expression)
+        print("%-8s encode %8.1f MB/s decode %8.1f MB/s" % (
+            name, encoded, decoded))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many queries per second a L{twisted.names.server.DNSServerFactory}
+answers from a L{twisted.names.authority.FileAuthority} holding a zone of a
+hundred thousand records.
+
+Each query is decoded from its wire form, resolved and its response encoded,
+as it would be for a datagram received by a real server.  The first pass over
+the names computes the responses, the next ones are answered from the index
+of the authority and from the encoded responses cached by the server.
+"""
+
+from __future__ import print_function
+
+import random
+import time
+
+from twisted.names import authority, dns, server
+
+RECORDS = 100000
+QUERIES = 100000
+
+
+
+class GeneratedAuthority(authority.FileAuthority):
+    """
+    An authority for C{example.com} whose zone is generated rather than read
+    from a file: C{host<n>.example.com} has an I{A} record for each C{n}
+    below C{RECORDS}, and every tenth host is also a mail exchanger.
+    """
+    def loadFile(self, filename):
+        soa = dns.Record_SOA(
+            mname=b'ns1.example.com', rname=b'hostmaster.example.com',
+            serial=1, refresh=3600, retry=600, expire=86400, minimum=300,
+            ttl=3600)
+        self.soa = (b'example.com', soa)
+        self.records = {b'example.com': [soa, dns.Record_NS(b'ns1.example.com')]}
+        for i in range(RECORDS):
+            name = b'host' + str(i).encode('ascii') + b'.example.com'
+            records = [dns.Record_A(
+                '10.%d.%d.%d' % (i >> 16, (i >> 8) & 0xff, i & 0xff), ttl=300)]
+            if not i % 10:
+                records.append(dns.Record_MX(10, name, ttl=300))
+            self.records[name] = records
+
+
+
+class Discard(object):
+    """
+    A DNS protocol which encodes the messages it is given and drops them.
+    """
+    def writeMessage(self, message, address):
+        message.toStr()
+
+
+
+def queries(count):
+    """
+    Build encoded query messages for random names of the zone.
+
+    @return: A L{list} of L{bytes}.
+    """
+    result = []
+    for i in range(count):
+        message = dns.Message(id=i & 0xffff, recDes=1)
+        name = b'host' + str(random.randrange(RECORDS)).encode('ascii')
+        if i % 4:
+            message.addQuery(name + b'.example.com', dns.A)
+        else:
+            message.addQuery(name + b'.example.com', dns.MX)
+        result.append(message.toStr())
+    return result
+
+
+
+def benchmark(factory, packets):
+    """
+    Answer every query of C{packets}.
+
+    @return: The number of queries answered per second.
+    """
+    protocol = Discard()
+    address = ('127.0.0.1', 53)
+    before = time.time()
+    for packet in packets:
+        message = dns.Message()
+        message.fromStr(packet)
+        message.timeReceived = time.time()
+        factory.handleQuery(message, protocol, address)
+    return len(packets) / (time.time() - before)
+
+
+
+def main():
+    before = time.time()
+    zone = GeneratedAuthority(None)
+    print("Generated %d names in %.2fs" % (
+        len(zone.records), time.time() - before))
+    factory = server.DNSServerFactory(authorities=[zone])
+    packets = queries(QUERIES)
+    for name in ["first pass", "second pass", "third pass"]:
+        print("%-12s %10.0f queries/s" % (name, benchmark(factory, packets)))
+
+
+
+if __name__ == '__main__':
+    main()
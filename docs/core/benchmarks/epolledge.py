@@ -0,0 +1,163 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Compare the level-triggered and edge-triggered epoll reactors on a
+request/response workload over TCP.
+
+A number of connections each send a small request and wait for the
+response before sending the next one, so that every connection starts and
+stops writing once per message.  For each reactor, the best number of
+round trips per second of C{RUNS} runs is reported, and then, in a separate
+run, the number of epoll and socket system calls made per round trip is
+counted by wrapping the poller and the sockets.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet import protocol
+from twisted.internet.epollreactor import (
+    EPollReactor, EdgeTriggeredEPollReactor)
+
+DURATION = 3
+RUNS = 3
+CONNECTIONS = 50
+MESSAGE = b"x" * 64
+
+
+
+class Counter(object):
+    """
+    Count the calls made to some methods of an object and delegate all
+    attribute lookups to it.
+    """
+    def __init__(self, counts, wrapped, names):
+        self._counts = counts
+        self._wrapped = wrapped
+        self._names = names
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self._wrapped, name)
+        if name not in self._names:
+            return attribute
+        counts = self._counts
+        def counted(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+
+POLLER = ["register", "modify", "unregister", "poll"]
+SOCKET = ["recv", "recv_into", "send", "sendmsg"]
+
+
+
+class Echo(protocol.Protocol):
+    """
+    Send back every message received.
+    """
+    def dataReceived(self, data):
+        self.transport.write(data)
+
+
+
+class Client(protocol.Protocol):
+    """
+    Send a message and the next one once it has been echoed back.
+    """
+    def connectionMade(self):
+        self.factory.connected(self)
+
+
+    def dataReceived(self, data):
+        self.factory.roundTrips += 1
+        self.transport.write(MESSAGE)
+
+
+
+class ClientFactory(protocol.ClientFactory):
+    protocol = Client
+    roundTrips = 0
+
+    def __init__(self):
+        self.clients = []
+
+
+    def connected(self, client):
+        self.clients.append(client)
+
+
+
+def benchmark(reactorFactory, count):
+    """
+    Run C{CONNECTIONS} connections on a new reactor for C{DURATION} seconds.
+
+    @param count: Whether to count the system calls made.
+
+    @return: The number of round trips per second and, if C{count} is true,
+        a L{dict} giving the number of calls of each system call per round
+        trip.
+    """
+    reactor = reactorFactory()
+    counts = {}
+    if count:
+        reactor._poller = Counter(counts, reactor._poller, POLLER)
+    serverFactory = protocol.ServerFactory()
+    serverFactory.protocol = Echo
+    port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+    clientFactory = ClientFactory()
+    for i in range(CONNECTIONS):
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+    while len(clientFactory.clients) < CONNECTIONS:
+        reactor.iterate(0.01)
+
+    transports = [client.transport for client in clientFactory.clients]
+    if count:
+        # Wrap both ends of every connection.
+        for selectable in list(reactor._selectables.values()):
+            if hasattr(selectable, "protocol"):
+                selectable.socket = Counter(counts, selectable.socket, SOCKET)
+        counts.clear()
+    for transport in transports:
+        transport.write(MESSAGE)
+
+    clientFactory.roundTrips = 0
+    start = time.time()
+    while time.time() - start < DURATION:
+        reactor.iterate(0)
+    elapsed = time.time() - start
+    roundTrips = clientFactory.roundTrips
+    perRoundTrip = None
+    if count:
+        perRoundTrip = dict(
+            (name, calls / roundTrips) for name, calls in counts.items())
+    for transport in transports:
+        transport.abortConnection()
+    port.stopListening()
+    reactor.iterate(0)
+    return roundTrips / elapsed, perRoundTrip
+
+
+
+def main():
+    rates = {}
+    for i in range(RUNS):
+        for reactorFactory in [EPollReactor, EdgeTriggeredEPollReactor]:
+            rate, ignored = benchmark(reactorFactory, False)
+            rates[reactorFactory] = max(rates.get(reactorFactory, 0), rate)
+    for reactorFactory in [EPollReactor, EdgeTriggeredEPollReactor]:
+        ignored, counts = benchmark(reactorFactory, True)
+        print("%-26s %8.0f round trips/s" % (
+            reactorFactory.__name__, rates[reactorFactory]))
+        print("    system calls per round trip: " + ", ".join(
+            "%s %.2f" % (name, counts.get(name, 0))
+            for name in POLLER + SOCKET))
+
+
+
+if __name__ == '__main__':
+    main()
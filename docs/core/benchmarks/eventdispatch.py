@@ -0,0 +1,115 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many I/O events per second the poll-like reactors dispatch.
+
+A number of always writable sockets are added as writers whose C{doWrite}
+does nothing, so that each iteration of the reactor dispatches one event per
+socket and the cost measured is that of the dispatch itself.  Each reactor is
+measured dispatching its events with a lazy log context, as it does, and with
+L{log.callWithLogger} wrapping every event.
+"""
+
+from __future__ import print_function
+
+import socket
+import time
+
+from twisted.internet import abstract
+from twisted.internet.epollreactor import EPollReactor
+from twisted.internet.pollreactor import PollReactor
+from twisted.internet.selectreactor import SelectReactor
+from twisted.python import log
+
+DURATION = 3
+SOCKETS = 100
+
+
+
+class Writable(abstract.FileDescriptor):
+    """
+    An always writable socket whose C{doWrite} counts its calls.
+    """
+    count = 0
+
+    def __init__(self, reactor, skt, number):
+        abstract.FileDescriptor.__init__(self, reactor)
+        self.socket = skt
+        self.number = number
+
+
+    def fileno(self):
+        return self.socket.fileno()
+
+
+    def logPrefix(self):
+        return "%s,%d,%s" % (
+            self.__class__.__name__, self.number, "127.0.0.1")
+
+
+    def doWrite(self):
+        Writable.count += 1
+
+
+
+def perEventDispatch(reactor):
+    """
+    Make C{reactor} wrap every event it dispatches in L{log.callWithLogger},
+    as the reactors used to.
+    """
+    _drdw = reactor._doReadOrWrite
+    if isinstance(reactor, SelectReactor):
+        def dispatch(lazyContext, r, w):
+            for selectables, method in ((r, "doRead"), (w, "doWrite")):
+                for selectable in selectables:
+                    log.callWithLogger(selectable, _drdw, selectable, method)
+    else:
+        def dispatch(lazyContext, events):
+            for fd, event in events:
+                selectable = reactor._selectables[fd]
+                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+    reactor._dispatchEvents = dispatch
+
+
+
+def benchmark(reactorFactory, lazy):
+    """
+    Iterate a new reactor with C{SOCKETS} writers for C{DURATION} seconds.
+
+    @return: The number of events dispatched per second.
+    """
+    reactor = reactorFactory()
+    if not lazy:
+        perEventDispatch(reactor)
+    writers = []
+    for i in range(SOCKETS // 2):
+        for skt in socket.socketpair():
+            writer = Writable(reactor, skt, len(writers))
+            writers.append(writer)
+            reactor.addWriter(writer)
+    Writable.count = 0
+    start = time.time()
+    end = start + DURATION
+    while time.time() < end:
+        for i in range(100):
+            reactor.doIteration(0)
+    elapsed = time.time() - start
+    for writer in writers:
+        reactor.removeWriter(writer)
+        writer.socket.close()
+    return Writable.count / elapsed
+
+
+
+def main():
+    for factory in [EPollReactor, PollReactor, SelectReactor]:
+        lazy = benchmark(factory, True)
+        perEvent = benchmark(factory, False)
+        print("%-15s lazy %10.0f events/s  callWithLogger %10.0f events/s" % (
+            factory.__name__, lazy, perEvent))
+
+
+
+if __name__ == '__main__':
+    main()
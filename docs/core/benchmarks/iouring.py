@@ -0,0 +1,165 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Compare the epoll and io_uring reactors on a request/response workload over
+TCP.
+
+A number of connections each send a small request and wait for the
+response before sending the next one.  For each reactor, the best number of
+round trips per second of C{RUNS} runs is reported, and then, in a separate
+run, the number of system calls made per round trip is counted: C{epoll_wait}
+and the socket calls for the epoll reactor, and C{io_uring_enter} for the
+io_uring reactor, which makes no socket calls once connected.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet import protocol
+from twisted.internet.epollreactor import EPollReactor
+from twisted.internet.iouringreactor import IOUringReactor
+
+DURATION = 3
+RUNS = 3
+CONNECTIONS = 50
+MESSAGE = b"x" * 64
+
+
+
+class Counter(object):
+    """
+    Count the calls made to some methods of an object and delegate all
+    attribute lookups to it.
+    """
+    def __init__(self, counts, wrapped, names):
+        self._counts = counts
+        self._wrapped = wrapped
+        self._names = names
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self._wrapped, name)
+        if name not in self._names:
+            return attribute
+        counts = self._counts
+        def counted(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return attribute(*args, **kwargs)
+        return counted
+
+
+
+class Echo(protocol.Protocol):
+    """
+    Send back every message received.
+    """
+    def dataReceived(self, data):
+        self.transport.write(data)
+
+
+
+class Client(protocol.Protocol):
+    """
+    Send a message and the next one once it has been echoed back.
+    """
+    def connectionMade(self):
+        self.factory.clients.append(self)
+
+
+    def dataReceived(self, data):
+        self.factory.roundTrips += 1
+        self.transport.write(MESSAGE)
+
+
+
+class ClientFactory(protocol.ClientFactory):
+    protocol = Client
+    roundTrips = 0
+
+    def __init__(self):
+        self.clients = []
+
+
+
+def countCalls(reactor, counts):
+    """
+    Wrap the poller or the ring of C{reactor} and the sockets of its
+    connections to count the system calls made.
+
+    @return: The names of the calls counted.
+    """
+    if isinstance(reactor, IOUringReactor):
+        names = ["enter"]
+        reactor._ring = Counter(counts, reactor._ring, names)
+        return names
+    names = ["poll", "recv", "send"]
+    reactor._poller = Counter(counts, reactor._poller, names)
+    for selectable in list(reactor._selectables.values()):
+        if hasattr(selectable, "protocol"):
+            selectable.socket = Counter(counts, selectable.socket, names)
+    return names
+
+
+
+def benchmark(reactorFactory, count):
+    """
+    Run C{CONNECTIONS} connections on a new reactor for C{DURATION} seconds.
+
+    @param count: Whether to count the system calls made.
+
+    @return: The number of round trips per second and, if C{count} is true,
+        a L{list} of the names and numbers per round trip of the system
+        calls made.
+    """
+    reactor = reactorFactory()
+    serverFactory = protocol.ServerFactory()
+    serverFactory.protocol = Echo
+    port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+    clientFactory = ClientFactory()
+    for i in range(CONNECTIONS):
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+    while len(clientFactory.clients) < CONNECTIONS:
+        reactor.iterate(0.01)
+
+    counts = {}
+    names = countCalls(reactor, counts) if count else []
+    transports = [client.transport for client in clientFactory.clients]
+    for transport in transports:
+        transport.write(MESSAGE)
+
+    clientFactory.roundTrips = 0
+    start = time.time()
+    while time.time() - start < DURATION:
+        reactor.iterate(0)
+    elapsed = time.time() - start
+    roundTrips = clientFactory.roundTrips
+    perRoundTrip = [
+        (name, counts.get(name, 0) / roundTrips) for name in names]
+    for transport in transports:
+        transport.abortConnection()
+    port.stopListening()
+    reactor.iterate(0)
+    return roundTrips / elapsed, perRoundTrip
+
+
+
+def main():
+    reactorFactories = [EPollReactor, IOUringReactor]
+    rates = {}
+    for i in range(RUNS):
+        for reactorFactory in reactorFactories:
+            rate, ignored = benchmark(reactorFactory, False)
+            rates[reactorFactory] = max(rates.get(reactorFactory, 0), rate)
+    for reactorFactory in reactorFactories:
+        ignored, counts = benchmark(reactorFactory, True)
+        print("%-14s %8.0f round trips/s" % (
+            reactorFactory.__name__, rates[reactorFactory]))
+        print("    system calls per round trip: " + ", ".join(
+            "%s %.2f" % (name, calls) for name, calls in counts))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many lines per second L{LineReceiver} and L{LineOnlyReceiver}
+parse from the data typical of a few line-based protocols.
+
+Each workload is delivered in chunks of C{CHUNK} bytes, as a transport
+reading 64KiB at a time would, and the best rate of C{RUNS} runs is
+reported:
+
+    - smtp: the 76 character lines of a message body.
+    - irc: 120 character C{PRIVMSG} lines.
+    - memcache: responses to C{get} requests, a line and 100 bytes of raw
+      data each, switching between line and raw modes as the memcache
+      protocol does.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.protocols.basic import LineOnlyReceiver, LineReceiver
+from twisted.test.proto_helpers import StringTransport
+
+CHUNK = 65536
+SIZE = 8 * 1024 * 1024
+RUNS = 3
+
+
+
+class CountingLineReceiver(LineReceiver):
+    """
+    Count the lines received.
+    """
+    lines = 0
+
+    def lineReceived(self, line):
+        self.lines += 1
+
+
+
+class CountingLineOnlyReceiver(LineOnlyReceiver):
+    """
+    Count the lines received.
+    """
+    lines = 0
+
+    def lineReceived(self, line):
+        self.lines += 1
+
+
+
+class MemcacheStyleReceiver(LineReceiver):
+    """
+    Receive C{VALUE} lines, each followed by as many bytes of raw data as it
+    says, like the responses to memcache C{get} requests.
+    """
+    lines = 0
+    _length = 0
+
+    def lineReceived(self, line):
+        self.lines += 1
+        if line.startswith(b"VALUE "):
+            self._length = int(line.split()[3]) + len(self.delimiter)
+            self._value = []
+            self.setRawMode()
+
+
+    def rawDataReceived(self, data):
+        self._length -= len(data)
+        if self._length > 0:
+            self._value.append(data)
+        else:
+            self._value.append(data[:len(data) + self._length])
+            rest = data[len(data) + self._length:]
+            self._length = 0
+            self.setLineMode(rest)
+
+
+
+def workload(line):
+    """
+    @return: C{line} repeated to make up at least C{SIZE} bytes, in chunks
+        of C{CHUNK} bytes.
+    """
+    data = line * (SIZE // len(line) + 1)
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+
+def benchmark(protocolFactory, chunks):
+    """
+    @return: The best number of lines received per second by a protocol
+        created with C{protocolFactory} from C{chunks}.
+    """
+    best = 0
+    for i in range(RUNS):
+        protocol = protocolFactory()
+        protocol.makeConnection(StringTransport())
+        start = time.time()
+        for chunk in chunks:
+            protocol.dataReceived(chunk)
+        best = max(best, protocol.lines / (time.time() - start))
+    return best
+
+
+
+def main():
+    smtp = workload(b"x" * 76 + b"\r\n")
+    irc = workload(
+        b":nick!user@host PRIVMSG #channel :" + b"x" * 84 + b"\r\n")
+    memcache = workload(b"VALUE key 0 100\r\n" + b"x" * 100 + b"\r\nEND\r\n")
+    for name, protocolFactory, chunks in [
+            ("smtp", CountingLineReceiver, smtp),
+            ("irc", CountingLineReceiver, irc),
+            ("irc (line only)", CountingLineOnlyReceiver, irc),
+            ("memcache", MemcacheStyleReceiver, memcache)]:
+        print("%-16s %10.0f lines/s" % (
+            name, benchmark(protocolFactory, chunks)))
+
+
+
+if __name__ == '__main__':
+    main()
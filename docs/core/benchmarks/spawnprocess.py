@@ -0,0 +1,110 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many processes per second C{reactor.spawnProcess} starts with
+C{posix_spawn} and with C{fork}, for parents of several heap sizes and
+numbers of open file descriptors.
+
+Only the time spent in C{spawnProcess}, during which the reactor is blocked,
+is measured.  The children run C{true} and are reaped afterwards.
+"""
+
+from __future__ import print_function
+
+import os
+import resource
+import time
+
+from twisted.internet import defer, protocol, reactor
+from twisted.internet import process
+
+PROCESSES = 200
+HEAPS = [0, 256, 1024]
+DESCRIPTORS = [0, 1000, 10000]
+
+
+
+class Waiter(protocol.ProcessProtocol):
+    """
+    Fire a L{defer.Deferred} when the process ends.
+    """
+    def __init__(self, ended):
+        self.ended = ended
+
+
+    def processEnded(self, reason):
+        self.ended.callback(None)
+
+
+
+def openDescriptors(count):
+    """
+    Open pipes until C{count} more file descriptors are open.
+
+    @return: The file descriptors.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < count + 256:
+        resource.setrlimit(
+            resource.RLIMIT_NOFILE, (min(hard, count + 256), hard))
+    fds = []
+    for i in range(count // 2):
+        fds.extend(os.pipe())
+    return fds
+
+
+
+@defer.inlineCallbacks
+def benchmark(usePosixSpawn):
+    """
+    Start C{PROCESSES} processes and wait for them to end.
+
+    @return: A L{defer.Deferred} firing with the number of processes started
+        per second.
+    """
+    process.Process._usePosixSpawn = usePosixSpawn
+    ended = []
+    spent = 0.0
+    for i in range(PROCESSES):
+        d = defer.Deferred()
+        ended.append(d)
+        before = time.time()
+        reactor.spawnProcess(Waiter(d), "true", ["true"], env=os.environ)
+        spent += time.time() - before
+    yield defer.gatherResults(ended)
+    defer.returnValue(PROCESSES / spent)
+
+
+
+@defer.inlineCallbacks
+def run():
+    heap = []
+    descriptors = []
+    try:
+        for megabytes in HEAPS:
+            # Touch the pages so that they are really mapped.
+            heap.append(b"x" * ((megabytes << 20) - sum(map(len, heap))))
+            for count in DESCRIPTORS:
+                descriptors.extend(
+                    openDescriptors(count - len(descriptors)))
+                spawn = yield benchmark(True)
+                fork = yield benchmark(False)
+                print("%5d MB, %5d fds  posix_spawn %8.0f/s  fork %8.0f/s" % (
+                    megabytes, count, spawn, fork))
+            for fd in descriptors:
+                os.close(fd)
+            del descriptors[:]
+    finally:
+        reactor.stop()
+
+
+
+def main():
+    reactor.callWhenRunning(run)
+    reactor.run()
+
+
+
+if __name__ == '__main__':
+    main()
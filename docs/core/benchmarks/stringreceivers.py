@@ -0,0 +1,101 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how fast L{Int32StringReceiver} and L{NetstringReceiver} break a
+stream up into strings.
+
+Each stream is delivered in chunks of C{CHUNK} bytes, as a transport
+reading 64KiB at a time would, and the best rate of C{RUNS} runs is
+reported:
+
+    - 1MiB frames: strings of 1MiB, each spread over many chunks.
+    - 100 byte frames: strings of 100 bytes, hundreds in each chunk.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.protocols.basic import Int32StringReceiver, NetstringReceiver
+from twisted.test.proto_helpers import StringTransport
+
+CHUNK = 65536
+SIZE = 32 * 1024 * 1024
+RUNS = 3
+
+
+
+class CountingInt32StringReceiver(Int32StringReceiver):
+    """
+    Count the strings received.
+    """
+    MAX_LENGTH = 2 ** 31
+    strings = 0
+
+    def stringReceived(self, string):
+        self.strings += 1
+
+
+
+class CountingNetstringReceiver(NetstringReceiver):
+    """
+    Count the strings received.
+    """
+    MAX_LENGTH = 2 ** 31
+    strings = 0
+
+    def stringReceived(self, string):
+        self.strings += 1
+
+
+
+def stream(protocolClass, length):
+    """
+    @return: Strings of C{length} bytes framed by C{protocolClass}, making up
+        at least C{SIZE} bytes, in chunks of C{CHUNK} bytes.
+    """
+    transport = StringTransport()
+    protocol = protocolClass()
+    protocol.makeConnection(transport)
+    protocol.sendString(b"x" * length)
+    frame = transport.value()
+    data = frame * (SIZE // len(frame) + 1)
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+
+def benchmark(protocolClass, chunks):
+    """
+    @return: The best numbers of strings and megabytes received per second
+        by a C{protocolClass} from C{chunks}.
+    """
+    best = None
+    for i in range(RUNS):
+        protocol = protocolClass()
+        protocol.makeConnection(StringTransport())
+        start = time.time()
+        for chunk in chunks:
+            protocol.dataReceived(chunk)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    size = sum(len(chunk) for chunk in chunks)
+    return protocol.strings / best, size / best / 1e6
+
+
+
+def main():
+    for name, protocolClass in [
+            ("int32", CountingInt32StringReceiver),
+            ("netstring", CountingNetstringReceiver)]:
+        for frames, length in [("1MiB", 2 ** 20), ("100 byte", 100)]:
+            chunks = stream(protocolClass, length)
+            strings, megabytes = benchmark(protocolClass, chunks)
+            print("%-10s %-9s frames %10.0f strings/s %8.1f MB/s" % (
+                name, frames, strings, megabytes))
+
+
+
+if __name__ == '__main__':
+    main()
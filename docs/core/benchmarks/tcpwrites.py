@@ -0,0 +1,116 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure TCP write throughput over loopback for many small writes and for a
+few large writes, with and without the vectored (C{sendmsg}) write path of
+L{twisted.internet.tcp.Connection}.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet import abstract, reactor, tcp
+from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.protocol import ClientFactory, Factory, Protocol
+
+
+
+class Counter(Protocol):
+    """
+    Count the bytes received and fire a L{Deferred} once all have arrived.
+    """
+    def __init__(self, expected, done):
+        self.expected = expected
+        self.received = 0
+        self.done = done
+
+
+    def dataReceived(self, data):
+        self.received += len(data)
+        if self.received >= self.expected:
+            self.transport.loseConnection()
+            self.done.callback(None)
+
+
+
+class Sender(Protocol):
+    """
+    Write C{rounds} sequences of C{chunks} chunks of C{size} bytes each time
+    the transport asks for more.
+    """
+    def __init__(self, size, chunks, rounds):
+        self.sequence = [b"x" * size] * chunks
+        self.rounds = rounds
+
+
+    def connectionMade(self):
+        self.transport.registerProducer(self, False)
+
+
+    def resumeProducing(self):
+        if self.rounds:
+            self.rounds -= 1
+            self.transport.writeSequence(self.sequence)
+        else:
+            self.transport.unregisterProducer()
+
+
+    def stopProducing(self):
+        pass
+
+
+
+def benchmark(size, chunks, rounds):
+    """
+    Send C{rounds} sequences of C{chunks} chunks of C{size} bytes over a
+    loopback connection.
+
+    @return: A L{Deferred} firing with the throughput, in MB/s.
+    """
+    total = size * chunks * rounds
+    done = Deferred()
+    factory = Factory()
+    factory.protocol = lambda: Counter(total, done)
+    port = reactor.listenTCP(0, factory, interface="127.0.0.1")
+    sender = ClientFactory()
+    sender.protocol = lambda: Sender(size, chunks, rounds)
+
+    before = time.time()
+    reactor.connectTCP("127.0.0.1", port.getHost().port, sender)
+    done.addCallback(lambda ignored: port.stopListening())
+    done.addCallback(lambda ignored: total / (time.time() - before) / 2 ** 20)
+    return done
+
+
+
+@inlineCallbacks
+def run():
+    cases = [
+        ("64 B chunks", 64, 1000, 200),
+        ("4 KiB chunks", 4096, 100, 100),
+        ("1 MiB chunks", 2 ** 20, 4, 50),
+        ]
+    paths = [("joined", abstract.FileDescriptor.doWrite)]
+    if tcp._HAS_SENDMSG:
+        paths.append(("sendmsg", tcp.Connection.doWrite))
+    try:
+        for name, size, chunks, rounds in cases:
+            for pathName, doWrite in paths:
+                tcp.Connection.doWrite = doWrite
+                throughput = yield benchmark(size, chunks, rounds)
+                print("%-18s %-8s %8.1f MB/s" % (name, pathName, throughput))
+    finally:
+        reactor.stop()
+
+
+
+def main():
+    reactor.callWhenRunning(run)
+    reactor.run()
+
+
+
+if __name__ == '__main__':
+    main()
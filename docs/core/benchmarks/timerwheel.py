@@ -0,0 +1,97 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Compare the cost of timed calls stored in the default heap of
+L{twisted.internet.base.ReactorBase} with the cost of the same calls stored
+in the timer wheel installed by L{ReactorBase.installTimerWheel}.
+
+For each number of pending calls, this schedules that many calls, resets
+each of them to a later time once (like
+L{twisted.protocols.policies.TimeoutMixin} does on every read), resets a
+hundred of them to an earlier time, cancels half of them and finally lets the
+others expire.
+"""
+
+from __future__ import print_function
+
+import time
+
+from twisted.internet.base import ReactorBase
+
+
+
+class BenchmarkReactor(ReactorBase):
+    """
+    A reactor which does no I/O and whose clock only moves when told to.
+    """
+    now = 0.0
+
+    def installWaker(self):
+        pass
+
+
+    def seconds(self):
+        return self.now
+
+
+
+def noop():
+    pass
+
+
+
+def benchmark(count, useWheel):
+    reactor = BenchmarkReactor()
+    if useWheel:
+        reactor.installTimerWheel()
+    results = []
+
+    before = time.time()
+    calls = [reactor.callLater(30 + (i % 1000) / 100.0, noop)
+             for i in range(count)]
+    reactor.runUntilCurrent()
+    results.append(time.time() - before)
+
+    reactor.now += 1
+    before = time.time()
+    for call in calls:
+        call.reset(40)
+    reactor.runUntilCurrent()
+    results.append(time.time() - before)
+
+    before = time.time()
+    for call in calls[-100:]:
+        call.reset(5)
+    reactor.runUntilCurrent()
+    results.append(time.time() - before)
+
+    before = time.time()
+    for call in calls[::2]:
+        call.cancel()
+    reactor.runUntilCurrent()
+    results.append(time.time() - before)
+
+    before = time.time()
+    for i in range(60):
+        reactor.now += 1
+        reactor.runUntilCurrent()
+    results.append(time.time() - before)
+    assert not reactor.getDelayedCalls()
+    return results
+
+
+
+def main():
+    print("%-6s %9s %10s %10s %10s %10s %10s" % (
+        "store", "calls", "schedule", "reset", "sooner", "cancel", "expire"))
+    for count in (10000, 100000, 1000000):
+        for name, useWheel in [("heap", False), ("wheel", True)]:
+            results = benchmark(count, useWheel)
+            print("%-6s %9d %9.3fs %9.3fs %9.3fs %9.3fs %9.3fs" % (
+                (name, count) + tuple(results)))
+
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure how many datagrams per second a UDP port receives and sends.
+
+For receiving, a blaster process sends small datagrams over the loopback
+interface as fast as it can, and the number of datagrams delivered to a
+protocol handling them one by one with C{datagramReceived} is compared with
+the number delivered to one handling them in batches with
+C{datagramsReceived}.  For sending, C{write} called for each datagram is
+compared with C{writeDatagrams}.
+"""
+
+from __future__ import print_function
+
+import socket
+import subprocess
+import sys
+import time
+
+from twisted.internet import protocol, reactor
+
+DURATION = 5
+SIZE = 64
+BATCH = 64
+DATAGRAMS = 200000
+
+BLASTER = """
+import socket, sys, time
+address = (sys.argv[1], int(sys.argv[2]))
+end = time.time() + float(sys.argv[3])
+datagram = b"x" * int(sys.argv[4])
+s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+while time.time() < end:
+    for i in range(1000):
+        s.sendto(datagram, address)
+"""
+
+
+
+class Counter(protocol.DatagramProtocol):
+    """
+    Count the datagrams received, one by one.
+    """
+    count = 0
+
+    def datagramReceived(self, datagram, addr):
+        self.count += 1
+
+
+
+class BatchCounter(Counter):
+    """
+    Count the datagrams received, a batch at a time.
+    """
+    def datagramsReceived(self, datagrams):
+        self.count += len(datagrams)
+
+
+
+def receive(counter):
+    """
+    Count the datagrams C{counter} receives while a blaster runs.
+
+    @return: The number of datagrams received per second.
+    """
+    port = reactor.listenUDP(0, counter, interface="127.0.0.1")
+    port.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    blaster = subprocess.Popen([
+        sys.executable, "-c", BLASTER, "127.0.0.1", str(port.getHost().port),
+        str(DURATION), str(SIZE)])
+    start = time.time()
+    while blaster.poll() is None:
+        reactor.iterate(0.1)
+    elapsed = time.time() - start
+    port.stopListening()
+    reactor.iterate(0)
+    return counter.count / elapsed
+
+
+
+def send(batched):
+    """
+    Send C{DATAGRAMS} datagrams to a socket which does not read them.
+
+    @return: The number of datagrams sent per second.
+    """
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    address = sink.getsockname()
+    port = reactor.listenUDP(0, protocol.DatagramProtocol(),
+                             interface="127.0.0.1")
+    batch = [(b"x" * SIZE, address)] * BATCH
+    start = time.time()
+    if batched:
+        for i in range(DATAGRAMS // BATCH):
+            port.writeDatagrams(batch)
+    else:
+        for i in range(DATAGRAMS // BATCH):
+            for datagram, addr in batch:
+                port.write(datagram, addr)
+    elapsed = time.time() - start
+    port.stopListening()
+    reactor.iterate(0)
+    sink.close()
+    return DATAGRAMS // BATCH * BATCH / elapsed
+
+
+
+def main():
+    print("receive datagramReceived   %10.0f datagrams/s" % (
+        receive(Counter()),))
+    print("receive datagramsReceived  %10.0f datagrams/s" % (
+        receive(BatchCounter()),))
+    print("send write                 %10.0f datagrams/s" % (send(False),))
+    print("send writeDatagrams        %10.0f datagrams/s" % (send(True),))
+
+
+
+if __name__ == '__main__':
+    main()
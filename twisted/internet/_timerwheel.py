@@ -0,0 +1,312 @@
+# -*- test-case-name: twisted.internet.test.test_timerwheel -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A hierarchical timer wheel for storing L{twisted.internet.base.DelayedCall}
+instances.
+
+A reactor normally keeps its pending delayed calls in a binary heap, which
+makes scheduling and expiring a call cost O(log n).  The wheel defined here
+trades a little timing precision (calls are bucketed into ticks of a fixed
+resolution) for O(1) scheduling, cancellation and rescheduling, which matters
+to applications keeping very large numbers of timeouts pending at once.
+
+The wheel is organized in levels, like the one described by Varghese and
+Lauck in "Hashed and Hierarchical Timing Wheels".  The first level has one
+slot per tick.  Each slot of the next level spans all the slots of the
+previous level.  Calls too far in the future for the top level are kept in
+an overflow collection.  As time passes, the slot of a higher level which
+becomes current is I{cascaded}: its calls are redistributed into the lower
+levels.
+"""
+
+from __future__ import division, absolute_import
+
+
+
+class TimerWheel(object):
+    """
+    A hierarchical timer wheel holding objects with a C{time} attribute (in
+    practice, L{twisted.internet.base.DelayedCall} instances).
+
+    Each stored call is given a C{_timerWheelSlot} attribute referring to the
+    slot holding it, so that it can be removed in constant time.
+
+    @ivar resolution: The duration, in seconds, of one tick.
+    @type resolution: L{float}
+
+    @ivar _tick: The number of the earliest tick which has not been entirely
+        processed by L{expire}.  Ticks are counted from the epoch.
+    @type _tick: L{int}
+
+    @ivar _levels: A L{list} with one L{list} of slots per level.  Each slot
+        is a L{dict} mapping the calls it holds to the index of the level.
+
+    @ivar _shifts: A L{list} giving, for each level, the base 2 logarithm of
+        the number of ticks one slot of that level spans.
+
+    @ivar _masks: A L{list} giving, for each level, the number of slots of
+        that level minus one.
+
+    @ivar _counts: A L{list} giving, for each level, the number of calls
+        stored in that level.
+
+    @ivar _spanShift: The base 2 logarithm of the number of ticks spanned by
+        all the levels together.
+
+    @ivar _overflow: A L{dict} used as an unordered set of the calls too far
+        in the future to be stored in any level.
+    """
+
+    def __init__(self, now, resolution=0.01, levelBits=(8, 6, 6, 6)):
+        """
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @param resolution: The duration, in seconds, of one tick.
+        @type resolution: L{float}
+
+        @param levelBits: The base 2 logarithm of the number of slots in each
+            level, starting with the finest level.
+        @type levelBits: L{tuple} of L{int}
+        """
+        self.resolution = resolution
+        self._tick = self._tickFor(now)
+        self._levels = []
+        self._shifts = []
+        self._masks = []
+        self._counts = []
+        shift = 0
+        for bits in levelBits:
+            self._levels.append([{} for i in range(1 << bits)])
+            self._shifts.append(shift)
+            self._masks.append((1 << bits) - 1)
+            self._counts.append(0)
+            shift += bits
+        self._spanShift = shift
+        self._overflow = {}
+
+
+    def __len__(self):
+        """
+        @return: The number of calls stored in this wheel.
+        @rtype: L{int}
+        """
+        return sum(self._counts) + len(self._overflow)
+
+
+    def _tickFor(self, when):
+        """
+        @param when: A time, in seconds since the epoch.
+        @type when: L{float}
+
+        @return: The number of the tick C{when} falls in.
+        @rtype: L{int}
+        """
+        return int(when // self.resolution)
+
+
+    def add(self, call):
+        """
+        Store a call in the slot matching its C{time} attribute.  A call which
+        is already due is stored in the current slot.
+
+        @param call: The call to store.  It must not already be stored in this
+            wheel.
+        """
+        tick = self._tickFor(call.time)
+        delta = tick - self._tick
+        if delta < 0:
+            tick = self._tick
+            delta = 0
+        if delta >> self._spanShift:
+            slot = self._overflow
+            level = None
+        else:
+            level = 0
+            while delta >> self._shifts[level] > self._masks[level]:
+                level += 1
+            slot = self._levels[level][
+                (tick >> self._shifts[level]) & self._masks[level]]
+            self._counts[level] += 1
+        slot[call] = level
+        call._timerWheelSlot = slot
+
+
+    def remove(self, call):
+        """
+        Remove a call from this wheel, if it is stored in it.
+
+        @param call: The call to remove.
+        """
+        slot = getattr(call, '_timerWheelSlot', None)
+        if slot is None:
+            return
+        level = slot.pop(call)
+        if level is not None:
+            self._counts[level] -= 1
+        call._timerWheelSlot = None
+
+
+    def reschedule(self, call):
+        """
+        Move a call to the slot matching its (changed) C{time} attribute.
+
+        @param call: The call to move.
+        """
+        self.remove(call)
+        self.add(call)
+
+
+    def getCalls(self):
+        """
+        @return: All the calls stored in this wheel, in no particular order.
+        @rtype: L{list}
+        """
+        calls = list(self._overflow)
+        for level in self._levels:
+            for slot in level:
+                calls.extend(slot)
+        return calls
+
+
+    def _take(self, slot, now=None):
+        """
+        Remove calls from a slot.
+
+        @param slot: The slot to take calls from.
+        @type slot: L{dict}
+
+        @param now: If not L{None}, only calls with a C{time} no later than
+            this are taken.
+        @type now: L{float} or L{None}
+
+        @return: The calls removed from C{slot}.
+        @rtype: L{list}
+        """
+        if now is None:
+            taken = list(slot)
+            slot.clear()
+        else:
+            taken = [call for call in slot if call.time <= now]
+            for call in taken:
+                del slot[call]
+        for call in taken:
+            call._timerWheelSlot = None
+        self._counts[0] -= len(taken)
+        return taken
+
+
+    def _cascade(self):
+        """
+        Redistribute the calls of the higher level slots which just became
+        current into the lower levels.  This is called each time C{_tick}
+        reaches the beginning of a slot of the second level.
+        """
+        for level in range(1, len(self._levels)):
+            index = (self._tick >> self._shifts[level]) & self._masks[level]
+            slot = self._levels[level][index]
+            if slot:
+                calls = list(slot)
+                slot.clear()
+                self._counts[level] -= len(calls)
+                for call in calls:
+                    self.add(call)
+            if index:
+                return
+        if self._overflow:
+            calls = list(self._overflow)
+            self._overflow.clear()
+            for call in calls:
+                self.add(call)
+
+
+    def expire(self, now):
+        """
+        Advance the wheel to C{now} and remove every call which is due.
+
+        @param now: The current time, in seconds since the epoch.
+        @type now: L{float}
+
+        @return: The calls with a C{time} no later than C{now}, ordered by
+            C{time}.
+        @rtype: L{list}
+        """
+        target = self._tickFor(now)
+        level0 = self._levels[0]
+        mask0 = self._masks[0]
+        expired = []
+        while self._tick < target:
+            if self._counts[0]:
+                slot = level0[self._tick & mask0]
+                if slot:
+                    expired.extend(self._take(slot))
+                self._tick += 1
+            else:
+                # Nothing is stored in the first level, so skip ahead to the
+                # next point where a higher level may cascade into it.
+                for level in range(1, len(self._counts)):
+                    if self._counts[level]:
+                        break
+                else:
+                    if not self._overflow:
+                        self._tick = target
+                        break
+                    level = len(self._counts)
+                if level == len(self._counts):
+                    shift = self._spanShift
+                else:
+                    shift = self._shifts[level]
+                boundary = ((self._tick >> shift) + 1) << shift
+                self._tick = min(boundary, target)
+            if not self._tick & mask0:
+                self._cascade()
+        slot = level0[self._tick & mask0]
+        if slot:
+            expired.extend(self._take(slot, now))
+        expired.sort()
+        return expired
+
+
+    def nextTime(self):
+        """
+        Determine the earliest time at which L{expire} may have calls to
+        return.
+
+        Calls are not ordered across levels: a call stored in a higher level
+        before the wheel advanced may be due before one stored in the first
+        level afterwards, so every level is considered.
+
+        @return: The earliest of the C{time} of the calls stored in the first
+            level, the times at which the next non-empty slot of each higher
+            level will cascade and the C{time} of the calls in the overflow,
+            or L{None} if this wheel is empty.
+        @rtype: L{float} or L{None}
+        """
+        candidates = []
+        for level in range(len(self._levels)):
+            if self._counts[level]:
+                shift = self._shifts[level]
+                mask = self._masks[level]
+                slots = self._levels[level]
+                block = self._tick >> shift
+                if level:
+                    # The slot of the current block of a higher level was
+                    # already cascaded, unless it has wrapped around.
+                    block += 1
+                for nextBlock in range(block, block + mask + 1):
+                    slot = slots[nextBlock & mask]
+                    if not slot:
+                        continue
+                    if level:
+                        candidates.append(
+                            (nextBlock << shift) * self.resolution)
+                    else:
+                        candidates.append(min(call.time for call in slot))
+                    break
+        if self._overflow:
+            candidates.append(min(call.time for call in self._overflow))
+        if candidates:
+            return min(candidates)
+        return None
@@ -8,6 +8,8 @@ Support for generic select()able objects.
 
 from __future__ import division, absolute_import
 
+from collections import deque
+from itertools import islice
 from socket import AF_INET6, inet_pton, error
 
 from zope.interface import implementer
@@ -20,9 +22,9 @@ from twisted.internet import interfaces, main
 if _PY3:
     def _concatenate(bObj, offset, bArray):
         # Python 3 lacks the buffer() builtin and the other primitives don't
-        # help in this case.  Just do the copy.  Perhaps later these buffers can
-        # be joined and FileDescriptor can use writev().  Or perhaps bytearrays
-        # would help.
+        # help in this case.  Just do the copy.  Transports which can send
+        # several buffers at once avoid it by using
+        # FileDescriptor._doWriteSequence instead.
         return bObj[offset:] + b"".join(bArray)
 else:
     def _concatenate(bObj, offset, bArray):
@@ -164,6 +166,15 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
     This is an abstract superclass of all objects which may be notified when
     they are readable or writable; e.g. they have a file-descriptor that is
     valid to be passed to select(2).
+
+    @ivar dataBuffer: The buffered bytes currently being written, starting
+        at C{offset}.
+
+    @ivar _tempDataBuffer: A L{deque} of the other buffered byte strings, in
+        the order they are to be written after C{dataBuffer}.
+
+    @ivar _tempDataLen: The total length of the byte strings in
+        C{_tempDataBuffer}.
     """
     connected = 0
     disconnected = 0
@@ -175,6 +186,11 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
 
     SEND_LIMIT = 128*1024
 
+    # Below this average size, buffered strings are cheaper to join (up to
+    # SEND_LIMIT bytes at a time) than to pass one by one to
+    # _writeSomeDataSequence.
+    _MIN_SEQUENCE_BUFFER = 1024
+
     def __init__(self, reactor=None):
         """
         @param reactor: An L{IReactorFDSet} provider which this descriptor will
@@ -184,7 +200,7 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         if not reactor:
             from twisted.internet import reactor
         self.reactor = reactor
-        self._tempDataBuffer = [] # will be added to dataBuffer in doWrite
+        self._tempDataBuffer = deque() # will be added to dataBuffer in doWrite
         self._tempDataLen = 0
 
 
@@ -221,6 +237,25 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                                   reflect.qual(self.__class__))
 
 
+    def _writeSomeDataSequence(self, buffers):
+        """
+        Write as much as possible of the given buffers, in order, immediately.
+
+        This is the counterpart of L{writeSomeData} used by
+        L{_doWriteSequence}, for instance with a scatter/gather system call
+        such as C{sendmsg} or C{writev}.
+
+        @param buffers: The buffers to write.
+        @type buffers: L{list} of L{bytes} or L{memoryview}
+
+        @return: The number of bytes written (possibly zero), or an exception
+            if the connection was lost.
+        """
+        raise NotImplementedError(
+            "%s does not implement _writeSomeDataSequence" %
+            reflect.qual(self.__class__))
+
+
     def doRead(self):
         """
         Called when data is available for reading.
@@ -246,7 +281,7 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
             self.dataBuffer = _concatenate(
                 self.dataBuffer, self.offset, self._tempDataBuffer)
             self.offset = 0
-            self._tempDataBuffer = []
+            self._tempDataBuffer = deque()
             self._tempDataLen = 0
 
         # Send as much data as you can.
@@ -262,6 +297,90 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
         if isinstance(l, Exception) or l < 0:
             return l
         self.offset += l
+        return self._maybeWriteFinished()
+
+
+    def _doWriteSequence(self, maxBuffers):
+        """
+        Called when data can be written, by subclasses which implement
+        L{_writeSomeDataSequence}, in place of L{doWrite}.
+
+        Unlike L{doWrite}, this does not join the buffered byte strings: up
+        to C{maxBuffers} of them are handed to L{_writeSomeDataSequence} at
+        once, and a partially written one is kept in C{dataBuffer} with the
+        position reached recorded in C{offset}.  Strings which are small on
+        average are still joined, as copying them costs less than handling
+        them one by one, but only the first C{SEND_LIMIT} bytes of them (the
+        most a single call writes) rather than all the buffered ones.
+
+        @param maxBuffers: The largest number of buffers to pass to a single
+            call to L{_writeSomeDataSequence}.
+        @type maxBuffers: L{int}
+
+        @return: L{None} on success, an exception or a negative integer on
+            failure.
+        """
+        pending = self._tempDataBuffer
+        if self._tempDataLen < len(pending) * self._MIN_SEQUENCE_BUFFER:
+            joined = []
+            size = 0
+            while pending and size < self.SEND_LIMIT:
+                data = pending.popleft()
+                joined.append(data)
+                size += len(data)
+            pending.appendleft(b"".join(joined))
+
+        buffers = []
+        size = 0
+        if self.offset < len(self.dataBuffer):
+            if self.offset:
+                buffers.append(memoryview(self.dataBuffer)[self.offset:])
+            else:
+                buffers.append(self.dataBuffer)
+            size = len(self.dataBuffer) - self.offset
+        for data in islice(pending, maxBuffers - len(buffers)):
+            if size >= self.SEND_LIMIT:
+                break
+            buffers.append(data)
+            size += len(data)
+
+        l = self._writeSomeDataSequence(buffers)
+
+        # See doWrite.
+        if isinstance(l, Exception) or l < 0:
+            return l
+        remaining = len(self.dataBuffer) - self.offset
+        if l < remaining:
+            self.offset += l
+        else:
+            l -= remaining
+            self.dataBuffer = b""
+            self.offset = 0
+            while pending:
+                data = pending[0]
+                if len(data) > l:
+                    if l:
+                        # Keep the partially written buffer where the next
+                        # call will resume from.
+                        self.dataBuffer = pending.popleft()
+                        self._tempDataLen -= len(data)
+                        self.offset = l
+                    break
+                pending.popleft()
+                self._tempDataLen -= len(data)
+                l -= len(data)
+        return self._maybeWriteFinished()
+
+
+    def _maybeWriteFinished(self):
+        """
+        Once some data has been written, check whether the buffers are now
+        empty and if so, stop writing and resume the producer or finish
+        closing the connection as appropriate.
+
+        @return: L{None} on success, an exception or a negative integer on
+            failure.
+        """
         # If there is nothing left to send,
         if self.offset == len(self.dataBuffer) and not self._tempDataLen:
             self.dataBuffer = b""
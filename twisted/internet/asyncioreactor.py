@@ -0,0 +1,318 @@
+# -*- test-case-name: twisted.internet.test.test_asyncioreactor -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A reactor running on an C{asyncio} event loop, so that Twisted and
+C{asyncio} code, including event loops such as uvloop's, share one thread.
+
+To install the event loop (and you should do this before any connections,
+listeners or connectors are added)::
+
+    from twisted.internet import asyncioreactor
+    asyncioreactor.install()
+
+Pass an event loop to L{install} to use it instead of the current one.
+"""
+
+from __future__ import division, absolute_import
+
+import errno
+import sys
+from asyncio import get_event_loop
+
+from zope.interface import implementer
+
+from twisted.internet.interfaces import IReactorFDSet
+from twisted.internet.posixbase import (
+    PosixReactorBase, _ContinuousPolling, _NO_FILEDESC)
+from twisted.python import log
+
+
+
+@implementer(IReactorFDSet)
+class AsyncioSelectorReactor(PosixReactorBase):
+    """
+    A reactor running on an C{asyncio} event loop.
+
+    Readers and writers are registered with the C{add_reader} and
+    C{add_writer} methods of the event loop, which must therefore be
+    selector based, and timed calls are run by a single callback of the
+    event loop scheduled for the earliest of them.  L{callFromThread} wakes
+    the event loop up with C{call_soon_threadsafe}.
+
+    L{run} runs the event loop until the reactor stops, so C{asyncio} code
+    can run in the meantime.
+
+    @ivar _asyncioEventloop: The C{asyncio} event loop.
+
+    @ivar _readers: A dictionary mapping the C{FileDescriptor}s being read
+        from to the file descriptors they were registered with.
+
+    @ivar _writers: A dictionary mapping the C{FileDescriptor}s being
+        written to to the file descriptors they were registered with.
+
+    @ivar _continuousPolling: A L{_ContinuousPolling} instance, used to
+        handle file descriptors (e.g. filesystem files) that the event loop
+        does not support.
+
+    @ivar _timerHandle: The handle of the event loop callback scheduled to
+        run the timed calls, or L{None}.
+
+    @ivar _timerTime: The time, as given by L{seconds}, C{_timerHandle} is
+        scheduled for, or L{None}.
+
+    @ivar _iterating: Whether L{doIteration} is running the event loop,
+        which is then stopped as soon as anything happens.
+    """
+
+    _timerHandle = None
+    _timerTime = None
+    _iterating = False
+
+    def __init__(self, eventloop=None):
+        """
+        @param eventloop: The C{asyncio} event loop to run on, by default the
+            current event loop.
+        """
+        if eventloop is None:
+            eventloop = get_event_loop()
+        self._asyncioEventloop = eventloop
+        self._readers = {}
+        self._writers = {}
+        self._continuousPolling = _ContinuousPolling(self)
+        PosixReactorBase.__init__(self)
+
+
+    def installWaker(self):
+        """
+        Do not install a waker: L{wakeUp} uses the event loop's own.
+        """
+
+
+    def wakeUp(self):
+        """
+        Wake the event loop up, from any thread, to run the calls made with
+        L{callFromThread}.
+        """
+        self._asyncioEventloop.call_soon_threadsafe(self._runUntilCurrent)
+
+
+    def _readOrWrite(self, selectable, read):
+        """
+        Call C{doRead} or C{doWrite} on C{selectable}, in a log context whose
+        system is its log prefix.
+
+        @param read: Whether to call C{doRead} rather than C{doWrite}.
+        """
+        log._callWithLazyLogger(self._doReadOrWrite, selectable, read)
+        if self._iterating:
+            self._asyncioEventloop.stop()
+
+
+    def _doReadOrWrite(self, lazyContext, selectable, read):
+        """
+        Call C{doRead} or C{doWrite} on C{selectable}, disconnecting it if it
+        fails.
+        """
+        lazyContext.logger = selectable
+        if selectable.fileno() == -1:
+            why = _NO_FILEDESC
+        else:
+            try:
+                if read:
+                    why = selectable.doRead()
+                else:
+                    why = selectable.doWrite()
+            except:
+                why = sys.exc_info()[1]
+                log.err()
+        if why:
+            self._disconnectSelectable(selectable, why, read)
+
+
+    def addReader(self, reader):
+        """
+        Add a FileDescriptor for notification of data available to read.
+        """
+        if reader in self._readers or reader in self._continuousPolling._readers:
+            return
+        fd = reader.fileno()
+        try:
+            self._asyncioEventloop.add_reader(
+                fd, self._readOrWrite, reader, True)
+        except (IOError, OSError) as e:
+            if e.errno != errno.EPERM:
+                raise
+            # epoll(7) does not support filesystem files, among others: poll
+            # those continuously.
+            self._continuousPolling.addReader(reader)
+        else:
+            self._readers[reader] = fd
+
+
+    def addWriter(self, writer):
+        """
+        Add a FileDescriptor for notification of data available to write.
+        """
+        if writer in self._writers or writer in self._continuousPolling._writers:
+            return
+        fd = writer.fileno()
+        try:
+            self._asyncioEventloop.add_writer(
+                fd, self._readOrWrite, writer, False)
+        except (IOError, OSError) as e:
+            if e.errno != errno.EPERM:
+                raise
+            self._continuousPolling.addWriter(writer)
+        else:
+            self._writers[writer] = fd
+
+
+    def removeReader(self, reader):
+        """
+        Remove a Selectable for notification of data available to read.
+        """
+        fd = self._readers.pop(reader, None)
+        if fd is None:
+            self._continuousPolling.removeReader(reader)
+        else:
+            self._asyncioEventloop.remove_reader(fd)
+
+
+    def removeWriter(self, writer):
+        """
+        Remove a Selectable for notification of data available to write.
+        """
+        fd = self._writers.pop(writer, None)
+        if fd is None:
+            self._continuousPolling.removeWriter(writer)
+        else:
+            self._asyncioEventloop.remove_writer(fd)
+
+
+    def removeAll(self):
+        return (self._removeAll(list(self._readers), list(self._writers)) +
+                self._continuousPolling.removeAll())
+
+
+    def getReaders(self):
+        return list(self._readers) + self._continuousPolling.getReaders()
+
+
+    def getWriters(self):
+        return list(self._writers) + self._continuousPolling.getWriters()
+
+
+    def callLater(self, _seconds, _f, *args, **kw):
+        """
+        See twisted.internet.interfaces.IReactorTime.callLater.
+        """
+        call = PosixReactorBase.callLater(self, _seconds, _f, *args, **kw)
+        self._scheduleTimer(call.time)
+        return call
+
+
+    def _moveCallLaterSooner(self, tple):
+        PosixReactorBase._moveCallLaterSooner(self, tple)
+        self._scheduleTimer(tple.getTime())
+
+
+    def _scheduleTimer(self, when):
+        """
+        Make sure the timed calls are run at time C{when} at the latest.
+
+        @param when: A time, as given by L{seconds}.
+        """
+        if self._timerTime is not None:
+            if self._timerTime <= when:
+                return
+            self._timerHandle.cancel()
+        self._timerTime = when
+        self._timerHandle = self._asyncioEventloop.call_later(
+            max(0, when - self.seconds()), self._onTimer)
+
+
+    def _onTimer(self):
+        """
+        Run the timed calls which are due.
+        """
+        self._timerHandle = self._timerTime = None
+        self._runUntilCurrent()
+
+
+    def _runUntilCurrent(self):
+        """
+        Run the calls made from threads and the timed calls which are due,
+        and schedule running the next ones.
+        """
+        self.runUntilCurrent()
+        timeout = self.timeout()
+        if timeout is not None:
+            self._scheduleTimer(self.seconds() + timeout)
+        if self._iterating:
+            self._asyncioEventloop.stop()
+
+
+    def stop(self):
+        """
+        See twisted.internet.interfaces.IReactorCore.stop.
+        """
+        PosixReactorBase.stop(self)
+        # The shutdown event is fired by runUntilCurrent.
+        self._scheduleTimer(self.seconds())
+
+
+    def crash(self):
+        """
+        See twisted.internet.interfaces.IReactorCore.crash.
+        """
+        PosixReactorBase.crash(self)
+        self._asyncioEventloop.stop()
+
+
+    def run(self, installSignalHandlers=True):
+        """
+        Run the event loop until the reactor stops.
+        """
+        self.startRunning(installSignalHandlers=installSignalHandlers)
+        self._asyncioEventloop.run_forever()
+        if self._justStopped:
+            self._justStopped = False
+
+
+    def doIteration(self, delay):
+        """
+        Run the event loop until it has handled something, or for up to
+        C{delay} seconds.
+        """
+        loop = self._asyncioEventloop
+        handle = None
+        if delay:
+            handle = loop.call_later(delay, loop.stop)
+        else:
+            loop.stop()
+        self._iterating = True
+        try:
+            loop.run_forever()
+        finally:
+            self._iterating = False
+            if handle is not None:
+                handle.cancel()
+
+
+
+def install(eventloop=None):
+    """
+    Install an L{AsyncioSelectorReactor} as the default reactor.
+
+    @param eventloop: The C{asyncio} event loop to run on, by default the
+        current event loop.
+    """
+    reactor = AsyncioSelectorReactor(eventloop)
+    from twisted.internet.main import installReactor
+    installReactor(reactor)
+
+
+
+__all__ = ["AsyncioSelectorReactor", "install"]
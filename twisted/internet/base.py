@@ -13,6 +13,7 @@ from zope.interface import implementer, classImplements
 
 import sys
 import warnings
+from collections import deque
 from heapq import heappush, heappop, heapify
 
 import traceback
@@ -21,6 +22,7 @@ from twisted.internet.interfaces import IReactorCore, IReactorTime, IReactorThre
 from twisted.internet.interfaces import IResolverSimple, IReactorPluggableResolver
 from twisted.internet.interfaces import IConnector, IDelayedCall
 from twisted.internet import fdesc, main, error, abstract, defer, threads
+from twisted.internet._timerwheel import TimerWheel
 from twisted.python import log, failure, reflect
 from twisted.python.compat import unicode, iteritems
 from twisted.python.runtime import seconds as runtimeSeconds, platform
@@ -461,11 +463,32 @@ class ReactorBase(object):
     @ivar _registerAsIOThread: A flag controlling whether the reactor will
         register the thread it is running in as the I/O thread when it starts.
         If C{True}, registration will be done, otherwise it will not be.
+
+    @ivar _timerWheel: The L{TimerWheel} storing the pending timed calls if
+        L{installTimerWheel} was called, otherwise L{None} and the pending
+        timed calls are stored in the C{_pendingTimedCalls} heap.
+
+    @ivar threadCallQueue: A C{deque} of the calls made with
+        L{callFromThread} which have not run yet.
+
+    @type _wakeUpPending: C{bool}
+    @ivar _wakeUpPending: A flag which is true from the time a call made
+        with L{callFromThread} wakes the reactor up until the time
+        L{runUntilCurrent} next runs the calls made from threads, so that
+        only the first of the calls made in between writes to the waker.
+
+    @ivar _threadCallBatch: The maximum number of calls made from threads
+        L{runUntilCurrent} runs at once, so that a flood of them cannot
+        starve I/O and timed calls.  The remaining ones run in the next
+        iterations.
     """
 
     _registerAsIOThread = True
 
     _stopped = True
+    _timerWheel = None
+    _wakeUpPending = False
+    _threadCallBatch = 1000
     installed = False
     usingThreads = False
     resolver = BlockingResolver()
@@ -473,7 +496,7 @@ class ReactorBase(object):
     __name__ = "twisted.internet.reactor"
 
     def __init__(self):
-        self.threadCallQueue = []
+        self.threadCallQueue = deque()
         self._eventTriggers = {}
         self._pendingTimedCalls = []
         self._newTimedCalls = []
@@ -713,7 +736,43 @@ class ReactorBase(object):
         self._newTimedCalls.append(tple)
         return tple
 
+    def installTimerWheel(self, resolution=0.01):
+        """
+        Store pending timed calls in a hierarchical timer wheel instead of a
+        heap.
+
+        Scheduling, cancelling and rescheduling a call then take constant
+        time, regardless of how many calls are pending, at the cost of
+        running calls in ticks of C{resolution} seconds: calls falling in the
+        same tick may run in the same iteration, and the reactor may wake up
+        once per tick when only distant calls are pending.  This is
+        worthwhile for applications keeping very large numbers of timeouts
+        which are frequently reset or cancelled.
+
+        Calls already pending are moved into the wheel.
+
+        @param resolution: The duration, in seconds, of one tick of the wheel.
+        @type resolution: L{float}
+        """
+        self._insertNewDelayedCalls()
+        wheel = TimerWheel(self.seconds(), resolution)
+        for call in self._pendingTimedCalls:
+            if not call.cancelled:
+                call.activate_delay()
+                wheel.add(call)
+        if self._timerWheel is not None:
+            for call in self._timerWheel.getCalls():
+                self._timerWheel.remove(call)
+                wheel.add(call)
+        self._pendingTimedCalls = []
+        self._cancellations = 0
+        self._timerWheel = wheel
+
+
     def _moveCallLaterSooner(self, tple):
+        if self._timerWheel is not None:
+            self._timerWheel.reschedule(tple)
+            return
         # Linear time find: slow.
         heap = self._pendingTimedCalls
         try:
@@ -734,7 +793,10 @@ class ReactorBase(object):
             pass
 
     def _cancelCallLater(self, tple):
-        self._cancellations+=1
+        if self._timerWheel is not None:
+            self._timerWheel.remove(tple)
+        else:
+            self._cancellations+=1
 
 
     def getDelayedCalls(self):
@@ -742,9 +804,19 @@ class ReactorBase(object):
         They are returned in no particular order.
         This method is not efficient -- it is really only meant for
         test cases."""
-        return [x for x in (self._pendingTimedCalls + self._newTimedCalls) if not x.cancelled]
+        pending = self._pendingTimedCalls + self._newTimedCalls
+        if self._timerWheel is not None:
+            pending.extend(self._timerWheel.getCalls())
+        return [x for x in pending if not x.cancelled]
 
     def _insertNewDelayedCalls(self):
+        if self._timerWheel is not None:
+            for call in self._newTimedCalls:
+                if not call.cancelled:
+                    call.activate_delay()
+                    self._timerWheel.add(call)
+            self._newTimedCalls = []
+            return
         for call in self._newTimedCalls:
             if call.cancelled:
                 self._cancellations-=1
@@ -766,10 +838,16 @@ class ReactorBase(object):
         # insert new delayed calls to make sure to include them in timeout value
         self._insertNewDelayedCalls()
 
-        if not self._pendingTimedCalls:
+        if self._timerWheel is not None:
+            nextTime = self._timerWheel.nextTime()
+            if nextTime is None:
+                return None
+        elif self._pendingTimedCalls:
+            nextTime = self._pendingTimedCalls[0].time
+        else:
             return None
 
-        delay = self._pendingTimedCalls[0].time - self.seconds()
+        delay = nextTime - self.seconds()
 
         # Pick a somewhat arbitrary maximum possible value for the timeout.
         # This value is 2 ** 31 / 1000, which is the number of seconds which can
@@ -787,28 +865,40 @@ class ReactorBase(object):
     def runUntilCurrent(self):
         """Run all pending timed calls.
         """
-        if self.threadCallQueue:
-            # Keep track of how many calls we actually make, as we're
-            # making them, in case another call is added to the queue
-            # while we're in this loop.
-            count = 0
-            total = len(self.threadCallQueue)
-            for (f, a, kw) in self.threadCallQueue:
+        # Calls made from threads from now on wake the reactor up again.
+        self._wakeUpPending = False
+        queue = self.threadCallQueue
+        if queue:
+            # Only run the calls already queued, up to _threadCallBatch of
+            # them, in case more are added to the queue while we're in this
+            # loop.
+            for i in range(min(len(queue), self._threadCallBatch)):
+                (f, a, kw) = queue.popleft()
                 try:
                     f(*a, **kw)
                 except:
                     log.err()
-                count += 1
-                if count == total:
-                    break
-            del self.threadCallQueue[:count]
-            if self.threadCallQueue:
+            if queue and not self._wakeUpPending:
+                self._wakeUpPending = True
                 self.wakeUp()
 
         # insert new delayed calls now
         self._insertNewDelayedCalls()
 
         now = self.seconds()
+        if self._timerWheel is not None:
+            for call in self._timerWheel.expire(now):
+                # A call run earlier in this loop may have cancelled this one.
+                if call.cancelled:
+                    continue
+
+                if call.delayed_time > 0:
+                    call.activate_delay()
+                    self._timerWheel.add(call)
+                    continue
+
+                self._runDelayedCall(call)
+
         while self._pendingTimedCalls and (self._pendingTimedCalls[0].time <= now):
             call = heappop(self._pendingTimedCalls)
             if call.cancelled:
@@ -820,19 +910,7 @@ class ReactorBase(object):
                 heappush(self._pendingTimedCalls, call)
                 continue
 
-            try:
-                call.called = 1
-                call.func(*call.args, **call.kw)
-            except:
-                log.deferr()
-                if hasattr(call, "creator"):
-                    e = "\n"
-                    e += " C: previous exception occurred in " + \
-                         "a DelayedCall created here:\n"
-                    e += " C:"
-                    e += "".join(call.creator).rstrip().replace("\n","\n C:")
-                    e += "\n"
-                    log.msg(e)
+            self._runDelayedCall(call)
 
 
         if (self._cancellations > 50 and
@@ -846,6 +924,26 @@ class ReactorBase(object):
             self._justStopped = False
             self.fireSystemEvent("shutdown")
 
+    def _runDelayedCall(self, call):
+        """
+        Run a due L{DelayedCall}, logging any exception it raises.
+
+        @param call: The L{DelayedCall} to run.
+        """
+        try:
+            call.called = 1
+            call.func(*call.args, **call.kw)
+        except:
+            log.deferr()
+            if hasattr(call, "creator"):
+                e = "\n"
+                e += " C: previous exception occurred in " + \
+                     "a DelayedCall created here:\n"
+                e += " C:"
+                e += "".join(call.creator).rstrip().replace("\n","\n C:")
+                e += "\n"
+                log.msg(e)
+
     # IReactorProcess
 
     def _checkProcessArgs(self, args, env):
@@ -944,11 +1042,15 @@ class ReactorBase(object):
             L{twisted.internet.interfaces.IReactorFromThreads.callFromThread}.
             """
             assert callable(f), "%s is not callable" % (f,)
-            # lists are thread-safe in CPython, but not in Jython
+            # deques are thread-safe in CPython, but not in Jython
             # this is probably a bug in Jython, but until fixed this code
             # won't work in Jython.
             self.threadCallQueue.append((f, args, kw))
-            self.wakeUp()
+            # The reactor only needs waking up by the first call queued
+            # since runUntilCurrent last ran the calls made from threads.
+            if not self._wakeUpPending:
+                self._wakeUpPending = True
+                self.wakeUp()
 
         def _initThreadPool(self):
             """
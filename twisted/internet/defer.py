@@ -191,6 +191,10 @@ def getDebugging():
 _NO_RESULT = object()
 _CONTINUE = object()
 
+# The type of the coroutines made by "async def" functions, on the versions
+# of Python having them.
+_CoroutineType = getattr(types, "CoroutineType", ())
+
 
 
 class Deferred:
@@ -661,6 +665,141 @@ class Deferred:
     __repr__ = __str__
 
 
+    def __await__(self):
+        """
+        Wait for this L{Deferred} with C{await}, in a coroutine run by
+        L{ensureDeferred}.
+
+        The C{await} expression evaluates to the result of this L{Deferred},
+        or raises the exception it failed with, and consumes it as yielding
+        it from an L{inlineCallbacks} generator would.
+
+        @return: The iterator the C{await} expression delegates to.
+        """
+        return _DeferredAwaiter(self)
+
+
+    def asFuture(self, loop):
+        """
+        Adapt this L{Deferred} into an C{asyncio.Future} bound to C{loop}.
+
+        Cancelling the C{asyncio.Future} cancels this L{Deferred}.
+
+        @note: Converting a L{Deferred} to an C{asyncio.Future} consumes both
+            its result and its errors: this L{Deferred} fires with L{None}
+            afterwards, regardless of what its result would have been.
+
+        @param loop: The asyncio event loop to bind the C{asyncio.Future} to.
+
+        @return: An C{asyncio.Future} done when this L{Deferred} fires, done
+            already if it has fired.
+        """
+        try:
+            createFuture = loop.create_future
+        except AttributeError:
+            from asyncio import Future
+            def createFuture():
+                return Future(loop=loop)
+        future = createFuture()
+
+        def maybeSucceed(result):
+            if not future.cancelled():
+                future.set_result(result)
+
+        def maybeFail(failure):
+            if not future.cancelled():
+                future.set_exception(failure.value)
+
+        self.addCallbacks(maybeSucceed, maybeFail)
+        if not future.done():
+            def checkCancel(future):
+                if future.cancelled():
+                    self.cancel()
+            future.add_done_callback(checkCancel)
+        return future
+
+
+    @classmethod
+    def fromFuture(cls, future):
+        """
+        Adapt an C{asyncio.Future} into a L{Deferred}.
+
+        Cancelling the L{Deferred} cancels the C{asyncio.Future}.
+
+        @note: This creates a L{Deferred} from an C{asyncio.Future}, not from
+            a coroutine: use C{asyncio.ensure_future} to run a coroutine as an
+            C{asyncio.Task} first, or L{ensureDeferred} to run it without an
+            event loop.
+
+        @param future: The C{asyncio.Future} to adapt.
+
+        @return: A L{Deferred} firing with the result of C{future}, or failing
+            with its exception, when it is done: at once if it is done
+            already.
+        """
+        d = cls(lambda d: future.cancel())
+
+        def adapt(future):
+            if d.called:
+                # The Deferred was cancelled.
+                return
+            try:
+                result = future.result()
+            except:
+                d.errback()
+            else:
+                d.callback(result)
+
+        if future.done():
+            # Do not wait for the event loop to call the done callbacks.
+            adapt(future)
+        else:
+            future.add_done_callback(adapt)
+        return d
+
+
+
+class _DeferredAwaiter(object):
+    """
+    The iterator an C{await} expression on a L{Deferred} delegates to.
+
+    It yields the L{Deferred} once, which L{_inlineCallbacks} waits for and
+    resumes the coroutine with the result of, which ends the iteration: an
+    exception is thrown into the coroutine instead by
+    L{failure.Failure.throwExceptionIntoGenerator}, which, since there is no
+    C{throw} method, raises it from the C{await} expression.
+
+    @ivar _deferred: The L{Deferred} to yield, or L{None} once it has been.
+    """
+
+    def __init__(self, deferred):
+        self._deferred = deferred
+
+
+    def __iter__(self):
+        return self
+
+
+    def __next__(self):
+        """
+        Yield the L{Deferred}, or end the iteration with L{None} as its
+        result, which is sent back with C{__next__} rather than L{send}.
+        """
+        deferred, self._deferred = self._deferred, None
+        if deferred is None:
+            raise StopIteration(None)
+        return deferred
+
+    next = __next__
+
+
+    def send(self, value):
+        """
+        End the iteration with C{value}, the result of the L{Deferred}.
+        """
+        raise StopIteration(value)
+
+
 
 class DebugInfo:
     """
@@ -1173,6 +1312,10 @@ def _inlineCallbacks(result, g, deferred):
             deferred.errback()
             return deferred
 
+        if isinstance(result, _CoroutineType):
+            # a coroutine was yielded, run it.
+            result = _inlineCallbacks(None, result, Deferred())
+
         if isinstance(result, Deferred):
             # a deferred was yielded, get the result.
             def gotResult(r):
@@ -1221,7 +1364,9 @@ def inlineCallbacks(f):
 
     Things that are not L{Deferred}s may also be yielded, and your generator
     will be resumed with the same object sent back. This means C{yield}
-    performs an operation roughly equivalent to L{maybeDeferred}.
+    performs an operation roughly equivalent to L{maybeDeferred}.  Coroutines
+    are the exception: they are run with L{ensureDeferred}, and your generator
+    is resumed with their result.
 
     Your inlineCallbacks-enabled generator will return a L{Deferred} object, which
     will result in the return value of the generator (or will fail with a
@@ -1274,6 +1419,41 @@ def inlineCallbacks(f):
     return unwindGenerator
 
 
+
+def ensureDeferred(coro):
+    """
+    Run a coroutine which awaits L{Deferred}s, as L{inlineCallbacks} runs a
+    generator, and wrap it in a L{Deferred} firing with its result.
+
+    A coroutine made by an C{async def} function can C{await} L{Deferred}s
+    and other coroutines doing so, but not C{asyncio} futures, which must be
+    adapted with L{Deferred.fromFuture} first::
+
+        async def fetch(url):
+            response = await agent.request(b"GET", url)
+            return await readBody(response)
+
+        d = ensureDeferred(fetch(b"http://example.com/"))
+
+    If a L{Deferred} is passed, it is returned as it is, like
+    C{asyncio.ensure_future} does with futures.
+
+    @param coro: The coroutine, or generator yielding L{Deferred}s, to run.
+
+    @return: A L{Deferred} firing with the value the coroutine returns, or
+        failing with the exception it raises.
+    @rtype: L{Deferred}
+
+    @raise ValueError: If C{coro} is neither a coroutine, a generator nor a
+        L{Deferred}.
+    """
+    if isinstance(coro, Deferred):
+        return coro
+    if isinstance(coro, (_CoroutineType, types.GeneratorType)):
+        return _inlineCallbacks(None, coro, Deferred())
+    raise ValueError("%r is not a coroutine or a Deferred" % (coro,))
+
+
 ## DeferredLock/DeferredQueue
 
 class _ConcurrencyPrimitive(object):
@@ -1653,7 +1833,7 @@ __all__ = ["Deferred", "DeferredList", "succeed", "fail", "FAILURE", "SUCCESS",
            "AlreadyCalledError", "TimeoutError", "gatherResults",
            "maybeDeferred",
            "waitForDeferred", "deferredGenerator", "inlineCallbacks",
-           "returnValue",
+           "returnValue", "ensureDeferred",
            "DeferredLock", "DeferredSemaphore", "DeferredQueue",
            "DeferredFilesystemLock", "AlreadyTryingToLockError",
           ]
@@ -9,12 +9,17 @@ listeners or connectors are added)::
 
     from twisted.internet import epollreactor
     epollreactor.install()
+
+Pass C{edgeTriggered=True} to L{install} to use
+L{EdgeTriggeredEPollReactor} instead.
 """
 
 from __future__ import division, absolute_import
 
-from select import epoll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT
+import select
+from select import epoll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT, EPOLLET
 import errno
+import sys
 
 from zope.interface import implementer
 
@@ -22,167 +27,10 @@ from twisted.internet.interfaces import IReactorFDSet
 
 from twisted.python import log
 from twisted.internet import posixbase
+from twisted.internet.posixbase import _ContinuousPolling
 
-
-
-@implementer(IReactorFDSet)
-class _ContinuousPolling(posixbase._PollLikeMixin,
-                         posixbase._DisconnectSelectableMixin):
-    """
-    Schedule reads and writes based on the passage of time, rather than
-    notification.
-
-    This is useful for supporting polling filesystem files, which C{epoll(7)}
-    does not support.
-
-    The implementation uses L{posixbase._PollLikeMixin}, which is a bit hacky,
-    but re-implementing and testing the relevant code yet again is
-    unappealing.
-
-    @ivar _reactor: The L{EPollReactor} that is using this instance.
-
-    @ivar _loop: A C{LoopingCall} that drives the polling, or L{None}.
-
-    @ivar _readers: A C{set} of C{FileDescriptor} objects that should be read
-        from.
-
-    @ivar _writers: A C{set} of C{FileDescriptor} objects that should be
-        written to.
-    """
-
-    # Attributes for _PollLikeMixin
-    _POLL_DISCONNECTED = 1
-    _POLL_IN = 2
-    _POLL_OUT = 4
-
-
-    def __init__(self, reactor):
-        self._reactor = reactor
-        self._loop = None
-        self._readers = set()
-        self._writers = set()
-
-
-    def _checkLoop(self):
-        """
-        Start or stop a C{LoopingCall} based on whether there are readers and
-        writers.
-        """
-        if self._readers or self._writers:
-            if self._loop is None:
-                from twisted.internet.task import LoopingCall, _EPSILON
-                self._loop = LoopingCall(self.iterate)
-                self._loop.clock = self._reactor
-                # LoopingCall seems unhappy with timeout of 0, so use very
-                # small number:
-                self._loop.start(_EPSILON, now=False)
-        elif self._loop:
-            self._loop.stop()
-            self._loop = None
-
-
-    def iterate(self):
-        """
-        Call C{doRead} and C{doWrite} on all readers and writers respectively.
-        """
-        for reader in list(self._readers):
-            self._doReadOrWrite(reader, reader, self._POLL_IN)
-        for reader in list(self._writers):
-            self._doReadOrWrite(reader, reader, self._POLL_OUT)
-
-
-    def addReader(self, reader):
-        """
-        Add a C{FileDescriptor} for notification of data available to read.
-        """
-        self._readers.add(reader)
-        self._checkLoop()
-
-
-    def addWriter(self, writer):
-        """
-        Add a C{FileDescriptor} for notification of data available to write.
-        """
-        self._writers.add(writer)
-        self._checkLoop()
-
-
-    def removeReader(self, reader):
-        """
-        Remove a C{FileDescriptor} from notification of data available to read.
-        """
-        try:
-            self._readers.remove(reader)
-        except KeyError:
-            return
-        self._checkLoop()
-
-
-    def removeWriter(self, writer):
-        """
-        Remove a C{FileDescriptor} from notification of data available to
-        write.
-        """
-        try:
-            self._writers.remove(writer)
-        except KeyError:
-            return
-        self._checkLoop()
-
-
-    def removeAll(self):
-        """
-        Remove all readers and writers.
-        """
-        result = list(self._readers | self._writers)
-        # Don't reset to new value, since self.isWriting and .isReading refer
-        # to the existing instance:
-        self._readers.clear()
-        self._writers.clear()
-        return result
-
-
-    def getReaders(self):
-        """
-        Return a list of the readers.
-        """
-        return list(self._readers)
-
-
-    def getWriters(self):
-        """
-        Return a list of the writers.
-        """
-        return list(self._writers)
-
-
-    def isReading(self, fd):
-        """
-        Checks if the file descriptor is currently being observed for read
-        readiness.
-
-        @param fd: The file descriptor being checked.
-        @type fd: L{twisted.internet.abstract.FileDescriptor}
-        @return: C{True} if the file descriptor is being observed for read
-            readiness, C{False} otherwise.
-        @rtype: C{bool}
-        """
-        return fd in self._readers
-
-
-    def isWriting(self, fd):
-        """
-        Checks if the file descriptor is currently being observed for write
-        readiness.
-
-        @param fd: The file descriptor being checked.
-        @type fd: L{twisted.internet.abstract.FileDescriptor}
-        @return: C{True} if the file descriptor is being observed for write
-            readiness, C{False} otherwise.
-        @rtype: C{bool}
-        """
-        return fd in self._writers
-
+# Not defined by the select module of Python 2.
+EPOLLRDHUP = getattr(select, "EPOLLRDHUP", 0x2000)
 
 
 @implementer(IReactorFDSet)
@@ -386,25 +234,260 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             # loudly.
             raise
 
-        _drdw = self._doReadOrWrite
-        for fd, event in l:
-            try:
-                selectable = self._selectables[fd]
-            except KeyError:
-                pass
+        if l:
+            log._callWithLazyLogger(self._dispatchEvents, l)
+
+    doIteration = doPoll
+
+
+
+class EdgeTriggeredEPollReactor(EPollReactor):
+    """
+    An epoll(7) reactor which registers connections edge-triggered.
+
+    L{EPollReactor} registers descriptors level-triggered, so it calls
+    C{epoll_ctl} every time a descriptor starts or stops reading or writing.
+    This reactor registers the descriptors which support it once, for both
+    input and output, with C{EPOLLET}, and keeps track of their readiness
+    itself: starting and stopping reading or writing then costs no system
+    call.  As epoll(7) reports no new event for such a descriptor until its
+    socket has blocked, its C{doRead} and C{doWrite} are called repeatedly
+    until it reports, by setting its C{_readBlocked} or C{_writeBlocked}
+    attribute, that they failed with C{EAGAIN}.
+
+    A descriptor supports this if its C{_edgeTriggerable} attribute is true
+    when it is added.  Other descriptors are handled as by L{EPollReactor}.
+
+    @ivar _edges: A set containing the integer file descriptors registered
+        edge-triggered.
+
+    @ivar _readable: A set containing the integer file descriptors in
+        C{_edges} which may be read from without blocking.
+
+    @ivar _writable: A set containing the integer file descriptors in
+        C{_edges} which may be written to without blocking.
+
+    @ivar _hungUp: A set containing the integer file descriptors in
+        C{_edges} whose peer has shut down its side of the connection.  A
+        descriptor may report having read everything when it reads less than
+        it asked for, but this cannot be trusted once the end of the stream
+        may be pending, so these are read from until the connection is lost.
+
+    @cvar _EDGE_BUDGET: The largest number of times C{doRead} or C{doWrite}
+        of a descriptor is called in one iteration, so that one busy
+        connection does not hold up the others.
+    """
+    _EDGE_EVENTS = EPOLLIN | EPOLLOUT | EPOLLRDHUP | EPOLLET
+    _EDGE_IN = EPOLLIN | EPOLLRDHUP | EPOLLHUP | EPOLLERR
+    _EDGE_OUT = EPOLLOUT | EPOLLHUP | EPOLLERR
+    _EDGE_HUP = EPOLLRDHUP | EPOLLHUP | EPOLLERR
+    _EDGE_BUDGET = 16
+
+    def __init__(self):
+        EPollReactor.__init__(self)
+        self._edges = set()
+        self._readable = set()
+        self._writable = set()
+        self._hungUp = set()
+
+
+    def _add(self, xer, primary, other, selectables, event, antievent):
+        """
+        Private method for adding a descriptor to the event loop.
+
+        A descriptor supporting it is registered edge-triggered the first
+        time it is added, and merely tracked afterwards.
+        """
+        fd = xer.fileno()
+        if fd in other:
+            edge = fd in self._edges
+        else:
+            edge = getattr(xer, "_edgeTriggerable", False)
+        if not edge:
+            EPollReactor._add(
+                self, xer, primary, other, selectables, event, antievent)
+            return
+        if fd not in primary:
+            if fd not in other:
+                # See comment above register call in EPollReactor._add.
+                self._poller.register(fd, self._EDGE_EVENTS)
+                self._edges.add(fd)
+            primary.add(fd)
+            selectables[fd] = xer
+
+
+    def _remove(self, xer, primary, other, selectables, event, antievent):
+        """
+        Private method for removing a descriptor from the event loop.
+
+        A descriptor registered edge-triggered is only unregistered once it
+        is neither reading nor writing.
+        """
+        fd = xer.fileno()
+        if fd == -1:
+            for fd, fdes in selectables.items():
+                if xer is fdes:
+                    break
             else:
-                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+                return
+        if fd not in self._edges:
+            EPollReactor._remove(
+                self, xer, primary, other, selectables, event, antievent)
+            return
+        if fd in primary:
+            if fd not in other:
+                self._poller.unregister(fd)
+                del selectables[fd]
+                self._edges.remove(fd)
+                self._readable.discard(fd)
+                self._writable.discard(fd)
+                self._hungUp.discard(fd)
+            primary.remove(fd)
+
+
+    def _hasReadyEdges(self):
+        """
+        Check whether some descriptors registered edge-triggered are ready
+        for the operations they are waiting for.
+
+        @rtype: C{bool}
+        """
+        return bool(
+            (self._readable and not self._readable.isdisjoint(self._reads))
+            or (self._writable and
+                not self._writable.isdisjoint(self._writes)))
+
+
+    def doPoll(self, timeout):
+        """
+        Poll the poller for new events, without blocking while descriptors
+        registered edge-triggered are still ready.
+        """
+        ready = self._hasReadyEdges()
+        if ready:
+            timeout = 0
+        elif timeout is None:
+            timeout = -1  # Wait indefinitely.
+
+        try:
+            l = self._poller.poll(timeout, len(self._selectables))
+        except IOError as err:
+            if err.errno == errno.EINTR:
+                return
+            # See EPollReactor.doPoll.
+            raise
+
+        if l or ready:
+            log._callWithLazyLogger(self._dispatchEvents, l)
 
     doIteration = doPoll
 
 
-def install():
+    def _dispatchEvents(self, lazyContext, events):
+        """
+        Record the readiness of the descriptors registered edge-triggered,
+        dispatch the events of the others, and then handle all the
+        descriptors registered edge-triggered which are ready.
+
+        @see: L{posixbase._PollLikeMixin._dispatchEvents}
+        """
+        edges = self._edges
+        readable = self._readable
+        writable = self._writable
+        levelEvents = []
+        for fd, event in events:
+            if fd in edges:
+                if event & self._EDGE_IN:
+                    readable.add(fd)
+                if event & self._EDGE_OUT:
+                    writable.add(fd)
+                if event & self._EDGE_HUP:
+                    self._hungUp.add(fd)
+            else:
+                levelEvents.append((fd, event))
+        if levelEvents:
+            EPollReactor._dispatchEvents(self, lazyContext, levelEvents)
+
+        selectables = self._selectables
+        for fd in (readable & self._reads) | (writable & self._writes):
+            try:
+                selectable = selectables[fd]
+            except KeyError:
+                # Handles the infrequent case where one selectable's
+                # handler disconnects another.
+                continue
+            lazyContext.logger = selectable
+            try:
+                self._doEdgeTriggered(selectable, fd)
+            except KeyboardInterrupt:
+                raise
+            except:
+                log.err()
+        lazyContext.logger = None
+
+
+    def _doEdgeTriggered(self, selectable, fd):
+        """
+        Read from and then write to a descriptor registered edge-triggered,
+        as long as it is ready and wants to, but no more than
+        C{_EDGE_BUDGET} times each.
+        """
+        why = None
+        inRead = False
+        try:
+            # See _PollLikeMixin._doReadOrWrite.
+            if selectable.fileno() == -1:
+                why = posixbase._NO_FILEDESC
+            else:
+                if fd in self._readable:
+                    inRead = True
+                    for i in range(self._EDGE_BUDGET):
+                        if fd not in self._reads:
+                            break
+                        selectable._readBlocked = False
+                        why = selectable.doRead()
+                        if why:
+                            break
+                        if (selectable._readBlocked and
+                                fd not in self._hungUp):
+                            self._readable.discard(fd)
+                            break
+                if not why and fd in self._writable:
+                    inRead = False
+                    for i in range(self._EDGE_BUDGET):
+                        if fd not in self._writes:
+                            break
+                        selectable._writeBlocked = False
+                        why = selectable.doWrite()
+                        if why:
+                            break
+                        if selectable._writeBlocked:
+                            self._writable.discard(fd)
+                            break
+        except:
+            # Any exception from application code gets logged and will
+            # cause us to disconnect the selectable.
+            why = sys.exc_info()[1]
+            log.err()
+        if why:
+            self._disconnectSelectable(selectable, why, inRead)
+
+
+
+def install(edgeTriggered=False):
     """
     Install the epoll() reactor.
+
+    @param edgeTriggered: If true, install an L{EdgeTriggeredEPollReactor}
+        rather than an L{EPollReactor}.
+    @type edgeTriggered: C{bool}
     """
-    p = EPollReactor()
+    if edgeTriggered:
+        p = EdgeTriggeredEPollReactor()
+    else:
+        p = EPollReactor()
     from twisted.internet.main import installReactor
     installReactor(p)
 
 
-__all__ = ["EPollReactor", "install"]
+__all__ = ["EPollReactor", "EdgeTriggeredEPollReactor", "install"]
@@ -1992,6 +1992,32 @@ class IFileDescriptorReceiver(Interface):
 
 
 
+class IBufferReceiver(Interface):
+    """
+    Protocols may implement L{IBufferReceiver} to indicate that their
+    C{dataReceived} method accepts any bytes-like object supporting the
+    buffer protocol (such as a L{memoryview}), not only L{bytes}.
+
+    Transports which support it may then read into a buffer they allocate
+    once and reuse for every read, and pass a view of the bytes received
+    instead of a new L{bytes} object.  The content of that view is only
+    valid until C{dataReceived} returns: a protocol must copy what it needs
+    to keep, with C{data.tobytes()} when C{data} is a L{memoryview}.  Do not
+    use C{bytes(data)}, which gives the representation of the view rather
+    than its content on Python 2.
+    """
+
+    def dataReceived(data):
+        """
+        Called whenever data is received.
+
+        @param data: The bytes received, only valid until this method
+            returns.  A L{memoryview} is copied with C{data.tobytes()}.
+        @type data: L{memoryview} or L{bytes}
+        """
+
+
+
 class IProtocolFactory(Interface):
     """
     Interface for protocol factories.
@@ -2178,6 +2204,39 @@ class IUNIXTransport(ITransport):
 
 
 
+class ISendFileTransport(ITransport):
+    """
+    A transport which can send the contents of a file directly from the
+    kernel, without copying them through user space (for example with
+    C{sendfile(2)}).
+    """
+
+    def sendFile(fileObject, offset, count):
+        """
+        Send C{count} bytes of a file, starting at C{offset}, after any data
+        already written to this transport.
+
+        Nothing may be written to the transport, and C{sendFile} may not be
+        called again, until the returned L{Deferred} has fired.
+
+        @param fileObject: A file open for reading.  Its position is not used
+            nor changed, and it is not closed.
+        @type fileObject: A file object with a C{fileno} method.
+
+        @param offset: The position in the file of the first byte to send.
+        @type offset: L{int}
+
+        @param count: The number of bytes to send.
+        @type count: L{int}
+
+        @return: A L{Deferred} which fires with L{None} once all the bytes
+            have been sent, or fails if the file could not be read or the
+            connection was lost first.
+        @rtype: L{twisted.internet.defer.Deferred}
+        """
+
+
+
 class IOpenSSLServerConnectionCreator(Interface):
     """
     A provider of L{IOpenSSLServerConnectionCreator} can create
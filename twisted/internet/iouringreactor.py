@@ -0,0 +1,803 @@
+# -*- test-case-name: twisted.internet.test.test_iouringreactor -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+An io_uring(7) based implementation of the twisted main loop.
+
+To install the event loop (and you should do this before any connections,
+listeners or connectors are added)::
+
+    from twisted.internet import iouringreactor
+    iouringreactor.install()
+
+If the kernel does not support io_uring, or lacks the features this reactor
+needs (Linux 5.7 or later is required), L{install} installs the default
+reactor instead.
+"""
+
+from __future__ import division, absolute_import
+
+import ctypes
+import errno
+import os
+import socket
+import warnings
+from select import POLLIN, POLLOUT, POLLHUP, POLLERR, POLLNVAL
+
+from zope.interface import implementer
+
+from twisted.internet import main, posixbase, tcp
+from twisted.internet.interfaces import IReactorFDSet, IBufferReceiver
+from twisted.python import log, _iouring
+from twisted.python.compat import _PY3, lazyByteSlice
+
+# Not defined by the socket and errno modules of Python 2.
+_SOCK_NONBLOCK = getattr(socket, "SOCK_NONBLOCK", 0o4000)
+_SOCK_CLOEXEC = getattr(socket, "SOCK_CLOEXEC", 0o2000000)
+_MSG_NOSIGNAL = getattr(socket, "MSG_NOSIGNAL", 0x4000)
+_ECANCELED = getattr(errno, "ECANCELED", 125)
+
+# Results of requests which did not happen.
+_NOT_DONE = (-_ECANCELED, -errno.EINTR, -errno.EAGAIN)
+
+# The errors accept may fail with which tcp.Port.doRead logs instead of
+# raising.
+_ACCEPT_ERRORS = (errno.EMFILE, errno.ENOBUFS, errno.ENFILE, errno.ENOMEM,
+                  errno.ECONNABORTED)
+
+
+
+class _CompletionConnectionMixin(object):
+    """
+    Mixin for TCP connections whose data is received and sent by
+    L{IOUringReactor} with io_uring requests instead of C{recv} and C{send}
+    calls: the reactor hands them the result of a request once it has
+    completed, and they hand the reactor the data to send.
+
+    @ivar _completionBased: Whether L{IOUringReactor} receives and sends the
+        data of this connection with io_uring requests, rather than waiting
+        for it to be readable or writable.
+
+    @ivar _readResult: The result of the last completed receive request which
+        has not been handed to the protocol yet: the data received, or
+        L{main.CONNECTION_DONE} or L{main.CONNECTION_LOST}.  L{None} if there
+        is none.
+
+    @ivar _writeResult: The number of bytes the last completed send request
+        sent, which have not been removed from the buffers yet, or
+        L{main.CONNECTION_LOST}.  L{None} if there is none.
+    """
+    _completionBased = True
+    _readResult = None
+    _writeResult = None
+
+    def doRead(self):
+        """
+        Hand the data received by the last completed receive request to the
+        protocol.
+
+        @see: L{tcp.Connection.doRead}
+        """
+        data, self._readResult = self._readResult, None
+        if not isinstance(data, bytes):
+            return data
+        if IBufferReceiver.providedBy(self.protocol):
+            data = memoryview(data)
+        return self._dataReceived(data)
+
+
+    def writeSomeData(self, data):
+        """
+        Account for the bytes sent by the last completed send request, or
+        send up to C{self.SEND_LIMIT} bytes of C{data} with a new one.
+
+        @return: The number of bytes sent by the last completed send request,
+            or C{0} if a new one was submitted, or L{main.CONNECTION_LOST}.
+        """
+        sent, self._writeResult = self._writeResult, None
+        if sent is not None:
+            return sent
+        data = lazyByteSlice(data, 0, self.SEND_LIMIT)
+        if len(data):
+            self.reactor._send(self, data)
+        return 0
+
+
+    def _writeSomeDataSequence(self, buffers):
+        """
+        Like L{writeSomeData}, for several buffers, which are joined to be
+        sent with a single request.
+        """
+        sent, self._writeResult = self._writeResult, None
+        if sent is not None:
+            return sent
+        self.reactor._send(self, b"".join(buffers))
+        return 0
+
+
+
+class _Server(_CompletionConnectionMixin, tcp.Server):
+    """
+    A server-side TCP connection of L{IOUringReactor}.
+    """
+
+
+
+class _Client(_CompletionConnectionMixin, tcp.Client):
+    """
+    A client-side TCP connection of L{IOUringReactor}, which waits for the
+    connection to be established like L{tcp.Client} does, by waiting for the
+    socket to be writable.
+    """
+    _completionBased = False
+
+    def _connectDone(self):
+        self._completionBased = True
+        tcp.Client._connectDone(self)
+
+
+
+class _Connector(tcp.Connector):
+    """
+    A TCP connector making L{_Client} connections.
+    """
+
+    def _makeTransport(self):
+        return _Client(self.host, self.port, self.bindAddress, self,
+                       self.reactor)
+
+
+
+class _Port(tcp.Port):
+    """
+    A TCP port of L{IOUringReactor}, which accepts connections with io_uring
+    requests.
+
+    @ivar _readResult: The results of the completed accept requests which
+        have not been handled yet: file descriptors of new connections, or
+        negated error numbers.
+    """
+    transport = _Server
+    _completionBased = True
+
+    def __init__(self, *args, **kwargs):
+        tcp.Port.__init__(self, *args, **kwargs)
+        self._readResult = []
+
+
+    def doRead(self):
+        """
+        Queue the connections accepted, and build a protocol and a
+        transport for up to C{maxBuildsPerIteration} of them.
+
+        @see: L{tcp.Port.doRead}
+        """
+        results, self._readResult = self._readResult, []
+        for i, result in enumerate(results):
+            if self.disconnecting:
+                self._closeAccepted(results[i:])
+                return
+            if result < 0:
+                if -result in _ACCEPT_ERRORS:
+                    log.msg("Could not accept new connection (%s)" % (
+                        errno.errorcode[-result],))
+                elif -result != errno.EPERM:
+                    log.err(socket.error(-result, os.strerror(-result)),
+                            "Could not accept new connection")
+                continue
+            if _PY3:
+                skt = socket.socket(
+                    self.addressFamily, self.socketType | _SOCK_NONBLOCK, 0,
+                    result)
+            else:
+                skt = socket.fromfd(result, self.addressFamily,
+                                    self.socketType)
+                os.close(result)
+            try:
+                addr = skt.getpeername()
+            except socket.error:
+                # The peer reset the connection already.
+                skt.close()
+                continue
+            self._queueConnection(skt, addr)
+        if self._buildCall is None:
+            self._buildConnections()
+
+
+    def _closeAccepted(self, results):
+        """
+        Close the file descriptors of connections which will not be handled.
+
+        @param results: Results of accept requests.
+        """
+        for result in results:
+            if result >= 0:
+                os.close(result)
+
+
+    def connectionLost(self, reason):
+        results, self._readResult = self._readResult, []
+        self._closeAccepted(results)
+        tcp.Port.connectionLost(self, reason)
+
+
+
+@implementer(IReactorFDSet)
+class IOUringReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
+    """
+    A reactor that uses io_uring(7).
+
+    The TCP connections and ports made by L{listenTCP} and L{connectTCP}
+    receive their data into buffers registered with the kernel, send it and
+    accept connections with io_uring requests whose results are handed to
+    them once completed, instead of waiting to be readable or writable and
+    then calling C{recv}, C{send} or C{accept}.  Other descriptors given to
+    L{addReader} and L{addWriter} are waited for with one-shot poll
+    requests.  The requests made during an iteration are submitted with the
+    same single C{io_uring_enter} call which waits for the next completions,
+    until a timeout request completes if the reactor has something to do
+    later.
+
+    @ivar _ring: The L{_iouring.Ring} requests are submitted to.
+
+    @ivar _selectables: A dictionary mapping integer file descriptors to
+        instances of C{FileDescriptor} which have been registered with the
+        reactor.  All C{FileDescriptors} which are currently receiving read or
+        write readiness notifications will be present as values in this
+        dictionary.
+
+    @ivar _reads: A set-like dictionary of the file descriptors being read
+        from, or accepted from.
+
+    @ivar _writes: A set-like dictionary of the file descriptors being
+        written to.
+
+    @ivar _requests: A dictionary mapping the identifiers of the pending
+        requests to C{(handler, fd, selectable, event, resource)} tuples:
+        C{handler} is called with the last four and the result of the
+        request, C{event} is C{POLLIN} for requests made to read from or
+        accept from C{fd} and C{POLLOUT} for those made to write to it, and
+        C{resource} is whatever must be kept alive while the request is
+        pending.
+
+    @ivar _readRequests: A dictionary mapping file descriptors to the
+        identifier of the request pending to read from them.  There is at
+        most one for each file descriptor, even after it has been cancelled:
+        until it completes, no other one is made.
+
+    @ivar _writeRequests: Like C{_readRequests}, for writing.
+
+    @ivar _ready: A list of C{(selectable, fd, event)} tuples to handle before
+        waiting for completions: connections which have received data while
+        they were not being read from and are now, and connections with
+        data to send.
+
+    @ivar _timeoutRequest: The identifier of the pending timeout request, or
+        L{None}.
+
+    @ivar _buffers: The memory of the registered buffers, or L{None} if they
+        have not been registered yet.
+
+    @ivar _freeBuffers: The indexes of the registered buffers not used by any
+        receive request.
+
+    @ivar _spareBuffers: The buffers of receive requests made when all the
+        registered buffers were in use, kept for the next ones once they
+        complete.
+    """
+
+    # Attributes for _PollLikeMixin
+    _POLL_DISCONNECTED = POLLHUP | POLLERR | POLLNVAL
+    _POLL_IN = POLLIN
+    _POLL_OUT = POLLOUT
+
+    # The size of the submission queue, the completion queue being larger so
+    # that it can hold the completions of all the requests a long iteration
+    # can submit.
+    _ENTRIES = 1024
+    _COMPLETION_ENTRIES = 8192
+
+    # The number and size of the buffers registered with the kernel.  Receive
+    # requests made when they are all in use read into other buffers, which
+    # are kept for reuse.
+    _BUFFERS = 32
+    _BUFFER_SIZE = 65536
+
+    _multishotAccept = True
+
+    def __init__(self):
+        """
+        Initialize io_uring and the dictionaries tracking requests.
+
+        @raise _iouring.IOUringError: If io_uring is not supported.
+        """
+        self._ring = _iouring.Ring(self._ENTRIES, self._COMPLETION_ENTRIES)
+        self._reads = {}
+        self._writes = {}
+        self._selectables = {}
+        self._requests = {}
+        self._readRequests = {}
+        self._writeRequests = {}
+        self._nextRequest = 1
+        self._ready = []
+        self._timeoutRequest = None
+        self._timespec = (ctypes.c_int64 * 2)()
+        self._buffers = None
+        self._freeBuffers = []
+        self._spareBuffers = []
+        posixbase.PosixReactorBase.__init__(self)
+
+
+    def _submit(self, handler, fd, selectable, event, resource, opcode,
+                **fields):
+        """
+        Prepare a request for C{fd}, to be submitted before waiting for
+        completions.
+
+        @param handler: The method to call once the request completes.
+
+        @param resource: An object to keep alive until then.
+
+        @param opcode: One of the C{IORING_OP_*} constants.
+
+        @param fields: The other fields of the request.
+        """
+        userData = self._nextRequest
+        self._nextRequest += 1
+        self._requests[userData] = (handler, fd, selectable, event, resource)
+        if event == POLLIN:
+            self._readRequests[fd] = userData
+        else:
+            self._writeRequests[fd] = userData
+        self._ring.prepare(opcode, fd, userData, **fields)
+
+
+    def _cancel(self, userData):
+        """
+        Cancel a pending request, which will complete with C{-ECANCELED} if it
+        had not completed already.
+        """
+        self._ring.prepare(_iouring.IORING_OP_ASYNC_CANCEL, -1, 0,
+                           addr=userData)
+
+
+    def _request(self, fd, event):
+        """
+        Make the request waiting for C{fd} to be read from or written to,
+        depending on C{event}, if there is none pending yet.
+        """
+        if event == POLLIN:
+            if fd in self._readRequests:
+                return
+        elif fd in self._writeRequests:
+            return
+        selectable = self._selectables[fd]
+        if not getattr(selectable, "_completionBased", False):
+            self._submit(self._polled, fd, selectable, event, None,
+                         _iouring.IORING_OP_POLL_ADD, opFlags=event)
+        elif event == POLLOUT:
+            if selectable._writeBlocked:
+                # Sending a file with sendfile, which is not done with a
+                # request, filled the send buffer of the socket.
+                self._submit(self._polled, fd, selectable, event, None,
+                             _iouring.IORING_OP_POLL_ADD, opFlags=event)
+            else:
+                self._ready.append((selectable, fd, event))
+        elif selectable._readResult:
+            self._ready.append((selectable, fd, event))
+        elif isinstance(selectable, _Port):
+            self._submit(
+                self._accepted, fd, selectable, event, None,
+                _iouring.IORING_OP_ACCEPT,
+                opFlags=_SOCK_NONBLOCK | _SOCK_CLOEXEC,
+                ioprio=self._multishotAccept and
+                _iouring.IORING_ACCEPT_MULTISHOT)
+        else:
+            self._receive(fd, selectable)
+
+
+    def _receive(self, fd, selectable):
+        """
+        Make a request receiving data for C{selectable}, into one of the
+        registered buffers if one is free.
+        """
+        if self._buffers is None:
+            self._registerBuffers()
+        size = min(selectable.bufferSize, self._BUFFER_SIZE)
+        if self._freeBuffers:
+            index = self._freeBuffers.pop()
+            address = ctypes.addressof(self._buffers) + (
+                index * self._BUFFER_SIZE)
+            self._submit(self._received, fd, selectable, POLLIN,
+                         (address, index, None),
+                         _iouring.IORING_OP_READ_FIXED, addr=address,
+                         length=size, bufIndex=index)
+        else:
+            if self._spareBuffers:
+                buffer = self._spareBuffers.pop()
+            else:
+                buffer = ctypes.create_string_buffer(self._BUFFER_SIZE)
+            address = ctypes.addressof(buffer)
+            self._submit(self._received, fd, selectable, POLLIN,
+                         (address, None, buffer), _iouring.IORING_OP_RECV,
+                         addr=address, length=size)
+
+
+    def _registerBuffers(self):
+        """
+        Register C{self._BUFFERS} buffers with the kernel, unless it refuses
+        to, usually because it would exceed C{RLIMIT_MEMLOCK}, in which case
+        receive requests only use unregistered buffers.
+        """
+        self._buffers = ctypes.create_string_buffer(
+            self._BUFFERS * self._BUFFER_SIZE)
+        address = ctypes.addressof(self._buffers)
+        try:
+            self._ring.registerBuffers([
+                (address + i * self._BUFFER_SIZE, self._BUFFER_SIZE)
+                for i in range(self._BUFFERS)])
+        except _iouring.IOUringError:
+            log.msg("Could not register buffers with io_uring")
+        else:
+            self._freeBuffers = list(range(self._BUFFERS))
+
+
+    def _send(self, selectable, data):
+        """
+        Make a request sending C{data} for C{selectable}, unless one is still
+        pending.
+
+        @param data: The data to send.
+        @type data: L{bytes} or L{memoryview}
+        """
+        fd = selectable.fileno()
+        if fd in self._writeRequests:
+            return
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        self._submit(self._sent, fd, selectable, POLLOUT, data,
+                     _iouring.IORING_OP_SEND, addr=_iouring.addressOf(data),
+                     length=len(data), opFlags=_MSG_NOSIGNAL)
+
+
+    def _polled(self, fd, selectable, event, resource, result):
+        """
+        Handle the completion of a poll request.
+        """
+        if result in _NOT_DONE:
+            return
+        if result < 0:
+            result = POLLNVAL
+        elif result & (POLLERR | POLLHUP):
+            # Let the descriptor find the error by reading if it is reading,
+            # as it does with the reactors waiting for both events at once.
+            result |= event
+            if fd in self._reads:
+                result |= POLLIN
+        self._handle(fd, selectable, event, result)
+
+
+    def _received(self, fd, selectable, event, resource, result):
+        """
+        Handle the completion of a receive request, keeping its result until
+        the connection is read from if it is not any more.
+        """
+        address, index, buffer = resource
+        if result > 0:
+            selectable._readResult = ctypes.string_at(address, result)
+        if index is not None:
+            self._freeBuffers.append(index)
+        else:
+            self._spareBuffers.append(buffer)
+        if result in _NOT_DONE:
+            return
+        if result == 0:
+            selectable._readResult = main.CONNECTION_DONE
+        elif result < 0:
+            selectable._readResult = main.CONNECTION_LOST
+        self._handle(fd, selectable, event, event)
+
+
+    def _sent(self, fd, selectable, event, resource, result):
+        """
+        Handle the completion of a send request.
+        """
+        if result in _NOT_DONE:
+            return
+        if result < 0:
+            selectable._writeResult = main.CONNECTION_LOST
+        else:
+            selectable._writeResult = result
+        self._handle(fd, selectable, event, event)
+
+
+    def _accepted(self, fd, port, event, resource, result):
+        """
+        Handle the completion of an accept request.
+        """
+        if result == -errno.EINVAL and self._multishotAccept:
+            # Multishot accept requests are not supported before Linux 5.19:
+            # fall back to making one request per connection.
+            self._multishotAccept = False
+            return
+        if result in _NOT_DONE:
+            return
+        if not port.connected:
+            port._closeAccepted([result])
+            return
+        port._readResult.append(result)
+        self._handle(fd, port, event, event)
+
+
+    def _handle(self, fd, selectable, event, events):
+        """
+        Call C{doRead} or C{doWrite} on C{selectable}, provided it is still
+        registered for it.
+        """
+        if event == POLLIN:
+            if fd not in self._reads:
+                return
+        elif fd not in self._writes:
+            return
+        if self._selectables.get(fd) is not selectable:
+            return
+        if event == POLLOUT and getattr(selectable, "_completionBased", False):
+            selectable._writeBlocked = False
+        self._doReadOrWrite(selectable, fd, events)
+
+
+    def _dispatchCompletions(self, lazyContext, completions):
+        """
+        Handle completions, with C{lazyContext} as the log context, and make
+        the requests needed to carry on reading and writing.
+
+        @param lazyContext: The log context to set the logger of.
+        @type lazyContext: L{twisted.python.log._LazyLoggerContext}
+
+        @param completions: The C{(userData, result, flags)} tuples read from
+            the completion queue.
+        """
+        requests = self._requests
+        for userData, result, flags in completions:
+            if flags & _iouring.IORING_CQE_F_MORE:
+                request = requests.get(userData)
+            else:
+                request = requests.pop(userData, None)
+            if request is None:
+                if userData == self._timeoutRequest:
+                    self._timeoutRequest = None
+                continue
+            handler, fd, selectable, event, resource = request
+            if not flags & _iouring.IORING_CQE_F_MORE:
+                if event == POLLIN:
+                    pending = self._readRequests
+                else:
+                    pending = self._writeRequests
+                if pending.get(fd) == userData:
+                    del pending[fd]
+            lazyContext.logger = selectable
+            try:
+                handler(fd, selectable, event, resource, result)
+                self._continue(fd)
+            except KeyboardInterrupt:
+                raise
+            except:
+                log.err()
+        lazyContext.logger = None
+
+
+    def _dispatchReady(self, lazyContext):
+        """
+        Hand connections the data they received while they were not being read
+        from, and give those with data to send the chance to send it.
+
+        @param lazyContext: The log context to set the logger of.
+        @type lazyContext: L{twisted.python.log._LazyLoggerContext}
+        """
+        ready, self._ready = self._ready, []
+        for selectable, fd, event in ready:
+            if event == POLLIN:
+                if fd in self._readRequests or not selectable._readResult:
+                    continue
+            elif fd in self._writeRequests:
+                continue
+            lazyContext.logger = selectable
+            try:
+                self._handle(fd, selectable, event, event)
+                self._continue(fd)
+            except KeyboardInterrupt:
+                raise
+            except:
+                log.err()
+        lazyContext.logger = None
+
+
+    def _continue(self, fd):
+        """
+        Make the requests needed for the selectable registered for C{fd}, if
+        any, to be read from and written to as it should.
+        """
+        if fd in self._reads:
+            self._request(fd, POLLIN)
+        if fd in self._writes:
+            self._request(fd, POLLOUT)
+
+
+    def _add(self, xer, primary, event):
+        """
+        Private method for adding a descriptor to the reactor.
+        """
+        fd = xer.fileno()
+        if fd not in primary:
+            primary[fd] = 1
+            self._selectables[fd] = xer
+            self._request(fd, event)
+
+
+    def addReader(self, reader):
+        """
+        Add a FileDescriptor for notification of data available to read.
+        """
+        self._add(reader, self._reads, POLLIN)
+
+
+    def addWriter(self, writer):
+        """
+        Add a FileDescriptor for notification of data available to write.
+        """
+        self._add(writer, self._writes, POLLOUT)
+
+
+    def _remove(self, xer, primary, other, pending):
+        """
+        Private method for removing a descriptor from the reactor, cancelling
+        the request pending for it.
+        """
+        try:
+            fd = xer.fileno()
+        except (socket.error, OSError):
+            # The descriptor was closed behind the reactor's back: find it
+            # like one whose fileno is -1.
+            fd = -1
+        if fd == -1:
+            for fd, fdes in self._selectables.items():
+                if xer is fdes:
+                    break
+            else:
+                return
+        if fd in primary:
+            del primary[fd]
+            if fd not in other:
+                del self._selectables[fd]
+            if fd in pending:
+                self._cancel(pending[fd])
+                if isinstance(xer, _Port):
+                    # The pending accept request keeps the listening socket
+                    # open, and accepting, until the cancellation is
+                    # submitted: do it before the port closes it.
+                    self._ring.enter(0)
+
+
+    def removeReader(self, reader):
+        """
+        Remove a Selectable for notification of data available to read.
+        """
+        self._remove(reader, self._reads, self._writes, self._readRequests)
+
+
+    def removeWriter(self, writer):
+        """
+        Remove a Selectable for notification of data available to write.
+        """
+        self._remove(writer, self._writes, self._reads, self._writeRequests)
+
+
+    def removeAll(self):
+        """
+        Remove all selectables, and return a list of them.
+        """
+        return self._removeAll(
+            [self._selectables[fd] for fd in self._reads],
+            [self._selectables[fd] for fd in self._writes])
+
+
+    def getReaders(self):
+        return [self._selectables[fd] for fd in self._reads]
+
+
+    def getWriters(self):
+        return [self._selectables[fd] for fd in self._writes]
+
+
+    def listenTCP(self, port, factory, backlog=50, interface='',
+                  reusePort=False):
+        """
+        @see: L{twisted.internet.interfaces.IReactorTCP.listenTCP}
+        """
+        p = _Port(port, factory, backlog, interface, self, reusePort)
+        p.startListening()
+        return p
+
+
+    def connectTCP(self, host, port, factory, timeout=30, bindAddress=None):
+        """
+        @see: L{twisted.internet.interfaces.IReactorTCP.connectTCP}
+        """
+        c = _Connector(host, port, factory, timeout, bindAddress, self)
+        c.connect()
+        return c
+
+
+    def doPoll(self, timeout):
+        """
+        Submit the requests made since the last call, wait for completions
+        for up to C{timeout} seconds and handle them.
+
+        @param timeout: the number of seconds to wait for, or L{None} to wait
+            until something completes.
+        """
+        if self._ready:
+            log._callWithLazyLogger(self._dispatchReady)
+            # What was handled may have called something, scheduled a call
+            # or stopped the reactor, so only wait if nothing else has to be
+            # done.
+            delay = self.timeout()
+            if self._ready or self._justStopped:
+                timeout = 0
+            elif delay is not None and (timeout is None or delay < timeout):
+                timeout = delay
+
+        wait = 1
+        if timeout is not None:
+            if timeout <= 0:
+                wait = 0
+            else:
+                self._prepareTimeout(timeout)
+        self._ring.enter(wait)
+
+        completions = self._ring.completions()
+        if completions:
+            log._callWithLazyLogger(self._dispatchCompletions, completions)
+
+    doIteration = doPoll
+
+
+    def _prepareTimeout(self, timeout):
+        """
+        Prepare a timeout request completing after C{timeout} seconds, or as
+        soon as anything else completes, replacing the previous one if it is
+        still pending.
+        """
+        if self._timeoutRequest is not None:
+            self._cancel(self._timeoutRequest)
+        self._timeoutRequest = userData = self._nextRequest
+        self._nextRequest += 1
+        seconds = int(timeout)
+        self._timespec[0] = seconds
+        self._timespec[1] = int((timeout - seconds) * 1e9)
+        self._ring.prepare(_iouring.IORING_OP_TIMEOUT, -1, userData,
+                           addr=ctypes.addressof(self._timespec), length=1,
+                           offset=1)
+
+
+
+def install():
+    """
+    Install the io_uring() reactor, or the default reactor if io_uring is not
+    supported.
+    """
+    try:
+        p = IOUringReactor()
+    except _iouring.IOUringError as e:
+        warnings.warn(
+            "io_uring is not supported (%s), installing the default reactor "
+            "instead." % (e,), category=RuntimeWarning, stacklevel=2)
+        from twisted.internet import default
+        default.install()
+        return
+    from twisted.internet.main import installReactor
+    installReactor(p)
+
+
+__all__ = ["IOUringReactor", "install"]
@@ -257,17 +257,39 @@ class KQueueReactor(posixbase.PosixReactorBase):
             else:
                 raise
 
+        if events:
+            log._callWithLazyLogger(self._dispatchEvents, events)
+
+
+    def _dispatchEvents(self, lazyContext, events):
+        """
+        Handle the events returned by C{kqueue}, with C{lazyContext} as the
+        log context so that the log prefix of each selectable is only
+        computed if something is logged while handling its event.
+
+        @param lazyContext: The log context to set the logger of.
+        @type lazyContext: L{twisted.python.log._LazyLoggerContext}
+
+        @param events: The C{kevent}s returned by C{kqueue}.
+        """
         _drdw = self._doWriteOrRead
+        selectables = self._selectables
         for event in events:
             fd = event.ident
             try:
-                selectable = self._selectables[fd]
+                selectable = selectables[fd]
             except KeyError:
                 # Handles the infrequent case where one selectable's
                 # handler disconnects another.
                 continue
-            else:
-                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+            lazyContext.logger = selectable
+            try:
+                _drdw(selectable, fd, event)
+            except KeyboardInterrupt:
+                raise
+            except:
+                log.err()
+        lazyContext.logger = None
 
 
     def _doWriteOrRead(self, selectable, fd, event):
@@ -158,15 +158,8 @@ class PollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
                 return
             else:
                 raise
-        _drdw = self._doReadOrWrite
-        for fd, event in l:
-            try:
-                selectable = self._selectables[fd]
-            except KeyError:
-                # Handles the infrequent case where one selectable's
-                # handler disconnects another.
-                continue
-            log.callWithLogger(selectable, _drdw, selectable, fd, event)
+        if l:
+            log._callWithLazyLogger(self._dispatchEvents, l)
 
     doIteration = doPoll
 
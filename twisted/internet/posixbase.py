@@ -22,6 +22,7 @@ from twisted.internet.interfaces import IReactorUNIX, IReactorUNIXDatagram
 from twisted.internet.interfaces import IReactorTCP, IReactorUDP, IReactorSSL
 from twisted.internet.interfaces import IReactorSocket, IHalfCloseableDescriptor
 from twisted.internet.interfaces import IReactorProcess, IReactorMulticast
+from twisted.internet.interfaces import IReactorFDSet
 
 from twisted.python import log, failure, util
 from twisted.python.runtime import platformType, platform
@@ -182,8 +183,68 @@ class _UnixWaker(_FDWaker):
 
 
 
+class _EventFDWaker(_FDWaker):
+    """
+    A waker using a Linux C{eventfd(2)} counter rather than a pipe: a single
+    file descriptor, which stays readable however many times it is written
+    to until it is read once.
+
+    @ivar o: The eventfd file descriptor, written to to wake up the reactor.
+
+    @ivar i: The same eventfd file descriptor, monitored by the reactor.
+    """
+
+    def __init__(self, reactor):
+        """Initialize.
+        """
+        self.reactor = reactor
+        self.i = self.o = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        self.fileno = lambda: self.i
+
+
+    def wakeUp(self):
+        """Add one to the counter.
+        """
+        if self.o is not None:
+            try:
+                util.untilConcludes(os.eventfd_write, self.o, 1)
+            except OSError as e:
+                # The counter is full, so the reactor is being woken up
+                # already.
+                if e.errno != errno.EAGAIN:
+                    raise
+
+
+    def doRead(self):
+        """
+        Reset the counter.
+        """
+        try:
+            os.eventfd_read(self.i)
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+
+    def connectionLost(self, reason):
+        """Close my eventfd.
+        """
+        if self.i is None:
+            return
+        try:
+            os.close(self.i)
+        except OSError:
+            pass
+        del self.i, self.o
+
+
+
 if platformType == 'posix':
-    _Waker = _UnixWaker
+    if getattr(os, "eventfd", None) is not None:
+        # Linux, on Python 3.10 and later.
+        _Waker = _EventFDWaker
+    else:
+        _Waker = _UnixWaker
 else:
     # Primarily Windows and Jython.
     _Waker = _SocketWaker
@@ -473,8 +534,16 @@ class PosixReactorBase(_SignalReactorMixin, _DisconnectSelectableMixin,
 
     # IReactorTCP
 
-    def listenTCP(self, port, factory, backlog=50, interface=''):
-        p = tcp.Port(port, factory, backlog, interface, self)
+    def listenTCP(self, port, factory, backlog=50, interface='',
+                  reusePort=False):
+        """
+        @see: L{twisted.internet.interfaces.IReactorTCP.listenTCP}
+
+        @param reusePort: If true, listen with C{SO_REUSEPORT}, so that other
+            sockets, usually in other processes, can listen on the same
+            address and port.  See L{tcp.Port.reusePort}.
+        """
+        p = tcp.Port(port, factory, backlog, interface, self, reusePort)
         p.startListening()
         return p
 
@@ -610,6 +679,195 @@ class _PollLikeMixin(object):
             self._disconnectSelectable(selectable, why, inRead)
 
 
+    def _dispatchEvents(self, lazyContext, events):
+        """
+        Handle the events returned by the poller, with C{lazyContext} as the
+        log context so that the log prefix of each selectable is only
+        computed if something is logged while handling its event.
+
+        @param lazyContext: The log context to set the logger of.
+        @type lazyContext: L{twisted.python.log._LazyLoggerContext}
+
+        @param events: The C{(fd, event)} pairs returned by the poller.
+        """
+        _drdw = self._doReadOrWrite
+        selectables = self._selectables
+        for fd, event in events:
+            try:
+                selectable = selectables[fd]
+            except KeyError:
+                # Handles the infrequent case where one selectable's
+                # handler disconnects another.
+                continue
+            lazyContext.logger = selectable
+            try:
+                _drdw(selectable, fd, event)
+            except KeyboardInterrupt:
+                raise
+            except:
+                log.err()
+        lazyContext.logger = None
+
+
+
+@implementer(IReactorFDSet)
+class _ContinuousPolling(_PollLikeMixin, _DisconnectSelectableMixin):
+    """
+    Schedule reads and writes based on the passage of time, rather than
+    notification.
+
+    This is useful for supporting polling filesystem files, which C{epoll(7)}
+    does not support.
+
+    The implementation uses L{_PollLikeMixin}, which is a bit hacky,
+    but re-implementing and testing the relevant code yet again is
+    unappealing.
+
+    @ivar _reactor: The reactor that is using this instance.
+
+    @ivar _loop: A C{LoopingCall} that drives the polling, or L{None}.
+
+    @ivar _readers: A C{set} of C{FileDescriptor} objects that should be read
+        from.
+
+    @ivar _writers: A C{set} of C{FileDescriptor} objects that should be
+        written to.
+    """
+
+    # Attributes for _PollLikeMixin
+    _POLL_DISCONNECTED = 1
+    _POLL_IN = 2
+    _POLL_OUT = 4
+
+
+    def __init__(self, reactor):
+        self._reactor = reactor
+        self._loop = None
+        self._readers = set()
+        self._writers = set()
+
+
+    def _checkLoop(self):
+        """
+        Start or stop a C{LoopingCall} based on whether there are readers and
+        writers.
+        """
+        if self._readers or self._writers:
+            if self._loop is None:
+                from twisted.internet.task import LoopingCall, _EPSILON
+                self._loop = LoopingCall(self.iterate)
+                self._loop.clock = self._reactor
+                # LoopingCall seems unhappy with timeout of 0, so use very
+                # small number:
+                self._loop.start(_EPSILON, now=False)
+        elif self._loop:
+            self._loop.stop()
+            self._loop = None
+
+
+    def iterate(self):
+        """
+        Call C{doRead} and C{doWrite} on all readers and writers respectively.
+        """
+        for reader in list(self._readers):
+            self._doReadOrWrite(reader, reader, self._POLL_IN)
+        for reader in list(self._writers):
+            self._doReadOrWrite(reader, reader, self._POLL_OUT)
+
+
+    def addReader(self, reader):
+        """
+        Add a C{FileDescriptor} for notification of data available to read.
+        """
+        self._readers.add(reader)
+        self._checkLoop()
+
+
+    def addWriter(self, writer):
+        """
+        Add a C{FileDescriptor} for notification of data available to write.
+        """
+        self._writers.add(writer)
+        self._checkLoop()
+
+
+    def removeReader(self, reader):
+        """
+        Remove a C{FileDescriptor} from notification of data available to read.
+        """
+        try:
+            self._readers.remove(reader)
+        except KeyError:
+            return
+        self._checkLoop()
+
+
+    def removeWriter(self, writer):
+        """
+        Remove a C{FileDescriptor} from notification of data available to
+        write.
+        """
+        try:
+            self._writers.remove(writer)
+        except KeyError:
+            return
+        self._checkLoop()
+
+
+    def removeAll(self):
+        """
+        Remove all readers and writers.
+        """
+        result = list(self._readers | self._writers)
+        # Don't reset to new value, since self.isWriting and .isReading refer
+        # to the existing instance:
+        self._readers.clear()
+        self._writers.clear()
+        return result
+
+
+    def getReaders(self):
+        """
+        Return a list of the readers.
+        """
+        return list(self._readers)
+
+
+    def getWriters(self):
+        """
+        Return a list of the writers.
+        """
+        return list(self._writers)
+
+
+    def isReading(self, fd):
+        """
+        Checks if the file descriptor is currently being observed for read
+        readiness.
+
+        @param fd: The file descriptor being checked.
+        @type fd: L{twisted.internet.abstract.FileDescriptor}
+        @return: C{True} if the file descriptor is being observed for read
+            readiness, C{False} otherwise.
+        @rtype: C{bool}
+        """
+        return fd in self._readers
+
+
+    def isWriting(self, fd):
+        """
+        Checks if the file descriptor is currently being observed for write
+        readiness.
+
+        @param fd: The file descriptor being checked.
+        @type fd: L{twisted.internet.abstract.FileDescriptor}
+        @return: C{True} if the file descriptor is being observed for write
+            readiness, C{False} otherwise.
+        @rtype: C{bool}
+        """
+        return fd in self._writers
+
+
 
 if tls is not None or ssl is not None:
     classImplements(PosixReactorBase, IReactorSSL)
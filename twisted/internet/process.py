@@ -46,7 +46,7 @@ from twisted.python.compat import items, xrange, _PY3
 from twisted.internet import fdesc, abstract, error
 from twisted.internet.main import CONNECTION_LOST, CONNECTION_DONE
 from twisted.internet._baseprocess import BaseProcess
-from twisted.internet.interfaces import IProcessTransport
+from twisted.internet.interfaces import IProcessTransport, IReadDescriptor
 
 # Some people were importing this, which is incorrect, just keeping it
 # here for backwards compatibility:
@@ -57,7 +57,37 @@ reapProcessHandlers = {}
 def reapAllProcesses():
     """
     Reap all registered processes.
+
+    Where C{waitid} is available, the exited children are found with
+    C{waitid(P_ALL, 0, WEXITED | WNOHANG | WNOWAIT)} and only the processes
+    registered for them are reaped, which costs a few system calls per exited
+    child rather than one per registered process.  C{WNOWAIT} leaves the
+    children in a waitable state, so that a child which was not registered
+    here, such as one started by the C{subprocess} module, is never reaped:
+    when one is found, every registered process is tried instead.
     """
+    waitid = getattr(os, "waitid", None)
+    if waitid is not None:
+        while True:
+            try:
+                result = waitid(
+                    os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except OSError as e:
+                if e.errno == errno.ECHILD:
+                    # No child process at all.
+                    return
+                break
+            if result is None:
+                # No child process has exited.
+                return
+            pid = result.si_pid
+            process = reapProcessHandlers.get(pid)
+            if process is None:
+                break
+            process.reapProcess()
+            if reapProcessHandlers.get(pid) is process:
+                # The process could not be reaped, it would be found again.
+                break
     # Coerce this to a list, as reaping the process changes the dictionary and
     # causes a "size changed during iteration" exception
     for process in list(reapProcessHandlers.values()):
@@ -298,12 +328,103 @@ class ProcessReader(abstract.FileDescriptor):
         self.proc.childConnectionLost(self.name, reason)
 
 
+@implementer(IReadDescriptor)
+class _ProcessExitWatcher(object):
+    """
+    Reap a process as soon as its pidfd becomes readable, which happens when
+    it exits, without waiting for C{SIGCHLD}.
+
+    @ivar reactor: The reactor the pidfd is registered with.
+    @ivar process: The L{_BaseProcess} to reap.
+    @ivar fd: The pidfd of the process, or L{None} once it is closed.
+    """
+
+    def __init__(self, reactor, process, fd):
+        self.reactor = reactor
+        self.process = process
+        self.fd = fd
+
+
+    def startWatching(self):
+        """
+        Register the pidfd with the reactor.
+        """
+        self.reactor.addReader(self)
+
+
+    def stopWatching(self):
+        """
+        Unregister and close the pidfd, if this was not done already.
+        """
+        if self.fd is not None:
+            self.reactor.removeReader(self)
+            os.close(self.fd)
+            self.fd = None
+
+
+    def fileno(self):
+        """
+        @return: The pidfd, or C{-1} once it is closed.
+        """
+        if self.fd is None:
+            return -1
+        return self.fd
+
+
+    def doRead(self):
+        """
+        The process has exited: reap it.
+        """
+        self.stopWatching()
+        self.process.reapProcess()
+
+
+    def connectionLost(self, reason):
+        """
+        The reactor is done with the pidfd: close it.
+        """
+        self.stopWatching()
+
+
+    def logPrefix(self):
+        return "ProcessExitWatcher"
+
+
+
 class _BaseProcess(BaseProcess, object):
     """
     Base class for Process and PTYProcess.
+
+    @cvar usePidfd: If true and C{os.pidfd_open} is available (Linux 5.3 and
+        Python 3.9 or later), a pidfd is opened for each process and
+        registered with the reactor, which reaps the process as soon as it
+        exits.  Processes are then reaped even if no C{SIGCHLD} handler is
+        installed, at the cost of one more file descriptor per process.
     """
     status = None
     pid = None
+    usePidfd = False
+    _exitWatcher = None
+
+
+    def _watchExit(self, reactor):
+        """
+        Start watching the pidfd of the process, if L{usePidfd} is set and
+        the process is not reaped already.
+
+        @param reactor: The reactor to register the pidfd with.
+        """
+        pidfdOpen = getattr(os, "pidfd_open", None)
+        if (not self.usePidfd or pidfdOpen is None
+                or reapProcessHandlers.get(self.pid) is not self):
+            return
+        try:
+            fd = pidfdOpen(self.pid)
+        except OSError:
+            return
+        self._exitWatcher = _ProcessExitWatcher(reactor, self, fd)
+        self._exitWatcher.startWatching()
+
 
     def reapProcess(self):
         """
@@ -332,6 +453,9 @@ class _BaseProcess(BaseProcess, object):
             log.err()
             pid = None
         if pid:
+            if self._exitWatcher is not None:
+                self._exitWatcher.stopWatching()
+                self._exitWatcher = None
             self.processEnded(status)
             unregisterReapProcessHandler(pid, self)
 
@@ -638,6 +762,86 @@ def _listOpenFDs():
     return detector._listOpenFDs()
 
 
+
+_PS_CLOSE = getattr(os, "POSIX_SPAWN_CLOSE", None)
+_PS_DUP2 = getattr(os, "POSIX_SPAWN_DUP2", None)
+
+def _spawnFileActions(openFDs, fdmap):
+    """
+    Compute the file actions which leave a child process started with
+    C{posix_spawn} with the file descriptors L{Process._setupChild} leaves a
+    forked child with.
+
+    Whether the descriptors of the parent are closed on exec is not looked
+    up, which would take a system call for each of them in the parent:
+    every descriptor not given to the child is closed, and closing one
+    which is closed on exec or not open at all is harmless.
+
+    @param openFDs: The file descriptors which may be open in the parent.
+    @type openFDs: iterable of L{int}
+
+    @param fdmap: Map the file descriptors of the child to the file
+        descriptors of the parent they are copies of.
+    @type fdmap: L{dict}
+
+    @return: The file actions, for the C{file_actions} argument of
+        C{os.posix_spawn}.
+    @rtype: L{list} of L{tuple}
+    """
+    openFDs = sorted(openFDs)
+    sources = set(fdmap.values())
+
+    # Close the descriptors which are not needed.
+    actions = [(_PS_CLOSE, fd) for fd in openFDs if fd not in sources]
+
+    spare = max([2] + openFDs + list(fdmap) + list(sources)) + 1
+    remaining = dict(fdmap)
+    for child in sorted(fdmap):
+        target = remaining.pop(child)
+        if target == child:
+            # The descriptor may be closed on exec, which dup2 leaves set
+            # when copying a descriptor onto itself, so go through a spare
+            # descriptor.
+            actions.extend([
+                (_PS_DUP2, child, spare), (_PS_DUP2, spare, child)])
+            sources.add(spare)
+            spare += 1
+            continue
+        if child in remaining.values():
+            # Another descriptor of the child is a copy of the one about to
+            # be replaced: keep it in a spare descriptor.
+            actions.append((_PS_DUP2, child, spare))
+            for other, parent in items(remaining):
+                if parent == child:
+                    remaining[other] = spare
+            sources.add(spare)
+            spare += 1
+        actions.append((_PS_DUP2, target, child))
+
+    # Close the descriptors copied to those of the child.
+    for fd in sorted(sources.difference(fdmap)):
+        actions.append((_PS_CLOSE, fd))
+    return actions
+
+
+
+def _spawnExecutable(executable, environment):
+    """
+    Find the file C{os.execvpe} would execute for C{executable} in
+    C{environment}.
+
+    @return: The path of the file, or L{None} if there is none.
+    """
+    if os.path.dirname(executable):
+        return executable
+    for directory in os.get_exec_path(environment):
+        candidate = os.path.join(
+            os.fsencode(directory), os.fsencode(executable))
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
 @implementer(IProcessTransport)
 class Process(_BaseProcess):
     """
@@ -648,13 +852,18 @@ class Process(_BaseProcess):
     standard output, and standard error, or any other file descriptor.
 
     On UNIX, this is implemented using fork(), exec(), pipe()
-    and fcntl(). These calls may not exist elsewhere so this
+    and fcntl(), or posix_spawn() instead of fork() and exec() where
+    possible. These calls may not exist elsewhere so this
     code is not cross-platform. (also, windows can only select
     on sockets...)
     """
     debug = False
     debug_child = False
 
+    # Whether to start the process with posix_spawn() when nothing requires
+    # fork().
+    _usePosixSpawn = True
+
     status = -1
     pid = None
 
@@ -728,7 +937,10 @@ class Process(_BaseProcess):
             if debug: print("helpers", helpers)
             # the child only cares about fdmap.values()
 
-            self._fork(path, uid, gid, executable, args, environment, fdmap=fdmap)
+            if not self._trySpawnInsteadOfFork(
+                    path, uid, gid, executable, args, environment, fdmap):
+                self._fork(path, uid, gid, executable, args, environment,
+                           fdmap=fdmap)
         except:
             for pipe in _openedPipes:
                 os.close(pipe)
@@ -762,6 +974,52 @@ class Process(_BaseProcess):
         # callback.  That's probably not ideal.  The replacement API for
         # spawnProcess should improve upon this situation.
         registerReapProcessHandler(self.pid, self)
+        self._watchExit(reactor)
+
+
+    def _trySpawnInsteadOfFork(self, path, uid, gid, executable, args,
+                               environment, fdmap):
+        """
+        Start the process with C{posix_spawn} instead of L{_fork}, if
+        possible.
+
+        Unlike C{fork}, C{posix_spawn} does not copy the memory mappings of
+        this process, so it is much faster for large processes.  It is only used when the
+        process runs with the same user, group and directory as this one, and
+        when L{_setupChild} and L{_execChild} are not overridden.
+
+        @return: Whether the process was started.
+        @rtype: L{bool}
+        """
+        posixSpawn = getattr(os, "posix_spawn", None)
+        if (posixSpawn is None or not self._usePosixSpawn or
+                self.debug_child or uid is not None or gid is not None):
+            return False
+        if (path is not None and
+                os.fsdecode(os.path.abspath(path)) != os.getcwd()):
+            return False
+        if (self._setupChild.__func__ is not Process._setupChild or
+                self._execChild.__func__ is not _BaseProcess._execChild):
+            return False
+
+        if environment is None:
+            environment = os.environ
+        executable = _spawnExecutable(executable, environment)
+        if executable is None:
+            return False
+
+        ignored = [signalnum for signalnum in xrange(1, signal.NSIG)
+                   if signal.getsignal(signalnum) == signal.SIG_IGN]
+        try:
+            self.pid = posixSpawn(
+                executable, args, environment,
+                file_actions=_spawnFileActions(_listOpenFDs(), fdmap),
+                setsigdef=ignored)
+        except OSError:
+            # Fork instead, so the error is reported by the child as usual.
+            return False
+        self.status = -1
+        return True
 
 
     def _setupChild(self, fdmap):
@@ -1019,6 +1277,7 @@ class PTYProcess(abstract.FileDescriptor, _BaseProcess):
         except:
             log.err()
         registerReapProcessHandler(self.pid, self)
+        self._watchExit(reactor)
 
 
     def _setupChild(self, masterfd, slavefd):
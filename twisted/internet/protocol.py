@@ -726,6 +726,22 @@ class AbstractDatagramProtocol:
         @param addr: tuple of source of datagram.
         """
 
+    def datagramsReceived(self, datagrams):
+        """Called with the datagrams received in one read of the transport.
+
+        Override this to handle several datagrams at once; by default
+        L{datagramReceived} is called for each of them, and the exceptions it
+        raises are logged.
+
+        @param datagrams: a C{list} of C{(datagram, addr)} tuples, in the
+            order the datagrams were received.
+        """
+        for datagram, addr in datagrams:
+            try:
+                self.datagramReceived(datagram, addr)
+            except:
+                log.err()
+
 
 @implementer(interfaces.ILoggingContext)
 class DatagramProtocol(AbstractDatagramProtocol):
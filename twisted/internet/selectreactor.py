@@ -130,8 +130,25 @@ class SelectReactor(posixbase.PosixReactorBase, _extraBase):
                 # OK, I really don't know what's going on.  Blow up.
                 raise
 
+        if r or w:
+            log._callWithLazyLogger(self._dispatchEvents, r, w)
+
+    doIteration = doSelect
+
+
+    def _dispatchEvents(self, lazyContext, r, w):
+        """
+        Handle the selectables returned by C{select}, with C{lazyContext} as
+        the log context so that the log prefix of each selectable is only
+        computed if something is logged while handling it.
+
+        @param lazyContext: The log context to set the logger of.
+        @type lazyContext: L{twisted.python.log._LazyLoggerContext}
+
+        @param r: The selectables ready for reading.
+        @param w: The selectables ready for writing.
+        """
         _drdw = self._doReadOrWrite
-        _logrun = log.callWithLogger
         for selectables, method, fdset in ((r, "doRead", self._reads),
                                            (w,"doWrite", self._writes)):
             for selectable in selectables:
@@ -140,9 +157,15 @@ class SelectReactor(posixbase.PosixReactorBase, _extraBase):
                 if selectable not in fdset:
                     continue
                 # This for pausing input when we're not ready for more.
-                _logrun(selectable, _drdw, selectable, method)
+                lazyContext.logger = selectable
+                try:
+                    _drdw(selectable, method)
+                except KeyboardInterrupt:
+                    raise
+                except:
+                    log.err()
+        lazyContext.logger = None
 
-    doIteration = doSelect
 
     def _doReadOrWrite(self, selectable, method):
         try:
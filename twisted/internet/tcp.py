@@ -11,12 +11,14 @@ End users shouldn't use this module directly - use the reactor APIs instead.
 from __future__ import division, absolute_import
 
 # System Imports
+import os
 import socket
 import sys
 import operator
 import struct
+from collections import deque
 
-from zope.interface import implementer
+from zope.interface import classImplements, implementer
 
 from twisted.python.compat import _PY3, lazyByteSlice
 from twisted.python.runtime import platformType
@@ -78,13 +80,15 @@ else:
     from os import strerror
 
 
-from errno import errorcode
+from errno import errorcode, ENOPROTOOPT
 
 # Twisted Imports
 from twisted.internet import base, address, fdesc
+from twisted.internet.defer import Deferred, fail
 from twisted.internet.task import deferLater
 from twisted.python import log, failure, reflect
 from twisted.python.util import untilConcludes
+from twisted.python._accept4 import accept as _accept4
 from twisted.internet.error import CannotListenError
 from twisted.internet import abstract, main, interfaces, error
 from twisted.internet.protocol import Protocol
@@ -92,6 +96,27 @@ from twisted.internet.protocol import Protocol
 # Not all platforms have, or support, this flag.
 _AI_NUMERICSERV = getattr(socket, "AI_NUMERICSERV", 0)
 
+# Whether sockets can send several buffers with one sendmsg(2) call (socket
+# objects only have a sendmsg method on Python 3, on POSIX platforms).
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+# The largest number of buffers sendmsg(2) accepts at once.  16 is the minimum
+# POSIX guarantees.
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+if _IOV_MAX < 16:
+    _IOV_MAX = 16
+
+# Whether file contents can be copied to a socket by the kernel, with
+# sendfile(2) (only available on Python 3, on some POSIX platforms).
+_HAS_SENDFILE = hasattr(os, "sendfile")
+
+# The largest number of bytes to ask sendfile(2) for at once.  Linux never
+# transfers more than this in a single call anyway.
+_SENDFILE_LIMIT = 0x7ffff000
+
 
 # The type for service names passed to socket.getservbyname:
 if _PY3:
@@ -162,6 +187,30 @@ class _AbortingMixin(object):
 
 
 
+class _SendFileRange(object):
+    """
+    The part of a file which L{Connection.sendFile} still has to send.
+
+    @ivar fileno: The file descriptor of the file.
+    @type fileno: L{int}
+
+    @ivar offset: The position in the file of the next byte to send.
+    @type offset: L{int}
+
+    @ivar remaining: The number of bytes left to send.
+    @type remaining: L{int}
+
+    @ivar deferred: The L{Deferred} to fire once all the bytes are sent.
+    """
+
+    def __init__(self, fileno, offset, remaining, deferred):
+        self.fileno = fileno
+        self.offset = offset
+        self.remaining = remaining
+        self.deferred = deferred
+
+
+
 @implementer(interfaces.ITCPTransport, interfaces.ISystemHandle)
 class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
                  _AbortingMixin):
@@ -173,13 +222,43 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
 
     @ivar logstr: prefix used when logging events related to this connection.
     @type logstr: C{str}
+
+    @ivar _readBuffer: L{None}, or the L{bytearray} data is read into for
+        protocols providing L{interfaces.IBufferReceiver}.
+
+    @ivar _readView: A L{memoryview} of C{_readBuffer}, if it exists.
+
+    @ivar _sendFileRange: L{None}, or the L{_SendFileRange} describing the
+        part of a file L{sendFile} has not sent yet.
+
+    @ivar _readBlocked: Set to C{True} when reading from the socket fails
+        with C{EWOULDBLOCK} or gets less than was asked for, meaning that
+        everything it had received has been read, for the benefit of
+        edge-triggered reactors, which reset it before calling L{doRead}.
+
+    @ivar _writeBlocked: Like C{_readBlocked}, for writing to the socket:
+        set when it fails with C{EWOULDBLOCK} or sends less than was asked
+        for, meaning that the send buffer of the socket is full, and when it
+        fails with C{ENOBUFS}, so that edge-triggered reactors do not retry
+        it in a loop.
+
+    @ivar _edgeTriggerable: Whether edge-triggered reactors may register this
+        connection as such, which is the case as long as L{doRead} and
+        L{doWrite} set C{_readBlocked} and C{_writeBlocked}.
     """
+    _readBuffer = None
+    _readView = None
+    _sendFileRange = None
+    _readBlocked = False
+    _writeBlocked = False
+    _edgeTriggerable = True
 
 
     def __init__(self, skt, protocol, reactor=None):
         abstract.FileDescriptor.__init__(self, reactor=reactor)
         self.socket = skt
-        self.socket.setblocking(0)
+        if skt.gettimeout() != 0:
+            self.socket.setblocking(0)
         self.fileno = skt.fileno
         self.protocol = protocol
 
@@ -196,18 +275,51 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         calls self.dataReceived(data) to process it.  If the connection is not
         lost through an error in the physical recv(), this function will return
         the result of the dataReceived call.
+
+        If the protocol provides L{interfaces.IBufferReceiver}, the data is
+        read into a buffer allocated once for this connection and the
+        protocol is given a L{memoryview} of it.
         """
+        if interfaces.IBufferReceiver.providedBy(self.protocol):
+            return self._doReadInto()
         try:
             data = self.socket.recv(self.bufferSize)
         except socket.error as se:
             if se.args[0] == EWOULDBLOCK:
+                self._readBlocked = True
                 return
             else:
                 return main.CONNECTION_LOST
 
+        if len(data) < self.bufferSize:
+            self._readBlocked = True
         return self._dataReceived(data)
 
 
+    def _doReadInto(self):
+        """
+        Read up to C{self.bufferSize} bytes into C{self._readBuffer} and pass
+        a L{memoryview} of them to the protocol.
+
+        @see: L{doRead}
+        """
+        if self._readBuffer is None:
+            self._readBuffer = bytearray(self.bufferSize)
+            self._readView = memoryview(self._readBuffer)
+        try:
+            size = self.socket.recv_into(self._readBuffer)
+        except socket.error as se:
+            if se.args[0] == EWOULDBLOCK:
+                self._readBlocked = True
+                return
+            else:
+                return main.CONNECTION_LOST
+
+        if size < self.bufferSize:
+            self._readBlocked = True
+        return self._dataReceived(self._readView[:size])
+
+
     def _dataReceived(self, data):
         if not data:
             return main.CONNECTION_DONE
@@ -237,12 +349,130 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         limitedData = lazyByteSlice(data, 0, self.SEND_LIMIT)
 
         try:
-            return untilConcludes(self.socket.send, limitedData)
+            sent = untilConcludes(self.socket.send, limitedData)
         except socket.error as se:
             if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                self._writeBlocked = True
                 return 0
             else:
                 return main.CONNECTION_LOST
+        if sent < len(limitedData):
+            self._writeBlocked = True
+        return sent
+
+
+    def doWrite(self):
+        """
+        Called when data can be written.
+
+        If the platform supports it, the buffered byte strings are sent with a
+        single C{sendmsg} call instead of being joined into one string first.
+        Once they have all been sent, the file given to L{sendFile}, if any,
+        is sent.
+
+        @see: L{abstract.FileDescriptor._doWriteSequence}
+        """
+        if (self._sendFileRange is not None and
+                self.offset == len(self.dataBuffer) and
+                not self._tempDataLen):
+            return self._doSendFile()
+        if _HAS_SENDMSG:
+            return self._doWriteSequence(_IOV_MAX)
+        return abstract.FileDescriptor.doWrite(self)
+
+
+    if _HAS_SENDMSG:
+        def _writeSomeDataSequence(self, buffers):
+            """
+            Write as much as possible of the given buffers to this TCP
+            connection with a single C{sendmsg} call.
+
+            @see: L{abstract.FileDescriptor._writeSomeDataSequence}
+            """
+            try:
+                sent = untilConcludes(self.socket.sendmsg, buffers)
+            except socket.error as se:
+                if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                    self._writeBlocked = True
+                    return 0
+                else:
+                    return main.CONNECTION_LOST
+            if sent < sum(map(len, buffers)):
+                self._writeBlocked = True
+            return sent
+
+
+    def sendFile(self, fileObject, offset, count):
+        """
+        Send part of a file with C{sendfile(2)}, once the data already written
+        has been sent.
+
+        @see: L{interfaces.ISendFileTransport.sendFile}
+
+        @raise RuntimeError: If TLS has been started on this connection, or if
+            a previous call has not completed yet.
+        """
+        if self.TLS:
+            raise RuntimeError("Cannot send a file over a TLS connection.")
+        if self._sendFileRange is not None:
+            raise RuntimeError("A file is already being sent.")
+        if (not self.connected or self.disconnecting or
+                self._writeDisconnected):
+            return fail(error.ConnectionLost())
+        d = Deferred()
+        if count <= 0:
+            d.callback(None)
+            return d
+        self._sendFileRange = _SendFileRange(
+            fileObject.fileno(), offset, count, d)
+        self.startWriting()
+        return d
+
+
+    def _doSendFile(self):
+        """
+        Send as much as possible of the file given to L{sendFile}.
+
+        @return: L{None} on success, an exception or a negative integer on
+            failure.
+        """
+        fileRange = self._sendFileRange
+        try:
+            sent = untilConcludes(
+                os.sendfile, self.socket.fileno(), fileRange.fileno,
+                fileRange.offset, min(fileRange.remaining, _SENDFILE_LIMIT))
+        except (OSError, IOError) as e:
+            if e.errno in (EWOULDBLOCK, ENOBUFS):
+                self._writeBlocked = True
+                return None
+            self._sendFileRange = None
+            fileRange.deferred.errback(failure.Failure())
+            return main.CONNECTION_LOST
+        if not sent:
+            # The file is shorter than promised: the peer will never get the
+            # bytes it expects, so the connection cannot be used any more.
+            self._sendFileRange = None
+            fileRange.deferred.errback(failure.Failure(IOError(
+                "End of file reached with %d bytes left to send."
+                % (fileRange.remaining,))))
+            return main.CONNECTION_LOST
+        fileRange.offset += sent
+        fileRange.remaining -= sent
+        if fileRange.remaining:
+            return None
+        self._sendFileRange = None
+        fileRange.deferred.callback(None)
+        return self._maybeWriteFinished()
+
+
+    def _maybeWriteFinished(self):
+        """
+        Keep writing while a file given to L{sendFile} still has to be sent,
+        otherwise behave like L{abstract.FileDescriptor._maybeWriteFinished}.
+        """
+        if self._sendFileRange is not None:
+            return None
+        return abstract.FileDescriptor._maybeWriteFinished(self)
 
 
     def _closeWriteConnection(self):
@@ -284,6 +514,10 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         if not hasattr(self, "socket"):
             return
         abstract.FileDescriptor.connectionLost(self, reason)
+        fileRange = self._sendFileRange
+        if fileRange is not None:
+            self._sendFileRange = None
+            fileRange.deferred.errback(reason)
         self._closeSocket(not reason.check(error.ConnectionAborted))
         protocol = self.protocol
         del self.protocol
@@ -314,6 +548,10 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
 
 
 
+if _HAS_SENDFILE:
+    classImplements(Connection, interfaces.ISendFileTransport)
+
+
 
 class _BaseBaseClient(object):
     """
@@ -541,6 +779,7 @@ class BaseClient(_BaseBaseClient, _TLSClientMixin, Connection):
         """
         self.doWrite = self.doConnect
         self.doRead = self.doConnect
+        self._edgeTriggerable = False
         if not hasattr(self, "connector"):
             # this happens when connection failed but doConnect
             # was scheduled via a callLater in self._finishInit
@@ -580,6 +819,7 @@ class BaseClient(_BaseBaseClient, _TLSClientMixin, Connection):
         # that the socket is connected.
         del self.doWrite
         del self.doRead
+        del self._edgeTriggerable
         # we first stop and then start, to reset any references to the old doRead
         self.stopReading()
         self.stopWriting()
@@ -891,6 +1131,40 @@ class Port(base.BasePort, _SocketCloser):
         was created and initialized outside of the reactor and will be used to
         listen for connections (instead of a new socket being created by this
         L{Port}).
+
+    @ivar reusePort: If true, the socket is created with C{SO_REUSEPORT} so
+        that several sockets, usually in several processes, can listen on the
+        same address and port, the kernel balancing the connections between
+        them.
+    @type reusePort: C{bool}
+
+    @ivar numberAccepts: The number of connections L{doRead} tries to
+        accept, grown by 20 each time it accepts them all, up to
+        C{maxAccepts}, and shrunk to the number accepted otherwise.
+
+    @ivar maxAccepts: The maximum number of connections accepted by each
+        call to L{doRead}.
+
+    @ivar maxBuildsPerIteration: The maximum number of accepted connections
+        for which a protocol and a transport are built in each reactor
+        iteration, so that a flood of new connections cannot starve the
+        established ones.  The remaining ones wait in C{_pendingConnections}
+        for the next iterations.
+
+    @ivar maxPendingConnections: The maximum number of accepted connections
+        waiting in C{_pendingConnections}.  When it is reached, the reactor
+        is not keeping up with the new connections and those accepted are
+        passed to L{shedConnection}.
+
+    @ivar _pendingConnections: A C{deque} of the C{(socket, address)} pairs
+        of the accepted connections whose protocol and transport have not
+        been built yet.
+
+    @ivar _buildCall: The L{IDelayedCall} building the pending connections
+        in the next reactor iteration, or L{None}.
+
+    @ivar _shed: The number of connections shed since the port last started
+        shedding them, or L{None} if it is not shedding them.
     """
 
     socketType = socket.SOCK_STREAM
@@ -899,8 +1173,14 @@ class Port(base.BasePort, _SocketCloser):
     sessionno = 0
     interface = ''
     backlog = 50
+    reusePort = False
+    maxAccepts = 1000
+    maxBuildsPerIteration = 100
+    maxPendingConnections = 1000
 
     _type = 'TCP'
+    _buildCall = None
+    _shed = None
 
     # Actual port number being listened on, only set to a non-None
     # value when we are actually listening.
@@ -913,7 +1193,8 @@ class Port(base.BasePort, _SocketCloser):
     addressFamily = socket.AF_INET
     _addressType = address.IPv4Address
 
-    def __init__(self, port, factory, backlog=50, interface='', reactor=None):
+    def __init__(self, port, factory, backlog=50, interface='', reactor=None,
+                 reusePort=False):
         """Initialize with a numeric port to listen on.
         """
         base.BasePort.__init__(self, reactor=reactor)
@@ -924,6 +1205,8 @@ class Port(base.BasePort, _SocketCloser):
             self.addressFamily = socket.AF_INET6
             self._addressType = address.IPv6Address
         self.interface = interface
+        self.reusePort = reusePort
+        self._pendingConnections = deque()
 
 
     @classmethod
@@ -961,6 +1244,12 @@ class Port(base.BasePort, _SocketCloser):
         s = base.BasePort.createInternetSocket(self)
         if platformType == "posix" and sys.platform != "cygwin":
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reusePort:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                s.close()
+                raise socket.error(
+                    ENOPROTOOPT, "SO_REUSEPORT is not supported")
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         return s
 
 
@@ -1015,8 +1304,9 @@ class Port(base.BasePort, _SocketCloser):
     def doRead(self):
         """Called when my socket is ready for reading.
 
-        This accepts a connection and calls self.protocol() to handle the
-        wire-level protocol.
+        This accepts connections and builds a protocol and a transport for
+        up to C{maxBuildsPerIteration} of them, leaving the others for the
+        next reactor iterations.
         """
         try:
             if platformType == "posix":
@@ -1031,7 +1321,7 @@ class Port(base.BasePort, _SocketCloser):
                 if self.disconnecting:
                     return
                 try:
-                    skt, addr = self.socket.accept()
+                    skt, addr = self._accept()
                 except socket.error as e:
                     if e.args[0] in (EWOULDBLOCK, EAGAIN):
                         self.numberAccepts = i
@@ -1062,17 +1352,10 @@ class Port(base.BasePort, _SocketCloser):
                         break
                     raise
 
-                fdesc._setCloseOnExec(skt.fileno())
-                protocol = self.factory.buildProtocol(self._buildAddr(addr))
-                if protocol is None:
-                    skt.close()
-                    continue
-                s = self.sessionno
-                self.sessionno = s+1
-                transport = self.transport(skt, protocol, addr, self, s, self.reactor)
-                protocol.makeConnection(transport)
+                self._queueConnection(skt, addr)
             else:
-                self.numberAccepts = self.numberAccepts+20
+                self.numberAccepts = min(
+                    self.numberAccepts + 20, self.maxAccepts)
         except:
             # Note that in TLS mode, this will possibly catch SSL.Errors
             # raised by self.socket.accept()
@@ -1082,6 +1365,114 @@ class Port(base.BasePort, _SocketCloser):
             # "except SSL.Error:" suite would probably do is log.deferr()
             # and return, so handling it here works just as well.
             log.deferr()
+        if self._buildCall is None:
+            self._buildConnections()
+
+
+    def _accept(self):
+        """
+        Accept a connection, with accept4 if it is available.  Objects
+        standing for the listening socket which are not L{socket.socket}
+        instances are accepted from with their own C{accept} method.
+
+        @return: The socket of the connection and the address of the peer.
+        """
+        if (_accept4 is not None and isinstance(self.socket, socket.socket)
+                and self.addressFamily in (socket.AF_INET, socket.AF_INET6)):
+            return _accept4(self.socket)
+        return self.socket.accept()
+
+
+    def _queueConnection(self, skt, addr):
+        """
+        Queue an accepted connection for L{_buildConnections}, or shed it if
+        C{maxPendingConnections} are already queued.
+
+        @param skt: The socket of the connection.
+        @type skt: L{socket.socket}
+
+        @param addr: The address of the peer, as returned by C{accept}.
+        """
+        if len(self._pendingConnections) < self.maxPendingConnections:
+            self._pendingConnections.append((skt, addr))
+            return
+        if self._shed is None:
+            log.msg("%s is saturated, shedding new connections" % (
+                self._getLogPrefix(self.factory),))
+            self._shed = 0
+        self._shed += 1
+        self.shedConnection(skt, addr)
+
+
+    def _buildConnections(self):
+        """
+        Build a protocol and a transport for up to C{maxBuildsPerIteration}
+        pending connections, and arrange to build the remaining ones in the
+        next reactor iteration.
+        """
+        self._buildCall = None
+        pending = self._pendingConnections
+        for i in range(min(len(pending), self.maxBuildsPerIteration)):
+            if self.disconnecting:
+                return
+            skt, addr = pending.popleft()
+            try:
+                self._connectionAccepted(skt, addr)
+            except:
+                log.deferr()
+        if self._shed is not None and (
+                len(pending) < self.maxPendingConnections):
+            log.msg("%s stopped shedding new connections, %d were shed" % (
+                self._getLogPrefix(self.factory), self._shed))
+            self._shed = None
+        if pending and not self.disconnecting:
+            self._buildCall = self.reactor.callLater(
+                0, self._buildConnections)
+
+
+    def shedConnection(self, skt, addr):
+        """
+        Get rid of a connection accepted while C{maxPendingConnections}
+        connections were waiting to be built.
+
+        By default, the connection is reset, so that the peer knows at once
+        that it should try again later.  Override this method to handle it
+        differently.
+
+        @param skt: The socket of the connection.
+        @type skt: L{socket.socket}
+
+        @param addr: The address of the peer, as returned by C{accept}.
+        """
+        try:
+            skt.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        except socket.error:
+            pass
+        skt.close()
+
+
+    def _connectionAccepted(self, skt, addr):
+        """
+        Build a protocol and a transport for a connection this port accepted.
+
+        @param skt: The socket of the connection.
+        @type skt: L{socket.socket}
+
+        @param addr: The address of the peer, as returned by C{accept}.
+        """
+        if not _PY3:
+            # Python 3 creates sockets which are closed on exec already.
+            fdesc._setCloseOnExec(skt.fileno())
+        protocol = self.factory.buildProtocol(self._buildAddr(addr))
+        if protocol is None:
+            skt.close()
+            return
+        s = self.sessionno
+        self.sessionno = s+1
+        transport = self.transport(skt, protocol, addr, self, s, self.reactor)
+        protocol.makeConnection(transport)
+
 
     def loseConnection(self, connDone=failure.Failure(main.CONNECTION_DONE)):
         """
@@ -1119,6 +1510,13 @@ class Port(base.BasePort, _SocketCloser):
         self._closeSocket(True)
         del self.socket
         del self.fileno
+        if self._buildCall is not None:
+            self._buildCall.cancel()
+            self._buildCall = None
+        while self._pendingConnections:
+            skt, addr = self._pendingConnections.popleft()
+            skt.close()
+        self._shed = None
 
         try:
             self.factory.doStop()
@@ -145,13 +145,17 @@ class ReactorBuilder:
                 "twisted.internet.glib2reactor.Glib2Reactor",
                 "twisted.internet.gtk2reactor.Gtk2Reactor",
                 "twisted.internet.gireactor.GIReactor",
-                "twisted.internet.gtk3reactor.Gtk3Reactor"])
+                "twisted.internet.gtk3reactor.Gtk3Reactor",
+                "twisted.internet.asyncioreactor.AsyncioSelectorReactor"])
         if platform.isMacOSX():
             _reactors.append("twisted.internet.cfreactor.CFReactor")
         else:
             _reactors.extend([
                     "twisted.internet.pollreactor.PollReactor",
-                    "twisted.internet.epollreactor.EPollReactor"])
+                    "twisted.internet.epollreactor.EPollReactor",
+                    "twisted.internet.epollreactor."
+                    "EdgeTriggeredEPollReactor",
+                    "twisted.internet.iouringreactor.IOUringReactor"])
             if not platform.isLinux():
                 # Presumably Linux is not going to start supporting kqueue, so
                 # skip even trying this configuration.
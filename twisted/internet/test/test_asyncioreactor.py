@@ -0,0 +1,192 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet.asyncioreactor}.
+"""
+
+from __future__ import division, absolute_import
+
+import threading
+import time
+
+from twisted.trial.unittest import TestCase
+from twisted.internet import defer, main
+from twisted.internet.abstract import FileDescriptor
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+else:
+    from twisted.internet import asyncioreactor
+
+
+
+class AsyncioSelectorReactorTests(TestCase):
+    """
+    Tests for L{asyncioreactor.AsyncioSelectorReactor}.
+    """
+    if asyncio is None:
+        skip = "asyncio is not available."
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.reactor = asyncioreactor.AsyncioSelectorReactor(self.loop)
+        self.addCleanup(self.reactor.disconnectAll)
+
+
+    def runReactor(self):
+        """
+        Run the reactor, stopping it after 10 seconds if nothing did before.
+        """
+        timeout = self.reactor.callLater(10, self.reactor.stop)
+        self.reactor.run(installSignalHandlers=False)
+        self.assertTrue(timeout.active(), "The reactor did not stop.")
+        timeout.cancel()
+
+
+    def test_defaultEventloop(self):
+        """
+        L{asyncioreactor.AsyncioSelectorReactor} runs on the current event
+        loop by default.
+        """
+        self.patch(asyncioreactor, "get_event_loop", lambda: self.loop)
+        reactor = asyncioreactor.AsyncioSelectorReactor()
+        self.assertIs(reactor._asyncioEventloop, self.loop)
+
+
+    def test_sharedEventloop(self):
+        """
+        Callbacks of the event loop run while the reactor runs, interleaved
+        with its calls.
+        """
+        events = []
+        def asyncioCall():
+            events.append("asyncio")
+            self.reactor.callLater(0, twistedCall)
+        def twistedCall():
+            events.append("twisted")
+            self.reactor.stop()
+        self.loop.call_soon(asyncioCall)
+        self.runReactor()
+        self.assertEqual(events, ["asyncio", "twisted"])
+
+
+    def test_coroutineAwaitingDeferred(self):
+        """
+        An C{asyncio} task can wait for a L{defer.Deferred} adapted with
+        L{defer.Deferred.asFuture}, fired by the reactor.
+        """
+        results = []
+        d = defer.Deferred()
+        future = d.asFuture(self.loop)
+        future.add_done_callback(
+            lambda future: results.append(future.result()))
+        future.add_done_callback(lambda future: self.reactor.stop())
+        self.reactor.callLater(0.01, d.callback, 3)
+        self.runReactor()
+        self.assertEqual(results, [3])
+
+
+    def test_timer(self):
+        """
+        The reactor runs its timed calls with a single callback of the event
+        loop, scheduled for the earliest one.
+        """
+        calls = [self.reactor.callLater(seconds, lambda: None)
+                 for seconds in (3, 1, 2)]
+        self.assertIsNotNone(self.reactor._timerHandle)
+        self.assertEqual(self.reactor._timerTime, calls[1].getTime())
+
+
+    def test_timerRescheduled(self):
+        """
+        Rescheduling a timed call sooner reschedules the callback of the event
+        loop running the timed calls.
+        """
+        call = self.reactor.callLater(10, self.reactor.stop)
+        call.reset(0.01)
+        self.assertEqual(self.reactor._timerTime, call.getTime())
+        start = time.time()
+        self.reactor.run(installSignalHandlers=False)
+        self.assertLess(time.time() - start, 5)
+
+
+    def test_callFromThread(self):
+        """
+        L{asyncioreactor.AsyncioSelectorReactor.callFromThread} wakes the
+        event loop up from another thread.
+        """
+        def stopFromThread():
+            threading.Thread(
+                target=self.reactor.callFromThread,
+                args=(self.reactor.stop,)).start()
+        self.reactor.callWhenRunning(stopFromThread)
+        self.runReactor()
+
+
+    def test_iterate(self):
+        """
+        L{asyncioreactor.AsyncioSelectorReactor.iterate} returns once the
+        reactor has handled something, rather than after the delay.
+        """
+        calls = []
+        self.reactor.callLater(0.01, calls.append, None)
+        start = time.time()
+        self.reactor.iterate(5)
+        self.assertLess(time.time() - start, 4)
+        self.assertEqual(calls, [None])
+
+
+    def test_iterateWithoutDelay(self):
+        """
+        L{asyncioreactor.AsyncioSelectorReactor.iterate} runs the callbacks of
+        the event loop which are ready, once.
+        """
+        calls = []
+        self.loop.call_soon(calls.append, None)
+        self.reactor.iterate()
+        self.assertEqual(calls, [None])
+
+
+    def test_fileDescriptorPolled(self):
+        """
+        A file descriptor the event loop does not support, such as a regular
+        file, is polled continuously instead.
+        """
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(b"data")
+        f = open(path, "rb")
+        self.addCleanup(f.close)
+
+        class Reader(FileDescriptor):
+            def fileno(self):
+                return f.fileno()
+
+            def doRead(self):
+                reactor.stop()
+                return main.CONNECTION_DONE
+
+        reactor = self.reactor
+        reader = Reader(reactor)
+        reactor.addReader(reader)
+        self.assertEqual(reactor.getReaders(), [reader])
+        self.assertIn(reader, reactor._continuousPolling._readers)
+        self.runReactor()
+        self.assertEqual(reactor.getReaders(), [])
+
+
+    def test_install(self):
+        """
+        L{asyncioreactor.install} installs a reactor running on the given
+        event loop.
+        """
+        installed = []
+        self.patch(main, "installReactor", installed.append)
+        asyncioreactor.install(self.loop)
+        [reactor] = installed
+        self.assertIsInstance(reactor, asyncioreactor.AsyncioSelectorReactor)
+        self.assertIs(reactor._asyncioEventloop, self.loop)
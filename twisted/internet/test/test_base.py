@@ -16,7 +16,7 @@ from zope.interface import implementer
 from twisted.python.threadpool import ThreadPool
 from twisted.internet.interfaces import IReactorTime, IReactorThreads
 from twisted.internet.error import DNSLookupError
-from twisted.internet.base import ThreadedResolver, DelayedCall
+from twisted.internet.base import ThreadedResolver, DelayedCall, ReactorBase
 from twisted.internet.task import Clock
 from twisted.trial.unittest import TestCase
 
@@ -270,3 +270,175 @@ class DelayedCallTests(TestCase):
         self.assertTrue(self.zero != self.one)
         self.assertFalse(self.zero != self.zero)
         self.assertFalse(self.one != self.one)
+
+
+
+class _TimeReactor(ReactorBase):
+    """
+    A L{ReactorBase} which never waits for I/O and whose time only passes
+    when its C{now} attribute is changed.
+    """
+    now = 1000.0
+
+    def installWaker(self):
+        pass
+
+
+    def seconds(self):
+        return self.now
+
+
+
+class TimerWheelReactorTests(TestCase):
+    """
+    Tests for the scheduling of timed calls by L{ReactorBase} once
+    L{ReactorBase.installTimerWheel} has been called.
+    """
+    def setUp(self):
+        self.reactor = _TimeReactor()
+        self.reactor.installTimerWheel(resolution=0.5)
+
+
+    def test_callLater(self):
+        """
+        Calls scheduled with C{callLater} run, in order, once their time has
+        come.
+        """
+        calls = []
+        self.reactor.callLater(3, calls.append, 3)
+        self.reactor.callLater(1, calls.append, 1)
+        self.reactor.callLater(200, calls.append, 200)
+        self.assertEqual(self.reactor.timeout(), 1)
+        self.reactor.now += 1
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [1])
+        self.reactor.now += 1000
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [1, 3, 200])
+        self.assertIsNone(self.reactor.timeout())
+
+
+    def test_cancel(self):
+        """
+        A cancelled call is removed from the reactor and never runs, even
+        when cancelled by another call due in the same iteration.
+        """
+        calls = []
+        cancelled = self.reactor.callLater(2, calls.append, "cancelled")
+        self.reactor.callLater(1, cancelled.cancel)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(len(self.reactor.getDelayedCalls()), 2)
+        self.reactor.now += 5
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [])
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_reset(self):
+        """
+        A call can be rescheduled earlier or later with
+        L{DelayedCall.reset}.
+        """
+        calls = []
+        call = self.reactor.callLater(10, calls.append, None)
+        self.reactor.runUntilCurrent()
+        call.reset(2)
+        self.assertEqual(self.reactor.timeout(), 2)
+        call.reset(5)
+        self.reactor.now += 2
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [])
+        self.reactor.now += 3
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [None])
+
+
+    def test_pendingCallsMoved(self):
+        """
+        Calls pending when L{ReactorBase.installTimerWheel} is called are
+        moved to the wheel.
+        """
+        reactor = _TimeReactor()
+        calls = []
+        reactor.callLater(1, calls.append, 1)
+        reactor.runUntilCurrent()
+        reactor.callLater(2, calls.append, 2)
+        reactor.installTimerWheel()
+        self.assertEqual(len(reactor.getDelayedCalls()), 2)
+        reactor.now += 2
+        reactor.runUntilCurrent()
+        self.assertEqual(calls, [1, 2])
+
+
+
+class _CountingWaker(object):
+    """
+    A waker counting how many times it has been asked to wake the reactor
+    up.
+    """
+    wakeUps = 0
+
+    def wakeUp(self):
+        self.wakeUps += 1
+
+
+
+class CallFromThreadTests(TestCase):
+    """
+    Tests for the queueing of calls by L{ReactorBase.callFromThread} and
+    their running by L{ReactorBase.runUntilCurrent}.
+    """
+    def setUp(self):
+        self.reactor = _TimeReactor()
+        self.reactor.waker = self.waker = _CountingWaker()
+
+
+    def test_wakeUpCoalesced(self):
+        """
+        Only the first call made with C{callFromThread} since the calls made
+        from threads last ran wakes the reactor up.
+        """
+        calls = []
+        for i in range(3):
+            self.reactor.callFromThread(calls.append, i)
+        self.assertEqual(self.waker.wakeUps, 1)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [0, 1, 2])
+        self.reactor.callFromThread(calls.append, 3)
+        self.assertEqual(self.waker.wakeUps, 2)
+
+
+    def test_batch(self):
+        """
+        L{ReactorBase.runUntilCurrent} runs at most C{_threadCallBatch} calls
+        made from threads, and wakes the reactor up again to run the
+        remaining ones.
+        """
+        self.reactor._threadCallBatch = 2
+        calls = []
+        for i in range(5):
+            self.reactor.callFromThread(calls.append, i)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [0, 1])
+        self.assertEqual(self.waker.wakeUps, 2)
+        self.reactor.runUntilCurrent()
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, [0, 1, 2, 3, 4])
+        self.assertEqual(self.waker.wakeUps, 3)
+
+
+    def test_callQueuedByCall(self):
+        """
+        A call made with C{callFromThread} by a call made from a thread runs
+        in the next iteration, and wakes the reactor up.
+        """
+        calls = []
+        def call():
+            calls.append("first")
+            self.reactor.callFromThread(calls.append, "second")
+        self.reactor.callFromThread(call)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, ["first"])
+        self.assertEqual(self.waker.wakeUps, 2)
+        self.reactor.runUntilCurrent()
+        self.assertEqual(calls, ["first", "second"])
@@ -1344,6 +1344,60 @@ class TCP4EndpointsTests(EndpointTestCaseMixin, unittest.TestCase):
 
 
 
+class RecordingTCPReactor(object):
+    """
+    A fake L{IReactorTCP} recording the arguments of C{listenTCP}.
+
+    @ivar listened: The C{(args, kwargs)} of each call to C{listenTCP}.
+    """
+    def __init__(self):
+        self.listened = []
+
+
+    def listenTCP(self, *args, **kwargs):
+        self.listened.append((args, kwargs))
+        return object()
+
+
+
+class TCPServerEndpointReusePortTests(unittest.TestCase):
+    """
+    Tests for the C{reusePort} argument of L{TCP4ServerEndpoint} and
+    L{TCP6ServerEndpoint}.
+    """
+
+    def test_reusePort(self):
+        """
+        The endpoints listen with C{reusePort} set when they are created with
+        it.
+        """
+        factory = object()
+        for endpointType, interface in [
+                (endpoints.TCP4ServerEndpoint, ''),
+                (endpoints.TCP6ServerEndpoint, '::')]:
+            reactor = RecordingTCPReactor()
+            endpointType(reactor, 1234, reusePort=True).listen(factory)
+            self.assertEqual(
+                reactor.listened,
+                [((1234, factory),
+                  {'backlog': 50, 'interface': interface,
+                   'reusePort': True})])
+
+
+    def test_noReusePort(self):
+        """
+        By default, the endpoints do not pass C{reusePort} to C{listenTCP},
+        which not every reactor accepts.
+        """
+        factory = object()
+        reactor = RecordingTCPReactor()
+        endpoints.TCP4ServerEndpoint(reactor, 1234).listen(factory)
+        self.assertEqual(
+            reactor.listened,
+            [((1234, factory), {'backlog': 50, 'interface': ''})])
+
+
+
 class TCP6EndpointsTests(EndpointTestCaseMixin, unittest.TestCase):
     """
     Tests for TCP IPv6 Endpoints.
@@ -2386,6 +2440,20 @@ class ParserTests(unittest.TestCase):
             ('TCP', (80, self.f), {'interface': '', 'backlog': 6}))
 
 
+    def test_reusePortTCP(self):
+        """
+        TCP port descriptions parse their 'reusePort' argument as an integer
+        flag, which is only passed on when set.
+        """
+        self.assertEqual(
+            self.parse('tcp:80:reusePort=1', self.f),
+            ('TCP', (80, self.f),
+             {'interface': '', 'backlog': 50, 'reusePort': True}))
+        self.assertEqual(
+            self.parse('tcp:80:reusePort=0', self.f),
+            ('TCP', (80, self.f), {'interface': '', 'backlog': 50}))
+
+
     def test_simpleUNIX(self):
         """
         L{endpoints._parseServer} returns a C{'UNIX'} port description with
@@ -2492,6 +2560,19 @@ class ServerStringTests(unittest.TestCase):
         self.assertEqual(server._interface, "10.0.0.1")
 
 
+    def test_tcpReusePort(self):
+        """
+        The C{reusePort} argument of a TCP strports description sets the
+        C{reusePort} flag of the L{TCP4ServerEndpoint}, which is not set by
+        default.
+        """
+        reactor = object()
+        server = endpoints.serverFromString(reactor, "tcp:1234:reusePort=1")
+        self.assertTrue(server._reusePort)
+        server = endpoints.serverFromString(reactor, "tcp:1234")
+        self.assertFalse(server._reusePort)
+
+
     def test_ssl(self):
         """
         When passed an SSL strports description, L{endpoints.serverFromString}
@@ -3274,6 +3355,17 @@ class TCP6ServerEndpointPluginTests(unittest.TestCase):
         self.assertEqual(ep._port, 8080)
         self.assertEqual(ep._backlog, 12)
         self.assertEqual(ep._interface, '::1')
+        self.assertFalse(ep._reusePort)
+
+
+    def test_reusePort(self):
+        """
+        The C{reusePort} argument of a 'tcp6' endpoint string description sets
+        the C{reusePort} flag of the L{TCP6ServerEndpoint}.
+        """
+        ep = endpoints.serverFromString(
+            MemoryReactor(), "tcp6:8080:reusePort=1")
+        self.assertTrue(ep._reusePort)
 
 
 
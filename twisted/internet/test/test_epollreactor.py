@@ -10,6 +10,9 @@ from __future__ import division, absolute_import
 from twisted.trial.unittest import TestCase
 try:
     from twisted.internet.epollreactor import _ContinuousPolling
+    from twisted.internet.epollreactor import EdgeTriggeredEPollReactor
+    from select import EPOLLIN, EPOLLOUT, EPOLLET, EPOLLHUP
+    from twisted.internet.epollreactor import EPOLLRDHUP
 except ImportError:
     _ContinuousPolling = None
 from twisted.internet.task import Clock
@@ -246,3 +249,240 @@ class ContinuousPollingTests(TestCase):
 
     if _ContinuousPolling is None:
         skip = "epoll not supported in this environment."
+
+
+
+class EdgeDescriptor(Descriptor):
+    """
+    Records reads and writes, as if it were a connection supporting
+    edge-triggered reactors, which can be read from C{reads} times and
+    written to C{writes} times before it would block.
+    """
+    _edgeTriggerable = True
+    _readBlocked = False
+    _writeBlocked = False
+
+    def __init__(self, reads=0, writes=0):
+        Descriptor.__init__(self)
+        self.reads = reads
+        self.writes = writes
+
+
+    def doRead(self):
+        if not self.reads:
+            self._readBlocked = True
+            return
+        self.reads -= 1
+        self.events.append("read")
+
+
+    def doWrite(self):
+        if not self.writes:
+            self._writeBlocked = True
+            return
+        self.writes -= 1
+        self.events.append("write")
+
+
+
+class FakePoller(object):
+    """
+    Records the calls made to it as if it were an C{epoll} object, and
+    returns the events in C{events} the next time it is polled.
+    """
+    def __init__(self):
+        self.calls = []
+        self.events = []
+        self.timeouts = []
+
+
+    def register(self, fd, events):
+        self.calls.append(("register", fd, events))
+
+
+    def modify(self, fd, events):
+        self.calls.append(("modify", fd, events))
+
+
+    def unregister(self, fd):
+        self.calls.append(("unregister", fd))
+
+
+    def poll(self, timeout, maxevents):
+        self.timeouts.append(timeout)
+        events, self.events = self.events, []
+        return events
+
+
+
+class EdgeTriggeredEPollReactorTests(TestCase):
+    """
+    Tests for L{EdgeTriggeredEPollReactor}.
+    """
+    def setUp(self):
+        self.reactor = EdgeTriggeredEPollReactor()
+        self.addCleanup(self.reactor._poller.close)
+        for reader in self.reactor._internalReaders:
+            self.addCleanup(reader.connectionLost, None)
+        self.poller = self.reactor._poller = FakePoller()
+
+
+    def test_registeredOnce(self):
+        """
+        A descriptor supporting it is registered edge-triggered for both
+        input and output when it is first added, and starting or stopping
+        reading or writing afterwards makes no call to C{epoll}.
+        """
+        descriptor = EdgeDescriptor()
+        self.reactor.addReader(descriptor)
+        self.reactor.addWriter(descriptor)
+        self.reactor.removeWriter(descriptor)
+        self.reactor.addWriter(descriptor)
+        self.assertEqual(
+            self.poller.calls,
+            [("register", 1, EPOLLIN | EPOLLOUT | EPOLLRDHUP | EPOLLET)])
+        self.assertIn(descriptor, self.reactor.getReaders())
+        self.assertEqual(self.reactor.getWriters(), [descriptor])
+
+
+    def test_unregistered(self):
+        """
+        A descriptor registered edge-triggered is unregistered once it is
+        neither reading nor writing.
+        """
+        descriptor = EdgeDescriptor()
+        self.reactor.addReader(descriptor)
+        self.reactor.addWriter(descriptor)
+        self.reactor.removeReader(descriptor)
+        self.reactor.removeWriter(descriptor)
+        self.assertEqual(
+            self.poller.calls,
+            [("register", 1, EPOLLIN | EPOLLOUT | EPOLLRDHUP | EPOLLET),
+             ("unregister", 1)])
+        self.assertNotIn(1, self.reactor._selectables)
+
+
+    def test_levelTriggered(self):
+        """
+        Descriptors not supporting it are registered level-triggered, as by
+        L{EPollReactor}.
+        """
+        descriptor = Descriptor()
+        self.reactor.addReader(descriptor)
+        self.reactor.addWriter(descriptor)
+        self.reactor.removeReader(descriptor)
+        self.assertEqual(
+            self.poller.calls,
+            [("register", 1, EPOLLIN),
+             ("modify", 1, EPOLLIN | EPOLLOUT),
+             ("modify", 1, EPOLLOUT)])
+
+
+    def test_readUntilBlocked(self):
+        """
+        When a descriptor registered edge-triggered becomes readable, it is
+        read from until it would block, after which it is not read from
+        until it becomes readable again.
+        """
+        descriptor = EdgeDescriptor(reads=3)
+        self.reactor.addReader(descriptor)
+        self.poller.events = [(1, EPOLLIN)]
+        self.reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read"] * 3)
+        self.reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read"] * 3)
+        self.assertEqual(self.poller.timeouts, [1, 1])
+
+
+    def test_writeUntilBlocked(self):
+        """
+        When a descriptor registered edge-triggered becomes writable, it is
+        written to until it would block.
+        """
+        descriptor = EdgeDescriptor(writes=2)
+        self.reactor.addWriter(descriptor)
+        self.poller.events = [(1, EPOLLOUT)]
+        self.reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["write"] * 2)
+        self.reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["write"] * 2)
+
+
+    def test_budget(self):
+        """
+        A descriptor is read from at most C{_EDGE_BUDGET} times in an
+        iteration, and the next iteration carries on reading from it without
+        blocking nor waiting for a new event.
+        """
+        budget = self.reactor._EDGE_BUDGET
+        descriptor = EdgeDescriptor(reads=budget + 2)
+        self.reactor.addReader(descriptor)
+        self.poller.events = [(1, EPOLLIN)]
+        self.reactor.doIteration(1)
+        self.assertEqual(len(descriptor.events), budget)
+        self.reactor.doIteration(1)
+        self.assertEqual(len(descriptor.events), budget + 2)
+        self.assertEqual(self.poller.timeouts, [1, 0])
+
+
+    def test_readinessKept(self):
+        """
+        A descriptor which stops reading before it would block is read from
+        again as soon as it starts reading again, without a new event.
+        """
+        descriptor = EdgeDescriptor(reads=3)
+        reactor = self.reactor
+        def doRead():
+            EdgeDescriptor.doRead(descriptor)
+            reactor.removeReader(descriptor)
+        descriptor.doRead = doRead
+        reactor.addReader(descriptor)
+        reactor.addWriter(descriptor)
+        self.poller.events = [(1, EPOLLIN)]
+        reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read"])
+        reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read"])
+
+        reactor.addReader(descriptor)
+        reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read", "read"])
+        self.assertEqual(self.poller.timeouts, [1, 1, 0])
+
+
+    def test_hangUp(self):
+        """
+        A hang up makes a descriptor registered edge-triggered both readable
+        and writable.
+        """
+        descriptor = EdgeDescriptor(reads=1, writes=1)
+        self.reactor.addReader(descriptor)
+        self.reactor.addWriter(descriptor)
+        self.poller.events = [(1, EPOLLHUP)]
+        self.reactor.doIteration(1)
+        self.assertEqual(descriptor.events, ["read", "write"])
+
+
+    def test_readUntilLostAfterShutdown(self):
+        """
+        Once the peer of a descriptor registered edge-triggered has shut
+        down its side of the connection, the descriptor is read from until
+        the connection is lost, even if it reports having read everything,
+        as it cannot tell that the end of the stream is pending.
+        """
+        reads = []
+        descriptor = EdgeDescriptor()
+        def doRead():
+            reads.append(None)
+            descriptor._readBlocked = True
+            if len(reads) == 2:
+                return ConnectionDone()
+        descriptor.doRead = doRead
+        self.reactor.addReader(descriptor)
+        self.poller.events = [(1, EPOLLIN | EPOLLRDHUP)]
+        self.reactor.doIteration(1)
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(descriptor.events, ["lost"])
+
+    if _ContinuousPolling is None:
+        skip = "epoll not supported in this environment."
@@ -11,6 +11,7 @@ import os, socket, traceback
 
 from zope.interface import implementer
 
+from twisted.python import log
 from twisted.python.runtime import platform
 from twisted.trial.unittest import SkipTest
 from twisted.internet.interfaces import IReactorFDSet, IReadDescriptor
@@ -286,7 +287,8 @@ class ReactorFDSetTestsBuilder(ReactorBuilder):
         reactor = self.buildReactor()
 
         name = reactor.__class__.__name__
-        if name in ('EPollReactor', 'KQueueReactor', 'CFReactor'):
+        if name in ('EPollReactor', 'EdgeTriggeredEPollReactor',
+                    'KQueueReactor', 'CFReactor', 'AsyncioSelectorReactor'):
             # Closing a file descriptor immediately removes it from the epoll
             # set without generating a notification.  That means epollreactor
             # will not call any methods on Victim after the close, so there's
@@ -342,6 +344,58 @@ class ReactorFDSetTestsBuilder(ReactorBuilder):
             "Cannot duplicate socket filenos on Windows")
 
 
+    def test_logPrefix(self):
+        """
+        Events logged while a descriptor handles an event have the
+        descriptor's C{logPrefix} as their C{system}.
+        """
+        reactor, fd, server = self._simpleSetup()
+        fd.logPrefix = lambda: "Custom Descriptor"
+        events = []
+        log.addObserver(events.append)
+        self.addCleanup(log.removeObserver, events.append)
+
+        def logAndStop():
+            log.msg("read")
+            reactor.removeReader(fd)
+            reactor.stop()
+        fd.doRead = logAndStop
+        reactor.addReader(fd)
+        server.sendall(b'x')
+
+        self.runReactor(reactor)
+        [event] = [e for e in events if e.get("message") == ("read",)]
+        self.assertEqual(event["system"], "Custom Descriptor")
+
+
+    def test_logPrefixNotCalled(self):
+        """
+        Reactors which dispatch events with a lazy log context do not call
+        the C{logPrefix} of a descriptor handling an event unless something
+        is logged.
+        """
+        reactor, fd, server = self._simpleSetup()
+        if getattr(reactor, "_dispatchEvents", None) is None:
+            raise SkipTest(
+                "%s computes the log prefix of every event" % (
+                    type(reactor).__name__,))
+        calls = []
+        def logPrefix():
+            calls.append(None)
+            return "Custom Descriptor"
+        fd.logPrefix = logPrefix
+
+        def removeAndStop():
+            reactor.removeReader(fd)
+            reactor.stop()
+        fd.doRead = removeAndStop
+        reactor.addReader(fd)
+        server.sendall(b'x')
+
+        self.runReactor(reactor)
+        self.assertEqual(calls, [])
+
+
     def test_connectionLostOnShutdown(self):
         """
         Any file descriptors added to the reactor have their C{connectionLost}
@@ -97,3 +97,132 @@ class WriteDescriptorTests(SynchronousTestCase):
         descriptor = MemoryFile()
         descriptor.write(b"hello, world")
         self.assertIsNone(descriptor.doWrite())
+
+
+
+class MemorySequenceFile(MemoryFile):
+    """
+    A L{MemoryFile} which also accepts several buffers at once, however
+    small.
+
+    @ivar _calls: A C{list} of the C{list}s of buffers passed to
+        L{_writeSomeDataSequence}.
+    """
+    _MIN_SEQUENCE_BUFFER = 0
+
+    def __init__(self):
+        MemoryFile.__init__(self)
+        self._calls = []
+
+
+    def _writeSomeDataSequence(self, buffers):
+        """
+        Copy at most C{self._freeSpace} bytes from C{buffers} into
+        C{self._written}.
+
+        @return: A C{int} indicating how many bytes were copied from
+            C{buffers}.
+        """
+        buffers = [memoryview(data).tobytes() for data in buffers]
+        self._calls.append(buffers)
+        total = 0
+        for data in buffers:
+            total += self.writeSomeData(data)
+        return total
+
+
+
+class WriteSequenceDescriptorTests(SynchronousTestCase):
+    """
+    Tests for L{FileDescriptor._doWriteSequence}.
+    """
+    def test_buffersNotJoined(self):
+        """
+        L{FileDescriptor._doWriteSequence} passes the buffered byte strings
+        to L{FileDescriptor._writeSomeDataSequence} without joining them.
+        """
+        descriptor = MemorySequenceFile()
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"hello", b", "])
+        descriptor.write(b"world")
+        self.assertIsNone(descriptor._doWriteSequence(16))
+        self.assertEqual(descriptor._calls, [[b"hello", b", ", b"world"]])
+        self.assertEqual(b"".join(descriptor._written), b"hello, world")
+        self.assertEqual(descriptor._tempDataLen, 0)
+        self.assertEqual(descriptor.dataBuffer, b"")
+
+
+    def test_partialWrite(self):
+        """
+        When only part of the buffers is written, the next call to
+        L{FileDescriptor._doWriteSequence} resumes from the first byte which
+        was not written.
+        """
+        descriptor = MemorySequenceFile()
+        descriptor._freeSpace = 7
+        descriptor.writeSequence([b"hello", b", ", b"world"])
+        descriptor._doWriteSequence(16)
+        descriptor._freeSpace = 100
+        descriptor._doWriteSequence(16)
+        self.assertEqual(
+            descriptor._calls,
+            [[b"hello", b", ", b"world"], [b"world"]])
+        descriptor._freeSpace = 3
+        descriptor.write(b"again")
+        descriptor._doWriteSequence(16)
+        descriptor._freeSpace = 100
+        descriptor._doWriteSequence(16)
+        self.assertEqual(descriptor._calls[2:], [[b"again"], [b"in"]])
+        self.assertEqual(
+            b"".join(descriptor._written), b"hello, worldagain")
+
+
+    def test_maxBuffers(self):
+        """
+        No more than the given number of buffers are passed to
+        L{FileDescriptor._writeSomeDataSequence} at once.
+        """
+        descriptor = MemorySequenceFile()
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"a", b"b", b"c", b"d", b"e"])
+        descriptor._doWriteSequence(2)
+        descriptor._doWriteSequence(2)
+        self.assertEqual(descriptor._calls, [[b"a", b"b"], [b"c", b"d"]])
+        self.assertEqual(descriptor._tempDataLen, 1)
+
+
+    def test_smallBuffersJoined(self):
+        """
+        When the buffered byte strings are smaller than
+        C{_MIN_SEQUENCE_BUFFER} on average, L{FileDescriptor._doWriteSequence}
+        joins them before passing them to
+        L{FileDescriptor._writeSomeDataSequence}.
+        """
+        descriptor = MemorySequenceFile()
+        descriptor._MIN_SEQUENCE_BUFFER = 4
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"abc", b"def"])
+        descriptor._doWriteSequence(16)
+        self.assertEqual(descriptor._calls, [[b"abcdef"]])
+        self.assertEqual(descriptor._written, [b"abcdef"])
+
+
+    def test_smallBuffersJoinedUpToSendLimit(self):
+        """
+        L{FileDescriptor._doWriteSequence} only joins small buffered byte
+        strings until they add up to C{SEND_LIMIT} bytes, leaving the others
+        to the next calls.
+        """
+        descriptor = MemorySequenceFile()
+        descriptor._MIN_SEQUENCE_BUFFER = 4
+        descriptor.SEND_LIMIT = 4
+        descriptor._freeSpace = 100
+        descriptor.writeSequence([b"ab", b"cd", b"ef", b"gh", b"ij"])
+        descriptor._doWriteSequence(16)
+        self.assertEqual(descriptor._calls, [[b"abcd"]])
+        self.assertEqual(list(descriptor._tempDataBuffer), [b"ef", b"gh", b"ij"])
+        self.assertEqual(descriptor._tempDataLen, 6)
+        descriptor._doWriteSequence(16)
+        descriptor._doWriteSequence(16)
+        self.assertEqual(descriptor._calls[1:], [[b"efgh"], [b"ij"]])
+        self.assertEqual(b"".join(descriptor._written), b"abcdefghij")
@@ -0,0 +1,528 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet.iouringreactor}.
+"""
+
+from __future__ import division, absolute_import
+
+import ctypes
+import errno
+from select import POLLIN, POLLOUT, POLLERR, POLLHUP
+
+from twisted.trial.unittest import TestCase
+from twisted.internet import default, iouringreactor, main, protocol
+from twisted.internet.test.reactormixins import ReactorBuilder
+from twisted.python import _iouring
+
+try:
+    _iouring.Ring(1, 2).close()
+except _iouring.IOUringError as e:
+    skip = "io_uring is not supported: %s" % (e,)
+else:
+    skip = None
+
+
+
+class RingTests(TestCase):
+    """
+    Tests for L{_iouring.Ring}.
+    """
+
+    def test_completions(self):
+        """
+        L{_iouring.Ring.completions} returns the user data, result and flags
+        of the requests which have completed, once.
+        """
+        ring = _iouring.Ring(4, 8)
+        self.addCleanup(ring.close)
+        ring.prepare(_iouring.IORING_OP_NOP, -1, 7)
+        ring.prepare(_iouring.IORING_OP_NOP, -1, 8)
+        self.assertEqual(ring.completions(), [])
+        self.assertTrue(ring.enter(2))
+        self.assertEqual(ring.completions(), [(7, 0, 0), (8, 0, 0)])
+        self.assertEqual(ring.completions(), [])
+
+
+    def test_full(self):
+        """
+        When the submission queue is full, L{_iouring.Ring.prepare} submits the
+        requests already prepared first.
+        """
+        ring = _iouring.Ring(2, 8)
+        self.addCleanup(ring.close)
+        for userData in range(1, 6):
+            ring.prepare(_iouring.IORING_OP_NOP, -1, userData)
+        ring.enter(0)
+        self.assertEqual(
+            [userData for userData, result, flags in ring.completions()],
+            [1, 2, 3, 4, 5])
+
+
+    def test_close(self):
+        """
+        L{_iouring.Ring.close} closes the instance, and can be called again.
+        """
+        ring = _iouring.Ring(2, 8)
+        ring.close()
+        self.assertEqual(ring.fd, -1)
+        ring.close()
+
+
+
+class FakeRing(object):
+    """
+    Record the requests prepared, and hand out the completions given in
+    C{completed}, as if it were a L{_iouring.Ring}.
+    """
+
+    def __init__(self):
+        self.prepared = []
+        self.completed = []
+        self.entered = []
+
+
+    def prepare(self, opcode, fd, userData, **fields):
+        self.prepared.append((opcode, fd, userData, fields))
+
+
+    def enter(self, wait):
+        self.entered.append(wait)
+        return True
+
+
+    def completions(self):
+        completions, self.completed = self.completed, []
+        return completions
+
+
+    def registerBuffers(self, buffers):
+        self.buffers = buffers
+
+
+
+class Descriptor(object):
+    """
+    Records reads and writes, as if it were a C{FileDescriptor}.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.events = []
+
+
+    def fileno(self):
+        return self.fd
+
+
+    def logPrefix(self):
+        return "Descriptor"
+
+
+    def doRead(self):
+        self.events.append("read")
+
+
+    def doWrite(self):
+        self.events.append("write")
+
+
+    def connectionLost(self, reason):
+        self.events.append("lost")
+
+
+
+class CompletionDescriptor(Descriptor):
+    """
+    Records the results of requests handed to it, as if it were a TCP
+    connection of L{iouringreactor.IOUringReactor}.
+    """
+    _completionBased = True
+    _readResult = None
+    _writeResult = None
+    _writeBlocked = False
+    bufferSize = 4096
+
+    def doRead(self):
+        self.events.append(("read", self._readResult))
+        self._readResult = None
+
+
+    def doWrite(self):
+        self.events.append(("write", self._writeResult))
+        self._writeResult = None
+
+
+
+class IOUringReactorTests(TestCase):
+    """
+    Tests for the requests L{iouringreactor.IOUringReactor} makes.
+    """
+
+    def reactor(self):
+        """
+        Create a reactor whose ring is a L{FakeRing}.
+        """
+        reactor = iouringreactor.IOUringReactor()
+        ring = reactor._ring
+        self.addCleanup(ring.close)
+        for reader in reactor._internalReaders:
+            reactor.removeReader(reader)
+            self.addCleanup(reader.connectionLost, None)
+        reactor._ring = FakeRing()
+        return reactor
+
+
+    def complete(self, reactor, *completions):
+        """
+        Iterate C{reactor} once, with C{completions} as the completions read.
+        """
+        reactor._ring.completed.extend(completions)
+        reactor.doIteration(0)
+
+
+    def test_pollRequests(self):
+        """
+        Descriptors which are not completion based are waited for with poll
+        requests, made again each time they complete and cancelled when the
+        descriptor is removed.
+        """
+        reactor = self.reactor()
+        descriptor = Descriptor(5)
+        reactor.addReader(descriptor)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(
+            (opcode, fd, fields),
+            (_iouring.IORING_OP_POLL_ADD, 5, {"opFlags": POLLIN}))
+
+        del reactor._ring.prepared[:]
+        self.complete(reactor, (userData, POLLIN, 0))
+        self.assertEqual(descriptor.events, ["read"])
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+
+        del reactor._ring.prepared[:]
+        reactor.removeReader(descriptor)
+        self.assertEqual(
+            reactor._ring.prepared,
+            [(_iouring.IORING_OP_ASYNC_CANCEL, -1, 0, {"addr": userData})])
+        self.complete(reactor, (userData, -iouringreactor._ECANCELED, 0))
+        self.assertEqual(descriptor.events, ["read"])
+
+
+    def test_pollError(self):
+        """
+        A poll request completing with an error makes a descriptor being read
+        from read, as it does with reactors waiting for reading and writing at
+        once, whichever event the request waited for.
+        """
+        reactor = self.reactor()
+        descriptor = Descriptor(5)
+        reactor.addReader(descriptor)
+        reactor.addWriter(descriptor)
+        [ignored, (opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(fields["opFlags"], POLLOUT)
+        self.complete(reactor, (userData, POLLERR | POLLHUP, 0))
+        self.assertEqual(descriptor.events, ["read", "write"])
+
+
+    def test_receive(self):
+        """
+        Completion based descriptors are read from with receive requests into
+        registered buffers, whose data is handed to them as C{_readResult}.
+        """
+        reactor = self.reactor()
+        descriptor = CompletionDescriptor(5)
+        reactor.addReader(descriptor)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(opcode, _iouring.IORING_OP_READ_FIXED)
+        self.assertEqual(fields["length"], 4096)
+        ctypes.memmove(fields["addr"], b"data", 4)
+
+        del reactor._ring.prepared[:]
+        self.complete(reactor, (userData, 4, 0))
+        self.assertEqual(descriptor.events, [("read", b"data")])
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(opcode, _iouring.IORING_OP_READ_FIXED)
+
+        self.complete(reactor, (userData, 0, 0))
+        self.assertEqual(descriptor.events[1:],
+                         [("read", main.CONNECTION_DONE)])
+
+
+    def test_unregisteredBuffers(self):
+        """
+        If the kernel refuses to register buffers, receive requests read into
+        buffers of their own.
+        """
+        reactor = self.reactor()
+        def registerBuffers(buffers):
+            raise _iouring.IOUringError(errno.ENOMEM, "refused")
+        reactor._ring.registerBuffers = registerBuffers
+        descriptor = CompletionDescriptor(5)
+        reactor.addReader(descriptor)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(opcode, _iouring.IORING_OP_RECV)
+        ctypes.memmove(fields["addr"], b"data", 4)
+        self.complete(reactor, (userData, 4, 0))
+        self.assertEqual(descriptor.events, [("read", b"data")])
+
+
+    def test_receivedWhileNotReading(self):
+        """
+        Data received by a request which completes after its descriptor has
+        stopped being read from is handed to it once it is read from again.
+        """
+        reactor = self.reactor()
+        descriptor = CompletionDescriptor(5)
+        reactor.addReader(descriptor)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        ctypes.memmove(fields["addr"], b"data", 4)
+        reactor.removeReader(descriptor)
+        self.complete(reactor, (userData, 4, 0))
+        self.assertEqual(descriptor.events, [])
+
+        del reactor._ring.prepared[:]
+        reactor.addReader(descriptor)
+        self.assertEqual(reactor._ring.prepared, [])
+        reactor.doIteration(0)
+        self.assertEqual(descriptor.events, [("read", b"data")])
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(opcode, _iouring.IORING_OP_READ_FIXED)
+
+
+    def test_oneRequestPending(self):
+        """
+        Until the request made to read from a descriptor completes, even if it
+        has been cancelled, no other one is made.
+        """
+        reactor = self.reactor()
+        descriptor = CompletionDescriptor(5)
+        reactor.addReader(descriptor)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        reactor.removeReader(descriptor)
+        reactor.addReader(descriptor)
+        del reactor._ring.prepared[:]
+        self.complete(reactor, (userData, -iouringreactor._ECANCELED, 0))
+        self.assertEqual(descriptor.events, [])
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual(opcode, _iouring.IORING_OP_READ_FIXED)
+
+
+    def test_send(self):
+        """
+        Completion based descriptors being written to are given the chance to
+        make a send request before the reactor waits, and the number of bytes
+        sent once it completes.
+        """
+        reactor = self.reactor()
+        descriptor = CompletionDescriptor(5)
+        def doWrite():
+            CompletionDescriptor.doWrite(descriptor)
+            if len(descriptor.events) == 1:
+                reactor._send(descriptor, b"data")
+            else:
+                reactor.removeWriter(descriptor)
+        descriptor.doWrite = doWrite
+        reactor.addWriter(descriptor)
+        self.assertEqual(reactor._ring.prepared, [])
+        reactor.doIteration(0)
+        self.assertEqual(descriptor.events, [("write", None)])
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual((opcode, fd, fields["length"]),
+                         (_iouring.IORING_OP_SEND, 5, 4))
+
+        self.complete(reactor, (userData, 4, 0))
+        self.assertEqual(descriptor.events[1:], [("write", 4)])
+
+
+    def test_sendFailed(self):
+        """
+        A send request failing is handed to the descriptor as
+        L{main.CONNECTION_LOST}.
+        """
+        reactor = self.reactor()
+        descriptor = CompletionDescriptor(5)
+        reactor.addWriter(descriptor)
+        reactor._send(descriptor, b"data")
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.complete(reactor, (userData, -errno.EPIPE, 0))
+        self.assertEqual(descriptor.events, [("write", main.CONNECTION_LOST)])
+
+
+    def test_multishotAcceptUnsupported(self):
+        """
+        If the kernel does not support multishot accept requests, a request is
+        made for each connection instead.
+        """
+        reactor = self.reactor()
+        port = iouringreactor._Port(0, protocol.ServerFactory(),
+                                    reactor=reactor)
+        port.fileno = lambda: 5
+        reactor.addReader(port)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual((opcode, fields["ioprio"]),
+                         (_iouring.IORING_OP_ACCEPT,
+                          _iouring.IORING_ACCEPT_MULTISHOT))
+
+        del reactor._ring.prepared[:]
+        self.complete(reactor, (userData, -errno.EINVAL, 0))
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual((opcode, fields["ioprio"]),
+                         (_iouring.IORING_OP_ACCEPT, False))
+        self.assertFalse(reactor._multishotAccept)
+
+
+    def test_timeout(self):
+        """
+        Waiting for completions with a timeout prepares a timeout request,
+        which is replaced if it is still pending the next time.
+        """
+        reactor = self.reactor()
+        reactor.doIteration(1.5)
+        [(opcode, fd, userData, fields)] = reactor._ring.prepared
+        self.assertEqual((opcode, fields["length"], fields["offset"]),
+                         (_iouring.IORING_OP_TIMEOUT, 1, 1))
+        self.assertEqual(list(reactor._timespec), [1, 500000000])
+        self.assertEqual(reactor._ring.entered, [1])
+
+        del reactor._ring.prepared[:]
+        reactor.doIteration(2)
+        self.assertEqual(
+            reactor._ring.prepared[0],
+            (_iouring.IORING_OP_ASYNC_CANCEL, -1, 0, {"addr": userData}))
+        timeout = reactor._ring.prepared[1][2]
+        self.complete(reactor, (timeout, -errno.ETIME, 0))
+        self.assertIdentical(reactor._timeoutRequest, None)
+
+
+    def test_noWait(self):
+        """
+        Iterating with a timeout of 0 does not wait nor make a timeout
+        request.
+        """
+        reactor = self.reactor()
+        reactor.doIteration(0)
+        self.assertEqual(reactor._ring.prepared, [])
+        self.assertEqual(reactor._ring.entered, [0])
+
+
+
+class InstallTests(TestCase):
+    """
+    Tests for L{iouringreactor.install}.
+    """
+
+    def test_unsupported(self):
+        """
+        If io_uring is not supported, L{iouringreactor.install} warns and
+        installs the default reactor instead.
+        """
+        def unsupported():
+            raise _iouring.IOUringError(errno.ENOSYS, "Function not implemented")
+        installed = []
+        self.patch(iouringreactor, "IOUringReactor", unsupported)
+        self.patch(default, "install", lambda: installed.append(True))
+        iouringreactor.install()
+        self.assertEqual(installed, [True])
+        [warning] = self.flushWarnings()
+        self.assertEqual(warning["category"], RuntimeWarning)
+        self.assertIn("Function not implemented", warning["message"])
+
+
+
+class TCPCompletionTestsBuilder(ReactorBuilder):
+    """
+    Tests for the TCP connections of L{iouringreactor.IOUringReactor}.
+    """
+    _reactors = ["twisted.internet.iouringreactor.IOUringReactor"]
+
+    def connect(self, reactor, server, client):
+        """
+        Connect a C{client} protocol to a C{server} protocol over TCP.
+        """
+        serverFactory = protocol.ServerFactory()
+        serverFactory.protocol = lambda: server
+        port = reactor.listenTCP(0, serverFactory, interface="127.0.0.1")
+        clientFactory = protocol.ClientFactory()
+        clientFactory.protocol = lambda: client
+        reactor.connectTCP("127.0.0.1", port.getHost().port, clientFactory)
+        return port
+
+
+    def test_completionBased(self):
+        """
+        L{iouringreactor.IOUringReactor.listenTCP} and
+        L{iouringreactor.IOUringReactor.connectTCP} make ports and connections
+        which accept, receive and send with io_uring requests once connected.
+        """
+        reactor = self.buildReactor()
+        transports = []
+        class Recorder(protocol.Protocol):
+            def connectionMade(self):
+                transports.append(self.transport)
+                if len(transports) == 2:
+                    reactor.stop()
+        port = self.connect(reactor, Recorder(), Recorder())
+        self.runReactor(reactor)
+        self.assertIsInstance(port, iouringreactor._Port)
+        self.assertEqual(
+            sorted(type(transport).__name__ for transport in transports),
+            ["_Client", "_Server"])
+        for transport in transports:
+            self.assertTrue(transport._completionBased)
+
+
+    def test_writesSentTogether(self):
+        """
+        The data written to a connection during an iteration is sent with a
+        single request.
+        """
+        reactor = self.buildReactor()
+        received = []
+        sent = []
+        send = reactor._send
+        def countingSend(selectable, data):
+            sent.append(data)
+            send(selectable, data)
+        reactor._send = countingSend
+        class Server(protocol.Protocol):
+            def dataReceived(self, data):
+                received.append(data)
+                if len(b"".join(received)) == 3000:
+                    reactor.stop()
+        class Client(protocol.Protocol):
+            def connectionMade(self):
+                for i in range(3):
+                    self.transport.write(b"x" * 1000)
+        self.connect(reactor, Server(), Client())
+        self.runReactor(reactor)
+        self.assertEqual(b"".join(received), b"x" * 3000)
+        self.assertEqual([len(data) for data in sent], [3000])
+
+
+    def test_largeWrite(self):
+        """
+        Data larger than what a single send request sends is sent with as many
+        as needed, in order.
+        """
+        reactor = self.buildReactor()
+        data = b"".join(
+            (u"%08d" % (i,)).encode("ascii") for i in range(2 ** 17))
+        received = []
+        class Server(protocol.Protocol):
+            def dataReceived(self, data):
+                received.append(data)
+            def connectionLost(self, reason):
+                reactor.stop()
+        class Client(protocol.Protocol):
+            def connectionMade(self):
+                self.transport.write(data)
+                self.transport.loseConnection()
+        self.connect(reactor, Server(), Client())
+        self.runReactor(reactor)
+        self.assertEqual(b"".join(received), data)
+
+
+
+globals().update(TCPCompletionTestsBuilder.makeTestCaseClasses())
@@ -7,9 +7,13 @@ Tests for L{twisted.internet.posixbase} and supporting code.
 
 from __future__ import division, absolute_import
 
+import os
+import select
+
 from twisted.trial.unittest import TestCase
 from twisted.internet.defer import Deferred
-from twisted.internet.posixbase import PosixReactorBase, _Waker
+from twisted.internet.posixbase import (
+    PosixReactorBase, _Waker, _EventFDWaker)
 from twisted.internet.protocol import ServerFactory
 
 skipSockets = None
@@ -102,6 +106,66 @@ class PosixReactorBaseTests(TestCase):
 
 
 
+class EventFDWakerTests(TestCase):
+    """
+    Tests for L{_EventFDWaker}.
+    """
+    if getattr(os, "eventfd", None) is None:
+        skip = "eventfd is not available."
+
+    def setUp(self):
+        self.waker = _EventFDWaker(None)
+        self.addCleanup(self.waker.connectionLost, None)
+
+
+    def readable(self):
+        """
+        Return whether the waker's file descriptor is readable.
+        """
+        return bool(select.select([self.waker.fileno()], [], [], 0)[0])
+
+
+    def test_defaultWaker(self):
+        """
+        L{PosixReactorBase} wakes up with an L{_EventFDWaker} where eventfd
+        is available.
+        """
+        self.assertIs(_Waker, _EventFDWaker)
+
+
+    def test_wakeUp(self):
+        """
+        L{_EventFDWaker.wakeUp} makes the waker readable until
+        L{_EventFDWaker.doRead} is called, however many times it is called.
+        """
+        self.assertFalse(self.readable())
+        for i in range(3):
+            self.waker.wakeUp()
+        self.assertTrue(self.readable())
+        self.waker.doRead()
+        self.assertFalse(self.readable())
+
+
+    def test_doReadWithoutWakeUp(self):
+        """
+        L{_EventFDWaker.doRead} does nothing if the waker was not woken up.
+        """
+        self.waker.doRead()
+        self.assertFalse(self.readable())
+
+
+    def test_connectionLost(self):
+        """
+        L{_EventFDWaker.connectionLost} closes the eventfd, after which
+        L{_EventFDWaker.wakeUp} does nothing.
+        """
+        fd = self.waker.fileno()
+        self.waker.connectionLost(None)
+        self.assertRaises(OSError, os.fstat, fd)
+        self.waker.wakeUp()
+
+
+
 class TCPPortTests(TestCase):
     """
     Tests for L{twisted.internet.tcp.Port}.
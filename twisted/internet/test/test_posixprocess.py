@@ -340,3 +340,95 @@ class FileDescriptorTests(TestCase):
             os.close(fd)
         # And it should not appear in the result.
         self.assertNotIn(fd, process._listOpenFDs())
+
+
+
+class SpawnFileActionsTests(TestCase):
+    """
+    Tests for L{twisted.internet.process._spawnFileActions}.
+    """
+    skip = platformSkip
+    if not skip and getattr(os, "posix_spawn", None) is None:
+        skip = "os.posix_spawn is not available"
+
+    def childFDs(self, fdState, fdmap):
+        """
+        Apply the file actions computed for C{fdState} and C{fdmap} to a model
+        of the file descriptors of a spawned child, as they are once it
+        executes its program.
+
+        @return: Map the file descriptors open in the child to the file
+            descriptors of the parent they are copies of.
+        """
+        fds = dict((fd, (fd, cloexec)) for (fd, cloexec) in fdState)
+        openFDs = [fd for (fd, cloexec) in fdState]
+        for action in process._spawnFileActions(openFDs, fdmap):
+            if action[0] == process._PS_CLOSE:
+                fds.pop(action[1], None)
+            elif action[1] != action[2]:
+                fds[action[2]] = (fds[action[1]][0], False)
+        return dict((fd, parent) for (fd, (parent, cloexec)) in fds.items()
+                    if not cloexec)
+
+
+    def test_pipes(self):
+        """
+        The child gets the descriptors of the parent it is given, even if
+        they are closed on exec in the parent.
+        """
+        fdState = [(0, False), (1, False), (2, False),
+                   (5, True), (6, True), (7, True)]
+        self.assertEqual(
+            self.childFDs(fdState, {0: 5, 1: 6, 2: 7}), {0: 5, 1: 6, 2: 7})
+
+
+    def test_inheritableClosed(self):
+        """
+        The descriptors of the parent which would be inherited but are not
+        given to the child are closed.
+        """
+        fdState = [(0, False), (1, False), (2, False), (6, True), (9, False)]
+        self.assertEqual(self.childFDs(fdState, {1: 6}), {1: 6})
+
+
+    def test_closeOnExecClosed(self):
+        """
+        The descriptors of the parent which are closed on exec are closed
+        too, unless they are given to the child, without looking up whether
+        they are.
+        """
+        self.assertEqual(
+            process._spawnFileActions([0, 1, 2, 5, 6], {1: 6}),
+            [(process._PS_CLOSE, 0), (process._PS_CLOSE, 1),
+             (process._PS_CLOSE, 2), (process._PS_CLOSE, 5),
+             (process._PS_DUP2, 6, 1), (process._PS_CLOSE, 6)])
+
+
+    def test_sameDescriptor(self):
+        """
+        A descriptor given to the child under the same number is kept open,
+        even if it is closed on exec in the parent.
+        """
+        fdState = [(0, False), (1, True), (2, False)]
+        self.assertEqual(self.childFDs(fdState, {0: 0, 1: 1}), {0: 0, 1: 1})
+
+
+    def test_sharedDescriptor(self):
+        """
+        A descriptor of the parent can be given to the child under several
+        numbers.
+        """
+        fdState = [(0, False), (1, False), (2, False), (6, True)]
+        self.assertEqual(self.childFDs(fdState, {1: 6, 2: 6}), {1: 6, 2: 6})
+
+
+    def test_permutation(self):
+        """
+        Descriptors given to the child under each other's numbers are
+        preserved until they are copied.
+        """
+        fdState = [(0, False), (1, False), (2, False)]
+        self.assertEqual(
+            self.childFDs(fdState, {0: 1, 1: 0}), {0: 1, 1: 0})
+        self.assertEqual(
+            self.childFDs(fdState, {0: 1, 1: 2, 2: 0}), {0: 1, 1: 2, 2: 0})
@@ -18,7 +18,7 @@ import threading
 import twisted
 import subprocess
 
-from twisted.trial.unittest import TestCase
+from twisted.trial.unittest import SkipTest, TestCase
 from twisted.internet.test.reactormixins import ReactorBuilder
 from twisted.python.log import msg, err
 from twisted.python.runtime import platform
@@ -470,6 +470,8 @@ sys.stdout.flush()""".format(twistedRoot.path))
 
         self.patch(os, "execvpe", execvpe)
         self.patch(sys, "getfilesystemencoding", lambda: "ascii")
+        # posix_spawn would not call execvpe.
+        self.patch(process.Process, "_usePosixSpawn", False)
 
         reactor = self.buildReactor()
         output = io.BytesIO()
@@ -772,6 +774,124 @@ class ProcessTestsBuilder(ProcessTestsBuilderBase):
         return os.path.abspath(script)
 
 
+    @onlyOnPOSIX
+    def test_posixSpawn(self):
+        """
+        Where C{os.posix_spawn} is available, a process which runs as the same
+        user, group and in the same directory is started with it, and gets the
+        file descriptors it is given.
+        """
+        realSpawn = getattr(os, "posix_spawn", None)
+        if realSpawn is None:
+            raise SkipTest("os.posix_spawn is not available")
+        spawned = []
+        def posix_spawn(path, *args, **kwargs):
+            spawned.append(path)
+            return realSpawn(path, *args, **kwargs)
+        self.patch(os, "posix_spawn", posix_spawn)
+
+        output = io.BytesIO()
+        class GatheringProtocol(ProcessProtocol):
+            def childDataReceived(self, childFD, data):
+                output.write(networkString("%d: " % (childFD,)) + data)
+
+            def processEnded(self, reason):
+                reactor.stop()
+
+        reactor = self.buildReactor()
+        reactor.callWhenRunning(
+            reactor.spawnProcess, GatheringProtocol(), pyExe,
+            [pyExe, b"-c", b"import os; os.write(3, b'three')"],
+            usePTY=self.usePTY, childFDs={0: "w", 1: "r", 3: "r"})
+        self.runReactor(reactor)
+        self.assertEqual(spawned, [pyExe])
+        self.assertEqual(output.getvalue(), b"3: three")
+
+
+    @onlyOnPOSIX
+    def test_pidfd(self):
+        """
+        If L{process.Process.usePidfd} is set and C{os.pidfd_open} is
+        available, the process is reaped once its pidfd becomes readable,
+        even if C{SIGCHLD} is not handled, and the pidfd is closed.
+        """
+        if getattr(os, "pidfd_open", None) is None:
+            raise SkipTest("os.pidfd_open is not available")
+        self.patch(process.Process, "usePidfd", True)
+        self.patch(process, "reapAllProcesses", lambda: None)
+
+        ended = Deferred()
+        reactor = self.buildReactor()
+        transports = []
+        def spawn():
+            transports.append(reactor.spawnProcess(
+                _ShutdownCallbackProcessProtocol(ended), pyExe,
+                [pyExe, b"-c", b""], usePTY=self.usePTY, childFDs={}))
+            self.assertIn(transports[0]._exitWatcher, reactor.getReaders())
+        reactor.callWhenRunning(spawn)
+        ended.addCallback(lambda ignored: reactor.stop())
+        self.runReactor(reactor)
+
+        self.assertIsNone(transports[0]._exitWatcher)
+        self.assertFalse(
+            [reader for reader in reactor.getReaders()
+             if isinstance(reader, process._ProcessExitWatcher)])
+
+
+    @onlyOnPOSIX
+    def test_unregisteredChildNotReaped(self):
+        """
+        An exited child which was not started by the reactor is not reaped
+        when the reactor reaps its own processes.
+        """
+        if getattr(os, "waitid", None) is None:
+            raise SkipTest("os.waitid is not available")
+        child = subprocess.Popen([pyExe, b"-c", b"import sys; sys.exit(3)"])
+        self.addCleanup(child.wait)
+        os.waitid(os.P_PID, child.pid, os.WEXITED | os.WNOWAIT)
+
+        ended = Deferred()
+        reactor = self.buildReactor()
+        reactor.callWhenRunning(
+            reactor.spawnProcess, _ShutdownCallbackProcessProtocol(ended),
+            pyExe, [pyExe, b"-c", b""], usePTY=self.usePTY)
+        ended.addCallback(lambda ignored: reactor.stop())
+        self.runReactor(reactor)
+
+        self.assertEqual(child.wait(), 3)
+
+
+    @onlyOnPOSIX
+    def test_forkForOtherDirectory(self):
+        """
+        A process which runs in another directory is not started with
+        C{os.posix_spawn}.
+        """
+        if getattr(os, "posix_spawn", None) is None:
+            raise SkipTest("os.posix_spawn is not available")
+        spawned = []
+        self.patch(os, "posix_spawn", lambda *a, **kw: spawned.append(a))
+        path = self.mktemp()
+        os.mkdir(path)
+
+        output = io.BytesIO()
+        class GatheringProtocol(ProcessProtocol):
+            outReceived = output.write
+
+            def processEnded(self, reason):
+                reactor.stop()
+
+        reactor = self.buildReactor()
+        reactor.callWhenRunning(
+            reactor.spawnProcess, GatheringProtocol(), pyExe,
+            [pyExe, b"-c", b"import os, sys; sys.stdout.write(os.getcwd())"],
+            usePTY=self.usePTY, path=path)
+        self.runReactor(reactor)
+        self.assertEqual(spawned, [])
+        self.assertEqual(
+            output.getvalue(), networkString(os.path.abspath(path)))
+
+
     def test_shebang(self):
         """
         Spawning a process with an executable which is a script starting
@@ -11,6 +11,7 @@ from __future__ import division, absolute_import
 __metaclass__ = type
 
 import errno
+import os
 import socket
 
 from functools import wraps
@@ -26,7 +27,7 @@ from twisted.python import log
 from twisted.trial.unittest import SkipTest, TestCase
 from twisted.internet.error import (
     ConnectionLost, UserError, ConnectionRefusedError, ConnectionDone,
-    ConnectionAborted, DNSLookupError, NoProtocol)
+    ConnectionAborted, DNSLookupError, NoProtocol, CannotListenError)
 from twisted.internet.test.connectionmixins import (
     LogObserverMixin, ConnectionTestsMixin, StreamClientTestsMixin,
     findFreePort, ConnectableProtocol, EndpointCreator,
@@ -42,8 +43,11 @@ from twisted.internet.defer import (
 from twisted.internet.endpoints import TCP4ServerEndpoint, TCP4ClientEndpoint
 from twisted.internet.protocol import ServerFactory, ClientFactory, Protocol
 from twisted.internet.interfaces import (
-    IPushProducer, IPullProducer, IHalfCloseableProtocol)
-from twisted.internet.tcp import Connection, Server, _resolveIPv6
+    IPushProducer, IPullProducer, IHalfCloseableProtocol, IBufferReceiver,
+    ISendFileTransport)
+from twisted.internet.main import CONNECTION_DONE, CONNECTION_LOST
+from twisted.internet.tcp import (
+    Connection, Server, _resolveIPv6, _HAS_SENDFILE)
 from twisted.internet.test.test_core import ObjectModelIntegrationMixin
 from twisted.test.test_tcp import MyClientFactory, MyServerFactory
 from twisted.test.test_tcp import ClosingFactory, ClientStartStopFactory
@@ -131,9 +135,24 @@ class FakeSocket(object):
     def setblocking(self, blocking):
         self.blocking = blocking
 
+    def gettimeout(self):
+        """
+        @return: L{None}, as a blocking socket would.
+        """
+        return None
+
     def recv(self, size):
         return self.data
 
+    def recv_into(self, buffer):
+        """
+        Copy C{self.data} into C{buffer}.
+
+        @return: The length of C{self.data}.
+        """
+        buffer[:len(self.data)] = self.data
+        return len(self.data)
+
     def send(self, bytes):
         """
         I{Send} all of C{bytes} by accumulating it into C{self.sendBuffer}.
@@ -195,6 +214,17 @@ class FakeSocketTests(TestCase):
         self.assertEqual(skt.recv(10), b"someData")
 
 
+    def test_recvInto(self):
+        """
+        L{FakeSocket.recv_into} copies its data into the given buffer and
+        returns its length.
+        """
+        skt = FakeSocket(b"someData")
+        buffer = bytearray(10)
+        self.assertEqual(skt.recv_into(buffer), 8)
+        self.assertEqual(buffer, bytearray(b"someData\x00\x00"))
+
+
     def test_send(self):
         """
         L{FakeSocket.send} accepts the entire string passed to it, adds it to
@@ -220,6 +250,24 @@ class FakeProtocol(Protocol):
 
 
 
+@implementer(IBufferReceiver)
+class BufferProtocol(Protocol):
+    """
+    An L{IBufferReceiver} which records the objects passed to its
+    C{dataReceived} method, along with a copy of their content.
+
+    @ivar received: A C{list} of two-tuples of the object passed to
+        C{dataReceived} and of its content as C{bytes}.
+    """
+    def __init__(self):
+        self.received = []
+
+
+    def dataReceived(self, data):
+        self.received.append((data, memoryview(data).tobytes()))
+
+
+
 @implementer(IReactorFDSet)
 class _FakeFDSetReactor(object):
     """
@@ -353,6 +401,97 @@ class TCPConnectionTests(TestCase):
         self.assertEqual(len(warnings), 1)
 
 
+    def test_doReadIntoBuffer(self):
+        """
+        When the protocol provides L{IBufferReceiver},
+        L{Connection.doRead} reads into a buffer allocated once and passes a
+        L{memoryview} of the bytes read to the protocol.
+        """
+        skt = FakeSocket(b"someData")
+        protocol = BufferProtocol()
+        conn = Connection(skt, protocol)
+        conn.doRead()
+        skt.data = b"more"
+        conn.doRead()
+        [(first, firstBytes), (second, secondBytes)] = protocol.received
+        self.assertIsInstance(first, memoryview)
+        self.assertEqual(firstBytes, b"someData")
+        self.assertEqual(secondBytes, b"more")
+        # The second read overwrote the start of the same buffer.
+        self.assertEqual(first.tobytes(), b"moreData")
+        self.assertEqual(len(conn._readBuffer), conn.bufferSize)
+
+
+    def test_doReadIntoBufferConnectionDone(self):
+        """
+        When the protocol provides L{IBufferReceiver} and no bytes are read,
+        L{Connection.doRead} reports the connection as done.
+        """
+        conn = Connection(FakeSocket(b""), BufferProtocol())
+        self.assertIs(conn.doRead(), CONNECTION_DONE)
+
+
+    def test_readBlocked(self):
+        """
+        L{Connection.doRead} sets C{_readBlocked} when it reads less than
+        C{bufferSize} bytes, as the socket has then been drained, but not
+        when it reads a full buffer.
+        """
+        skt = FakeSocket(b"x" * Connection.bufferSize)
+        conn = Connection(skt, Protocol())
+        conn.doRead()
+        self.assertFalse(conn._readBlocked)
+        skt.data = b"x"
+        conn.doRead()
+        self.assertTrue(conn._readBlocked)
+
+
+    def test_readWouldBlock(self):
+        """
+        L{Connection.doRead} sets C{_readBlocked} when reading fails with
+        C{EWOULDBLOCK}.
+        """
+        skt, peer = socket.socketpair()
+        self.addCleanup(skt.close)
+        self.addCleanup(peer.close)
+        conn = Connection(skt, Protocol())
+        self.assertIsNone(conn.doRead())
+        self.assertTrue(conn._readBlocked)
+
+
+    def test_writeBlocked(self):
+        """
+        L{Connection.writeSomeData} sets C{_writeBlocked} when it sends less
+        than it was given, as the send buffer of the socket is then full.
+        """
+        conn = Connection(FakeSocket(b""), Protocol())
+        conn.writeSomeData(b"x" * 10)
+        self.assertFalse(conn._writeBlocked)
+
+        skt, peer = socket.socketpair()
+        self.addCleanup(skt.close)
+        self.addCleanup(peer.close)
+        conn = Connection(skt, Protocol())
+        data = b"x" * Connection.SEND_LIMIT
+        while not conn._writeBlocked:
+            self.assertTrue(conn.writeSomeData(data) <= len(data))
+        self.assertEqual(conn.writeSomeData(data), 0)
+
+
+    def test_writeNoBuffers(self):
+        """
+        L{Connection.writeSomeData} sets C{_writeBlocked} when it fails with
+        C{ENOBUFS}, so that edge-triggered reactors stop retrying it.
+        """
+        class NoBuffersSocket(FakeSocket):
+            def send(self, data):
+                raise socket.error(errno.ENOBUFS, "No buffer space available")
+            sendmsg = send
+        conn = Connection(NoBuffersSocket(b""), Protocol())
+        self.assertEqual(conn.writeSomeData(b"x" * 10), 0)
+        self.assertTrue(conn._writeBlocked)
+
+
     def test_noTLSBeforeStartTLS(self):
         """
         The C{TLS} attribute of a L{Connection} instance is C{False} before
@@ -380,6 +519,163 @@ class TCPConnectionTests(TestCase):
 
 
 
+class SendFileTests(TestCase):
+    """
+    Tests for L{Connection.sendFile}.
+    """
+    if not _HAS_SENDFILE:
+        skip = "sendfile(2) is not available on this platform."
+
+    def setUp(self):
+        """
+        Create a L{Connection} wrapping one end of a connected socket pair,
+        and a file to send over it.
+        """
+        self.skt, self.peer = socket.socketpair()
+        self.addCleanup(self.peer.close)
+        self.peer.settimeout(5)
+        self.reactor = _FakeFDSetReactor()
+        self.conn = Connection(self.skt, Protocol(), reactor=self.reactor)
+        self.conn.connected = 1
+        self.addCleanup(self.conn.connectionLost, Failure(ConnectionDone()))
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(b"0123456789")
+        self.fileObject = open(path, "rb")
+        self.addCleanup(self.fileObject.close)
+
+
+    def receive(self, size):
+        """
+        Read exactly C{size} bytes from the peer socket.
+        """
+        data = b""
+        while len(data) < size:
+            data += self.peer.recv(size - len(data))
+        return data
+
+
+    def test_interface(self):
+        """
+        TCP connections provide L{ISendFileTransport} where C{sendfile(2)} is
+        available.
+        """
+        self.assertTrue(verifyClass(ISendFileTransport, Server))
+        self.assertTrue(ISendFileTransport.providedBy(self.conn))
+
+
+    def test_sendFileNoBuffers(self):
+        """
+        When C{sendfile(2)} fails with C{ENOBUFS}, L{Connection.doWrite}
+        sets C{_writeBlocked} and sends the file later.
+        """
+        realSendFile = os.sendfile
+        def sendfile(*args):
+            self.patch(os, "sendfile", realSendFile)
+            raise OSError(errno.ENOBUFS, "No buffer space available")
+        self.patch(os, "sendfile", sendfile)
+        d = self.conn.sendFile(self.fileObject, 0, 10)
+        self.assertIsNone(self.conn.doWrite())
+        self.assertTrue(self.conn._writeBlocked)
+        self.assertNoResult(d)
+        self.assertIsNone(self.conn.doWrite())
+        self.assertEqual(self.receive(10), b"0123456789")
+        self.successResultOf(d)
+
+
+    def test_sendFileAfterWrite(self):
+        """
+        L{Connection.sendFile} sends the requested part of the file after the
+        data already written, then fires its L{Deferred} with L{None} and
+        stops writing.
+        """
+        self.conn.write(b"head:")
+        d = self.conn.sendFile(self.fileObject, 2, 5)
+        self.assertNoResult(d)
+        while self.conn in self.reactor.getWriters():
+            self.assertIsNone(self.conn.doWrite())
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(self.receive(10), b"head:23456")
+        self.assertEqual(self.fileObject.tell(), 0)
+
+
+    def test_sendFileThenLoseConnection(self):
+        """
+        If L{Connection.loseConnection} is called while a file is being
+        sent, the connection is closed only once the file has been sent.
+        """
+        d = self.conn.sendFile(self.fileObject, 0, 10)
+        self.conn.loseConnection()
+        self.assertIs(self.conn.doWrite(), CONNECTION_DONE)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(self.receive(10), b"0123456789")
+
+
+    def test_sendNothing(self):
+        """
+        L{Connection.sendFile} fires its L{Deferred} at once if asked to send
+        no bytes.
+        """
+        d = self.conn.sendFile(self.fileObject, 0, 0)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(self.reactor.getWriters(), [])
+
+
+    def test_fileTooShort(self):
+        """
+        If the file ends before all the requested bytes are sent, the
+        L{Deferred} returned by L{Connection.sendFile} fails and the
+        connection is lost, as the peer will never get the expected bytes.
+        """
+        d = self.conn.sendFile(self.fileObject, 5, 10)
+        self.assertIsNone(self.conn.doWrite())
+        self.assertIs(self.conn.doWrite(), CONNECTION_LOST)
+        self.failureResultOf(d, IOError)
+
+
+    def test_connectionLost(self):
+        """
+        If the connection is lost while a file is being sent, the
+        L{Deferred} returned by L{Connection.sendFile} fails with the reason.
+        """
+        d = self.conn.sendFile(self.fileObject, 0, 10)
+        self.conn.connectionLost(Failure(ConnectionLost()))
+        self.failureResultOf(d, ConnectionLost)
+
+
+    def test_sendFileAfterLoseConnection(self):
+        """
+        L{Connection.sendFile} returns a failed L{Deferred} once the
+        connection is being closed.
+        """
+        self.conn.loseConnection()
+        self.failureResultOf(
+            self.conn.sendFile(self.fileObject, 0, 10), ConnectionLost)
+
+
+    def test_sendFileTwice(self):
+        """
+        L{Connection.sendFile} raises L{RuntimeError} if a previous call has
+        not completed yet.
+        """
+        d = self.conn.sendFile(self.fileObject, 0, 10)
+        self.assertRaises(
+            RuntimeError, self.conn.sendFile, self.fileObject, 0, 10)
+        self.conn.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(d, ConnectionDone)
+
+
+    def test_sendFileTLS(self):
+        """
+        L{Connection.sendFile} raises L{RuntimeError} once TLS has been
+        started on the connection, as the file would not be encrypted.
+        """
+        self.conn.TLS = True
+        self.assertRaises(
+            RuntimeError, self.conn.sendFile, self.fileObject, 0, 10)
+
+
+
 class TCPCreator(EndpointCreator):
     """
     Create IPv4 TCP endpoints for L{runProtocolsWithReactor}-based tests.
@@ -1300,6 +1596,45 @@ class TCPFDPortTestsBuilder(ReactorBuilder, SocketTCPMixin, TCPPortTestsMixin,
 
 
 
+class ReusePortTestsBuilder(ReactorBuilder):
+    """
+    Tests for the C{reusePort} argument of the C{listenTCP} method of the
+    POSIX reactors.
+    """
+    requiredInterfaces = (IReactorTCP,)
+
+    if getattr(socket, "SO_REUSEPORT", None) is None:
+        skip = "SO_REUSEPORT is not available on this platform."
+
+    def test_reusePort(self):
+        """
+        Several ports listening with C{reusePort} set can listen on the same
+        address and port, while a port without it cannot.
+        """
+        reactor = self.buildReactor()
+        try:
+            first = reactor.listenTCP(
+                0, ServerFactory(), interface="127.0.0.1", reusePort=True)
+        except TypeError:
+            raise SkipTest("listenTCP of %r has no reusePort argument" % (
+                reactor,))
+        portNumber = first.getHost().port
+        second = reactor.listenTCP(
+            portNumber, ServerFactory(), interface="127.0.0.1",
+            reusePort=True)
+        self.assertEqual(second.getHost().port, portNumber)
+        self.assertTrue(second.socket.getsockopt(
+            socket.SOL_SOCKET, socket.SO_REUSEPORT))
+        self.assertRaises(
+            CannotListenError, reactor.listenTCP, portNumber,
+            ServerFactory(), interface="127.0.0.1")
+
+        d = gatherResults([first.stopListening(), second.stopListening()])
+        d.addCallback(lambda ignored: reactor.stop())
+        self.runReactor(reactor)
+
+
+
 class StopStartReadingProtocol(Protocol):
     """
     Protocol that pauses and resumes the transport a few times
@@ -1933,6 +2268,7 @@ class AdoptStreamConnectionTestsBuilder(TCPTransportServerAddressTestMixin,
 globals().update(TCP4ClientTestsBuilder.makeTestCaseClasses())
 globals().update(TCP6ClientTestsBuilder.makeTestCaseClasses())
 globals().update(TCPPortTestsBuilder.makeTestCaseClasses())
+globals().update(ReusePortTestsBuilder.makeTestCaseClasses())
 globals().update(TCPFDPortTestsBuilder.makeTestCaseClasses())
 globals().update(TCPConnectionTestsBuilder.makeTestCaseClasses())
 globals().update(TCP4ConnectorTestsBuilder.makeTestCaseClasses())
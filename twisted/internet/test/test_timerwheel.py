@@ -0,0 +1,164 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet._timerwheel}.
+"""
+
+from __future__ import division, absolute_import
+
+from twisted.internet._timerwheel import TimerWheel
+from twisted.internet.base import DelayedCall
+from twisted.trial.unittest import SynchronousTestCase
+
+
+
+def _call(time):
+    """
+    Create a L{DelayedCall} scheduled for C{time}.
+
+    @param time: The absolute time at which the call is scheduled.
+    @type time: L{float}
+
+    @rtype: L{DelayedCall}
+    """
+    def noop(call):
+        pass
+    return DelayedCall(time, lambda: None, (), {}, noop, noop, None)
+
+
+
+class TimerWheelTests(SynchronousTestCase):
+    """
+    Tests for L{TimerWheel}.
+    """
+
+    def setUp(self):
+        """
+        Create a small wheel, with a resolution of one second and two levels
+        of four slots, so that cascading and the overflow are easy to reach.
+        """
+        self.wheel = TimerWheel(100, resolution=1, levelBits=(2, 2))
+
+
+    def test_empty(self):
+        """
+        A new L{TimerWheel} holds no calls and has no next time.
+        """
+        self.assertEqual(len(self.wheel), 0)
+        self.assertEqual(self.wheel.getCalls(), [])
+        self.assertIsNone(self.wheel.nextTime())
+        self.assertEqual(self.wheel.expire(1000), [])
+
+
+    def test_expireDue(self):
+        """
+        L{TimerWheel.expire} returns the calls due at the given time, ordered
+        by time, and leaves the others in the wheel.
+        """
+        late = _call(102.5)
+        early = _call(101.5)
+        notYet = _call(102.7)
+        for call in [late, early, notYet]:
+            self.wheel.add(call)
+        self.assertEqual(self.wheel.expire(102.6), [early, late])
+        self.assertEqual(self.wheel.getCalls(), [notYet])
+        self.assertEqual(self.wheel.expire(102.7), [notYet])
+        self.assertEqual(len(self.wheel), 0)
+
+
+    def test_pastCall(self):
+        """
+        A call scheduled before the current tick is returned by the next call
+        to L{TimerWheel.expire}.
+        """
+        call = _call(50)
+        self.wheel.add(call)
+        self.assertEqual(self.wheel.nextTime(), 50)
+        self.assertEqual(self.wheel.expire(100), [call])
+
+
+    def test_cascade(self):
+        """
+        Calls beyond the first level are cascaded into it as time passes, and
+        expire at their scheduled time rather than at the cascade.
+        """
+        call = _call(109.5)
+        self.wheel.add(call)
+        self.assertEqual(self.wheel.nextTime(), 108)
+        self.assertEqual(self.wheel.expire(108), [])
+        self.assertEqual(self.wheel.nextTime(), 109.5)
+        self.assertEqual(self.wheel.expire(109.4), [])
+        self.assertEqual(self.wheel.expire(109.5), [call])
+
+
+    def test_cascadeBeforeFirstLevel(self):
+        """
+        L{TimerWheel.nextTime} is no later than the cascade of a higher level
+        slot holding a call stored before the wheel advanced, even when the
+        first level holds a later call stored afterwards.
+        """
+        wheel = TimerWheel(0, 0.01)
+        early = _call(3.0)
+        late = _call(4.5)
+        wheel.add(early)
+        self.assertEqual(wheel.expire(2.0), [])
+        wheel.add(late)
+        self.assertLessEqual(wheel.nextTime(), 3.0)
+        self.assertEqual(wheel.expire(wheel.nextTime()), [])
+        self.assertEqual(wheel.nextTime(), 3.0)
+        self.assertEqual(wheel.expire(3.0), [early])
+        self.assertEqual(wheel.nextTime(), 4.5)
+
+
+    def test_overflow(self):
+        """
+        Calls too far in the future for every level are kept aside until the
+        wheel gets close enough to them.
+        """
+        call = _call(150.5)
+        self.wheel.add(call)
+        self.assertEqual(self.wheel.nextTime(), 150.5)
+        self.assertEqual(len(self.wheel), 1)
+        self.assertEqual(self.wheel.expire(150), [])
+        self.assertEqual(self.wheel.expire(151), [call])
+
+
+    def test_skipAhead(self):
+        """
+        L{TimerWheel.expire} can advance over a long period at once without
+        losing any call.
+        """
+        calls = [_call(100 + i * 7.5) for i in range(20)]
+        for call in calls:
+            self.wheel.add(call)
+        self.assertEqual(self.wheel.expire(100000), calls)
+
+
+    def test_remove(self):
+        """
+        L{TimerWheel.remove} removes a call from the wheel, and does nothing
+        if the call is not in the wheel.
+        """
+        near = _call(101)
+        far = _call(109)
+        distant = _call(1000)
+        for call in [near, far, distant]:
+            self.wheel.add(call)
+            self.wheel.remove(call)
+            self.wheel.remove(call)
+        self.assertEqual(len(self.wheel), 0)
+        self.assertEqual(self.wheel.expire(2000), [])
+
+
+    def test_reschedule(self):
+        """
+        L{TimerWheel.reschedule} moves a call to the slot matching its new
+        time.
+        """
+        call = _call(109)
+        self.wheel.add(call)
+        call.time = 101
+        self.wheel.reschedule(call)
+        self.assertEqual(self.wheel.nextTime(), 101)
+        self.assertEqual(self.wheel.expire(101), [call])
@@ -52,7 +52,33 @@ else:
 # Twisted Imports
 from twisted.internet import base, defer, address
 from twisted.python import log, failure
+from twisted.python._mmsg import recvmmsg as _recvmmsg
+from twisted.python._mmsg import sendmmsg as _sendmmsg
 from twisted.internet import abstract, error, interfaces
+from twisted.internet.protocol import AbstractDatagramProtocol
+
+# The implementation of datagramsReceived which gives each datagram to
+# datagramReceived: Port calls datagramReceived itself instead.
+_defaultDatagramsReceived = getattr(
+    AbstractDatagramProtocol.datagramsReceived, "__func__",
+    AbstractDatagramProtocol.datagramsReceived)
+
+
+
+def _batchable(skt):
+    """
+    Determine whether datagrams can be read from and written to a socket with
+    L{_recvmmsg} and L{_sendmmsg}, which only handle IPv4 and IPv6 addresses.
+    Other sockets, such as the UNIX datagram sockets of the subclasses of
+    L{Port} in L{twisted.internet.unix}, use one call per datagram.
+
+    @param skt: The socket of a L{Port}.
+
+    @return: C{True} if C{skt} is an IPv4 or IPv6 L{socket.socket}.
+    @rtype: L{bool}
+    """
+    return (isinstance(skt, socket.socket) and
+            skt.family in (socket.AF_INET, socket.AF_INET6))
 
 
 
@@ -220,34 +246,85 @@ class Port(base.BasePort):
     def doRead(self):
         """
         Called when my socket is ready for reading.
+
+        If the protocol overrides C{datagramsReceived}, the datagrams read are
+        given to it at once.  Otherwise they are given to its
+        C{datagramReceived} method one by one, as soon as they are read.
+        """
+        datagramsReceived = getattr(self.protocol, "datagramsReceived", None)
+        if (getattr(datagramsReceived, "__func__", None)
+                is _defaultDatagramsReceived):
+            datagramsReceived = None
+        if datagramsReceived is None:
+            refused = self._readDatagrams(None)
+        else:
+            datagrams = []
+            try:
+                refused = self._readDatagrams(datagrams)
+            finally:
+                if datagrams:
+                    try:
+                        datagramsReceived(datagrams)
+                    except:
+                        log.err()
+        if refused and self._connectedAddr:
+            self.protocol.connectionRefused()
+
+
+    def _readDatagrams(self, datagrams):
+        """
+        Read datagrams until there is none left or C{maxThroughput} bytes were
+        read.
+
+        Where recvmmsg is available, datagrams are read several at a time, so
+        up to one batch more than C{maxThroughput} bytes may be read.
+
+        @param datagrams: A C{list} to which the C{(datagram, addr)} tuples
+            read are appended, or L{None} to give each datagram to the
+            C{datagramReceived} method of the protocol instead.
+
+        @return: C{True} if reading failed because a previous write was
+            refused, C{False} otherwise.
         """
+        maxPacketSize = self.maxPacketSize
+        skt = self.socket
+        if _recvmmsg is not None and _batchable(skt):
+            receive = lambda: _recvmmsg(skt, maxPacketSize)
+        else:
+            recvfrom = skt.recvfrom
+            receive = lambda: ([recvfrom(maxPacketSize)], False)
+        # Remove the flow and scope ID from the IPv6 address tuples, reducing
+        # them to tuples of just (host, port).
+        #
+        # TODO: This should be amended to return an object that can unpack to
+        # (host, port) but also includes the flow info and scope ID. See
+        # http://tm.tl/6826
+        trimAddress = self.addressFamily == socket.AF_INET6
         read = 0
         while read < self.maxThroughput:
             try:
-                data, addr = self.socket.recvfrom(self.maxPacketSize)
+                batch, drained = receive()
             except socket.error as se:
                 no = se.args[0]
                 if no in _sockErrReadIgnore:
-                    return
+                    return False
                 if no in _sockErrReadRefuse:
-                    if self._connectedAddr:
-                        self.protocol.connectionRefused()
-                    return
+                    return True
                 raise
-            else:
+            for data, addr in batch:
                 read += len(data)
-                if self.addressFamily == socket.AF_INET6:
-                    # Remove the flow and scope ID from the address tuple,
-                    # reducing it to a tuple of just (host, port).
-                    #
-                    # TODO: This should be amended to return an object that can
-                    # unpack to (host, port) but also includes the flow info
-                    # and scope ID. See http://tm.tl/6826
+                if trimAddress:
                     addr = addr[:2]
-                try:
-                    self.protocol.datagramReceived(data, addr)
-                except:
-                    log.err()
+                if datagrams is not None:
+                    datagrams.append((data, addr))
+                else:
+                    try:
+                        self.protocol.datagramReceived(data, addr)
+                    except:
+                        log.err()
+            if drained:
+                break
+        return False
 
 
     def write(self, datagram, addr=None):
@@ -264,51 +341,147 @@ class Port(base.BasePort):
         """
         if self._connectedAddr:
             assert addr in (None, self._connectedAddr)
-            try:
-                return self.socket.send(datagram)
-            except socket.error as se:
-                no = se.args[0]
-                if no == EINTR:
-                    return self.write(datagram)
-                elif no == EMSGSIZE:
-                    raise error.MessageLengthError("message too long")
-                elif no == ECONNREFUSED:
-                    self.protocol.connectionRefused()
-                else:
-                    raise
+            return self._send(datagram)
+        else:
+            self._checkAddress(addr)
+            return self._sendTo(datagram, addr)
+
+
+    def writeDatagrams(self, datagrams):
+        """
+        Write several datagrams, each to its own address.
+
+        Every address is checked before any datagram is sent, and only once
+        however many datagrams are sent to it, so this is cheaper than calling
+        L{write} for each datagram.  Where sendmmsg is available, the
+        datagrams are sent several at a time.
+
+        @param datagrams: An iterable of C{(datagram, addr)} tuples, as the
+            arguments of L{write}.
+
+        @raise error.InvalidAddressError: If one of the addresses cannot be
+            written to by this port.  No datagram is sent then.
+        """
+        datagrams = list(datagrams)
+        batched = _sendmmsg is not None and _batchable(self.socket)
+        if self._connectedAddr:
+            for datagram, addr in datagrams:
+                assert addr in (None, self._connectedAddr)
+            if batched:
+                self._sendBatches(
+                    [(datagram, None) for datagram, addr in datagrams])
+            else:
+                for datagram, addr in datagrams:
+                    self._send(datagram)
         else:
-            assert addr != None
-            if (not abstract.isIPAddress(addr[0])
-                    and not abstract.isIPv6Address(addr[0])
-                    and addr[0] != "<broadcast>"):
-                raise error.InvalidAddressError(
-                    addr[0],
-                    "write() only accepts IP addresses, not hostnames")
-            if ((abstract.isIPAddress(addr[0]) or addr[0] == "<broadcast>")
-                    and self.addressFamily == socket.AF_INET6):
-                raise error.InvalidAddressError(
-                    addr[0],
-                    "IPv6 port write() called with IPv4 or broadcast address")
-            if (abstract.isIPv6Address(addr[0])
-                    and self.addressFamily == socket.AF_INET):
-                raise error.InvalidAddressError(
-                    addr[0], "IPv4 port write() called with IPv6 address")
+            checked = set()
+            for datagram, addr in datagrams:
+                if addr not in checked:
+                    self._checkAddress(addr)
+                    checked.add(addr)
+            if batched:
+                self._sendBatches(datagrams)
+            else:
+                for datagram, addr in datagrams:
+                    self._sendTo(datagram, addr)
+
+
+    def _sendBatches(self, datagrams):
+        """
+        Send datagrams with sendmmsg, handling errors like L{_send} and
+        L{_sendTo} do.
+
+        @param datagrams: A L{list} of C{(datagram, addr)} tuples, with
+            C{addr} L{None} for the datagrams sent to the connected address.
+            The addresses were checked by L{_checkAddress}.
+        """
+        sent = 0
+        while sent < len(datagrams):
             try:
-                return self.socket.sendto(datagram, addr)
+                sent += _sendmmsg(self.socket, datagrams, sent)
             except socket.error as se:
                 no = se.args[0]
                 if no == EINTR:
-                    return self.write(datagram, addr)
+                    continue
                 elif no == EMSGSIZE:
                     raise error.MessageLengthError("message too long")
                 elif no == ECONNREFUSED:
-                    # in non-connected UDP ECONNREFUSED is platform dependent, I
-                    # think and the info is not necessarily useful. Nevertheless
-                    # maybe we should call connectionRefused? XXX
-                    return
+                    if self._connectedAddr:
+                        self.protocol.connectionRefused()
+                    sent += 1
                 else:
                     raise
 
+
+    def _send(self, datagram):
+        """
+        Send a datagram to the connected address.
+
+        @param datagram: The datagram to be sent.
+        """
+        try:
+            return self.socket.send(datagram)
+        except socket.error as se:
+            no = se.args[0]
+            if no == EINTR:
+                return self._send(datagram)
+            elif no == EMSGSIZE:
+                raise error.MessageLengthError("message too long")
+            elif no == ECONNREFUSED:
+                self.protocol.connectionRefused()
+            else:
+                raise
+
+
+    def _checkAddress(self, addr):
+        """
+        Check that this port can write to an address.
+
+        @param addr: The address, as given to L{write}.
+
+        @raise error.InvalidAddressError: If it cannot.
+        """
+        assert addr != None
+        if (not abstract.isIPAddress(addr[0])
+                and not abstract.isIPv6Address(addr[0])
+                and addr[0] != "<broadcast>"):
+            raise error.InvalidAddressError(
+                addr[0],
+                "write() only accepts IP addresses, not hostnames")
+        if ((abstract.isIPAddress(addr[0]) or addr[0] == "<broadcast>")
+                and self.addressFamily == socket.AF_INET6):
+            raise error.InvalidAddressError(
+                addr[0],
+                "IPv6 port write() called with IPv4 or broadcast address")
+        if (abstract.isIPv6Address(addr[0])
+                and self.addressFamily == socket.AF_INET):
+            raise error.InvalidAddressError(
+                addr[0], "IPv4 port write() called with IPv6 address")
+
+
+    def _sendTo(self, datagram, addr):
+        """
+        Send a datagram to an address which was checked by L{_checkAddress}.
+
+        @param datagram: The datagram to be sent.
+        @param addr: The address to send it to.
+        """
+        try:
+            return self.socket.sendto(datagram, addr)
+        except socket.error as se:
+            no = se.args[0]
+            if no == EINTR:
+                return self._sendTo(datagram, addr)
+            elif no == EMSGSIZE:
+                raise error.MessageLengthError("message too long")
+            elif no == ECONNREFUSED:
+                # in non-connected UDP ECONNREFUSED is platform dependent, I
+                # think and the info is not necessarily useful. Nevertheless
+                # maybe we should call connectionRefused? XXX
+                return
+            else:
+                raise
+
     def writeSequence(self, seq, addr):
         self.write("".join(seq), addr)
 
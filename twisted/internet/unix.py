@@ -24,6 +24,7 @@ if not hasattr(socket, 'AF_UNIX'):
     raise ImportError("UNIX sockets not supported on this platform")
 
 from twisted.internet import main, base, tcp, udp, error, interfaces
+from twisted.internet import abstract
 from twisted.internet import protocol, address
 from twisted.python import lockfile, log, reflect, failure
 from twisted.python.filepath import _coerceToFilesystemEncoding
@@ -134,6 +135,7 @@ class _SendmsgMixin(object):
                         _ancillaryDescriptor(fd))
                 except socket.error as se:
                     if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                        self._writeBlocked = True
                         return index
                     else:
                         return main.CONNECTION_LOST
@@ -152,6 +154,22 @@ class _SendmsgMixin(object):
             return result
 
 
+    def doWrite(self):
+        """
+        Called when data can be written.
+
+        While file descriptors are queued, the buffered bytes are sent by
+        L{writeSomeData}, which needs them joined in order to pair each file
+        descriptor with one byte.  Otherwise, the base implementation is used,
+        which may send several buffers at once.
+
+        @see: L{twisted.internet.abstract.FileDescriptor.doWrite}
+        """
+        if self._sendmsgQueue:
+            return abstract.FileDescriptor.doWrite(self)
+        return self._writeSomeDataBase.doWrite(self)
+
+
     def doRead(self):
         """
         Calls L{IFileDescriptorReceiver.fileDescriptorReceived} and
@@ -167,6 +185,7 @@ class _SendmsgMixin(object):
                 sendmsg.recvmsg, self.socket, self.bufferSize)
         except socket.error as se:
             if se.args[0] == EWOULDBLOCK:
+                self._readBlocked = True
                 return
             else:
                 return main.CONNECTION_LOST
@@ -72,6 +72,20 @@ class FileAuthority(common.ResolverBase):
 
     @ivar soa: A 2-tuple containing the SOA domain name as a L{bytes} and a
         L{dns.Record_SOA}.
+
+    @ivar records: A L{dict} mapping lowercase domain names to the L{list} of
+        records they own.  Replacing it, or C{soa}, discards the responses
+        computed so far; modifying it in place does not.
+
+    @ivar _index: A L{dict} mapping 2-tuples of a lowercase domain name and
+        of a record type to the L{common._StaticResponse} computed for them.
+        The type is L{None} for the response shared by all the types the
+        domain owns no record of.
+
+    @ivar _indexedRecords: The value of C{records} when C{_index} was
+        created.
+
+    @ivar _indexedSOA: The value of C{soa} when C{_index} was created.
     """
     # See https://twistedmatrix.com/trac/ticket/6650
     _ADDITIONAL_PROCESSING_TYPES = (dns.CNAME, dns.MX, dns.NS)
@@ -80,15 +94,24 @@ class FileAuthority(common.ResolverBase):
     soa = None
     records = None
 
+    _index = None
+    _indexedRecords = None
+    _indexedSOA = None
+
     def __init__(self, filename):
         common.ResolverBase.__init__(self)
         self.loadFile(filename)
-        self._cache = {}
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_index', '_indexedRecords', '_indexedSOA'):
+            state.pop(name, None)
+        return state
 
 
     def __setstate__(self, state):
         self.__dict__ = state
-#        print 'setstate ', self.soa
 
 
     def _additionalRecords(self, answer, authority, ttl):
@@ -126,6 +149,12 @@ class FileAuthority(common.ResolverBase):
         """
         Determine a response to a particular DNS query.
 
+        Responses to queries for lowercase domain names are computed once for
+        each name and record type and kept in an index, so that further
+        queries for them are answered with the very same records.  Answers
+        are owned by the name as queried, so queries spelling it with other
+        cases are answered with records computed for them.
+
         @param name: The name which is being queried and for which to lookup a
             response.
         @type name: L{bytes}
@@ -144,7 +173,89 @@ class FileAuthority(common.ResolverBase):
         @return: A L{Deferred} that fires with a L{tuple} of three sets of
             response records (to comprise the I{answer}, I{authority}, and
             I{additional} sections of a DNS response) or with a L{Failure} if
-            there is a problem processing the query.
+            there is a problem processing the query.  The records must not be
+            modified.
+        """
+        if (self._indexedRecords is not self.records or
+                self._indexedSOA is not self.soa):
+            self._index = {}
+            self._indexedRecords = self.records
+            self._indexedSOA = self.soa
+
+        key = name.lower()
+        if key != name:
+            # The answers are owned by the name as it was queried: only those
+            # to lowercase queries, by far the most common, are indexed.
+            domain_records = self.records.get(key)
+            if domain_records:
+                return defer.succeed(
+                    self._computeResponse(name, type, domain_records))
+            return self._notFound(name)
+
+        response = self._index.get((name, type))
+        if response is not None:
+            return defer.succeed(response)
+
+        domain_records = self.records.get(name)
+        if domain_records:
+            if type != dns.ALL_RECORDS:
+                for record in domain_records:
+                    if record.TYPE == type:
+                        break
+                else:
+                    # The response does not depend on the queried type when
+                    # the domain owns no record of that type.
+                    response = self._index.get((name, None))
+                    if response is None:
+                        response = self._index[name, None] = (
+                            self._computeResponse(name, type, domain_records))
+                    return defer.succeed(response)
+            response = self._index[name, type] = self._computeResponse(
+                name, type, domain_records)
+            return defer.succeed(response)
+        else:
+            return self._notFound(name)
+
+
+    def _notFound(self, name):
+        """
+        Fail a query for a name which owns no record.
+
+        @param name: The name which is being queried.
+        @type name: L{bytes}
+
+        @return: A L{Deferred} failing with L{dns.AuthoritativeDomainError} if
+            C{name} is in this zone, with L{error.DomainError} otherwise.
+        """
+        if dns._isSubdomainOf(name, self.soa[0]):
+            # We may be the authority and we didn't find it.
+            # XXX: The QNAME may also be a in a delegated child zone. See
+            # #6581 and #6580
+            return defer.fail(failure.Failure(dns.AuthoritativeDomainError(name)))
+        else:
+            # The QNAME is not a descendant of this zone. Fail with
+            # DomainError so that the next chained authority or
+            # resolver will be queried.
+            return defer.fail(failure.Failure(error.DomainError(name)))
+
+
+    def _computeResponse(self, name, type, domain_records):
+        """
+        Compute the response to a query for the records of a domain name.
+
+        @param name: The name which is being queried, which owns the
+            records of the response.
+        @type name: L{bytes}
+
+        @param type: The type of records being queried.
+        @type type: L{int}
+
+        @param domain_records: The records owned by C{name}.
+        @type domain_records: L{list}
+
+        @return: The I{answer}, I{authority} and I{additional} sections of
+            the response.
+        @rtype: L{common._StaticResponse}
         """
         cnames = []
         results = []
@@ -152,61 +263,48 @@ class FileAuthority(common.ResolverBase):
         additional = []
         default_ttl = max(self.soa[1].minimum, self.soa[1].expire)
 
-        domain_records = self.records.get(name.lower())
-
-        if domain_records:
-            for record in domain_records:
-                if record.ttl is not None:
-                    ttl = record.ttl
-                else:
-                    ttl = default_ttl
-
-                if record.TYPE == dns.NS and name.lower() != self.soa[0].lower():
-                    # NS record belong to a child zone: this is a referral.  As
-                    # NS records are authoritative in the child zone, ours here
-                    # are not.  RFC 2181, section 6.1.
-                    authority.append(
-                        dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=False)
-                    )
-                elif record.TYPE == type or type == dns.ALL_RECORDS:
-                    results.append(
-                        dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=True)
-                    )
-                if record.TYPE == dns.CNAME:
-                    cnames.append(
-                        dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=True)
-                    )
-            if not results:
-                results = cnames
-
-            # https://tools.ietf.org/html/rfc1034#section-4.3.2 - sort of.
-            # See https://twistedmatrix.com/trac/ticket/6732
-            additionalInformation = self._additionalRecords(
-                results, authority, default_ttl)
-            if cnames:
-                results.extend(additionalInformation)
+        for record in domain_records:
+            if record.ttl is not None:
+                ttl = record.ttl
             else:
-                additional.extend(additionalInformation)
+                ttl = default_ttl
 
-            if not results and not authority:
-                # Empty response. Include SOA record to allow clients to cache
-                # this response.  RFC 1034, sections 3.7 and 4.3.4, and RFC 2181
-                # section 7.1.
+            if (record.TYPE == dns.NS and
+                    name.lower() != self.soa[0].lower()):
+                # NS record belong to a child zone: this is a referral.  As
+                # NS records are authoritative in the child zone, ours here
+                # are not.  RFC 2181, section 6.1.
                 authority.append(
-                    dns.RRHeader(self.soa[0], dns.SOA, dns.IN, ttl, self.soa[1], auth=True)
-                    )
-            return defer.succeed((results, authority, additional))
+                    dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=False)
+                )
+            elif record.TYPE == type or type == dns.ALL_RECORDS:
+                results.append(
+                    dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=True)
+                )
+            if record.TYPE == dns.CNAME:
+                cnames.append(
+                    dns.RRHeader(name, record.TYPE, dns.IN, ttl, record, auth=True)
+                )
+        if not results:
+            results = cnames
+
+        # https://tools.ietf.org/html/rfc1034#section-4.3.2 - sort of.
+        # See https://twistedmatrix.com/trac/ticket/6732
+        additionalInformation = self._additionalRecords(
+            results, authority, default_ttl)
+        if cnames:
+            results.extend(additionalInformation)
         else:
-            if dns._isSubdomainOf(name, self.soa[0]):
-                # We may be the authority and we didn't find it.
-                # XXX: The QNAME may also be a in a delegated child zone. See
-                # #6581 and #6580
-                return defer.fail(failure.Failure(dns.AuthoritativeDomainError(name)))
-            else:
-                # The QNAME is not a descendant of this zone. Fail with
-                # DomainError so that the next chained authority or
-                # resolver will be queried.
-                return defer.fail(failure.Failure(error.DomainError(name)))
+            additional.extend(additionalInformation)
+
+        if not results and not authority:
+            # Empty response. Include SOA record to allow clients to cache
+            # this response.  RFC 1034, sections 3.7 and 4.3.4, and RFC 2181
+            # section 7.1.
+            authority.append(
+                dns.RRHeader(self.soa[0], dns.SOA, dns.IN, ttl, self.soa[1], auth=True)
+                )
+        return common._StaticResponse(results, authority, additional)
 
 
     def lookupZone(self, name, timeout = 10):
@@ -352,7 +450,6 @@ class BindAuthority(FileAuthority):
             r.ttl = ttl
             self.records.setdefault(domain.lower(), []).append(r)
 
-            print('Adding IN Record', domain, ttl, r)
             if type == 'SOA':
                 self.soa = (domain, r)
         else:
@@ -8,26 +8,132 @@ An in-memory caching resolver.
 
 from __future__ import division, absolute_import
 
+from collections import OrderedDict
+
 from twisted.names import dns, common
 from twisted.python import failure, log
 from twisted.internet import defer
 
 
 
+class _CacheEntry(object):
+    """
+    A result stored by L{CacheResolver}.
+
+    @ivar when: The time (seconds since epoch) at which the result was added
+        to the cache.
+    @type when: L{float}
+
+    @ivar payload: A 3-tuple of lists of L{dns.RRHeader} records (answers,
+        authority and additional), or L{None} for a cached name error.
+
+    @ivar expires: The time (seconds since epoch) from which the result must
+        not be used any more.
+    @type expires: L{float}
+
+    @ivar _age: The age, in whole seconds, for which C{_result} was built.
+
+    @ivar _result: C{payload} with the TTL of every record decreased by
+        C{_age}, as last returned by L{resultAt}.
+    """
+    __slots__ = ('when', 'payload', 'expires', '_age', '_result')
+
+    def __init__(self, when, payload, expires):
+        self.when = when
+        self.payload = payload
+        self.expires = expires
+        self._age = None
+        self._result = None
+
+
+    def resultAt(self, now):
+        """
+        Build the result of a lookup of this entry at a given time.
+
+        The records are only rebuilt once per second, as their TTLs are
+        expressed in whole seconds.  The lists and records returned are shared
+        by all the lookups made within the same second and must not be
+        modified.
+
+        @param now: The current time (seconds since epoch), earlier than
+            C{expires}.
+        @type now: L{float}
+
+        @return: A 3-tuple of lists of L{dns.RRHeader} records, copied from
+            C{payload} with their TTL decreased by the age of this entry.
+        """
+        age = int(now - self.when)
+        if age != self._age:
+            self._result = tuple(
+                [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - age,
+                              r.payload) for r in section]
+                for section in self.payload)
+            self._age = age
+        return self._result
+
+
+
 class CacheResolver(common.ResolverBase):
     """
     A resolver that serves records from a local, memory cache.
 
+    Entries are not removed when they expire, but when they are looked up
+    after expiring, or when room is needed for a new entry: once the cache
+    holds C{maxSize} entries, the least recently used one is evicted.
+
+    Name errors (I{NXDOMAIN}) can be cached with L{cacheNegativeResult}, as
+    described by RFC 2308.
+
+    @ivar cache: A L{collections.OrderedDict} mapping L{dns.Query} instances to
+        L{_CacheEntry} instances, from the least to the most recently used.
+
+    @ivar maxSize: The largest number of entries kept in C{cache}, or L{None}
+        for no limit.
+    @type maxSize: L{int} or L{None}
+
+    @ivar maxNegativeTTL: The longest time, in seconds, for which a name
+        error is cached, whatever the authority says.
+    @type maxNegativeTTL: L{int}
+
+    @ivar hits: The number of lookups answered from the cache, including the
+        cached name errors.
+    @type hits: L{int}
+
+    @ivar misses: The number of lookups which found no entry, or an expired
+        one.
+    @type misses: L{int}
+
+    @ivar evictions: The number of entries removed from the cache to make room
+        for newer ones.
+    @type evictions: L{int}
+
     @ivar _reactor: A provider of L{interfaces.IReactorTime}.
     """
     cache = None
+    maxSize = 10000
+    maxNegativeTTL = 3 * 60 * 60
+    hits = misses = evictions = 0
 
-    def __init__(self, cache=None, verbose=0, reactor=None):
+    def __init__(self, cache=None, verbose=0, reactor=None, maxSize=10000):
+        """
+        @param cache: A L{dict} mapping L{dns.Query} instances to 2-tuples of
+            the time (seconds since epoch) at which the result was obtained and
+            of the result, to add to the cache.
+
+        @param verbose: The verbosity of the cache: if greater than 0, hits
+            are logged, if greater than 1, misses and additions are logged too.
+        @type verbose: L{int}
+
+        @param reactor: A provider of L{interfaces.IReactorTime}, or L{None}
+            to use the global reactor.
+
+        @param maxSize: See C{maxSize}.
+        """
         common.ResolverBase.__init__(self)
 
-        self.cache = {}
+        self.cache = OrderedDict()
         self.verbose = verbose
-        self.cancel = {}
+        self.maxSize = maxSize
         if reactor is None:
             from twisted.internet import reactor
         self._reactor = reactor
@@ -38,60 +144,123 @@ class CacheResolver(common.ResolverBase):
 
 
     def __setstate__(self, state):
+        cache = state.pop('cache')
+        # Instances pickled by older versions kept a timer per entry.
+        state.pop('cancel', None)
         self.__dict__ = state
-
-        now = self._reactor.seconds()
-        for (k, (when, (ans, add, ns))) in self.cache.items():
-            diff = now - when
-            for rec in ans + add + ns:
-                if rec.ttl < diff:
-                    del self.cache[k]
-                    break
+        self.cache = OrderedDict()
+        if isinstance(cache, dict):
+            # Older versions pickled a dict of (when, payload) tuples.
+            for query, (when, payload) in cache.items():
+                self.cacheResult(query, payload, when)
+        else:
+            for query, when, payload, expires in cache:
+                self._store(query, _CacheEntry(when, payload, expires))
+        self._purge(self._reactor.seconds())
 
 
     def __getstate__(self):
-        for c in self.cancel.values():
-            c.cancel()
-        self.cancel.clear()
-        return self.__dict__
+        state = self.__dict__.copy()
+        state['cache'] = [
+            (query, entry.when, entry.payload, entry.expires)
+            for (query, entry) in self.cache.items()]
+        return state
+
+
+    def _purge(self, now):
+        """
+        Remove every expired entry from the cache.
+
+        @param now: The current time (seconds since epoch).
+        @type now: L{float}
+        """
+        for query, entry in list(self.cache.items()):
+            if entry.expires <= now:
+                del self.cache[query]
 
 
     def _lookup(self, name, cls, type, timeout):
         now = self._reactor.seconds()
         q = dns.Query(name, type, cls)
-        try:
-            when, (ans, auth, add) = self.cache[q]
-        except KeyError:
+        entry = self.cache.pop(q, None)
+        if entry is None or entry.expires <= now:
+            self.misses += 1
             if self.verbose > 1:
                 log.msg('Cache miss for ' + repr(name))
             return defer.fail(failure.Failure(dns.DomainError(name)))
-        else:
-            if self.verbose:
-                log.msg('Cache hit for ' + repr(name))
-            diff = now - when
-
-            try:
-                result = (
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in ans],
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in auth],
-                    [dns.RRHeader(r.name.name, r.type, r.cls, r.ttl - diff,
-                                  r.payload) for r in add])
-            except ValueError:
-                return defer.fail(failure.Failure(dns.DomainError(name)))
-            else:
-                return defer.succeed(result)
+
+        # Reinserting the entry makes it the most recently used one.
+        self.cache[q] = entry
+        self.hits += 1
+        if self.verbose:
+            log.msg('Cache hit for ' + repr(name))
+        if entry.payload is None:
+            # Unlike a miss, a cached name error is final.
+            return defer.fail(failure.Failure(
+                dns.AuthoritativeDomainError(name)))
+        try:
+            result = entry.resultAt(now)
+        except ValueError:
+            # A record outlived its TTL, which entries restored from caches
+            # pickled by older versions may allow: treat it as a miss.
+            del self.cache[q]
+            self.hits -= 1
+            self.misses += 1
+            return defer.fail(failure.Failure(dns.DomainError(name)))
+        return defer.succeed(result)
 
 
     def lookupAllRecords(self, name, timeout = None):
         return defer.fail(failure.Failure(dns.DomainError(name)))
 
 
+    def _store(self, query, entry):
+        """
+        Add an entry to the cache, as the most recently used one, evicting
+        the least recently used entries if the cache is full.
+
+        @param query: The L{dns.Query} the entry answers.
+
+        @param entry: The L{_CacheEntry} to add.
+        """
+        self.cache.pop(query, None)
+        self.cache[query] = entry
+        if self.maxSize is not None:
+            while len(self.cache) > self.maxSize:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+
+
+    def _negativeTTL(self, authority):
+        """
+        Compute how long a negative answer may be cached, following RFC 2308
+        section 5: the smaller of the TTL of the I{SOA} record of the
+        authority section and of its I{minimum} field, and no more than
+        C{maxNegativeTTL}.
+
+        @param authority: The records of the authority section of the answer.
+        @type authority: L{list} of L{dns.RRHeader}
+
+        @return: The TTL in seconds, or L{None} if the authority section holds
+            no I{SOA} record, in which case the answer must not be cached.
+        @rtype: L{int} or L{None}
+        """
+        for record in authority:
+            if record.type == dns.SOA:
+                return min(record.ttl, record.payload.minimum,
+                           self.maxNegativeTTL)
+        return None
+
+
     def cacheResult(self, query, payload, cacheTime=None):
         """
         Cache a DNS entry.
 
+        The entry expires once the smallest TTL of its records has elapsed.
+        If it has no answer records, it is a I{NODATA} answer, which expires
+        earlier if RFC 2308 says so and the authority section holds an
+        I{SOA} record.
+
         @param query: a L{dns.Query} instance.
 
         @param payload: a 3-tuple of lists of L{dns.RRHeader} records, the
@@ -104,22 +273,49 @@ class CacheResolver(common.ResolverBase):
         if self.verbose > 1:
             log.msg('Adding %r to cache' % query)
 
-        self.cache[query] = (cacheTime or self._reactor.seconds(), payload)
+        when = cacheTime or self._reactor.seconds()
+        records = list(payload[0]) + list(payload[1]) + list(payload[2])
+        ttls = [r.ttl for r in records]
+        if not payload[0]:
+            negativeTTL = self._negativeTTL(payload[1])
+            if negativeTTL is not None:
+                # No record may outlive its own TTL, though.
+                ttls.append(negativeTTL)
+        ttl = min(ttls) if ttls else 0
+        self._store(query, _CacheEntry(when, payload, when + ttl))
 
-        if query in self.cancel:
-            self.cancel[query].cancel()
 
-        s = list(payload[0]) + list(payload[1]) + list(payload[2])
-        if s:
-            m = s[0].ttl
-            for r in s:
-                m = min(m, r.ttl)
-        else:
-            m = 0
+    def cacheNegativeResult(self, query, authority, cacheTime=None):
+        """
+        Cache a name error (I{NXDOMAIN}) for the time allowed by the I{SOA}
+        record of the authority section of the answer, as described by RFC
+        2308.  Until it expires, lookups of C{query} fail with
+        L{dns.AuthoritativeDomainError}.
+
+        Nothing is cached if the authority section holds no I{SOA} record.
+
+        @param query: a L{dns.Query} instance.
 
-        self.cancel[query] = self._reactor.callLater(m, self.clearEntry, query)
+        @param authority: The records of the authority section of the answer.
+        @type authority: L{list} of L{dns.RRHeader}
+
+        @param cacheTime: The time (seconds since epoch) at which the entry is
+            considered to have been added to the cache. If L{None} is given,
+            the current time is used.
+        """
+        ttl = self._negativeTTL(authority)
+        if ttl is None:
+            return
+        if self.verbose > 1:
+            log.msg('Adding name error for %r to cache' % query)
+        when = cacheTime or self._reactor.seconds()
+        self._store(query, _CacheEntry(when, None, when + ttl))
 
 
     def clearEntry(self, query):
-        del self.cache[query]
-        del self.cancel[query]
+        """
+        Remove an entry from the cache, if it is there.
+
+        @param query: The L{dns.Query} the entry answers.
+        """
+        self.cache.pop(query, None)
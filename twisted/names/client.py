@@ -39,8 +39,9 @@ moduleProvides(interfaces.IResolver)
 
 class Resolver(common.ResolverBase):
     """
-    @ivar _waiting: A C{dict} mapping tuple keys of query name/type/class to
-        Deferreds which will be called back with the result of those queries.
+    @ivar _waiting: A C{dict} mapping L{dns.Query} instances to two-tuples of
+        the L{Deferred} of the network request sent for that query and of the
+        list of Deferreds which will be called back with its result.
         This is used to avoid issuing the same query more than once in
         parallel.  This is more efficient on the network and helps avoid a
         "birthday paradox" attack by keeping the number of outstanding requests
@@ -381,7 +382,12 @@ class Resolver(common.ResolverBase):
 
         If this query is already outstanding, it will not be re-issued.
         Instead, when the outstanding query receives a response, that response
-        will be re-used for this query as well.
+        will be re-used for this query as well.  Names are compared without
+        regard to case, as in the rest of the DNS.
+
+        Each call gets its own L{Deferred}: cancelling it does not affect the
+        other callers waiting for the same query, and the query itself is only
+        cancelled once all of them have cancelled theirs.
 
         @type name: C{str}
         @type type: C{int}
@@ -391,23 +397,39 @@ class Resolver(common.ResolverBase):
             answer, authority, and additional sections of the response or with
             a L{Failure} if the response code is anything other than C{dns.OK}.
         """
-        key = (name, type, cls)
+        key = dns.Query(name, type, cls)
+        d = defer.Deferred(lambda d: self._cancelWaiting(key, d))
         waiting = self._waiting.get(key)
         if waiting is None:
-            self._waiting[key] = []
-            d = self.queryUDP([dns.Query(name, type, cls)], timeout)
+            query = self.queryUDP([key], timeout)
+            self._waiting[key] = (query, [d])
             def cbResult(result):
-                for d in self._waiting.pop(key):
+                for d in self._waiting.pop(key)[1]:
                     d.callback(result)
-                return result
-            d.addCallback(self.filterAnswers)
-            d.addBoth(cbResult)
+            query.addCallback(self.filterAnswers)
+            query.addBoth(cbResult)
         else:
-            d = defer.Deferred()
-            waiting.append(d)
+            waiting[1].append(d)
         return d
 
 
+    def _cancelWaiting(self, key, d):
+        """
+        Stop waiting for the answer to a query on behalf of a cancelled
+        L{Deferred} returned by L{_lookup}, and cancel the network request
+        itself if nothing else waits for it.
+
+        @param key: The L{dns.Query} the L{Deferred} waits for.
+
+        @param d: The cancelled L{Deferred}.
+        """
+        query, waiters = self._waiting.get(key, (None, ()))
+        if d in waiters:
+            waiters.remove(d)
+            if not waiters:
+                query.cancel()
+
+
     # This one doesn't ever belong on UDP
     def lookupZone(self, name, timeout=10):
         address = self.pickServer()
@@ -28,6 +28,27 @@ EMPTY_RESULT = (), (), ()
 
 
 
+class _StaticResponse(tuple):
+    """
+    The answer, authority and additional sections of a response which never
+    change, like those precomputed by
+    L{twisted.names.authority.FileAuthority}.  The same instance may be given
+    to any number of callers, none of which may modify it.
+
+    @ivar encodings: A L{dict} used by L{twisted.names.server.DNSServerFactory}
+        to keep the encoded form of response messages made of these sections,
+        so that they are only encoded once.
+    """
+
+    def __new__(cls, answers, authority, additional):
+        return tuple.__new__(cls, (answers, authority, additional))
+
+
+    def __init__(self, answers, authority, additional):
+        self.encodings = {}
+
+
+
 @implementer(interfaces.IResolver)
 class ResolverBase:
     """
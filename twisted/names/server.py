@@ -18,13 +18,44 @@ for resolvers to deal with.  Fix it.
 """
 from __future__ import division, absolute_import
 
+import struct
 import time
 
 from twisted.internet import protocol
-from twisted.names import dns, resolve
+from twisted.names import common, dns, error, resolve
 from twisted.python import log
 
 
+class _EncodedMessage(object):
+    """
+    A response message whose encoded form is already known, so that sending
+    it does not encode it again.  Other attributes are those of the wrapped
+    message.
+
+    @ivar _message: The wrapped L{dns.Message}.
+
+    @ivar _encoded: The encoded form of C{_message}.
+    @type _encoded: L{bytes}
+    """
+
+    def __init__(self, message, encoded):
+        self._message = message
+        self._encoded = encoded
+
+
+    def __getattr__(self, name):
+        return getattr(self._message, name)
+
+
+    def toStr(self):
+        """
+        @return: The encoded form of the message.
+        @rtype: L{bytes}
+        """
+        return self._encoded
+
+
+
 class DNSServerFactory(protocol.ServerFactory):
     """
     Server factory and tracker for L{DNSProtocol} connections.  This class also
@@ -60,11 +91,16 @@ class DNSServerFactory(protocol.ServerFactory):
     @ivar _messageFactory: A response message constructor with an initializer
          signature matching L{dns.Message.__init__}.
     @type _messageFactory: C{callable}
+
+    @ivar _MAX_ENCODINGS: The largest number of encoded response messages
+        kept for the same L{common._StaticResponse}.
+    @type _MAX_ENCODINGS: L{int}
     """
 
     protocol = dns.DNSProtocol
     cache = None
     _messageFactory = dns.Message
+    _MAX_ENCODINGS = 16
 
 
     def __init__(self, authorities=None, caches=None, clients=None, verbose=0):
@@ -261,6 +297,39 @@ class DNSServerFactory(protocol.ServerFactory):
         return response
 
 
+    def _encodeStaticReply(self, response, reply):
+        """
+        Encode a response message made of records which never change, reusing
+        the encoded form of a previous response to the same query if there is
+        one.
+
+        @param response: The records of C{reply}.
+        @type response: L{common._StaticResponse}
+
+        @param reply: The response message.
+        @type reply: L{dns.Message}
+
+        @return: An object standing for C{reply}, with a C{toStr} method
+            returning its encoded form.
+        @rtype: L{_EncodedMessage}
+        """
+        # Everything but the ID which ends up in the encoded message.
+        key = (reply.answer, reply.opCode, reply.auth, reply.recDes,
+               reply.recAv, reply.rCode, reply.authenticData,
+               reply.checkingDisabled, reply.maxSize,
+               tuple((q.name.name, q.type, q.cls) for q in reply.queries))
+        encoded = response.encodings.get(key)
+        if encoded is None:
+            if len(response.encodings) >= self._MAX_ENCODINGS:
+                # Queries for the same records can be spelled with any case,
+                # so do not keep an unbounded number of encodings around.
+                response.encodings.clear()
+            encoded = response.encodings[key] = reply.toStr()
+        else:
+            encoded = struct.pack('!H', reply.id) + encoded[2:]
+        return _EncodedMessage(reply, encoded)
+
+
     def gotResolverResponse(self, response, protocol, message, address):
         """
         A callback used by L{DNSServerFactory.handleQuery} for handling the
@@ -275,6 +344,11 @@ class DNSServerFactory(protocol.ServerFactory):
         The resolved answers count will be logged if C{DNSServerFactory.verbose}
         is C{>1}.
 
+        If the records never change (C{response} is a
+        L{common._StaticResponse}), the response message is only encoded
+        once for each form of the query message: further responses are
+        copied from it, with the message ID replaced.
+
         @param response: Answer records, authority records and additional records
         @type response: L{tuple} of L{list} of L{dns.RRHeader} instances
 
@@ -291,10 +365,13 @@ class DNSServerFactory(protocol.ServerFactory):
         @type address: L{tuple} or L{None}
         """
         ans, auth, add = response
-        response = self._responseFromMessage(
+        reply = self._responseFromMessage(
             message=message, rCode=dns.OK,
             answers=ans, authority=auth, additional=add)
-        self.sendReply(protocol, response, address)
+        if (isinstance(response, common._StaticResponse) and
+                self._messageFactory is dns.Message):
+            reply = self._encodeStaticReply(response, reply)
+        self.sendReply(protocol, reply, address)
 
         l = len(ans) + len(auth) + len(add)
         self._verboseLog("Lookup found %d record%s" % (l, l != 1 and "s" or ""))
@@ -315,6 +392,9 @@ class DNSServerFactory(protocol.ServerFactory):
 
         An error message will be logged if C{DNSServerFactory.verbose} is C{>1}.
 
+        A name error reported by an upstream server is cached with the
+        C{cacheNegativeResult} method of C{self.cache}, if it has one.
+
         @param failure: The reason for the failed resolution (as reported by
             C{self.resolver.query}).
         @type failure: L{Failure<twisted.python.failure.Failure>}
@@ -342,6 +422,17 @@ class DNSServerFactory(protocol.ServerFactory):
         self.sendReply(protocol, response, address)
         self._verboseLog("Lookup failed")
 
+        if self.cache and failure.check(error.DNSNameError):
+            # A name error reported by an upstream server carries its answer,
+            # whose authority section tells how long the error may be cached.
+            # Caches which predate negative caching are left alone.
+            cacheNegativeResult = getattr(
+                self.cache, 'cacheNegativeResult', None)
+            upstream = failure.value.args and failure.value.args[0]
+            if (cacheNegativeResult is not None and
+                    isinstance(upstream, dns.Message)):
+                cacheNegativeResult(message.queries[0], upstream.authority)
+
 
     def handleQuery(self, message, protocol, address):
         """
@@ -30,11 +30,14 @@ class CachingTests(unittest.TestCase):
 
 
     def test_lookup(self):
+        r = ([dns.RRHeader(b"example.com", dns.MX, dns.IN, 60,
+                           dns.Record_MX(10, b"mail.example.com", 60))],
+             [], [])
         c = cache.CacheResolver({
             dns.Query(name=b'example.com', type=dns.MX, cls=dns.IN):
-                (time.time(), ([], [], []))})
+                (time.time(), r)})
         return c.lookupMailExchange(b'example.com').addCallback(
-            self.assertEqual, ([], [], []))
+            self.assertEqual, r)
 
 
     def test_constructorExpires(self):
@@ -58,10 +61,10 @@ class CachingTests(unittest.TestCase):
         # on the minimum TTL.
         clock.advance(40)
 
-        self.assertNotIn(query, c.cache)
-
-        return self.assertFailure(
+        d = self.assertFailure(
             c.lookupAddress(b"example.com"), dns.DomainError)
+        d.addCallback(lambda ignored: self.assertNotIn(query, c.cache))
+        return d
 
 
     def test_normalLookup(self):
@@ -111,10 +114,10 @@ class CachingTests(unittest.TestCase):
 
         clock.advance(40)
 
-        self.assertNotIn(query, c.cache)
-
-        return self.assertFailure(
+        d = self.assertFailure(
             c.lookupAddress(b"example.com"), dns.DomainError)
+        d.addCallback(lambda ignored: self.assertNotIn(query, c.cache))
+        return d
 
 
     def test_expiredTTLLookup(self):
@@ -142,3 +145,236 @@ class CachingTests(unittest.TestCase):
 
         return self.assertFailure(
             c.lookupAddress(b"example.com"), dns.DomainError)
+
+
+    def test_noTimers(self):
+        """
+        L{cache.CacheResolver.cacheResult} does not schedule any timed call:
+        entries are expired when they are looked up.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            _payload(60))
+        self.assertEqual(clock.getDelayedCalls(), [])
+
+
+    def test_counters(self):
+        """
+        L{cache.CacheResolver} counts the lookups answered from the cache in
+        C{hits} and the others, including those finding an expired entry, in
+        C{misses}.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            _payload(60))
+        c.lookupAddress(b"example.com")
+        c.lookupAddress(b"example.com")
+        self.failureResultOf(
+            c.lookupAddress(b"example.org"), dns.DomainError)
+        clock.advance(60)
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+        self.assertEqual((c.hits, c.misses, c.evictions), (2, 2, 0))
+
+
+    def test_leastRecentlyUsedEvicted(self):
+        """
+        Once L{cache.CacheResolver} holds C{maxSize} entries, adding another
+        one evicts the least recently used entry and is counted in
+        C{evictions}.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock, maxSize=2)
+        first, second, third = [
+            dns.Query(name=name, type=dns.A, cls=dns.IN)
+            for name in [b"first.example", b"second.example",
+                         b"third.example"]]
+        c.cacheResult(first, _payload(60, b"first.example"))
+        c.cacheResult(second, _payload(60, b"second.example"))
+        # Looking the first entry up makes the second the least recently
+        # used.
+        self.successResultOf(c.lookupAddress(b"first.example"))
+        c.cacheResult(third, _payload(60, b"third.example"))
+        self.assertEqual(list(c.cache), [first, third])
+        self.assertEqual(c.evictions, 1)
+
+
+    def test_resultReused(self):
+        """
+        Lookups made within the same second return the same records, which
+        are only rebuilt with decreased TTLs once a second has elapsed.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            _payload(60))
+        first = self.successResultOf(c.lookupAddress(b"example.com"))
+        clock.advance(0.5)
+        second = self.successResultOf(c.lookupAddress(b"example.com"))
+        clock.advance(0.5)
+        third = self.successResultOf(c.lookupAddress(b"example.com"))
+        self.assertIs(first, second)
+        self.assertEqual(second[0][0].ttl, 60)
+        self.assertEqual(third[0][0].ttl, 59)
+
+
+    def test_noDataExpiresWithSOA(self):
+        """
+        An answer without answer records expires after the smaller of the TTL
+        of the I{SOA} record of its authority section and of its I{minimum}
+        field, as described by RFC 2308.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            ([], [_soa(300, 30)], []))
+        self.successResultOf(c.lookupAddress(b"example.com"))
+        clock.advance(30)
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+
+
+    def test_noDataExpiresWithRecords(self):
+        """
+        An answer without answer records expires no later than the smallest
+        TTL of the records of its other sections, even if the I{SOA} record
+        allows caching it for longer.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            ([], [_soa(300, 300)], _payload(10)[0]))
+        clock.advance(9)
+        result = self.successResultOf(c.lookupAddress(b"example.com"))
+        self.assertEqual(result[2][0].ttl, 1)
+        clock.advance(1)
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+
+
+    def test_recordOutlivedTTL(self):
+        """
+        An entry with a record older than its TTL, as restored from a cache
+        pickled by an older version may be, is removed and counted as a
+        miss.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        query = dns.Query(name=b"example.com", type=dns.A, cls=dns.IN)
+        c.cache[query] = cache._CacheEntry(0, _payload(10), 60)
+        clock.advance(30)
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+        self.assertEqual((c.hits, c.misses), (0, 1))
+        self.assertEqual(len(c.cache), 0)
+
+
+    def test_negativeResult(self):
+        """
+        A name error cached with L{cache.CacheResolver.cacheNegativeResult}
+        makes lookups fail with L{dns.AuthoritativeDomainError}, so that other
+        resolvers are not asked, until it expires.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.cacheNegativeResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            [_soa(30, 300)])
+        self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.AuthoritativeDomainError)
+        self.assertEqual(c.hits, 1)
+        clock.advance(30)
+        failure = self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+        self.assertFalse(failure.check(dns.AuthoritativeDomainError))
+
+
+    def test_negativeResultWithoutSOA(self):
+        """
+        A name error is not cached if the authority section of the answer has
+        no I{SOA} record.
+        """
+        c = cache.CacheResolver(reactor=task.Clock())
+        c.cacheNegativeResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN), [])
+        self.assertEqual(len(c.cache), 0)
+
+
+    def test_maxNegativeTTL(self):
+        """
+        A name error is not cached for longer than C{maxNegativeTTL} seconds.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        c.maxNegativeTTL = 10
+        c.cacheNegativeResult(
+            dns.Query(name=b"example.com", type=dns.A, cls=dns.IN),
+            [_soa(300, 300)])
+        clock.advance(10)
+        self.assertEqual(len(c.cache), 1)
+        failure = self.failureResultOf(
+            c.lookupAddress(b"example.com"), dns.DomainError)
+        self.assertFalse(failure.check(dns.AuthoritativeDomainError))
+
+
+    def test_pickle(self):
+        """
+        A pickled L{cache.CacheResolver} keeps its unexpired entries, in the
+        same order.
+        """
+        clock = task.Clock()
+        c = cache.CacheResolver(reactor=clock)
+        queries = [
+            dns.Query(name=name, type=dns.A, cls=dns.IN)
+            for name in [b"first.example", b"second.example",
+                         b"third.example"]]
+        c.cacheResult(queries[0], _payload(10, b"first.example"))
+        c.cacheNegativeResult(queries[1], [_soa(60, 60)])
+        c.cacheResult(queries[2], _payload(60, b"third.example"))
+        state = c.__getstate__()
+        clock.advance(10)
+
+        restored = cache.CacheResolver(reactor=task.Clock())
+        restored.__setstate__(state)
+        self.assertEqual(list(restored.cache), queries[1:])
+        self.failureResultOf(
+            restored.lookupAddress(b"second.example"),
+            dns.AuthoritativeDomainError)
+
+
+
+def _payload(ttl, name=b"example.com"):
+    """
+    Build the payload of an answer with one I{A} record.
+
+    @param ttl: The TTL of the record.
+    @param name: The name of the record.
+
+    @return: A 3-tuple of lists of L{dns.RRHeader}.
+    """
+    return ([dns.RRHeader(name, dns.A, dns.IN, ttl,
+                          dns.Record_A("127.0.0.1", ttl))], [], [])
+
+
+
+def _soa(ttl, minimum):
+    """
+    Build an I{SOA} record, as found in the authority section of negative
+    answers.
+
+    @param ttl: The TTL of the record.
+    @param minimum: The I{minimum} field of the record.
+
+    @rtype: L{dns.RRHeader}
+    """
+    return dns.RRHeader(
+        b"example.com", dns.SOA, dns.IN, ttl,
+        dns.Record_SOA(b"ns.example.com", b"root.example.com",
+                       minimum=minimum, ttl=ttl))
@@ -394,6 +394,72 @@ class ResolverTests(unittest.TestCase):
         return d
 
 
+    def test_singleConcurrentRequestIgnoresCase(self):
+        """
+        L{client.Resolver.query} issues a single request for concurrent
+        queries whose names only differ by case.
+        """
+        protocol = StubDNSDatagramProtocol()
+        resolver = client.Resolver(servers=[('example.com', 53)])
+        resolver._connectedProtocol = lambda: protocol
+
+        resolver.query(dns.Query(b'foo.example.com', dns.A, dns.IN))
+        resolver.query(dns.Query(b'FOO.Example.COM', dns.A, dns.IN))
+        self.assertEqual(len(protocol.queries), 1)
+
+
+    def test_cancelConcurrentRequest(self):
+        """
+        Cancelling the L{Deferred} returned by L{client.Resolver.query} for
+        one of several concurrent identical queries does not affect the
+        others, which still get the response.
+        """
+        protocol = StubDNSDatagramProtocol()
+        resolver = client.Resolver(servers=[('example.com', 53)])
+        resolver._connectedProtocol = lambda: protocol
+        queries = protocol.queries
+
+        query = dns.Query(b'foo.example.com', dns.A, dns.IN)
+        firstResult = resolver.query(query)
+        secondResult = resolver.query(query)
+        firstResult.cancel()
+        self.failureResultOf(firstResult, defer.CancelledError)
+
+        response = dns.Message()
+        response.answers.append(object())
+        [(address, sent, timeout, id, result)] = queries
+        self.assertNoResult(result)
+        result.callback(response)
+        self.assertEqual(
+            self.successResultOf(secondResult), (response.answers, [], []))
+
+
+    def test_cancelAllConcurrentRequests(self):
+        """
+        Once the L{Deferred}s returned by L{client.Resolver.query} for all the
+        concurrent identical queries are cancelled, the request itself is
+        cancelled and a new query issues a new request.
+        """
+        protocol = StubDNSDatagramProtocol()
+        resolver = client.Resolver(servers=[('example.com', 53)])
+        resolver._connectedProtocol = lambda: protocol
+        queries = protocol.queries
+
+        query = dns.Query(b'foo.example.com', dns.A, dns.IN)
+        firstResult = resolver.query(query)
+        secondResult = resolver.query(query)
+        firstResult.cancel()
+        self.assertFalse(protocol.transport.disconnected)
+        secondResult.cancel()
+        self.failureResultOf(firstResult, defer.CancelledError)
+        self.failureResultOf(secondResult, defer.CancelledError)
+        self.assertTrue(protocol.transport.disconnected)
+
+        queries.pop()
+        resolver.query(query)
+        self.assertEqual(len(queries), 1)
+
+
     def test_multipleConcurrentRequests(self):
         """
         L{client.Resolver.query} issues a request for each different concurrent
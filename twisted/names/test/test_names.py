@@ -623,6 +623,77 @@ class AuthorityTests(unittest.TestCase):
 
 
 
+    def test_responseReused(self):
+        """
+        L{FileAuthority} computes the response to a query for a name and a
+        type once, and answers further queries for them with the same
+        records.
+        """
+        authority = NoFileAuthority(
+            soa=(b'example.com', soa_record),
+            records={b'www.example.com': [dns.Record_A('10.0.0.1')]})
+        first = self.successResultOf(
+            authority.lookupAddress(b'www.example.com'))
+        second = self.successResultOf(
+            authority.lookupAddress(b'www.example.com'))
+        self.assertIs(first, second)
+        self.assertEqual(
+            first[0], [dns.RRHeader(
+                    b'www.example.com', dns.A, ttl=soa_record.expire,
+                    payload=dns.Record_A('10.0.0.1'), auth=True)])
+
+
+    def test_queriedCase(self):
+        """
+        The answers of L{FileAuthority} are owned by the name as it was
+        queried, whatever the case of the name indexed before or of the
+        name in the zone.
+        """
+        authority = NoFileAuthority(
+            soa=(b'example.com', soa_record),
+            records={b'www.example.com': [dns.Record_A('10.0.0.1')]})
+        self.successResultOf(authority.lookupAddress(b'www.example.com'))
+        answer, authority, additional = self.successResultOf(
+            authority.lookupAddress(b'WWW.Example.com'))
+        self.assertEqual(
+            [record.name.name for record in answer], [b'WWW.Example.com'])
+        self.assertEqual(
+            [record.payload for record in answer], [dns.Record_A('10.0.0.1')])
+
+
+    def test_missingTypesShareResponse(self):
+        """
+        L{FileAuthority} answers queries for all the types of records a name
+        does not own with the same response.
+        """
+        authority = NoFileAuthority(
+            soa=(b'example.com', soa_record),
+            records={b'www.example.com': [dns.Record_A('10.0.0.1')]})
+        mailExchange = self.successResultOf(
+            authority.lookupMailExchange(b'www.example.com'))
+        text = self.successResultOf(authority.lookupText(b'www.example.com'))
+        self.assertIs(mailExchange, text)
+        self.assertEqual(mailExchange[0], [])
+
+
+    def test_recordsReplaced(self):
+        """
+        When the records of a L{FileAuthority} are replaced, for example by a
+        new zone transfer, the responses are computed again.
+        """
+        authority = NoFileAuthority(
+            soa=(b'example.com', soa_record),
+            records={b'www.example.com': [dns.Record_A('10.0.0.1')]})
+        self.successResultOf(authority.lookupAddress(b'www.example.com'))
+        authority.records = {
+            b'www.example.com': [dns.Record_A('10.0.0.2')]}
+        answer, authority, additional = self.successResultOf(
+            authority.lookupAddress(b'www.example.com'))
+        self.assertEqual(
+            [record.payload for record in answer], [dns.Record_A('10.0.0.2')])
+
+
+
 class AdditionalProcessingTests(unittest.TestCase):
     """
     Tests for L{FileAuthority}'s additional processing for those record types
@@ -10,7 +10,7 @@ from zope.interface.verify import verifyClass
 
 from twisted.internet import defer
 from twisted.internet.interfaces import IProtocolFactory
-from twisted.names import dns, error, resolve, server
+from twisted.names import common, dns, error, resolve, server
 from twisted.python import failure, log
 from twisted.trial import unittest
 
@@ -749,6 +749,58 @@ class DNSServerFactoryTests(unittest.TestCase):
         self.assertIs(message.additional, additional)
 
 
+    def test_gotResolverResponseStatic(self):
+        """
+        L{server.DNSServerFactory.gotResolverResponse} encodes a response made
+        of a L{common._StaticResponse} once, and sends further responses to
+        the same query as copies of it with their own message ID.
+        """
+        class RecordingProtocol(object):
+            def __init__(self):
+                self.sent = []
+
+            def writeMessage(self, message):
+                self.sent.append(message.toStr())
+
+        f = server.DNSServerFactory()
+        protocol = RecordingProtocol()
+        response = common._StaticResponse(
+            [dns.RRHeader(b'example.com', payload=dns.Record_A('10.0.0.1'),
+                          auth=True)], [], [])
+        requests = []
+        for id in (1, 2):
+            request = dns.Message(id=id, recDes=1)
+            request.timeReceived = 1
+            request.addQuery(b'example.com', dns.A)
+            requests.append(request)
+            f.gotResolverResponse(
+                response, protocol=protocol, message=request, address=None)
+
+        self.assertEqual(len(response.encodings), 1)
+        expected = f._responseFromMessage(
+            requests[1], answers=response[0], authority=[], additional=[])
+        self.assertEqual(protocol.sent[1], expected.toStr())
+        self.assertEqual(protocol.sent[0][2:], protocol.sent[1][2:])
+
+
+    def test_gotResolverResponseStaticOtherQuery(self):
+        """
+        L{server.DNSServerFactory.gotResolverResponse} encodes a response made
+        of a L{common._StaticResponse} again if the query differs, if only by
+        the case of the name.
+        """
+        f = server.DNSServerFactory()
+        response = common._StaticResponse([], [], [])
+        for name in (b'example.com', b'EXAMPLE.com'):
+            request = dns.Message(id=1)
+            request.timeReceived = 1
+            request.addQuery(name, dns.A)
+            f.gotResolverResponse(
+                response, protocol=NoopProtocol(), message=request,
+                address=None)
+        self.assertEqual(len(response.encodings), 2)
+
+
     def test_gotResolverResponseCallsResponseFromMessage(self):
         """
         L{server.DNSServerFactory.gotResolverResponse} calls
@@ -924,6 +976,50 @@ class DNSServerFactoryTests(unittest.TestCase):
         self.assertIs(additional, expectedAdditional)
 
 
+    def test_gotResolverErrorCachesNameError(self):
+        """
+        L{server.DNSServerFactory.gotResolverError} passes the authority
+        section of a name error answered by an upstream server to the
+        C{cacheNegativeResult} method of the cache.
+        """
+        class NegativeCache(object):
+            def __init__(self):
+                self.negative = []
+
+            def cacheNegativeResult(self, query, authority):
+                self.negative.append((query, authority))
+
+        negativeCache = NegativeCache()
+        f = NoResponseDNSServerFactory(caches=[negativeCache])
+        m = dns.Message()
+        m.addQuery(b'example.com')
+        upstream = dns.Message(rCode=dns.ENAME)
+        upstream.authority = [dns.RRHeader(b'example.com', dns.SOA)]
+
+        f.gotResolverError(
+            failure.Failure(error.DNSNameError(upstream)),
+            protocol=NoopProtocol(), message=m, address=None)
+        f.gotResolverError(
+            failure.Failure(error.DomainError()),
+            protocol=NoopProtocol(), message=m, address=None)
+
+        self.assertEqual(
+            negativeCache.negative, [(m.queries[0], upstream.authority)])
+
+
+    def test_gotResolverErrorCacheWithoutNegativeCaching(self):
+        """
+        L{server.DNSServerFactory.gotResolverError} does not fail when the
+        cache has no C{cacheNegativeResult} method.
+        """
+        f = NoResponseDNSServerFactory(caches=[RaisingCache()])
+        m = dns.Message()
+        m.addQuery(b'example.com')
+        f.gotResolverError(
+            failure.Failure(error.DNSNameError(dns.Message(rCode=dns.ENAME))),
+            protocol=NoopProtocol(), message=m, address=None)
+
+
     def test_gotResolverErrorCallsResponseFromMessage(self):
         """
         L{server.DNSServerFactory.gotResolverError} calls
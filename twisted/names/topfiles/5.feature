@@ -0,0 +1 @@
+twisted.names.cache.CacheResolver keeps at most maxSize entries, evicting the least recently used ones, expires them when they are looked up, and caches negative answers and name errors as RFC 2308 describes.
@@ -18,13 +18,23 @@ poll = Reactor(
 epoll = Reactor(
     'epoll', 'twisted.internet.epollreactor', 'epoll(4)-based reactor.')
 
+iouring = Reactor(
+    'iouring', 'twisted.internet.iouringreactor', 'io_uring(7)-based reactor.')
+
 kqueue = Reactor(
     'kqueue', 'twisted.internet.kqreactor', 'kqueue(2)-based reactor.')
 
 __all__ = [
-    "default", "select", "poll", "epoll", "kqueue"
+    "default", "select", "poll", "epoll", "iouring", "kqueue"
 ]
 
+if _PY3:
+    asyncio = Reactor(
+        'asyncio', 'twisted.internet.asyncioreactor',
+        'asyncio integration reactor.')
+
+    __all__.append("asyncio")
+
 if not _PY3:
     wx = Reactor(
         'wx', 'twisted.internet.wxreactor', 'wxPython integration reactor.')
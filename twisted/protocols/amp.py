@@ -199,8 +199,9 @@ __metaclass__ = type
 
 import types, warnings
 
+from collections import deque
 from io import BytesIO
-from struct import pack
+from struct import pack, Struct
 import decimal, datetime
 from functools import partial
 from itertools import count
@@ -214,8 +215,10 @@ from twisted.python._tzhelper import (
 )
 
 from twisted.python import log, filepath
+from twisted.python.runtime import seconds as runtimeSeconds
 
-from twisted.internet.interfaces import IFileDescriptorReceiver
+from twisted.internet.interfaces import (
+    IConsumer, IFileDescriptorReceiver, IPushProducer)
 from twisted.internet.main import CONNECTION_LOST
 from twisted.internet.error import PeerVerifyError, ConnectionLost
 from twisted.internet.error import ConnectionClosed
@@ -255,6 +258,7 @@ __all__ = [
     'COMMAND',
     'Command',
     'CommandLocator',
+    'CommandStatistics',
     'Decimal',
     'Descriptor',
     'ERROR',
@@ -285,6 +289,7 @@ __all__ = [
     'StartTLS',
     'String',
     'TooLong',
+    'TooManyRequests',
     'UNHANDLED_ERROR_CODE',
     'UNKNOWN_ERROR_CODE',
     'UnhandledCommand',
@@ -309,6 +314,8 @@ UNHANDLED_ERROR_CODE = b'UNHANDLED'
 MAX_KEY_LENGTH = 0xff
 MAX_VALUE_LENGTH = 0xffff
 
+_length = Struct("!H")
+
 
 
 class IArgumentType(Interface):
@@ -627,6 +634,16 @@ class IncompatibleVersions(AmpError):
     """
 
 
+
+class TooManyRequests(AmpError):
+    """
+    A request was not sent because as many requests as
+    L{BoxDispatcher.maxOutstandingRequests} were awaiting answers already,
+    and as many as L{BoxDispatcher.maxQueuedRequests} were waiting to be
+    sent.
+    """
+
+
 PROTOCOL_ERRORS = {UNHANDLED_ERROR_CODE: UnhandledCommand}
 
 class AmpBox(dict):
@@ -689,6 +706,7 @@ class AmpBox(dict):
         i = sorted(iteritems(self))
         L = []
         w = L.append
+        packLength = _length.pack
         for k, v in i:
             if type(k) == unicode:
                 raise TypeError("Unicode key not allowed: %r" % k)
@@ -699,10 +717,11 @@ class AmpBox(dict):
                 raise TooLong(True, True, k, None)
             if len(v) > MAX_VALUE_LENGTH:
                 raise TooLong(False, True, v, k)
-            for kv in k, v:
-                w(pack("!H", len(kv)))
-                w(kv)
-        w(pack("!H", 0))
+            w(packLength(len(k)))
+            w(k)
+            w(packLength(len(v)))
+            w(v)
+        w(b'\x00\x00')
         return b''.join(L)
 
 
@@ -784,6 +803,57 @@ class _SwitchBox(AmpBox):
 
 
 
+class CommandStatistics(object):
+    """
+    Counters of the requests made with one command over one connection.
+
+    @ivar outstanding: The number of requests sent which have not been
+        answered yet.
+    @type outstanding: L{int}
+
+    @ivar queued: The number of requests waiting to be sent until fewer than
+        L{BoxDispatcher.maxOutstandingRequests} requests are outstanding.
+    @type queued: L{int}
+
+    @ivar answered: The number of requests answered, successfully or with an
+        error.
+    @type answered: L{int}
+
+    @ivar errors: The number of requests answered with an error.
+    @type errors: L{int}
+
+    @ivar rejected: The number of requests failed with L{TooManyRequests}
+        rather than sent.
+    @type rejected: L{int}
+
+    @ivar totalLatency: The sum of the seconds between sending each
+        answered request and receiving its answer.
+    @type totalLatency: L{float}
+
+    @ivar maxLatency: The most seconds between sending a request and
+        receiving its answer.
+    @type maxLatency: L{float}
+    """
+
+    def __init__(self):
+        self.outstanding = 0
+        self.queued = 0
+        self.answered = 0
+        self.errors = 0
+        self.rejected = 0
+        self.totalLatency = 0.0
+        self.maxLatency = 0.0
+
+
+    def __repr__(self):
+        return (
+            "<CommandStatistics outstanding=%d queued=%d answered=%d "
+            "errors=%d rejected=%d totalLatency=%f maxLatency=%f>" % (
+                self.outstanding, self.queued, self.answered, self.errors,
+                self.rejected, self.totalLatency, self.maxLatency))
+
+
+
 @implementer(IBoxReceiver)
 class BoxDispatcher:
     """
@@ -798,9 +868,44 @@ class BoxDispatcher:
     Incoming '_ask' boxes are converted into method calls on a supplied method
     locator.
 
+    Requests which require an answer may be limited to
+    L{maxOutstandingRequests} awaiting answers at once.  Further requests
+    wait in a queue of up to L{maxQueuedRequests} requests, which are sent
+    in order as answers arrive, and requests beyond that fail with
+    L{TooManyRequests}.  Requests which require no answer are always sent
+    right away.
+
     @ivar _outstandingRequests: a dictionary mapping request IDs to
     L{Deferred}s which were returned for those requests.
 
+    @ivar _requestStatistics: a dictionary mapping the IDs of outstanding
+        requests to the L{CommandStatistics} of their command and the time
+        they were sent at.
+
+    @ivar _queuedRequests: the ID, box and L{Deferred} of each request
+        waiting to be sent.
+    @type _queuedRequests: L{deque}
+
+    @ivar maxOutstandingRequests: The largest number of requests which may
+        await answers at once, or L{None} for no limit.
+    @type maxOutstandingRequests: L{int} or L{None}
+
+    @ivar maxQueuedRequests: The largest number of requests which may wait
+        to be sent, or L{None} for no limit.
+    @type maxQueuedRequests: L{int} or L{None}
+
+    @ivar commandStatistics: a dictionary mapping the names of the commands
+        requests were made with to their L{CommandStatistics}.
+    @type commandStatistics: L{dict} of L{bytes} to L{CommandStatistics}
+
+    @ivar _callProducers: The L{IPushProducer} providers registered with
+        L{registerCallProducer}.
+
+    @ivar _callProducersPaused: Whether C{_callProducers} are paused.
+
+    @ivar _sendingPaused: Whether the boxes sent are not being written out
+        fast enough, as the transport of an L{AMP} connection tells.
+
     @ivar locator: an object with a L{CommandLocator.locateResponder} method
         that locates a responder function that takes a Box and returns a result
         (either a Box or a Deferred which fires one).
@@ -812,11 +917,24 @@ class BoxDispatcher:
 
     _failAllReason = None
     _outstandingRequests = None
+    _requestStatistics = None
+    _queuedRequests = None
+    _callProducers = None
+    _callProducersPaused = False
+    _sendingPaused = False
     _counter = long(0)
+    _seconds = staticmethod(runtimeSeconds)
     boxSender = None
+    commandStatistics = None
+    maxOutstandingRequests = None
+    maxQueuedRequests = 0
 
     def __init__(self, locator):
         self._outstandingRequests = {}
+        self._requestStatistics = {}
+        self._queuedRequests = deque()
+        self._callProducers = []
+        self.commandStatistics = {}
         self.locator = locator
 
 
@@ -833,9 +951,11 @@ class BoxDispatcher:
     def stopReceivingBoxes(self, reason):
         """
         No further boxes will be received here.  Terminate all currently
-        outstanding command deferreds with the given reason.
+        outstanding command deferreds with the given reason, and stop the
+        producers registered with L{registerCallProducer}.
         """
         self.failAllOutgoing(reason)
+        self._stopCallProducers()
 
 
     def failAllOutgoing(self, reason):
@@ -847,8 +967,16 @@ class BoxDispatcher:
         self._failAllReason = reason
         OR = self._outstandingRequests.items()
         self._outstandingRequests = None # we can never send another request
+        for statistics, sentAt in self._requestStatistics.values():
+            statistics.outstanding -= 1
+        self._requestStatistics.clear()
+        queued = self._queuedRequests
+        self._queuedRequests = deque()
         for key, value in OR:
             value.errback(reason)
+        for tag, box, result in queued:
+            self._statisticsFor(box[COMMAND]).queued -= 1
+            result.errback(reason)
 
 
     def _nextTag(self):
@@ -897,16 +1025,168 @@ class BoxDispatcher:
             return fail(self._failAllReason)
         box[COMMAND] = command
         tag = self._nextTag()
-        if requiresAnswer:
-            box[ASK] = tag
+        if not requiresAnswer:
+            box._sendTo(self.boxSender)
+            return None
+        statistics = self._statisticsFor(command)
+        if self._queuedRequests or (
+                self.maxOutstandingRequests is not None and
+                len(self._outstandingRequests) >=
+                self.maxOutstandingRequests):
+            if (self.maxQueuedRequests is not None and
+                    len(self._queuedRequests) >= self.maxQueuedRequests):
+                statistics.rejected += 1
+                return fail(TooManyRequests(
+                    "%d requests are outstanding and %d queued already" % (
+                        len(self._outstandingRequests),
+                        len(self._queuedRequests))))
+            result = Deferred()
+            self._queuedRequests.append((tag, box, result))
+            statistics.queued += 1
+            return result
+        box[ASK] = tag
         box._sendTo(self.boxSender)
-        if requiresAnswer:
-            result = self._outstandingRequests[tag] = Deferred()
-        else:
-            result = None
+        result = self._outstandingRequests[tag] = Deferred()
+        self._requestSent(tag, statistics)
         return result
 
 
+    def _statisticsFor(self, command):
+        """
+        @param command: The name of a command.
+        @type command: L{bytes}
+
+        @return: The L{CommandStatistics} of C{command}, created if need be.
+        """
+        statistics = self.commandStatistics.get(command)
+        if statistics is None:
+            statistics = self.commandStatistics[command] = CommandStatistics()
+        return statistics
+
+
+    def _requestSent(self, tag, statistics):
+        """
+        Count a request which has been sent as outstanding, and pause the
+        producers registered with L{registerCallProducer} if no more
+        requests may be sent.
+
+        @param tag: The ID of the request.
+
+        @param statistics: The L{CommandStatistics} of its command.
+        """
+        statistics.outstanding += 1
+        self._requestStatistics[tag] = (statistics, self._seconds())
+        if (self.maxOutstandingRequests is not None and
+                len(self._outstandingRequests) >= self.maxOutstandingRequests):
+            self._updateCallProducers()
+
+
+    def _requestAnswered(self, tag, error):
+        """
+        Count the answer to an outstanding request, send queued requests in
+        its place and resume the producers registered with
+        L{registerCallProducer} if more requests may be sent.
+
+        @param tag: The ID of the request.
+
+        @param error: Whether the request was answered with an error.
+        @type error: L{bool}
+        """
+        statistics, sentAt = self._requestStatistics.pop(tag)
+        latency = self._seconds() - sentAt
+        statistics.outstanding -= 1
+        statistics.answered += 1
+        if error:
+            statistics.errors += 1
+        statistics.totalLatency += latency
+        if latency > statistics.maxLatency:
+            statistics.maxLatency = latency
+        self._sendQueuedRequests()
+        if self._callProducersPaused:
+            self._updateCallProducers()
+
+
+    def _sendQueuedRequests(self):
+        """
+        Send queued requests until none are left or as many as
+        L{maxOutstandingRequests} are outstanding.
+        """
+        queued = self._queuedRequests
+        while queued and (
+                self.maxOutstandingRequests is None or
+                len(self._outstandingRequests) < self.maxOutstandingRequests):
+            tag, box, result = queued.popleft()
+            statistics = self._statisticsFor(box[COMMAND])
+            statistics.queued -= 1
+            if result.called:
+                # The request was cancelled while it was queued.
+                continue
+            box[ASK] = tag
+            try:
+                box._sendTo(self.boxSender)
+            except:
+                result.errback()
+                continue
+            self._outstandingRequests[tag] = result
+            self._requestSent(tag, statistics)
+
+
+    def registerCallProducer(self, producer):
+        """
+        Register a producer of requests, to be paused while no more requests
+        should be made: while as many requests as L{maxOutstandingRequests}
+        are outstanding, and, on an L{AMP} connection, while its transport
+        is not writing the boxes sent out fast enough.  It is stopped when
+        the connection is lost.
+
+        @param producer: The producer, which makes requests with
+            L{callRemote} or L{callRemoteString}.
+        @type producer: L{IPushProducer} provider
+        """
+        self._callProducers.append(producer)
+        if self._callProducersPaused:
+            producer.pauseProducing()
+
+
+    def unregisterCallProducer(self, producer):
+        """
+        Unregister a producer registered with L{registerCallProducer}.
+
+        @param producer: The producer.
+        @type producer: L{IPushProducer} provider
+        """
+        self._callProducers.remove(producer)
+
+
+    def _updateCallProducers(self):
+        """
+        Pause the producers registered with L{registerCallProducer} if no
+        more requests should be made, and resume them otherwise.
+        """
+        paused = self._sendingPaused or (
+            self.maxOutstandingRequests is not None and
+            len(self._outstandingRequests) >= self.maxOutstandingRequests)
+        if paused == self._callProducersPaused:
+            return
+        self._callProducersPaused = paused
+        for producer in self._callProducers[:]:
+            if paused:
+                producer.pauseProducing()
+            else:
+                producer.resumeProducing()
+
+
+    def _stopCallProducers(self):
+        """
+        Stop and forget the producers registered with
+        L{registerCallProducer}.
+        """
+        producers = self._callProducers
+        self._callProducers = []
+        for producer in producers:
+            producer.stopProducing()
+
+
     def callRemoteString(self, command, requiresAnswer=True, **kw):
         """
         This is a low-level API, designed only for optimizing simple messages
@@ -986,7 +1266,9 @@ class BoxDispatcher:
 
         @param box: an AmpBox with a value for its L{ANSWER} key.
         """
-        question = self._outstandingRequests.pop(box[ANSWER])
+        tag = box[ANSWER]
+        question = self._outstandingRequests.pop(tag)
+        self._requestAnswered(tag, False)
         question.addErrback(self.unhandledError)
         question.callback(box)
 
@@ -999,7 +1281,9 @@ class BoxDispatcher:
         @param box: an L{AmpBox} with a value for its L{ERROR}, L{ERROR_CODE},
         and L{ERROR_DESCRIPTION} keys.
         """
-        question = self._outstandingRequests.pop(box[ERROR])
+        tag = box[ERROR]
+        question = self._outstandingRequests.pop(tag)
+        self._requestAnswered(tag, True)
         question.addErrback(self.unhandledError)
         errorCode = box[ERROR_CODE]
         description = box[ERROR_DESCRIPTION]
@@ -1458,6 +1742,115 @@ class Argument:
 
 
 
+class _ArgumentSchema(object):
+    """
+    A list of arguments, as described in L{Command.arguments}, compiled to
+    convert between L{AmpBox}es and dictionaries of Python objects.
+
+    The Python names of the arguments are worked out once, when the schema
+    is created.  If every argument uses the L{Argument} implementations of
+    C{fromBox}, C{toBox} and C{retrieve}, boxes are converted by looking the
+    arguments up directly, without copying the box or the dictionary and
+    without calling those methods.  Otherwise, each argument converts itself
+    with C{fromBox} or C{toBox}, as L{_stringsToObjects} and
+    L{_objectsToStrings} have them do.
+
+    @ivar arglist: The list of arguments.
+    @type arglist: L{list} of 2-L{tuple}s of L{bytes} and L{IArgumentType}
+        providers
+
+    @ivar arguments: The wire name, Python name and L{IArgumentType}
+        provider of each argument.
+    @type arguments: L{list} of 3-L{tuple}s
+
+    @ivar names: The Python names of the arguments.
+    @type names: L{frozenset} of native strings
+    """
+
+    def __init__(self, arglist):
+        """
+        @param arglist: The list of arguments to compile.
+        @type arglist: L{list} of 2-L{tuple}s of L{bytes} and
+            L{IArgumentType} providers
+        """
+        self.arglist = arglist
+        self.arguments = [
+            (wireName, _wireNameToPythonIdentifier(wireName), argument)
+            for wireName, argument in arglist]
+        self.names = frozenset(name for _, name, _ in self.arguments)
+        self._plainFromBox = all(
+            self._inherits(argument, 'retrieve') and
+            self._inherits(argument, 'fromBox')
+            for _, argument in arglist)
+        self._plainToBox = all(
+            self._inherits(argument, 'retrieve') and
+            self._inherits(argument, 'toBox')
+            for _, argument in arglist)
+
+
+    def _inherits(self, argument, methodName):
+        """
+        @return: Whether C{argument} uses the L{Argument} implementation of
+            the method named C{methodName}.
+        @rtype: L{bool}
+        """
+        return (getattr(type(argument), methodName, None) ==
+                getattr(Argument, methodName))
+
+
+    def toObjects(self, strings, proto):
+        """
+        Convert an L{AmpBox} to a dictionary of Python objects.
+
+        @param strings: an AmpBox (or dict of strings)
+
+        @param proto: an L{AMP} instance.
+
+        @return: the converted dictionary mapping names to argument objects.
+        """
+        if not self._plainFromBox:
+            return _stringsToObjects(strings, self.arglist, proto)
+        objects = {}
+        get = strings.get
+        for wireName, name, argument in self.arguments:
+            value = get(wireName)
+            if value is None:
+                if not argument.optional:
+                    raise KeyError(wireName)
+                objects[name] = None
+            else:
+                objects[name] = argument.fromStringProto(value, proto)
+        return objects
+
+
+    def toStrings(self, objects, strings, proto):
+        """
+        Convert a dictionary of Python objects to an L{AmpBox}.
+
+        @param objects: a dict mapping names to python objects
+
+        @param strings: [OUT PARAMETER] An object providing the L{dict}
+            interface which will be populated with serialized data.
+
+        @param proto: an L{AMP} instance.
+
+        @return: C{strings}.
+        """
+        if not self._plainToBox:
+            return _objectsToStrings(objects, self.arglist, strings, proto)
+        get = objects.get
+        for wireName, name, argument in self.arguments:
+            value = get(name)
+            if value is None:
+                if argument.optional:
+                    continue
+                if name not in objects:
+                    raise KeyError(name)
+            strings[wireName] = argument.toStringProto(value, proto)
+        return strings
+
+
+
 class Integer(Argument):
     """
     Encode any integer values of any size on the wire as the string
@@ -1755,6 +2148,12 @@ class Command:
     method must always be a dictionary adhering to the contract specified by
     L{response}, because clients are always free to request a response if they
     want one.
+
+    @cvar _argumentSchema: L{arguments}, compiled when the class is created.
+    @type _argumentSchema: L{_ArgumentSchema}
+
+    @cvar _responseSchema: L{response}, compiled when the class is created.
+    @type _responseSchema: L{_ArgumentSchema}
     """
 
     class __metaclass__(type):
@@ -1815,6 +2214,9 @@ class Command:
                         "Fatal error names must be byte strings, got: %r"
                         % (name, ))
 
+            newtype._argumentSchema = _ArgumentSchema(newtype.arguments)
+            newtype._responseSchema = _ArgumentSchema(newtype.response)
+
             return newtype
 
     arguments = []
@@ -1850,8 +2252,7 @@ class Command:
         """
         self.structured = kw
         forgotten = []
-        for name, arg in self.arguments:
-            pythonName = _wireNameToPythonIdentifier(name)
+        for _, pythonName, arg in self._argumentSchema.arguments:
             if pythonName not in self.structured and not arg.optional:
                 forgotten.append(pythonName)
         if forgotten:
@@ -1877,7 +2278,7 @@ class Command:
             responseType = cls.responseType()
         except:
             return fail()
-        return _objectsToStrings(objects, cls.response, responseType, proto)
+        return cls._responseSchema.toStrings(objects, responseType, proto)
     makeResponse = classmethod(makeResponse)
 
 
@@ -1894,16 +2295,12 @@ class Command:
 
         @return: An instance of this L{Command}'s C{commandType}.
         """
-        allowedNames = set()
-        for (argName, ignored) in cls.arguments:
-            allowedNames.add(_wireNameToPythonIdentifier(argName))
-
+        allowedNames = cls._argumentSchema.names
         for intendedArg in objects:
             if intendedArg not in allowedNames:
                 raise InvalidSignature(
                     "%s is not a valid argument" % (intendedArg,))
-        return _objectsToStrings(objects, cls.arguments, cls.commandType(),
-                                 proto)
+        return cls._argumentSchema.toStrings(objects, cls.commandType(), proto)
     makeArguments = classmethod(makeArguments)
 
 
@@ -1919,7 +2316,7 @@ class Command:
         @return: A mapping of response-argument names to the parsed
         forms.
         """
-        return _stringsToObjects(box, cls.response, protocol)
+        return cls._responseSchema.toObjects(box, protocol)
     parseResponse = classmethod(parseResponse)
 
 
@@ -1934,7 +2331,7 @@ class Command:
 
         @return: A mapping of argument names to the parsed forms.
         """
-        return _stringsToObjects(box, cls.arguments, protocol)
+        return cls._argumentSchema.toObjects(box, protocol)
     parseArguments = classmethod(parseArguments)
 
 
@@ -2296,6 +2693,11 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
     In other words, an even number of strings prefixed with packed unsigned
     16-bit integers, and then a 0-length string to indicate the end of the box.
 
+    Boxes are parsed from the data received in one pass, a key-value pair at
+    a time, rather than by delivering each string to L{stringReceived}.  The
+    data of a pair which has not been received entirely is kept in chunks
+    until enough has been received to parse it.
+
     This protocol also implements 2 extra private bits of functionality related
     to the byte boundaries between messages; it can start TLS between two given
     boxes or switch to an entirely different protocol.  However, due to some
@@ -2309,6 +2711,8 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
     @ivar boxReceiver: an L{IBoxReceiver} provider, whose
         L{IBoxReceiver.ampBoxReceived} method will be invoked for each
         L{AmpBox} that is received.
+
+    @ivar _currentBox: The box whose pairs are being received, or L{None}.
     """
 
     _justStartedTLS = False
@@ -2404,7 +2808,71 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
         if self.innerProtocol is not None:
             self.innerProtocol.dataReceived(data)
             return
-        return Int16StringReceiver.dataReceived(self, data)
+        if self._payloadChunks is not None:
+            # The start of a key-value pair was received already.  Hold on to
+            # the chunks of it until there is enough to parse it, and then
+            # join them only once.
+            self._payloadChunks.append(data)
+            self._payloadReceived += len(data)
+            if self._payloadReceived < self._payloadLength:
+                return
+            data = b"".join(self._payloadChunks)
+            self._payloadChunks = None
+
+        unpackLength = _length.unpack_from
+        alldata = self._unprocessed + data
+        self._unprocessed = alldata
+        end = len(alldata)
+        offset = needed = 0
+        box = self._currentBox
+        while offset < end and not self.paused:
+            if box is None:
+                box = AmpBox()
+            if end - offset < 2:
+                needed = offset + 2
+                break
+            keyLength, = unpackLength(alldata, offset)
+            if not keyLength:
+                offset += 2
+                self._compatibilityOffset = offset
+                self._currentBox = None
+                self.boxReceiver.ampBoxReceived(box)
+                box = None
+                # _switchTo sets the backwards compatible "recvd" attribute
+                # when the rest of the data belongs to another protocol.
+                if 'recvd' in self.__dict__:
+                    alldata = self.__dict__.pop('recvd')
+                    self._unprocessed = alldata
+                    self._compatibilityOffset = offset = 0
+                    end = len(alldata)
+                continue
+            if keyLength > self._MAX_KEY_LENGTH:
+                self._currentBox = box
+                self._compatibilityOffset = offset
+                self.lengthLimitExceeded(keyLength)
+                return
+            valueOffset = offset + keyLength + 4
+            if end < valueOffset:
+                needed = valueOffset
+                break
+            valueLength, = unpackLength(alldata, valueOffset - 2)
+            valueEnd = valueOffset + valueLength
+            if end < valueEnd:
+                needed = valueEnd
+                break
+            box[alldata[offset + 2:valueOffset - 2]] = alldata[
+                valueOffset:valueEnd]
+            offset = valueEnd
+
+        self._currentBox = box
+        self._compatibilityOffset = 0
+        if needed:
+            self._unprocessed = b""
+            self._payloadChunks = [alldata[offset:]]
+            self._payloadReceived = end - offset
+            self._payloadLength = needed - offset
+        else:
+            self._unprocessed = alldata[offset:]
 
 
     def connectionLost(self, reason):
@@ -2576,14 +3044,84 @@ class BinaryBoxProtocol(StatefulStringProtocol, Int16StringReceiver,
 
 
 
+@implementer(IPushProducer)
+class _SendingCongestion(object):
+    """
+    A producer registered with the transport of an L{AMP} connection on
+    behalf of the producers registered with L{AMP.registerCallProducer}, so
+    that they are paused while the transport is not writing the boxes sent
+    out fast enough.
+
+    A streaming producer already registered with the transport is chained:
+    it is paused, resumed and stopped along with the call producers, and
+    registered with the transport again once this one is unregistered.
+
+    @ivar _dispatcher: The L{AMP} connection.
+
+    @ivar _wrapped: The producer chained, or L{None}.
+
+    @ivar _paused: Whether the transport has paused this producer.
+    """
+    _paused = False
+
+    def __init__(self, dispatcher, wrapped=None):
+        self._dispatcher = dispatcher
+        self._wrapped = wrapped
+
+
+    def pauseProducing(self):
+        """
+        The transport's buffer is full: pause the call producers.
+        """
+        self._paused = True
+        if self._wrapped is not None:
+            self._wrapped.pauseProducing()
+        self._dispatcher._sendingPaused = True
+        self._dispatcher._updateCallProducers()
+
+
+    def resumeProducing(self):
+        """
+        The transport's buffer has drained: resume the call producers if
+        more requests may be sent.
+
+        If the transport is being closed, it waits for its producer to be
+        unregistered before closing, so this producer unregisters.
+        """
+        dispatcher = self._dispatcher
+        dispatcher._sendingPaused = False
+        if getattr(dispatcher.transport, "disconnecting", False):
+            dispatcher._stopWatchingSending()
+        else:
+            self._paused = False
+            if self._wrapped is not None:
+                self._wrapped.resumeProducing()
+        dispatcher._updateCallProducers()
+
+
+    def stopProducing(self):
+        """
+        The connection is gone: stop the call producers.
+        """
+        if self._wrapped is not None:
+            self._wrapped.stopProducing()
+        self._dispatcher._stopCallProducers()
+
+
+
 class AMP(BinaryBoxProtocol, BoxDispatcher,
           CommandLocator, SimpleStringLocator):
     """
     This protocol is an AMP connection.  See the module docstring for protocol
     details.
+
+    @ivar _sendingCongestion: The L{_SendingCongestion} registered with the
+        transport while there are producers registered with
+        L{registerCallProducer}, or L{None}.
     """
 
     _ampInitialized = False
+    _sendingCongestion = None
 
     def __init__(self, boxReceiver=None, locator=None):
         # For backwards compatibility.  When AMP did not separate parsing logic
@@ -2629,6 +3167,88 @@ class AMP(BinaryBoxProtocol, BoxDispatcher,
             self.__class__.__name__, innerRepr, id(self))
 
 
+    def registerCallProducer(self, producer):
+        """
+        Register a producer of requests, to be paused while as many requests
+        as L{maxOutstandingRequests} are outstanding or while the transport
+        is not writing the boxes sent out fast enough.
+
+        @see: L{BoxDispatcher.registerCallProducer}
+        """
+        BoxDispatcher.registerCallProducer(self, producer)
+        self._watchSending()
+
+
+    def unregisterCallProducer(self, producer):
+        """
+        Unregister a producer registered with L{registerCallProducer}, and
+        stop watching the transport after the last one.
+
+        @see: L{BoxDispatcher.unregisterCallProducer}
+        """
+        BoxDispatcher.unregisterCallProducer(self, producer)
+        if not self._callProducers:
+            self._stopWatchingSending()
+
+
+    def _watchSending(self):
+        """
+        Register a L{_SendingCongestion} with the transport, if it can take a
+        producer and is not being closed, while there are producers
+        registered with L{registerCallProducer}.
+
+        A streaming producer registered with the transport already is
+        chained.  If the transport has a pull producer, or a producer it
+        does not tell about, it is left alone, and the call producers are
+        only paused while L{maxOutstandingRequests} requests are
+        outstanding.
+        """
+        transport = self.transport
+        if (not self._callProducers or self._sendingCongestion is not None or
+                not IConsumer.providedBy(transport) or
+                getattr(transport, "disconnecting", False)):
+            return
+        wrapped = getattr(transport, "producer", None)
+        if wrapped is not None:
+            # abstract.FileDescriptor and StringTransport name this
+            # differently.
+            streaming = getattr(
+                transport, "streamingProducer",
+                getattr(transport, "streaming", False))
+            if not streaming:
+                return
+            transport.unregisterProducer()
+        congestion = _SendingCongestion(self, wrapped)
+        try:
+            transport.registerProducer(congestion, True)
+        except RuntimeError:
+            return
+        self._sendingCongestion = congestion
+
+
+    def _stopWatchingSending(self):
+        """
+        Unregister the L{_SendingCongestion} from the transport, and register
+        the producer it chained again.
+        """
+        congestion = self._sendingCongestion
+        if congestion is None:
+            return
+        self._sendingCongestion = None
+        self._sendingPaused = False
+        transport = self.transport
+        if transport is None:
+            return
+        if getattr(transport, "producer", congestion) is congestion:
+            transport.unregisterProducer()
+        wrapped = congestion._wrapped
+        if wrapped is not None:
+            transport.registerProducer(wrapped, True)
+            if congestion._paused:
+                # The transport pauses it again if its buffer is still full.
+                wrapped.resumeProducing()
+
+
     def makeConnection(self, transport):
         """
         Emit a helpful log message when the connection is made.
@@ -2645,6 +3265,7 @@ class AMP(BinaryBoxProtocol, BoxDispatcher,
                 self._transportHost,
                 self._transportPeer))
         BinaryBoxProtocol.makeConnection(self, transport)
+        self._watchSending()
 
 
     def connectionLost(self, reason):
@@ -11,8 +11,7 @@ from __future__ import absolute_import, division
 
 # System imports
 import re
-from struct import pack, unpack, calcsize
-from io import BytesIO
+from struct import pack, unpack_from, calcsize
 import math
 
 from zope.interface import implementer
@@ -109,9 +108,15 @@ class NetstringReceiver(protocol.Protocol):
     @ivar _remainingData: Holds the chunk of data that has not yet been consumed
     @type _remainingData: C{string}
 
-    @ivar _payload: Holds the payload portion of a netstring including the
-        trailing comma
-    @type _payload: C{BytesIO}
+    @ivar _remainingOffset: The offset within C{_remainingData} of the data
+        not yet consumed.  Netstrings are parsed by advancing it, rather than
+        by slicing the consumed data off C{_remainingData}.
+    @type _remainingOffset: C{int}
+
+    @ivar _payload: Holds the chunks of the payload portion of a netstring
+        received so far, without the trailing comma.  They are joined once
+        the netstring is complete.
+    @type _payload: C{list} of C{bytes}
 
     @ivar _expectedPayloadSize: Holds the payload size plus one for the trailing
         comma.
@@ -142,8 +147,9 @@ class NetstringReceiver(protocol.Protocol):
         """
         protocol.Protocol.makeConnection(self, transport)
         self._remainingData = b""
+        self._remainingOffset = 0
         self._currentPayloadSize = 0
-        self._payload = BytesIO()
+        self._payload = []
         self._state = self._PARSING_LENGTH
         self._expectedPayloadSize = 0
         self.brokenPeer = 0
@@ -174,8 +180,10 @@ class NetstringReceiver(protocol.Protocol):
             netstring
         @type data: C{bytes}
         """
-        self._remainingData += data
-        while self._remainingData:
+        self._remainingData = (
+            self._remainingData[self._remainingOffset:] + data)
+        self._remainingOffset = 0
+        while self._remainingOffset < len(self._remainingData):
             try:
                 self._consumeData()
             except IncompleteNetstring:
@@ -235,7 +243,8 @@ class NetstringReceiver(protocol.Protocol):
         @raise NetstringParseError: if the received data do not form a valid
             netstring.
         """
-        lengthMatch = self._LENGTH.match(self._remainingData)
+        lengthMatch = self._LENGTH.match(
+            self._remainingData, self._remainingOffset)
         if not lengthMatch:
             self._checkPartialLengthSpecification()
             raise IncompleteNetstring()
@@ -252,7 +261,8 @@ class NetstringReceiver(protocol.Protocol):
         @raise NetstringParseError: if C{self._remainingData} is no
             number or is too big (checked by L{_extractLength}).
         """
-        partialLengthMatch = self._LENGTH_PREFIX.match(self._remainingData)
+        partialLengthMatch = self._LENGTH_PREFIX.match(
+            self._remainingData, self._remainingOffset)
         if not partialLengthMatch:
             raise NetstringParseError(self._MISSING_LENGTH)
         lengthSpecification = (partialLengthMatch.group(1))
@@ -266,7 +276,7 @@ class NetstringReceiver(protocol.Protocol):
         Extracts and stores in C{self._expectedPayloadSize} the number
         representing the netstring size.  Removes the prefix
         representing the length specification from
-        C{self._remainingData}.
+        C{self._remainingData} by advancing C{self._remainingOffset}.
 
         @raise NetstringParseError: if the received netstring does not
             start with a number or the number is bigger than
@@ -277,10 +287,10 @@ class NetstringReceiver(protocol.Protocol):
         """
         endOfNumber = lengthMatch.end(1)
         startOfData = lengthMatch.end(2)
-        lengthString = self._remainingData[:endOfNumber]
+        lengthString = self._remainingData[self._remainingOffset:endOfNumber]
         # Expect payload plus trailing comma:
         self._expectedPayloadSize = self._extractLength(lengthString) + 1
-        self._remainingData = self._remainingData[startOfData:]
+        self._remainingOffset = startOfData
 
 
     def _extractLength(self, lengthAsString):
@@ -327,8 +337,7 @@ class NetstringReceiver(protocol.Protocol):
         """
         self._state = self._PARSING_PAYLOAD
         self._currentPayloadSize = 0
-        self._payload.seek(0)
-        self._payload.truncate()
+        self._payload = []
 
 
     def _consumePayload(self):
@@ -356,23 +365,27 @@ class NetstringReceiver(protocol.Protocol):
         """
         Extracts payload information from C{self._remainingData}.
 
-        Splits C{self._remainingData} at the end of the netstring.  The
-        first part becomes C{self._payload}, the second part is stored
-        in C{self._remainingData}.
+        If the netstring is complete, the rest of its payload is appended
+        to C{self._payload} and C{self._remainingOffset} is advanced past
+        its trailing comma.
 
-        If the netstring is not yet complete, the whole content of
-        C{self._remainingData} is moved to C{self._payload}.
+        If the netstring is not yet complete, the rest of
+        C{self._remainingData} is appended to C{self._payload}.
         """
         if self._payloadComplete():
-            remainingPayloadSize = (self._expectedPayloadSize -
-                                    self._currentPayloadSize)
-            self._payload.write(self._remainingData[:remainingPayloadSize])
-            self._remainingData = self._remainingData[remainingPayloadSize:]
+            endOfPayload = (self._remainingOffset + self._expectedPayloadSize -
+                            self._currentPayloadSize)
+            self._payload.append(self._remainingData[
+                self._remainingOffset:endOfPayload - 1])
+            self._remainingOffset = endOfPayload
             self._currentPayloadSize = self._expectedPayloadSize
         else:
-            self._payload.write(self._remainingData)
-            self._currentPayloadSize += len(self._remainingData)
+            self._payload.append(
+                self._remainingData[self._remainingOffset:])
+            self._currentPayloadSize += (
+                len(self._remainingData) - self._remainingOffset)
             self._remainingData = b""
+            self._remainingOffset = 0
 
 
     def _payloadComplete(self):
@@ -384,28 +397,30 @@ class NetstringReceiver(protocol.Protocol):
             netstring
         @rtype: C{bool}
         """
-        return (len(self._remainingData) + self._currentPayloadSize >=
-                self._expectedPayloadSize)
+        return (len(self._remainingData) - self._remainingOffset +
+                self._currentPayloadSize >= self._expectedPayloadSize)
 
 
     def _processPayload(self):
         """
         Processes the actual payload with L{stringReceived}.
 
-        Strips C{self._payload} of the trailing comma and calls
-        L{stringReceived} with the result.
+        Joins the chunks of C{self._payload} and calls L{stringReceived}
+        with the result.
         """
-        self.stringReceived(self._payload.getvalue()[:-1])
+        self.stringReceived(b"".join(self._payload))
 
 
     def _checkForTrailingComma(self):
         """
-        Checks if the netstring has a trailing comma at the expected position.
+        Checks if the netstring has a trailing comma at the expected position,
+        the last character consumed from C{self._remainingData}.
 
         @raise NetstringParseError: if the last payload character is
             anything but a comma.
         """
-        if self._payload.getvalue()[-1:] != b",":
+        if self._remainingData[
+                self._remainingOffset - 1:self._remainingOffset] != b",":
             raise NetstringParseError(self._MISSING_COMMA)
 
 
@@ -524,6 +539,7 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
     """
     line_mode = 1
     _buffer = b''
+    _bufferOffset = 0
     _busyReceiving = False
     delimiter = b'\r\n'
     MAX_LENGTH = 16384
@@ -535,7 +551,9 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         @return: All of the cleared buffered data.
         @rtype: C{bytes}
         """
-        b, self._buffer = self._buffer, b""
+        b = self._buffer[self._bufferOffset:]
+        self._buffer = b""
+        self._bufferOffset = 0
         return b
 
 
@@ -544,6 +562,10 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         Protocol.dataReceived.
         Translates bytes into lines, and calls lineReceived (or
         rawDataReceived, depending on mode.)
+
+        Lines are found by moving an offset through the buffer, which only
+        gets rid of the lines delivered once all the data received has been
+        handled, rather than copying what follows each line.
         """
         if self._busyReceiving:
             self._buffer += data
@@ -552,34 +574,38 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         try:
             self._busyReceiving = True
             self._buffer += data
-            while self._buffer and not self.paused:
+            while len(self._buffer) > self._bufferOffset and not self.paused:
                 if self.line_mode:
-                    try:
-                        line, self._buffer = self._buffer.split(
-                            self.delimiter, 1)
-                    except ValueError:
-                        if len(self._buffer) > self.MAX_LENGTH:
-                            line, self._buffer = self._buffer, b''
-                            return self.lineLengthExceeded(line)
-                        return
-                    else:
-                        lineLength = len(line)
-                        if lineLength > self.MAX_LENGTH:
-                            exceeded = line + self.delimiter + self._buffer
+                    buffer = self._buffer
+                    start = self._bufferOffset
+                    end = buffer.find(self.delimiter, start)
+                    if end == -1:
+                        if len(buffer) - start > self.MAX_LENGTH:
                             self._buffer = b''
-                            return self.lineLengthExceeded(exceeded)
-                        why = self.lineReceived(line)
-                        if (why or self.transport and
-                            self.transport.disconnecting):
-                            return why
+                            self._bufferOffset = 0
+                            return self.lineLengthExceeded(buffer[start:])
+                        return
+                    elif end - start > self.MAX_LENGTH:
+                        self._buffer = b''
+                        self._bufferOffset = 0
+                        return self.lineLengthExceeded(buffer[start:])
+                    self._bufferOffset = end + len(self.delimiter)
+                    why = self.lineReceived(buffer[start:end])
+                    if (why or self.transport and
+                        self.transport.disconnecting):
+                        return why
                 else:
-                    data = self._buffer
+                    data = self._buffer[self._bufferOffset:]
                     self._buffer = b''
+                    self._bufferOffset = 0
                     why = self.rawDataReceived(data)
                     if why:
                         return why
         finally:
             self._busyReceiving = False
+            if self._bufferOffset:
+                self._buffer = self._buffer[self._bufferOffset:]
+                self._bufferOffset = 0
 
 
     def setLineMode(self, extra=b''):
@@ -674,7 +700,10 @@ class _RecvdCompatHack(object):
     the default __set__ behavior in both new-style and old-style subclasses.
     """
     def __get__(self, oself, type=None):
-        return oself._unprocessed[oself._compatibilityOffset:]
+        recvd = oself._unprocessed[oself._compatibilityOffset:]
+        if oself._payloadChunks is not None:
+            recvd += b"".join(oself._payloadChunks)
+        return recvd
 
 
 
@@ -699,11 +728,27 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
     @ivar _compatibilityOffset: the offset within C{_unprocessed} to the next
         message to be parsed. (used to generate the recvd attribute)
     @type _compatibilityOffset: C{int}
+
+    @ivar _payloadChunks: the chunks of data received of a message whose
+        length prefix is in C{_unprocessed} but which has not been received
+        entirely yet, or L{None}.  They are joined once the message is
+        complete, rather than copied into C{_unprocessed} on every read.
+    @type _payloadChunks: L{list} of C{bytes}
+
+    @ivar _payloadReceived: the number of bytes in C{_payloadChunks}.
+    @type _payloadReceived: C{int}
+
+    @ivar _payloadLength: the length of the message C{_payloadChunks} are
+        part of.
+    @type _payloadLength: C{int}
     """
 
     MAX_LENGTH = 99999
     _unprocessed = b""
     _compatibilityOffset = 0
+    _payloadChunks = None
+    _payloadReceived = 0
+    _payloadLength = 0
 
     # Backwards compatibility support for applications which directly touch the
     # "internal" parse buffer.
@@ -736,6 +781,29 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         """
         Convert int prefixed strings into calls to stringReceived.
         """
+        if self._payloadChunks is not None:
+            # Part of a message was received already.  Hold on to the chunks
+            # of it until it is complete, and then join them only once.
+            self._payloadChunks.append(data)
+            self._payloadReceived += len(data)
+            excess = self._payloadReceived - self._payloadLength
+            if excess < 0 or self.paused:
+                return
+            chunks = self._payloadChunks
+            if excess:
+                # The last chunk holds the start of the messages after it.
+                data = chunks[-1][-excess:]
+                chunks[-1] = chunks[-1][:-excess]
+            else:
+                data = b""
+            self._payloadChunks = None
+            self._unprocessed = data
+            self._compatibilityOffset = 0
+            self.stringReceived(b"".join(chunks))
+            if 'recvd' in self.__dict__:
+                data = self.__dict__.pop('recvd')
+            self._unprocessed = b""
+
         # Try to minimize string copying (via slices) by keeping one buffer
         # containing all the data we have so far and a separate offset into that
         # buffer.
@@ -747,7 +815,7 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
 
         while len(alldata) >= (currentOffset + prefixLength) and not self.paused:
             messageStart = currentOffset + prefixLength
-            length, = unpack(fmt, alldata[currentOffset:messageStart])
+            length, = unpack_from(fmt, alldata, currentOffset)
             if length > self.MAX_LENGTH:
                 self._unprocessed = alldata
                 self._compatibilityOffset = currentOffset
@@ -755,7 +823,14 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
                 return
             messageEnd = messageStart + length
             if len(alldata) < messageEnd:
-                break
+                # Keep the length prefix, and the start of the message in the
+                # chunks joined once the rest of it has been received.
+                self._unprocessed = alldata[currentOffset:messageStart]
+                self._compatibilityOffset = 0
+                self._payloadChunks = [alldata[messageStart:]]
+                self._payloadReceived = len(alldata) - messageStart
+                self._payloadLength = length
+                return
 
             # Here we have to slice the working buffer so we can send just the
             # netstring into the stringReceived callback.
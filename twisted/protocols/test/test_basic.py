@@ -292,6 +292,65 @@ a'''
         self.assertEqual(protocol.rest, b'')
 
 
+    def test_bufferCompacted(self):
+        """
+        Once L{LineReceiver.dataReceived} returns, only the data which was
+        not delivered is left in the buffer.
+        """
+        protocol = LineTester()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        protocol.dataReceived(b'foo\nbar\nba')
+        self.assertEqual(protocol.received, [b'foo', b'bar'])
+        self.assertEqual(protocol._buffer, b'ba')
+        self.assertEqual(protocol._bufferOffset, 0)
+        protocol.dataReceived(b'z\n')
+        self.assertEqual(protocol.received, [b'foo', b'bar', b'baz'])
+        self.assertEqual(protocol._buffer, b'')
+
+
+    def test_delimiterChanged(self):
+        """
+        A change of L{LineReceiver.delimiter} made by
+        L{LineReceiver.lineReceived} applies to the rest of the data
+        received.
+        """
+        class SwitchingReceiver(basic.LineReceiver):
+            def connectionMade(self):
+                self.lines = []
+
+            def lineReceived(self, line):
+                self.lines.append(line)
+                self.delimiter = b'\n'
+
+        protocol = SwitchingReceiver()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        protocol.dataReceived(b'foo\r\nbar\r\nbaz\n')
+        self.assertEqual(protocol.lines, [b'foo', b'bar\r', b'baz'])
+
+
+    def test_dataReceivedFromLineReceived(self):
+        """
+        Data given to L{LineReceiver.dataReceived} by
+        L{LineReceiver.lineReceived} is delivered after the data already
+        received.
+        """
+        class FeedingReceiver(basic.LineReceiver):
+            def connectionMade(self):
+                self.lines = []
+
+            def lineReceived(self, line):
+                self.lines.append(line)
+                if line == b'foo':
+                    self.dataReceived(b'quux\r\n')
+
+        protocol = FeedingReceiver()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        protocol.dataReceived(b'foo\r\nbar\r\nbaz')
+        protocol.dataReceived(b'\r\n')
+        self.assertEqual(
+            protocol.lines, [b'foo', b'bar', b'bazquux', b''])
+
+
     def test_stackRecursion(self):
         """
         Test switching modes many times on the same data.
@@ -768,6 +827,42 @@ class NetstringReceiverTests(unittest.SynchronousTestCase, LPTestCaseMixin):
                           self.netstringReceiver._consumeLength)
 
 
+    def test_receivePayloadInChunks(self):
+        """
+        A netstring whose payload arrives in several chunks is delivered
+        whole, and a netstring starting in the chunk which completes it is
+        delivered too.
+        """
+        for part in [b"12:ab", b"cdef", b"ghij", b"kl,3:", b"abc,"]:
+            self.netstringReceiver.dataReceived(part)
+        self.assertEqual(
+            self.netstringReceiver.received, [b"abcdefghijkl", b"abc"])
+
+
+    def test_trailingCommaInSeparateChunk(self):
+        """
+        A netstring is delivered when its trailing comma arrives on its own,
+        and refused if what arrives in its place is not a comma.
+        """
+        self.netstringReceiver.dataReceived(b"3:abc")
+        self.assertEqual(self.netstringReceiver.received, [])
+        self.netstringReceiver.dataReceived(b",3:abc")
+        self.assertEqual(self.netstringReceiver.received, [b"abc"])
+        self.netstringReceiver.dataReceived(b"x")
+        self.assertTrue(self.transport.disconnecting)
+
+
+    def test_consumedDataReleased(self):
+        """
+        Once a chunk of data has been parsed, only the part of it which was
+        not consumed is kept.
+        """
+        self.netstringReceiver.dataReceived(b"1:a,1:b,12")
+        self.netstringReceiver.dataReceived(b"")
+        self.assertEqual(self.netstringReceiver._remainingData, b"12")
+        self.assertEqual(self.netstringReceiver._remainingOffset, 0)
+
+
     def test_stringReceivedNotImplemented(self):
         """
         When L{NetstringReceiver.stringReceived} is not overridden in a
@@ -847,6 +942,23 @@ class IntNTestCaseMixin(LPTestCaseMixin):
         self.assertEqual(r.received, [])
 
 
+    def test_receiveInChunks(self):
+        """
+        A string received in several chunks is delivered whole, and the
+        strings following it in the chunk which completes it are delivered
+        too.
+        """
+        r = self.getProtocol()
+        first = struct.pack(r.structFormat, 40) + b"a" * 40
+        for i in range(0, len(first) - 3, 7):
+            r.dataReceived(first[i:min(i + 7, len(first) - 3)])
+        self.assertEqual(r.received, [])
+        r.dataReceived(
+            first[-3:] + struct.pack(r.structFormat, 1) + b"b" +
+            struct.pack(r.structFormat, 3) + b"c" * 3)
+        self.assertEqual(r.received, [b"a" * 40, b"b", b"c" * 3])
+
+
     def test_stringReceivedNotImplemented(self):
         """
         When L{IntNStringReceiver.stringReceived} is not overridden in a
@@ -857,6 +969,30 @@ class IntNTestCaseMixin(LPTestCaseMixin):
 
 
 
+class PauseableIntNMixin(object):
+    """
+    Mixin defining tests for L{basic.IntNStringReceiver} subclasses, which
+    can be paused, to be combined with L{IntNTestCaseMixin} on a
+    L{TestCase} subclass.
+    """
+
+    def test_receiveInChunksWhilePaused(self):
+        """
+        A string completed by a chunk received while the protocol is paused
+        is delivered once it is resumed.
+        """
+        r = self.getProtocol()
+        data = struct.pack(r.structFormat, 10) + b"a" * 10
+        r.dataReceived(data[:5])
+        r.paused = True
+        r.dataReceived(data[5:])
+        self.assertEqual(r.received, [])
+        r.paused = False
+        r.dataReceived(b"")
+        self.assertEqual(r.received, [b"a" * 10])
+
+
+
 class RecvdAttributeMixin(object):
     """
     Mixin defining tests for string receiving protocols with a C{recvd}
@@ -911,6 +1047,42 @@ class RecvdAttributeMixin(object):
         self.assertEqual(result, [payloadA, payloadC])
 
 
+    def test_recvdContainsIncompleteMessage(self):
+        """
+        Between reads, recvd contains the part received of a message which
+        is not complete yet, including its length prefix.
+        """
+        r = self.getProtocol()
+        message = self.makeMessage(r, b'a' * 10)
+        r.dataReceived(message[:-6])
+        r.dataReceived(message[-6:-3])
+        self.assertEqual(r.recvd, message[:-3])
+
+
+    def test_recvdChangedAfterMessageInChunks(self):
+        """
+        In stringReceived for a message received in several chunks, recvd
+        contains the data received after the message, and if it is changed,
+        messages are parsed from it rather than from that data.
+        """
+        r = self.getProtocol()
+        result = []
+        payloadC = b'c' * 5
+        messageC = self.makeMessage(r, payloadC)
+        def stringReceived(receivedString):
+            if not result:
+                result.append(r.recvd)
+                r.recvd = messageC
+            result.append(receivedString)
+        r.stringReceived = stringReceived
+        payloadA = b'a' * 10
+        messageA = self.makeMessage(r, payloadA)
+        messageB = self.makeMessage(r, b'b' * 5)
+        r.dataReceived(messageA[:-5])
+        r.dataReceived(messageA[-5:] + messageB)
+        self.assertEqual(result, [messageB, payloadA, payloadC])
+
+
     def test_switching(self):
         """
         Data already parsed by L{IntNStringReceiver.dataReceived} is not
@@ -972,6 +1144,7 @@ class TestInt32(TestMixin, basic.Int32StringReceiver):
 
 
 class Int32Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
+                 PauseableIntNMixin,
                  RecvdAttributeMixin):
     """
     Test case for int32-prefixed protocol
@@ -1003,6 +1176,7 @@ class TestInt16(TestMixin, basic.Int16StringReceiver):
 
 
 class Int16Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
+                 PauseableIntNMixin,
                  RecvdAttributeMixin):
     """
     Test case for int16-prefixed protocol
@@ -1062,6 +1236,7 @@ class TestInt8(TestMixin, basic.Int8StringReceiver):
 
 
 class Int8Tests(unittest.SynchronousTestCase, IntNTestCaseMixin,
+                PauseableIntNMixin,
                 RecvdAttributeMixin):
     """
     Test case for int8-prefixed protocol
@@ -0,0 +1,119 @@
+# -*- test-case-name: twisted.test.test_tcp_internals -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Very low-level ctypes-based interface to Linux accept4(2), which accepts a
+connection as a non-blocking socket closed on exec in one system call,
+sparing the C{setblocking} call a socket returned by
+L{socket.socket.accept} needs.
+
+ctypes, Python 3 and Linux are required: L{accept} is L{None} otherwise.
+The C library is only searched for accept4 when the first connection is
+accepted; if it lacks it, L{accept} falls back to L{socket.socket.accept}.
+"""
+
+from __future__ import division, absolute_import
+
+import ctypes
+import errno
+import os
+import socket
+import struct
+import sys
+
+from twisted.python.compat import _PY3
+
+# sizeof(struct sockaddr_storage)
+_SOCKADDR_SIZE = 128
+
+
+
+def _decodeAddress(family, data):
+    """
+    Decode a C{struct sockaddr_in} or C{struct sockaddr_in6}.
+
+    @param family: C{AF_INET} or C{AF_INET6}.
+
+    @param data: The C{struct sockaddr}.
+    @type data: L{bytes}
+
+    @return: The address, as L{socket.socket.accept} returns it.
+    """
+    if family == socket.AF_INET:
+        port, = struct.unpack("!H", data[2:4])
+        return (socket.inet_ntop(family, data[4:8]), port)
+    port, flowInfo = struct.unpack("!HI", data[2:8])
+    scopeID, = struct.unpack("=I", data[24:28])
+    host = socket.inet_ntop(family, data[8:24])
+    if scopeID:
+        # inet_ntop leaves out the zone of a scoped address, which
+        # socket.socket.accept gives as getnameinfo formats it.
+        host = socket.getnameinfo(
+            (host, port, flowInfo, scopeID),
+            socket.NI_NUMERICHOST | socket.NI_NUMERICSERV)[0]
+    return (host, port, flowInfo, scopeID)
+
+
+
+# The accept4 function of the C library: False until _lookUpAccept4 looks it
+# up, then None if the C library lacks it.
+_accept4 = False
+
+def _lookUpAccept4():
+    """
+    Look up the accept4 function of the C library, once.
+
+    @return: The function, or L{None} if the C library lacks it.
+    """
+    global _accept4
+    function = getattr(ctypes.CDLL(None, use_errno=True), "accept4", None)
+    if function is not None:
+        function.argtypes = [
+            ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(ctypes.c_uint32),
+            ctypes.c_int]
+    _accept4 = function
+    return function
+
+
+
+def _accept(skt):
+    """
+    Accept a connection on a listening IPv4 or IPv6 socket.
+
+    @param skt: The listening socket.
+    @type skt: L{socket.socket}
+
+    @raise socket.error: If accept4 fails.
+
+    @return: The socket of the connection, which is non-blocking and closed
+        on exec, and the address of the peer, as L{socket.socket.accept}
+        returns them.
+    """
+    accept4 = _accept4
+    if accept4 is False:
+        accept4 = _lookUpAccept4()
+    if accept4 is None:
+        connection, address = skt.accept()
+        connection.setblocking(False)
+        return connection, address
+    address = ctypes.create_string_buffer(_SOCKADDR_SIZE)
+    size = ctypes.c_uint32(_SOCKADDR_SIZE)
+    while True:
+        fd = accept4(skt.fileno(), address, ctypes.byref(size), _FLAGS)
+        if fd >= 0:
+            break
+        code = ctypes.get_errno()
+        if code != errno.EINTR:
+            raise socket.error(code, os.strerror(code))
+    family = skt.family
+    connection = socket.socket(
+        family, skt.type | socket.SOCK_NONBLOCK, skt.proto, fd)
+    return connection, _decodeAddress(family, address.raw[:size.value])
+
+
+
+accept = None
+if _PY3 and sys.platform.startswith("linux"):
+    _FLAGS = socket.SOCK_NONBLOCK | socket.SOCK_CLOEXEC
+    accept = _accept
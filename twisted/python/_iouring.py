@@ -0,0 +1,324 @@
+# -*- test-case-name: twisted.internet.test.test_iouringreactor -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Very low-level ctypes-based interface to Linux io_uring(7).
+
+The three io_uring system calls are made with C{syscall(2)}, so that only
+ctypes, a Linux kernel supporting io_uring and the C library are required.
+The submission and completion queues are shared with the kernel through
+memory maps, which are read and written with L{struct}.
+"""
+
+from __future__ import division, absolute_import
+
+import ctypes
+import errno
+import mmap
+import os
+import struct
+import sys
+
+from twisted.python.compat import long
+
+# System call numbers, shared by all the architectures using the generic
+# system call table, which io_uring was added after.
+_SYS_IO_URING_SETUP = 425
+_SYS_IO_URING_ENTER = 426
+_SYS_IO_URING_REGISTER = 427
+
+# Operation codes.
+IORING_OP_NOP = 0
+IORING_OP_READ_FIXED = 4
+IORING_OP_POLL_ADD = 6
+IORING_OP_TIMEOUT = 11
+IORING_OP_ACCEPT = 13
+IORING_OP_ASYNC_CANCEL = 14
+IORING_OP_SEND = 26
+IORING_OP_RECV = 27
+
+# Flags of io_uring_setup.
+IORING_SETUP_CQSIZE = 1 << 3
+
+# Features reported by io_uring_setup.
+IORING_FEAT_SINGLE_MMAP = 1 << 0
+IORING_FEAT_NODROP = 1 << 1
+IORING_FEAT_FAST_POLL = 1 << 5
+
+# Flags of io_uring_enter.
+IORING_ENTER_GETEVENTS = 1 << 0
+
+# Flags of the submission queue.
+IORING_SQ_CQ_OVERFLOW = 1 << 1
+
+# Operations of io_uring_register.
+IORING_REGISTER_BUFFERS = 0
+
+# The ioprio field of an accept request.
+IORING_ACCEPT_MULTISHOT = 1 << 0
+
+# Flags of completions.
+IORING_CQE_F_MORE = 1 << 1
+
+_IORING_OFF_SQ_RING = 0
+_IORING_OFF_CQ_RING = 0x8000000
+_IORING_OFF_SQES = 0x10000000
+
+# struct io_uring_sqe and struct io_uring_cqe.
+_SQE = struct.Struct("=BBHiQQIIQHHiQQ")
+_CQE = struct.Struct("=QiI")
+_U32 = struct.Struct("=I")
+
+
+
+class IOUringError(EnvironmentError):
+    """
+    io_uring is not usable, or one of its system calls failed.
+    """
+
+
+
+class _SQRingOffsets(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_uint32) for name in (
+        "head", "tail", "ring_mask", "ring_entries", "flags", "dropped",
+        "array", "resv1")] + [("user_addr", ctypes.c_uint64)]
+
+
+
+class _CQRingOffsets(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_uint32) for name in (
+        "head", "tail", "ring_mask", "ring_entries", "overflow", "cqes",
+        "flags", "resv1")] + [("user_addr", ctypes.c_uint64)]
+
+
+
+class _Params(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_uint32) for name in (
+        "sq_entries", "cq_entries", "flags", "sq_thread_cpu",
+        "sq_thread_idle", "features", "wq_fd")] + [
+            ("resv", ctypes.c_uint32 * 3),
+            ("sq_off", _SQRingOffsets),
+            ("cq_off", _CQRingOffsets)]
+
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+
+def _syscall(*args):
+    """
+    Make a system call, raising L{IOUringError} if it fails.
+
+    @return: The result of the system call.
+    """
+    result = libc.syscall(*[
+        ctypes.c_long(arg) if isinstance(arg, (int, long)) else arg
+        for arg in args])
+    if result < 0:
+        code = ctypes.get_errno()
+        raise IOUringError(code, os.strerror(code))
+    return result
+
+
+
+def addressOf(data):
+    """
+    Get the address of the contents of a byte string, which must be kept
+    alive for as long as the address is used.
+
+    @type data: L{bytes}
+
+    @rtype: L{int}
+    """
+    return ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p).value or 0
+
+
+
+class Ring(object):
+    """
+    An io_uring instance.
+
+    Requests are added to the submission queue with L{prepare}, handed to the
+    kernel with L{enter} and their results read with L{completions}.
+
+    @ivar fd: The file descriptor of the instance.
+
+    @ivar entries: The size of the submission queue.
+    """
+
+    def __init__(self, entries, completionEntries):
+        """
+        @param entries: The size of the submission queue.
+
+        @param completionEntries: The size of the completion queue.
+
+        @raise IOUringError: If io_uring is not supported by the platform or
+            the kernel, or lacks the features needed, which are non-blocking
+            requests on sockets and completions which are never dropped:
+            Linux 5.7 or later is required.
+        """
+        self.fd = -1
+        if libc is None:
+            raise IOUringError(errno.ENOSYS, "io_uring requires Linux")
+        params = _Params()
+        params.flags = IORING_SETUP_CQSIZE
+        params.cq_entries = completionEntries
+        self.fd = _syscall(
+            _SYS_IO_URING_SETUP, entries, ctypes.byref(params))
+        needed = IORING_FEAT_NODROP | IORING_FEAT_FAST_POLL
+        if params.features & needed != needed:
+            self.close()
+            raise IOUringError(
+                errno.ENOSYS, "io_uring lacks non-blocking socket requests")
+        self.entries = params.sq_entries
+
+        sq, cq = params.sq_off, params.cq_off
+        sqSize = sq.array + params.sq_entries * _U32.size
+        cqSize = cq.cqes + params.cq_entries * _CQE.size
+        if params.features & IORING_FEAT_SINGLE_MMAP:
+            sqSize = cqSize = max(sqSize, cqSize)
+        self._sqRing = self._map(sqSize, _IORING_OFF_SQ_RING)
+        if params.features & IORING_FEAT_SINGLE_MMAP:
+            self._cqRing = self._sqRing
+        else:
+            self._cqRing = self._map(cqSize, _IORING_OFF_CQ_RING)
+        self._sqes = self._map(params.sq_entries * _SQE.size, _IORING_OFF_SQES)
+
+        self._sqHead = sq.head
+        self._sqTail = sq.tail
+        self._sqFlags = sq.flags
+        self._sqMask = _U32.unpack_from(self._sqRing, sq.ring_mask)[0]
+        self._cqHead = cq.head
+        self._cqTail = cq.tail
+        self._cqMask = _U32.unpack_from(self._cqRing, cq.ring_mask)[0]
+        self._cqes = cq.cqes
+        self._tail = _U32.unpack_from(self._sqRing, sq.tail)[0]
+        self._completed = []
+        # Entry i of the submission queue always uses the i-th request.
+        for i in range(params.sq_entries):
+            _U32.pack_into(self._sqRing, sq.array + i * _U32.size, i)
+
+
+    def _map(self, size, offset):
+        """
+        Map part of the memory shared with the kernel.
+        """
+        return mmap.mmap(self.fd, size, mmap.MAP_SHARED,
+                         mmap.PROT_READ | mmap.PROT_WRITE, offset=offset)
+
+
+    def prepare(self, opcode, fd, userData, addr=0, length=0, offset=0,
+                opFlags=0, bufIndex=0, ioprio=0):
+        """
+        Add a request to the submission queue, entering the kernel first if
+        the queue is full.
+
+        @param opcode: One of the C{IORING_OP_*} constants.
+
+        @param userData: An integer identifying the request, given back with
+            its completion.
+
+        The other parameters are the fields of C{struct io_uring_sqe} used by
+        the operation.
+        """
+        tail = self._tail
+        while (tail - _U32.unpack_from(self._sqRing, self._sqHead)[0]
+               ) & 0xffffffff >= self.entries:
+            if not self.enter(0):
+                # The kernel may need room in the completion queue first.
+                self._completed.extend(self.completions())
+        _SQE.pack_into(
+            self._sqes, (tail & self._sqMask) * _SQE.size, opcode, 0, ioprio,
+            fd, offset, addr, length, opFlags, userData, bufIndex, 0, 0, 0, 0)
+        self._tail = tail = (tail + 1) & 0xffffffff
+        _U32.pack_into(self._sqRing, self._sqTail, tail)
+
+
+    def enter(self, wait):
+        """
+        Submit the requests which have been prepared and wait for C{wait}
+        completions.
+
+        The system call is skipped when there is nothing to submit nor to
+        wait for and no completion is held back by the kernel: completions
+        are then read from the queue directly.
+
+        @return: C{False} if interrupted by a signal, or if the kernel could
+            not accept the requests until some completions are read,
+            otherwise C{True}.
+        """
+        toSubmit = (
+            self._tail - _U32.unpack_from(self._sqRing, self._sqHead)[0]
+            ) & 0xffffffff
+        if not (toSubmit or wait or _U32.unpack_from(
+                self._sqRing, self._sqFlags)[0] & IORING_SQ_CQ_OVERFLOW):
+            return True
+        try:
+            _syscall(_SYS_IO_URING_ENTER, self.fd, toSubmit, wait,
+                     IORING_ENTER_GETEVENTS, None, 0)
+        except IOUringError as e:
+            if e.errno in (errno.EINTR, errno.EAGAIN, errno.EBUSY):
+                return False
+            raise
+        return True
+
+
+    def completions(self):
+        """
+        Read the completions available.
+
+        @return: A L{list} of C{(userData, result, flags)} tuples.
+        """
+        ring = self._cqRing
+        head = _U32.unpack_from(ring, self._cqHead)[0]
+        tail = _U32.unpack_from(ring, self._cqTail)[0]
+        completions, self._completed = self._completed, []
+        if head == tail:
+            return completions
+        mask, cqes, size, unpack = (
+            self._cqMask, self._cqes, _CQE.size, _CQE.unpack_from)
+        while head != tail:
+            completions.append(unpack(ring, cqes + (head & mask) * size))
+            head = (head + 1) & 0xffffffff
+        _U32.pack_into(ring, self._cqHead, head)
+        return completions
+
+
+    def registerBuffers(self, buffers):
+        """
+        Register buffers with the kernel, for L{IORING_OP_READ_FIXED}
+        requests.
+
+        @param buffers: A L{list} of C{(address, length)} tuples.
+        """
+        iovecs = (_IOVec * len(buffers))(*buffers)
+        _syscall(_SYS_IO_URING_REGISTER, self.fd, IORING_REGISTER_BUFFERS,
+                 iovecs, len(buffers))
+
+
+    def close(self):
+        """
+        Release the memory shared with the kernel and close the instance,
+        which cancels the requests still pending.
+        """
+        if self.fd == -1:
+            return
+        for name in ("_sqRing", "_cqRing", "_sqes"):
+            ring = getattr(self, name, None)
+            if ring is not None:
+                ring.close()
+        os.close(self.fd)
+        self.fd = -1
+
+    __del__ = close
+
+
+
+if sys.platform.startswith("linux"):
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.syscall.restype = ctypes.c_long
+else:
+    libc = None
@@ -0,0 +1,382 @@
+# -*- test-case-name: twisted.test.test_udp -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Very low-level ctypes-based interface to Linux recvmmsg(2) and sendmmsg(2),
+which read and write several datagrams in one system call.
+
+ctypes and Linux are required: L{recvmmsg} and L{sendmmsg} are L{None}
+otherwise.  The C library is only searched for the functions when they are
+first called; if it lacks them, L{recvmmsg} falls back to
+L{socket.socket.recvfrom} and L{sendmmsg} to L{socket.socket.sendto}, one
+datagram per call.
+"""
+
+from __future__ import division, absolute_import
+
+import ctypes
+import errno
+import os
+import socket
+import struct
+import sys
+import threading
+
+from array import array
+from itertools import chain
+try:
+    from itertools import accumulate as _accumulate
+except ImportError:
+    def _accumulate(values):
+        """
+        Yield the running totals of C{values}, like
+        C{itertools.accumulate} on Python 3.
+        """
+        total = 0
+        for value in values:
+            total += value
+            yield total
+
+from twisted.python._accept4 import _decodeAddress, _SOCKADDR_SIZE
+
+# The most datagrams read by one recvmmsg call, and the most bytes of
+# buffers it reads them into.
+_RECEIVE_COUNT = 32
+_RECEIVE_SIZE = 2 ** 20
+
+# UIO_MAXIOV, the most datagrams the kernel writes in one sendmmsg call.
+_SEND_COUNT = 1024
+
+
+
+# struct iovec, and struct mmsghdr, in which struct msghdr is padded to the
+# alignment of a pointer, as is struct mmsghdr itself.  size_t is an
+# unsigned long on Linux.
+_IOVEC = "PL"
+_IOVEC_SIZE = struct.calcsize("@" + _IOVEC)
+_MMSGHDR = "PIPLPLi0PI0P"
+_MMSGHDR_SIZE = struct.calcsize("@" + _MMSGHDR)
+
+# Only the msg_namelen and msg_len members of a struct mmsghdr.
+_NAMELEN_OFFSET = struct.calcsize("@P")
+_LEN_OFFSET = struct.calcsize("@PIPLPLi0P")
+_MMSGHDR_LENGTHS = "%dxI%dxI%dx" % (
+    _NAMELEN_OFFSET, _LEN_OFFSET - _NAMELEN_OFFSET - 4,
+    _MMSGHDR_SIZE - _LEN_OFFSET - 4)
+
+# sendmmsg fills its arrays as arrays of unsigned longs, as large as pointers
+# on Linux: a struct iovec is 2 of them and a struct mmsghdr 8, with
+# msg_namelen in the second, which takes the low-order bytes of a word on
+# little-endian platforms.
+_WORD = struct.calcsize("@L")
+_WORDS = (_MMSGHDR_SIZE == 8 * _WORD and _IOVEC_SIZE == 2 * _WORD and
+          struct.calcsize("@P") == _WORD and _NAMELEN_OFFSET == _WORD and
+          (_WORD == 4 or sys.byteorder == "little"))
+
+
+
+def _encodeAddress(family, addr):
+    """
+    Encode an address as a C{struct sockaddr_in} or C{struct sockaddr_in6}.
+
+    @param family: C{AF_INET} or C{AF_INET6}.
+
+    @param addr: The address, as given to L{socket.socket.sendto}.  Its host
+        must be an IP address, or C{"<broadcast>"} for C{AF_INET}.
+
+    @raise ValueError: If the address cannot be encoded.
+
+    @return: The C{struct sockaddr}.
+    @rtype: L{bytes}
+    """
+    host, port = addr[:2]
+    try:
+        if family == socket.AF_INET:
+            if host == "<broadcast>":
+                host = "255.255.255.255"
+            return (struct.pack("=H", family) + struct.pack("!H", port) +
+                    socket.inet_pton(family, host) + b"\0" * 8)
+        flowInfo = scopeID = 0
+        if len(addr) > 2:
+            flowInfo = addr[2]
+        if len(addr) > 3:
+            scopeID = addr[3]
+        if "%" in host:
+            host, zone = host.split("%", 1)
+            if zone.isdigit():
+                scopeID = int(zone)
+            else:
+                scopeID = socket.if_nametoindex(zone)
+        return (struct.pack("=H", family) +
+                struct.pack("!HI", port, flowInfo) +
+                socket.inet_pton(family, host) + struct.pack("=I", scopeID))
+    except (socket.error, struct.error, TypeError, AttributeError) as e:
+        raise ValueError("Cannot encode %r: %s" % (addr, e))
+
+
+
+class _ReceiveBuffers(object):
+    """
+    The buffers recvmmsg reads datagrams of a given maximum size into.
+
+    @ivar count: The number of datagrams read at most.
+    @ivar size: The maximum size of a datagram.
+    @ivar dataView: A L{memoryview} of the buffers of the datagrams, each
+        following the previous one.
+    @ivar namesView: A L{memoryview} of the buffers of their addresses,
+        each C{_SOCKADDR_SIZE} bytes long.
+    @ivar messages: The C{struct mmsghdr} array given to recvmmsg.
+    @ivar initial: The C{struct mmsghdr} array as it is before recvmmsg
+        writes the lengths of the datagrams and of their addresses in it.
+    @ivar lengths: For each number of datagrams read, the L{struct.Struct}
+        unpacking those lengths from C{messages}.
+    """
+
+    def __init__(self, size):
+        self.count = count = max(1, min(_RECEIVE_COUNT, _RECEIVE_SIZE // size))
+        self.size = size
+        self._data = ctypes.create_string_buffer(count * size)
+        self._names = ctypes.create_string_buffer(count * _SOCKADDR_SIZE)
+        self._iovecs = ctypes.create_string_buffer(count * _IOVEC_SIZE)
+        data = ctypes.addressof(self._data)
+        names = ctypes.addressof(self._names)
+        iovecs = ctypes.addressof(self._iovecs)
+        struct.pack_into(
+            "@" + _IOVEC * count, self._iovecs, 0,
+            *[value for i in range(count)
+              for value in (data + i * size, size)])
+        self.initial = struct.pack(
+            "@" + _MMSGHDR * count,
+            *[value for i in range(count)
+              for value in (names + i * _SOCKADDR_SIZE, _SOCKADDR_SIZE,
+                            iovecs + i * _IOVEC_SIZE, 1, 0, 0, 0, 0)])
+        self.messages = ctypes.create_string_buffer(self.initial)
+        self.dataView = memoryview(self._data)
+        self.namesView = memoryview(self._names)
+        self.lengths = [
+            struct.Struct("@" + _MMSGHDR_LENGTHS * received)
+            for received in range(count + 1)]
+
+
+
+# The recvmmsg and sendmmsg functions of the C library: False until
+# _lookUpFunctions looks them up, then None if the C library lacks them.
+_recvmmsgFunction = _sendmmsgFunction = False
+
+# The _ReceiveBuffers of each thread, in a dict by maximum datagram size.
+_receiveBuffers = threading.local()
+
+def _buffersFor(size):
+    """
+    Get the L{_ReceiveBuffers} of the current thread for datagrams of at most
+    C{size} bytes, creating them the first time.
+
+    @rtype: L{_ReceiveBuffers}
+    """
+    bySize = getattr(_receiveBuffers, "bySize", None)
+    if bySize is None:
+        bySize = _receiveBuffers.bySize = {}
+    buffers = bySize.get(size)
+    if buffers is None:
+        buffers = bySize[size] = _ReceiveBuffers(size)
+    return buffers
+
+
+
+def _lookUpFunctions():
+    """
+    Look up the recvmmsg and sendmmsg functions of the C library, once.
+    """
+    global _recvmmsgFunction, _sendmmsgFunction
+    library = ctypes.CDLL(None, use_errno=True)
+    receive = getattr(library, "recvmmsg", None)
+    if receive is not None:
+        receive.argtypes = [
+            ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_void_p]
+    send = getattr(library, "sendmmsg", None)
+    if send is not None:
+        send.argtypes = [
+            ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    _recvmmsgFunction = receive
+    _sendmmsgFunction = send
+
+
+
+def _recvmmsg(skt, size):
+    """
+    Read the datagrams waiting on a non-blocking IPv4 or IPv6 datagram
+    socket, as many as fit in one call.
+
+    @param skt: The socket.
+    @type skt: L{socket.socket}
+
+    @param size: The maximum size of a datagram: longer datagrams are
+        truncated, as by L{socket.socket.recvfrom}.
+    @type size: L{int}
+
+    @raise socket.error: If no datagram could be read.
+
+    @return: The datagrams read, at least one, as a L{list} of
+        C{(datagram, addr)} tuples like those L{socket.socket.recvfrom}
+        returns, and whether no datagram was left waiting: this is only
+        known when fewer datagrams than fit in one call were read.
+    @rtype: L{tuple}
+    """
+    if _recvmmsgFunction is False:
+        _lookUpFunctions()
+    recvmmsg = _recvmmsgFunction
+    if recvmmsg is None:
+        return [skt.recvfrom(size)], False
+    buffers = _buffersFor(size)
+    messages = buffers.messages
+    while True:
+        received = recvmmsg(skt.fileno(), messages, buffers.count, 0, None)
+        if received >= 0:
+            break
+        code = ctypes.get_errno()
+        if code != errno.EINTR:
+            raise socket.error(code, os.strerror(code))
+
+    lengths = buffers.lengths[received].unpack_from(messages)
+    ctypes.memmove(messages, buffers.initial, received * _MMSGHDR_SIZE)
+    family = skt.family
+    dataView = buffers.dataView
+    namesView = buffers.namesView
+    addresses = {}
+    datagrams = []
+    for i in range(received):
+        start = i * _SOCKADDR_SIZE
+        name = namesView[start:start + lengths[2 * i]].tobytes()
+        addr = addresses.get(name)
+        if addr is None:
+            addr = addresses[name] = _decodeAddress(family, name)
+        start = i * size
+        datagrams.append(
+            (dataView[start:start + lengths[2 * i + 1]].tobytes(), addr))
+    return datagrams, received < buffers.count
+
+
+
+def _sendmmsg(skt, datagrams, start=0):
+    """
+    Write datagrams to a non-blocking IPv4 or IPv6 datagram socket, as many
+    as possible in one call.
+
+    @param skt: The socket.
+    @type skt: L{socket.socket}
+
+    @param datagrams: C{(datagram, addr)} tuples, with C{addr} L{None} to send
+        the datagram to the address the socket is connected to.  C{datagram}
+        is L{bytes} and C{addr} as given to L{socket.socket.sendto}.
+    @type datagrams: L{list}
+
+    @param start: The index in C{datagrams} of the first datagram to write.
+    @type start: L{int}
+
+    @raise socket.error: If the first datagram could not be written.
+
+    @return: The number of datagrams written, at least one.
+    @rtype: L{int}
+    """
+    if _sendmmsgFunction is False:
+        _lookUpFunctions()
+    sendmmsg = _sendmmsgFunction
+    if sendmmsg is None:
+        return _sendOne(skt, *datagrams[start])
+
+    family = skt.family
+    batch = datagrams[start:start + _SEND_COUNT]
+    count = len(batch)
+    data = [datagram for datagram, addr in batch]
+    addresses = [addr for datagram, addr in batch]
+    distinct = set(addresses)
+    try:
+        if set(map(type, data)) != {bytes}:
+            raise ValueError("Not all bytes")
+        names = dict((addr, _encodeAddress(family, addr))
+                     for addr in distinct if addr is not None)
+    except ValueError:
+        # Find the first datagram which cannot be written this way and
+        # write only the ones before it.
+        names = {}
+        for i, (datagram, addr) in enumerate(batch):
+            try:
+                if not isinstance(datagram, bytes):
+                    raise ValueError("Not bytes: %r" % (datagram,))
+                if addr is not None and addr not in names:
+                    names[addr] = _encodeAddress(family, addr)
+            except ValueError:
+                if not i:
+                    # Let the socket module make sense of it.
+                    return _sendOne(skt, datagram, addr)
+                count = i
+                break
+        data = data[:count]
+        addresses = addresses[:count]
+        distinct = set(addresses)
+
+    # The datagrams and their addresses are copied in one buffer each, and
+    # each member of the arrays pointing into them is filled at once for all
+    # the datagrams.
+    nameBuffer = ctypes.create_string_buffer(b"".join(names.values()))
+    nameAddress = ctypes.addressof(nameBuffer)
+    nameAddresses = {None: 0}
+    nameLengths = {None: 0}
+    for addr, name in names.items():
+        nameAddresses[addr] = nameAddress
+        nameLengths[addr] = len(name)
+        nameAddress += len(name)
+    dataBuffer = ctypes.create_string_buffer(b"".join(data))
+    lengths = array("L", map(len, data))
+
+    iovecs = array("L", [0]) * (2 * count)
+    iovecs[0::2] = array("L", _accumulate(
+        chain([ctypes.addressof(dataBuffer)], lengths[:-1])))
+    iovecs[1::2] = lengths
+    iovecAddress = iovecs.buffer_info()[0]
+    messages = array("L", [0]) * (8 * count)
+    if len(distinct) == 1:
+        # Usually all the datagrams go to the same address.
+        addr, = distinct
+        messages[0::8] = array("L", [nameAddresses[addr]]) * count
+        messages[1::8] = array("L", [nameLengths[addr]]) * count
+    else:
+        messages[0::8] = array("L", map(nameAddresses.__getitem__, addresses))
+        messages[1::8] = array("L", map(nameLengths.__getitem__, addresses))
+    messages[2::8] = array("L", range(
+        iovecAddress, iovecAddress + count * _IOVEC_SIZE, _IOVEC_SIZE))
+    messages[3::8] = array("L", [1]) * count
+    while True:
+        sent = sendmmsg(
+            skt.fileno(), messages.buffer_info()[0], count, 0)
+        if sent > 0:
+            return sent
+        code = ctypes.get_errno()
+        if code != errno.EINTR:
+            raise socket.error(code, os.strerror(code))
+
+
+
+def _sendOne(skt, datagram, addr):
+    """
+    Write one datagram to a socket.
+
+    @see: L{_sendmmsg}
+
+    @return: C{1}
+    """
+    if addr is None:
+        skt.send(datagram)
+    else:
+        skt.sendto(datagram, addr)
+    return 1
+
+
+
+recvmmsg = sendmmsg = None
+if sys.platform.startswith("linux"):
+    recvmmsg = _recvmmsg
+    if _WORDS:
+        sendmmsg = _sendmmsg
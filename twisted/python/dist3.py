@@ -73,9 +73,11 @@ modules = [
     "twisted.internet._posixstdio",
     "twisted.internet._posixserialport",
     "twisted.internet._signals",
+    "twisted.internet._timerwheel",
     "twisted.internet._win32serialport",
     "twisted.internet.abstract",
     "twisted.internet.address",
+    "twisted.internet.asyncioreactor",
     "twisted.internet.base",
     "twisted.internet.default",
     "twisted.internet.defer",
@@ -94,6 +96,7 @@ modules = [
     "twisted.internet.iocpreactor.setup",
     "twisted.internet.iocpreactor.tcp",
     "twisted.internet.iocpreactor.udp",
+    "twisted.internet.iouringreactor",
     "twisted.internet.kqreactor",
     "twisted.internet.main",
     "twisted.internet.pollreactor",
@@ -198,6 +201,7 @@ modules = [
     "twisted.protocols.tls",
     "twisted.python.__init__",
     "twisted.python._appdirs",
+    "twisted.python._iouring",
     "twisted.python._tzhelper",
     "twisted.python._oldstyle",
     "twisted.python._textattributes",
@@ -235,6 +239,9 @@ modules = [
     "twisted.python.util",
     "twisted.python.versions",
     "twisted.python.zippath",
+    "twisted.runner.__init__",
+    "twisted.runner.procmon",
+    "twisted.runner.test.__init__",
     "twisted.scripts.__init__",
     "twisted.scripts._twistd_unix",
     "twisted.scripts.trial",
@@ -325,6 +332,7 @@ testModules = [
     "twisted.cred.test.test_strcred",
     "twisted.internet.test.test_abstract",
     "twisted.internet.test.test_address",
+    "twisted.internet.test.test_asyncioreactor",
     "twisted.internet.test.test_base",
     "twisted.internet.test.test_baseprocess",
     "twisted.internet.test.test_core",
@@ -337,6 +345,7 @@ testModules = [
     "twisted.internet.test.test_glibbase",
     "twisted.internet.test.test_inlinecb",
     "twisted.internet.test.test_iocp",
+    "twisted.internet.test.test_iouringreactor",
     "twisted.internet.test.test_kqueuereactor",
     "twisted.internet.test.test_main",
     "twisted.internet.test.test_newtls",
@@ -349,6 +358,7 @@ testModules = [
     "twisted.internet.test.test_stdio",
     "twisted.internet.test.test_tcp",
     "twisted.internet.test.test_threads",
+    "twisted.internet.test.test_timerwheel",
     "twisted.internet.test.test_tls",
     "twisted.internet.test.test_udp",
     "twisted.internet.test.test_udp_internals",
@@ -406,6 +416,7 @@ testModules = [
     "twisted.python.test.test_util",
     "twisted.python.test.test_versions",
     "twisted.python.test.test_zippath",
+    "twisted.runner.test.test_procmon",
     "twisted.test.test_abstract",
     "twisted.test.test_adbapi",
     "twisted.test.test_amp",
@@ -85,18 +85,33 @@ def callWithContext(ctx, func, *args, **kw):
 
 
 
-def callWithLogger(logger, func, *args, **kw):
+def _logPrefixOf(logger):
     """
-    Utility method which wraps a function in a try:/except:, logs a failure if
-    one occurs, and uses the system's logPrefix.
+    Get the log prefix of C{logger}, logging any error raised while doing so.
+
+    @param logger: An object with a C{logPrefix} method.
+
+    @return: The log prefix, or C{'(buggy logPrefix method)'} if
+        C{logger.logPrefix} raised an exception.
+    @rtype: C{str}
     """
     try:
-        lp = logger.logPrefix()
+        return logger.logPrefix()
     except KeyboardInterrupt:
         raise
     except:
         lp = '(buggy logPrefix method)'
         err(system=lp)
+        return lp
+
+
+
+def callWithLogger(logger, func, *args, **kw):
+    """
+    Utility method which wraps a function in a try:/except:, logs a failure if
+    one occurs, and uses the system's logPrefix.
+    """
+    lp = _logPrefixOf(logger)
     try:
         return callWithContext({"system": lp}, func, *args, **kw)
     except KeyboardInterrupt:
@@ -106,6 +121,80 @@ def callWithLogger(logger, func, *args, **kw):
 
 
 
+class _LazyLoggerContext(dict):
+    """
+    A log context whose C{system} is the log prefix of its current C{logger}.
+
+    Unlike L{callWithLogger}, which calls C{logPrefix} and installs a new
+    context for every call, this lets a reactor install one context for all
+    the events it dispatches in an iteration and only set C{logger} before
+    each of them: C{logPrefix} is called only when an event is actually
+    logged, as this is when the context is copied.
+
+    @ivar logger: The object whose C{logPrefix} gives the C{system} of
+        events logged in this context, or L{None} to leave the C{system} of
+        the enclosing context.
+    """
+    logger = None
+
+    def _system(self):
+        """
+        Get the log prefix of C{logger}.
+
+        @return: The log prefix.
+        @rtype: C{str}
+        """
+        logger = self.logger
+        # Events logged by logPrefix itself get the enclosing system.
+        self.logger = None
+        try:
+            return _logPrefixOf(logger)
+        finally:
+            self.logger = logger
+
+
+    def __getitem__(self, key):
+        if key == "system" and self.logger is not None:
+            return self._system()
+        return dict.__getitem__(self, key)
+
+
+    def get(self, key, default=None):
+        if key == "system" and self.logger is not None:
+            return self._system()
+        return dict.get(self, key, default)
+
+
+    def copy(self):
+        """
+        Copy this context, resolving the C{system} of C{logger}.
+
+        @return: A L{dict} with the items of this context.
+        """
+        copied = dict.copy(self)
+        if self.logger is not None:
+            copied["system"] = self._system()
+        return copied
+
+
+
+def _callWithLazyLogger(func, *args, **kw):
+    """
+    Call C{func} in a new L{_LazyLoggerContext}, which is passed to it as its
+    first argument.
+
+    @param func: A callable setting the C{logger} of the context it is given
+        before running the code for which that logger should provide the log
+        prefix.
+
+    @return: The result of C{func}.
+    """
+    lazyContext = _LazyLoggerContext(context.get(ILogContext))
+    return context.call(
+        {ILogContext: lazyContext}, func, lazyContext, *args, **kw)
+
+
+
 def err(_stuff=None, _why=None, **kw):
     """
     Write a failure to the log.
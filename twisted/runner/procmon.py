@@ -5,7 +5,11 @@
 """
 Support for starting, monitoring, and restarting child process.
 """
+
+from __future__ import absolute_import, division
+
 from twisted.python import log
+from twisted.python.compat import _PY3
 from twisted.internet import error, protocol, reactor as _reactor
 from twisted.application import service
 from twisted.protocols import basic
@@ -19,9 +23,11 @@ transport = DummyTransport()
 class LineLogger(basic.LineReceiver):
 
     tag = None
-    delimiter = '\n'
+    delimiter = b'\n'
 
     def lineReceived(self, line):
+        if _PY3:
+            line = line.decode("utf-8", "backslashreplace")
         log.msg('[%s] %s' % (self.tag, line))
 
 
@@ -39,14 +45,14 @@ class LoggingProtocol(protocol.ProcessProtocol):
 
     def outReceived(self, data):
         self.output.dataReceived(data)
-        self.empty = data[-1] == '\n'
+        self.empty = data[-1:] == b'\n'
 
     errReceived = outReceived
 
 
     def processEnded(self, reason):
         if not self.empty:
-            self.output.dataReceived('\n')
+            self.output.dataReceived(b'\n')
         self.service.connectionLost(self.name)
 
 
@@ -5,8 +5,11 @@
 Tests for L{twisted.runner.procmon}.
 """
 
+from __future__ import absolute_import, division
+
 from twisted.trial import unittest
 from twisted.runner.procmon import LoggingProtocol, ProcessMonitor
+from twisted.python import log
 from twisted.internet.error import (ProcessDone, ProcessTerminated,
                                     ProcessExitedAlready)
 from twisted.internet.task import Clock
@@ -159,7 +162,7 @@ class ProcmonTests(unittest.TestCase):
                           {"foo": (["arg1", "arg2"], 1, 2, {})})
         self.pm.startService()
         self.reactor.advance(0)
-        self.assertEqual(self.pm.protocols.keys(), ["foo"])
+        self.assertEqual(list(self.pm.protocols.keys()), ["foo"])
 
 
     def test_addProcessDuplicateKeyError(self):
@@ -475,3 +478,35 @@ class ProcmonTests(unittest.TestCase):
         # all pending process restarts.
         self.assertEqual(self.pm.protocols, {})
 
+
+
+class LoggingProtocolTests(unittest.TestCase):
+    """
+    Tests for L{LoggingProtocol}.
+    """
+
+    def test_outputLogged(self):
+        """
+        Each line written by the process to its standard output or error is
+        logged with the name of the process, including a last line without a
+        newline once the process ends.
+        """
+        messages = []
+        log.addObserver(messages.append)
+        self.addCleanup(log.removeObserver, messages.append)
+        lost = []
+        class Service(object):
+            def connectionLost(self, name):
+                lost.append(name)
+
+        proto = LoggingProtocol()
+        proto.service = Service()
+        proto.name = "worker"
+        proto.makeConnection(None)
+        proto.outReceived(b"one\ntw")
+        proto.errReceived(b"o\nthree")
+        proto.processEnded(Failure(ProcessDone(0)))
+        self.assertEqual(
+            ["".join(message["message"]) for message in messages],
+            ["[worker] one", "[worker] two", "[worker] three"])
+        self.assertEqual(lost, ["worker"])
@@ -0,0 +1 @@
+twisted.runner.procmon has been ported to Python 3.
@@ -23,6 +23,11 @@ if platformType == "win32":
     raise ImportError("_twistd_unix doesn't work on Windows.")
 
 
+# The environment variable telling a twistd process that it is a worker
+# started by a twistd process run with --workers, and its number.
+_WORKER_ENVIRONMENT = "TWISTD_WORKER"
+
+
 def _umask(value):
     return int(value, 8)
 
@@ -53,6 +58,10 @@ class ServerOptions(app.ServerOptions):
                      ['gid', 'g', None, "The gid to run as.", gidFromString],
                      ['umask', None, None,
                       "The (octal) file creation mask to apply.", _umask],
+                     ['workers', None, 0,
+                      "Run the application in this many worker processes, "
+                      "restarted when they exit.  Its TCP ports should use "
+                      "reusePort so that the workers can share them.", int],
                     ]
 
     compData = usage.Completions(
@@ -74,6 +83,16 @@ class ServerOptions(app.ServerOptions):
 
     def postOptions(self):
         app.ServerOptions.postOptions(self)
+        if self['workers'] < 0:
+            raise usage.UsageError("--workers must not be negative")
+        if os.environ.get(_WORKER_ENVIRONMENT):
+            # This process is a worker: run in the foreground, logging to the
+            # standard output, which the supervising process logs.
+            self['workers'] = 0
+            self['nodaemon'] = True
+            self['pidfile'] = ''
+            if not self['syslog']:
+                self['logfile'] = '-'
         if self['pidfile']:
             self['pidfile'] = os.path.abspath(self['pidfile'])
 
@@ -204,7 +223,10 @@ class UnixApplicationRunner(app.ApplicationRunner):
         such.
         """
         try:
-            self.startApplication(self.application)
+            if self.config['workers']:
+                self.startWorkers(self.config['workers'])
+            else:
+                self.startApplication(self.application)
         except Exception as ex:
             statusPipe = self.config.get("statusPipe", None)
             if statusPipe is not None:
@@ -223,6 +245,74 @@ class UnixApplicationRunner(app.ApplicationRunner):
         self.removePID(self.config['pidfile'])
 
 
+    def startWorkers(self, workers):
+        """
+        Run the application in worker processes rather than in this process,
+        which supervises them: they are restarted when they exit, and stopped
+        when this process stops.
+
+        Each worker runs twistd again, with the same arguments, in the
+        foreground and logging to its standard output, which this process
+        logs.  The C{TWISTD_WORKER} environment variable gives its number,
+        from 1.  For the workers to share a TCP port, each listening with its
+        own socket while the kernel balances the connections between them,
+        the application should listen with C{reusePort}.
+
+        This process does not change its root directory, which the workers
+        do.  Once the first workers are started, it sheds its privileges like
+        a process running the application itself, so the workers restarted
+        later start without them and cannot listen on privileged ports.
+
+        @param workers: The number of worker processes.
+        @type workers: C{int}
+        """
+        from twisted.runner.procmon import ProcessMonitor
+        # The paths are relative to the current directory, which changes.
+        arguments = self._workerArguments()
+        self.setupEnvironment(
+            None, self.config['rundir'], self.config['nodaemon'],
+            self.config['umask'], self.config['pidfile'])
+        supervisor = service.Application("twistd")
+        monitor = ProcessMonitor()
+        for number in range(1, workers + 1):
+            environment = dict(os.environ)
+            environment[_WORKER_ENVIRONMENT] = str(number)
+            monitor.addProcess(
+                "worker-%d" % (number,), arguments, env=environment)
+        monitor.setServiceParent(supervisor)
+        app.startApplication(supervisor, False)
+
+        process = service.IProcess(self.application)
+        uid, gid = self.config['uid'], self.config['gid']
+        if uid is None:
+            uid = process.uid
+        if gid is None:
+            gid = process.gid
+        self.shedPrivileges(self.config['euid'], uid, gid)
+
+
+    def _workerArguments(self):
+        """
+        @return: The command line running a worker: twistd with the arguments
+            of this process, followed by those giving the relative paths among
+            them as absolute paths, as the worker starts in the run directory
+            of this process.
+        @rtype: C{list} of C{str}
+        """
+        arguments = [sys.executable, "-c",
+                     "from twisted.scripts.twistd import run; run()"
+                     ] + sys.argv[1:]
+        names = ['rundir', 'python', 'source', 'logfile', 'profile']
+        if not (self.config['python'] or self.config['source']):
+            names.append('file')
+        for name in names:
+            path = self.config[name]
+            if (path and path not in ('-', os.curdir) and
+                    not os.path.isabs(path)):
+                arguments.append('--%s=%s' % (name, os.path.abspath(path)))
+        return arguments
+
+
     def removePID(self, pidfile):
         """
         Remove the specified PID file, if possible.  Errors are logged, not
@@ -12,7 +12,7 @@ for more details.
 @author: Glyph Lefkowitz
 """
 
-import copy, cStringIO, struct
+import copy, cStringIO, re, struct
 
 from twisted.internet import protocol
 from twisted.persisted import styles
@@ -22,14 +22,30 @@ from twisted.python.reflect import fullyQualifiedName
 class BananaError(Exception):
     pass
 
-def int2b128(integer, stream):
-    if integer == 0:
-        stream(chr(0))
-        return
+_b128Digits = [chr(i) for i in range(128)]
+
+def _int2b128(integer):
+    """
+    Represent an integer as a base 128 string.
+
+    @param integer: The integer, which must not be negative.
+    @type integer: C{int} or C{long}
+
+    @return: The integer encoded in a string.
+    @rtype: C{str}
+    """
+    if 0 <= integer < 128:
+        return _b128Digits[integer]
     assert integer > 0, "can only encode positive integers"
+    digits = []
     while integer:
-        stream(chr(integer & 0x7f))
+        digits.append(_b128Digits[integer & 0x7f])
         integer = integer >> 7
+    return ''.join(digits)
+
+
+def int2b128(integer, stream):
+    stream(_int2b128(integer))
 
 
 def b1282int(st):
@@ -66,6 +82,11 @@ VOCAB    = chr(0x87)
 
 HIGH_BIT_SET = chr(0x80)
 
+# Finds the type byte which ends a prefix.
+_typeByte = re.compile('[\x80-\xff]')
+
+_float = struct.Struct("!d")
+
 def setPrefixLimit(limit):
     """
     Set the limit on the prefix length for all Banana connections
@@ -169,79 +190,85 @@ class Banana(protocol.Protocol, styles.Ephemeral):
     buffer = ''
 
     def dataReceived(self, chunk):
+        """
+        Decode the items in C{chunk} and any data left over from previous
+        calls.
+
+        The data is scanned by an offset into it rather than by slicing off
+        each item decoded, so that decoding takes time proportional to the
+        size of the data however many items it holds.  Only an incomplete
+        item at the end is kept in L{buffer} for the next call.
+        """
         buffer = self.buffer + chunk
+        end = len(buffer)
         listStack = self.listStack
         gotItem = self.gotItem
-        while buffer:
-            assert self.buffer != buffer, "This ain't right: %s %s" % (repr(self.buffer), repr(buffer))
-            self.buffer = buffer
-            pos = 0
-            for ch in buffer:
-                if ch >= HIGH_BIT_SET:
+        prefixLimit = self.prefixLimit
+        findTypeByte = _typeByte.search
+        # The offset of the first item not yet completely decoded.
+        pos = 0
+        try:
+            while pos < end:
+                match = findTypeByte(buffer, pos, pos + prefixLimit + 1)
+                if match is None:
+                    if end - pos > prefixLimit:
+                        raise BananaError(
+                            "Security precaution: more than %d bytes of "
+                            "prefix" % (prefixLimit,))
                     break
-                pos = pos + 1
-            else:
-                if pos > self.prefixLimit:
-                    raise BananaError("Security precaution: more than %d bytes of prefix" % (self.prefixLimit,))
-                return
-            num = buffer[:pos]
-            typebyte = buffer[pos]
-            rest = buffer[pos+1:]
-            if len(num) > self.prefixLimit:
-                raise BananaError("Security precaution: longer than %d bytes worth of prefix" % (self.prefixLimit,))
-            if typebyte == LIST:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: List too long.")
-                listStack.append((num, []))
-                buffer = rest
-            elif typebyte == STRING:
-                num = b1282int(num)
-                if num > SIZE_LIMIT:
-                    raise BananaError("Security precaution: String too long.")
-                if len(rest) >= num:
-                    buffer = rest[num:]
-                    gotItem(rest[:num])
+                typePos = match.start()
+                if typePos - pos == 1:
+                    num = ord(buffer[pos])
                 else:
-                    return
-            elif typebyte == INT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGINT:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(num)
-            elif typebyte == LONGNEG:
-                buffer = rest
-                num = b1282int(num)
-                gotItem(-num)
-            elif typebyte == NEG:
-                buffer = rest
-                num = -b1282int(num)
-                gotItem(num)
-            elif typebyte == VOCAB:
-                buffer = rest
-                num = b1282int(num)
-                item = self.incomingVocabulary[num]
-                if self.currentDialect == b'pb':
-                    # the sender issues VOCAB only for dialect pb
-                    gotItem(item)
+                    num = b1282int(buffer[pos:typePos])
+                typebyte = buffer[typePos]
+                itemPos = typePos + 1
+                if typebyte == STRING:
+                    if num > SIZE_LIMIT:
+                        raise BananaError(
+                            "Security precaution: String too long.")
+                    if end - itemPos < num:
+                        break
+                    nextPos = itemPos + num
+                    gotItem(buffer[itemPos:nextPos])
+                elif typebyte == INT or typebyte == LONGINT:
+                    nextPos = itemPos
+                    gotItem(num)
+                elif typebyte == LIST:
+                    if num > SIZE_LIMIT:
+                        raise BananaError(
+                            "Security precaution: List too long.")
+                    nextPos = itemPos
+                    listStack.append((num, []))
+                elif typebyte == NEG or typebyte == LONGNEG:
+                    nextPos = itemPos
+                    gotItem(-num)
+                elif typebyte == VOCAB:
+                    nextPos = itemPos
+                    item = self.incomingVocabulary[num]
+                    if self.currentDialect == b'pb':
+                        # the sender issues VOCAB only for dialect pb
+                        gotItem(item)
+                    else:
+                        raise NotImplementedError(
+                            "Invalid item for pb protocol {0!r}".format(item))
+                elif typebyte == FLOAT:
+                    if end - itemPos < 8:
+                        break
+                    nextPos = itemPos + 8
+                    gotItem(_float.unpack_from(buffer, itemPos)[0])
                 else:
                     raise NotImplementedError(
-                        "Invalid item for pb protocol {0!r}".format(item))
-            elif typebyte == FLOAT:
-                if len(rest) >= 8:
-                    buffer = rest[8:]
-                    gotItem(struct.unpack("!d", rest[:8])[0])
-                else:
-                    return
-            else:
-                raise NotImplementedError(("Invalid Type Byte %r" % (typebyte,)))
-            while listStack and (len(listStack[-1][1]) == listStack[-1][0]):
-                item = listStack.pop()[1]
-                gotItem(item)
-        self.buffer = ''
+                        ("Invalid Type Byte %r" % (typebyte,)))
+                while listStack and (
+                        len(listStack[-1][1]) == listStack[-1][0]):
+                    item = listStack.pop()[1]
+                    gotItem(item)
+                pos = nextPos
+        finally:
+            # Keep the item being decoded when an error is raised, as well
+            # as an incomplete one.
+            self.buffer = buffer[pos:]
 
 
     def expressionReceived(self, lst):
@@ -310,52 +337,48 @@ class Banana(protocol.Protocol, styles.Ephemeral):
 
         @return: L{None}
         """
-        io = cStringIO.StringIO()
-        self._encode(obj, io.write)
-        value = io.getvalue()
-        self.transport.write(value)
+        chunks = []
+        self._encode(obj, chunks.append)
+        self.transport.write(''.join(chunks))
 
     def _encode(self, obj, write):
-        if isinstance(obj, (list, tuple)):
+        """
+        Encode an object, passing each token, a prefix and type byte
+        together, to C{write}.  Strings are checked for first, as they are
+        the most common items.
+        """
+        if isinstance(obj, str):
+            # TODO: an API for extending banana...
+            if self.currentDialect == "pb" and obj in self.outgoingSymbols:
+                write(_int2b128(self.outgoingSymbols[obj]) + VOCAB)
+            else:
+                if len(obj) > SIZE_LIMIT:
+                    raise BananaError(
+                        "string is too long to send (%d)" % (len(obj),))
+                write(_int2b128(len(obj)) + STRING)
+                write(obj)
+        elif isinstance(obj, (list, tuple)):
             if len(obj) > SIZE_LIMIT:
                 raise BananaError(
                     "list/tuple is too long to send (%d)" % (len(obj),))
-            int2b128(len(obj), write)
-            write(LIST)
+            write(_int2b128(len(obj)) + LIST)
+            encode = self._encode
             for elem in obj:
-                self._encode(elem, write)
+                encode(elem, write)
         elif isinstance(obj, (int, long)):
             if obj < self._smallestLongInt or obj > self._largestLongInt:
                 raise BananaError(
                     "int/long is too large to send (%d)" % (obj,))
             if obj < self._smallestInt:
-                int2b128(-obj, write)
-                write(LONGNEG)
+                write(_int2b128(-obj) + LONGNEG)
             elif obj < 0:
-                int2b128(-obj, write)
-                write(NEG)
+                write(_int2b128(-obj) + NEG)
             elif obj <= self._largestInt:
-                int2b128(obj, write)
-                write(INT)
+                write(_int2b128(obj) + INT)
             else:
-                int2b128(obj, write)
-                write(LONGINT)
+                write(_int2b128(obj) + LONGINT)
         elif isinstance(obj, float):
-            write(FLOAT)
-            write(struct.pack("!d", obj))
-        elif isinstance(obj, str):
-            # TODO: an API for extending banana...
-            if self.currentDialect == "pb" and obj in self.outgoingSymbols:
-                symbolID = self.outgoingSymbols[obj]
-                int2b128(symbolID, write)
-                write(VOCAB)
-            else:
-                if len(obj) > SIZE_LIMIT:
-                    raise BananaError(
-                        "string is too long to send (%d)" % (len(obj),))
-                int2b128(len(obj), write)
-                write(STRING)
-                write(obj)
+            write(FLOAT + _float.pack(obj))
         else:
             raise BananaError("Banana cannot send {0} objects: {1!r}".format(
                 fullyQualifiedName(type(obj)), obj))
@@ -20,9 +20,9 @@ from twisted.python.failure import Failure
 from twisted.protocols import amp
 from twisted.trial import unittest
 from twisted.internet import (
-    address, protocol, defer, error, reactor, interfaces)
+    abstract, address, protocol, defer, error, main, reactor, interfaces)
 from twisted.test import iosim
-from twisted.test.proto_helpers import StringTransport
+from twisted.test.proto_helpers import MemoryReactor, StringTransport
 
 ssl = None
 try:
@@ -678,6 +678,376 @@ class CommandDispatchTests(unittest.TestCase):
 
 
 
+@implementer(interfaces.IPushProducer)
+class RecordingCallProducer(object):
+    """
+    A producer of requests which records how it is paused, resumed and
+    stopped.
+
+    @ivar events: The names of the methods called, in order.
+    """
+    def __init__(self):
+        self.events = []
+
+
+    def pauseProducing(self):
+        self.events.append('pause')
+
+
+    def resumeProducing(self):
+        self.events.append('resume')
+
+
+    def stopProducing(self):
+        self.events.append('stop')
+
+
+
+class CongestedTransport(abstract.FileDescriptor):
+    """
+    A transport which writes nothing while C{congested} is set, so that its
+    buffer fills up and it pauses its producer.
+
+    @ivar written: The data written.
+    """
+    bufferSize = 16
+    connected = True
+    congested = True
+
+    def __init__(self):
+        abstract.FileDescriptor.__init__(self, reactor=MemoryReactor())
+        self.written = []
+
+
+    def writeSomeData(self, data):
+        if self.congested:
+            return 0
+        self.written.append(data)
+        return len(data)
+
+
+    def getPeer(self):
+        return address.IPv4Address('TCP', '127.0.0.1', 12345)
+
+
+    def getHost(self):
+        return address.IPv4Address('TCP', '127.0.0.1', 54321)
+
+
+
+class OutstandingRequestTests(unittest.TestCase):
+    """
+    Tests for the limits L{amp.BoxDispatcher} places on requests awaiting
+    answers, the statistics it keeps on them and the producers of requests
+    it pauses and resumes.
+    """
+
+    def setUp(self):
+        """
+        Create a dispatcher with a fake clock, which allows two outstanding
+        requests and two queued ones.
+        """
+        self.now = 0.0
+        self.sender = FakeSender()
+        self.dispatcher = amp.BoxDispatcher(FakeLocator())
+        self.dispatcher._seconds = lambda: self.now
+        self.dispatcher.maxOutstandingRequests = 2
+        self.dispatcher.maxQueuedRequests = 2
+        self.dispatcher.startReceivingBoxes(self.sender)
+
+
+    def answer(self, tag):
+        """
+        Answer the L{Hello} request with the ID C{tag}.
+        """
+        self.dispatcher.ampBoxReceived(amp.AmpBox({
+            b'hello': b'yay', b'_answer': tag}))
+
+
+    def test_unlimitedByDefault(self):
+        """
+        L{amp.BoxDispatcher.maxOutstandingRequests} is L{None} by default,
+        so that any number of requests are sent right away.
+        """
+        dispatcher = amp.BoxDispatcher(FakeLocator())
+        dispatcher.startReceivingBoxes(self.sender)
+        self.assertIsNone(dispatcher.maxOutstandingRequests)
+        for i in range(100):
+            dispatcher.callRemote(Hello, hello=b'world')
+        self.assertEqual(len(self.sender.sentBoxes), 100)
+
+
+    def test_queuedBeyondLimit(self):
+        """
+        Requests made while as many as C{maxOutstandingRequests} are
+        outstanding are queued, and sent in order as answers arrive.
+        """
+        results = [self.dispatcher.callRemote(Hello, hello=b'world')
+                   for i in range(4)]
+        self.assertEqual(
+            [box[b'_ask'] for box in self.sender.sentBoxes], [b'1', b'2'])
+        self.answer(b'1')
+        self.assertEqual(
+            [box[b'_ask'] for box in self.sender.sentBoxes],
+            [b'1', b'2', b'3'])
+        self.answer(b'2')
+        self.answer(b'3')
+        self.answer(b'4')
+        self.assertEqual(
+            [box[b'_ask'] for box in self.sender.sentBoxes],
+            [b'1', b'2', b'3', b'4'])
+        for result in results:
+            self.assertEqual(
+                self.successResultOf(result)['hello'], b'yay')
+
+
+    def test_failFastBeyondQueue(self):
+        """
+        Requests made while C{maxQueuedRequests} requests are queued fail
+        with L{amp.TooManyRequests} without being sent, and are counted as
+        rejected.
+        """
+        for i in range(4):
+            self.dispatcher.callRemote(Hello, hello=b'world')
+        self.failureResultOf(
+            self.dispatcher.callRemote(Hello, hello=b'world'),
+            amp.TooManyRequests)
+        self.assertEqual(len(self.sender.sentBoxes), 2)
+        self.assertEqual(
+            self.dispatcher.commandStatistics[b'hello'].rejected, 1)
+
+
+    def test_failFastByDefault(self):
+        """
+        L{amp.BoxDispatcher.maxQueuedRequests} is C{0} by default, so that
+        requests beyond C{maxOutstandingRequests} fail right away.
+        """
+        dispatcher = amp.BoxDispatcher(FakeLocator())
+        dispatcher.startReceivingBoxes(self.sender)
+        dispatcher.maxOutstandingRequests = 1
+        dispatcher.callRemote(Hello, hello=b'world')
+        self.failureResultOf(
+            dispatcher.callRemote(Hello, hello=b'world'),
+            amp.TooManyRequests)
+
+
+    def test_noAnswerRequestsNotLimited(self):
+        """
+        Requests which require no answer are sent right away, however many
+        requests are outstanding.
+        """
+        for i in range(4):
+            self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(NoAnswerHello, hello=b'world')
+        self.assertEqual(len(self.sender.sentBoxes), 3)
+        self.assertNotIn(b'_ask', self.sender.sentBoxes[-1])
+
+
+    def test_cancelledWhileQueued(self):
+        """
+        A queued request whose L{Deferred} has been cancelled is not sent.
+        """
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        cancelled = self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        cancelled.cancel()
+        self.failureResultOf(cancelled, defer.CancelledError)
+        self.answer(b'1')
+        self.assertEqual(
+            [box[b'_ask'] for box in self.sender.sentBoxes],
+            [b'1', b'2', b'4'])
+        self.assertEqual(self.dispatcher.commandStatistics[b'hello'].queued, 0)
+
+
+    def test_statistics(self):
+        """
+        L{amp.BoxDispatcher.commandStatistics} counts the requests made with
+        each command which are outstanding, queued, answered and answered
+        with errors, and the seconds taken to answer them.
+        """
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.now = 1.0
+        failing = self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        statistics = self.dispatcher.commandStatistics[b'hello']
+        self.assertEqual(
+            (statistics.outstanding, statistics.queued), (2, 1))
+
+        self.now = 3.0
+        self.answer(b'1')
+        self.now = 4.0
+        self.dispatcher.ampBoxReceived(amp.AmpBox({
+            b'_error': b'2', b'_error_code': b'bugs',
+            b'_error_description': b'stuff'}))
+        self.failureResultOf(failing, amp.RemoteAmpError)
+
+        self.assertEqual(
+            (statistics.outstanding, statistics.queued, statistics.answered,
+             statistics.errors),
+            (1, 0, 2, 1))
+        self.assertEqual(statistics.totalLatency, 6.0)
+        self.assertEqual(statistics.maxLatency, 3.0)
+
+
+    def test_failAllOutgoing(self):
+        """
+        L{amp.BoxDispatcher.failAllOutgoing} fails queued requests as well as
+        outstanding ones.
+        """
+        results = [self.dispatcher.callRemote(Hello, hello=b'world')
+                   for i in range(3)]
+        self.dispatcher.failAllOutgoing(Failure(error.ConnectionLost()))
+        for result in results:
+            self.failureResultOf(result, error.ConnectionLost)
+        statistics = self.dispatcher.commandStatistics[b'hello']
+        self.assertEqual(
+            (statistics.outstanding, statistics.queued), (0, 0))
+
+
+    def test_callProducerPausedAtLimit(self):
+        """
+        Producers registered with
+        L{amp.BoxDispatcher.registerCallProducer} are paused while as many
+        requests as C{maxOutstandingRequests} are outstanding.
+        """
+        producer = RecordingCallProducer()
+        self.dispatcher.registerCallProducer(producer)
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.assertEqual(producer.events, [])
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.assertEqual(producer.events, ['pause'])
+        self.answer(b'1')
+        self.assertEqual(producer.events, ['pause', 'resume'])
+
+
+    def test_callProducerRegisteredWhilePaused(self):
+        """
+        A producer registered while no more requests should be made is
+        paused right away.
+        """
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        producer = RecordingCallProducer()
+        self.dispatcher.registerCallProducer(producer)
+        self.assertEqual(producer.events, ['pause'])
+
+
+    def test_callProducerUnregistered(self):
+        """
+        A producer unregistered with
+        L{amp.BoxDispatcher.unregisterCallProducer} is no longer paused.
+        """
+        producer = RecordingCallProducer()
+        self.dispatcher.registerCallProducer(producer)
+        self.dispatcher.unregisterCallProducer(producer)
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.dispatcher.callRemote(Hello, hello=b'world')
+        self.assertEqual(producer.events, [])
+
+
+    def test_callProducerStopped(self):
+        """
+        Producers are stopped when the dispatcher stops receiving boxes.
+        """
+        producer = RecordingCallProducer()
+        self.dispatcher.registerCallProducer(producer)
+        self.dispatcher.stopReceivingBoxes(Failure(error.ConnectionDone()))
+        self.assertEqual(producer.events, ['stop'])
+
+
+    def test_callProducerPausedByTransport(self):
+        """
+        L{amp.AMP} registers a producer with its transport while there are
+        producers registered with L{amp.AMP.registerCallProducer}, and pauses
+        them while the transport is paused.
+        """
+        transport = StringTransport()
+        protocol = amp.AMP()
+        protocol.makeConnection(transport)
+        producer = RecordingCallProducer()
+        protocol.registerCallProducer(producer)
+        self.assertTrue(transport.streaming)
+        transport.producer.pauseProducing()
+        self.assertEqual(producer.events, ['pause'])
+        transport.producer.resumeProducing()
+        self.assertEqual(producer.events, ['pause', 'resume'])
+        protocol.unregisterCallProducer(producer)
+        self.assertIsNone(transport.producer)
+
+
+    def test_loseConnectionWhileSendingPaused(self):
+        """
+        A transport which paused the producer L{amp.AMP} registered with it
+        closes once its buffer has drained after C{loseConnection} is
+        called, as that producer then unregisters.
+        """
+        transport = CongestedTransport()
+        protocol = amp.AMP()
+        protocol.makeConnection(transport)
+        producer = RecordingCallProducer()
+        protocol.registerCallProducer(producer)
+        transport.write(b"x" * 100)
+        self.assertEqual(producer.events, ['pause'])
+        transport.loseConnection()
+        transport.congested = False
+        self.assertIsNone(transport.doWrite())
+        self.assertIsNone(transport.producer)
+        self.assertIs(transport.doWrite(), main.CONNECTION_DONE)
+
+
+    def test_existingProducerChained(self):
+        """
+        If a streaming producer is registered with the transport already,
+        L{amp.AMP.registerCallProducer} chains it, pausing and resuming it
+        along with the call producers, and registers it with the transport
+        again once the last call producer is unregistered.
+        """
+        transport = StringTransport()
+        protocol = amp.AMP()
+        protocol.makeConnection(transport)
+        existing = RecordingCallProducer()
+        transport.registerProducer(existing, True)
+        producer = RecordingCallProducer()
+        protocol.registerCallProducer(producer)
+        transport.producer.pauseProducing()
+        self.assertEqual(existing.events, ['pause'])
+        self.assertEqual(producer.events, ['pause'])
+        protocol.unregisterCallProducer(producer)
+        self.assertIs(transport.producer, existing)
+        self.assertTrue(transport.streaming)
+        self.assertEqual(existing.events, ['pause', 'resume'])
+
+
+    def test_existingPullProducerKept(self):
+        """
+        If a pull producer is registered with the transport already,
+        L{amp.AMP.registerCallProducer} leaves it alone.
+        """
+        transport = StringTransport()
+        protocol = amp.AMP()
+        protocol.makeConnection(transport)
+        existing = RecordingCallProducer()
+        transport.registerProducer(existing, False)
+        protocol.registerCallProducer(RecordingCallProducer())
+        self.assertIs(transport.producer, existing)
+        self.assertFalse(transport.streaming)
+
+
+    def test_callProducerRegisteredBeforeConnection(self):
+        """
+        If a producer is registered with L{amp.AMP.registerCallProducer}
+        before the connection is made, L{amp.AMP} registers its producer
+        with the transport once it is.
+        """
+        transport = StringTransport()
+        protocol = amp.AMP()
+        protocol.registerCallProducer(RecordingCallProducer())
+        protocol.makeConnection(transport)
+        self.assertIsNotNone(transport.producer)
+
+
+
 class SimpleGreeting(amp.Command):
     """
     A very simple greeting command that uses a few basic argument types.
@@ -1055,6 +1425,56 @@ class BinaryProtocolTests(unittest.TestCase):
         self.assertFalse(transport.disconnecting)
 
 
+    def test_receiveBoxesInChunks(self):
+        """
+        L{amp.BinaryBoxProtocol} emits the same boxes however the data of
+        their serialized forms is split up when it is received.
+        """
+        boxes = [amp.Box({b"k": b"v", b"key": b"x" * 300}),
+                 amp.Box(),
+                 amp.Box({b"long": b"y" * (2 ** 16 - 1), b"a": b""})]
+        data = b"".join(box.serialize() for box in boxes)
+        for size in [1, 3, 7, 64, 4096, len(data)]:
+            self.boxes = []
+            protocol = amp.BinaryBoxProtocol(self)
+            protocol.makeConnection(StringTransport())
+            for i in range(0, len(data), size):
+                protocol.dataReceived(data[i:i + size])
+            self.assertEqual(self.boxes, boxes)
+
+
+    def test_incompleteBoxRecvd(self):
+        """
+        While L{amp.BinaryBoxProtocol} waits for the rest of a key-value pair,
+        the backwards compatible C{recvd} attribute holds the data of that
+        pair received so far.
+        """
+        data = amp.Box({b"k": b"v", b"key": b"value"}).serialize()
+        protocol = amp.BinaryBoxProtocol(self)
+        protocol.makeConnection(StringTransport())
+        protocol.dataReceived(data[:8])
+        protocol.dataReceived(data[8:12])
+        self.assertEqual(protocol.recvd, data[6:12])
+        self.assertEqual(self.boxes, [])
+
+
+    def test_pausedWhileReceivingBoxes(self):
+        """
+        L{amp.BinaryBoxProtocol} emits no boxes while it is paused, and emits
+        the boxes received in the meantime once it is resumed.
+        """
+        data = amp.Box({b"k": b"v"}).serialize() * 2
+        protocol = amp.BinaryBoxProtocol(self)
+        protocol.makeConnection(StringTransport())
+        protocol.paused = True
+        protocol.dataReceived(data[:5])
+        protocol.dataReceived(data[5:])
+        self.assertEqual(self.boxes, [])
+        protocol.paused = False
+        protocol.dataReceived(b"")
+        self.assertEqual(self.boxes, [amp.Box({b"k": b"v"})] * 2)
+
+
     def test_sendBox(self):
         """
         When a binary box protocol sends a box, it should emit the serialized
@@ -2622,6 +3042,57 @@ class CommandTests(unittest.TestCase):
             None)
 
 
+    def test_schemaCompiledWithClass(self):
+        """
+        The Python names of the arguments and response of a L{Command} are
+        worked out when it is created.
+        """
+        self.assertEqual(
+            Hello._argumentSchema.names,
+            frozenset(['hello', 'optional', 'Print', 'From', 'mixedCase',
+                       'dash_arg', 'underscore_arg']))
+        self.assertEqual(
+            Hello._responseSchema.names, frozenset(['hello', 'Print']))
+
+
+    def test_parseArgumentsRequiredMissing(self):
+        """
+        L{amp.Command.parseArguments} raises L{KeyError} if a required
+        argument is missing, and parses missing optional arguments as
+        L{None}.
+        """
+        class Store(amp.Command):
+            arguments = [(b'key', amp.String()),
+                         (b'ttl', amp.Integer(optional=True))]
+
+        self.assertEqual(
+            Store.parseArguments({b'key': b'k'}, None),
+            {'key': b'k', 'ttl': None})
+        self.assertRaises(
+            KeyError, Store.parseArguments, {b'ttl': b'3'}, None)
+
+
+    def test_makeArgumentsOptionalNone(self):
+        """
+        L{amp.Command.makeArguments} leaves optional arguments which are
+        missing or L{None} out of the box, and raises L{KeyError} if a
+        required argument is missing.
+        """
+        class Store(amp.Command):
+            arguments = [(b'key', amp.String()),
+                         (b'ttl', amp.Integer(optional=True)),
+                         (b'owner-name', amp.Unicode(optional=True))]
+
+        self.assertEqual(
+            Store.makeArguments({'key': b'k', 'ttl': None}, None),
+            amp.Box(key=b'k'))
+        self.assertEqual(
+            Store.makeArguments({'key': b'k', 'owner_name': u'\N{SNOWMAN}'},
+                                None),
+            amp.Box({b'key': b'k', b'owner-name': b'\xe2\x98\x83'}))
+        self.assertRaises(KeyError, Store.makeArguments, {'ttl': 3}, None)
+
+
     def test_commandNameDefaultsToClassNameAsByteString(self):
         """
         A L{Command} subclass without a defined C{commandName} that's
@@ -304,6 +304,71 @@ class BananaTests(BananaTestBase):
             self.enc.dataReceived(byte)
 
 
+    def test_partialFloat(self):
+        """
+        A float split across calls to L{banana.Banana.dataReceived} is
+        decoded once all of it has been received.
+        """
+        self.enc.sendEncoded([1, 2.5])
+        data = self.io.getvalue()
+        self.enc.dataReceived(data[:-3])
+        self.assertFalse(hasattr(self, 'result'))
+        self.enc.dataReceived(data[-3:])
+        self.assertEqual(self.result, [1, 2.5])
+
+
+    def test_consumedDataReleased(self):
+        """
+        L{banana.Banana.dataReceived} keeps only the incomplete item at the
+        end of the data in its buffer.
+        """
+        self.enc.sendEncoded(["x" * 100] * 1000)
+        data = self.io.getvalue()
+        self.enc.dataReceived(data[:-50])
+        self.assertEqual(self.enc.buffer, data[-102:-50])
+        self.enc.dataReceived(data[-50:])
+        self.assertEqual(self.enc.buffer, b'')
+        self.assertEqual(self.result, ["x" * 100] * 1000)
+
+
+    def test_manyItemsInOneChunk(self):
+        """
+        Many items delivered in one call to L{banana.Banana.dataReceived}
+        are all decoded.
+        """
+        for i in range(3):
+            self.enc.sendEncoded([i, "spam", -i, [i * 1.5]])
+        received = []
+        self.enc.expressionReceived = received.append
+        self.enc.dataReceived(self.io.getvalue())
+        self.assertEqual(
+            received, [[i, "spam", -i, [i * 1.5]] for i in range(3)])
+
+
+    def test_prefixWithoutTypeByte(self):
+        """
+        L{banana.Banana.dataReceived} raises L{banana.BananaError} once more
+        bytes than the prefix limit have been received with no type byte
+        among them.
+        """
+        self.enc.dataReceived(b'\x01' * self.enc.prefixLimit)
+        self.assertRaises(
+            banana.BananaError, self.enc.dataReceived, b'\x01')
+
+
+    def test_encodedInOneWrite(self):
+        """
+        L{banana.Banana.sendEncoded} writes the encoding of an object to
+        its transport all at once.
+        """
+        writes = []
+        self.enc.transport.write = writes.append
+        self.enc.sendEncoded([1, "two", [3.0, -4]])
+        self.assertEqual(len(writes), 1)
+        self.enc.dataReceived(writes[0])
+        self.assertEqual(self.result, [1, "two", [3.0, -4]])
+
+
     def test_oversizedList(self):
         data = '\x02\x01\x01\x01\x01\x80'
         # list(size=0x0101010102, about 4.3e9)
@@ -17,6 +17,10 @@ from twisted.internet import defer, reactor
 from twisted.internet.task import Clock
 from twisted.trial import unittest
 
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
 
 
 class GenericError(Exception):
@@ -2446,3 +2450,260 @@ class DeferredFilesystemLockTests(unittest.TestCase):
         self.assertFalse(timeoutCall.active())
         self.assertIsNone(self.lock._timeoutCall)
         self.failureResultOf(deferred, defer.CancelledError)
+
+
+
+if _PY3:
+    # "async def" is a syntax error on Python 2.
+    exec("""if 1:
+    async def _awaitResults(deferreds):
+        '''
+        Await C{deferreds} in turn, catching their exceptions.
+
+        @return: The list of their results, or exceptions.
+        '''
+        results = []
+        for d in deferreds:
+            try:
+                results.append(await d)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _awaitThenRaise(d):
+        '''
+        Await C{d}, then raise L{GenericError} with its result.
+        '''
+        raise GenericError(await d)
+    """)
+
+
+
+class EnsureDeferredTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{defer.ensureDeferred} and awaiting L{defer.Deferred}s.
+    """
+
+    def test_passesThroughDeferreds(self):
+        """
+        L{defer.ensureDeferred} returns the L{defer.Deferred} it is given.
+        """
+        d = defer.Deferred()
+        self.assertIs(defer.ensureDeferred(d), d)
+
+
+    def test_notACoroutine(self):
+        """
+        L{defer.ensureDeferred} raises L{ValueError} if it is given something
+        else than a coroutine, a generator or a L{defer.Deferred}.
+        """
+        self.assertRaises(ValueError, defer.ensureDeferred, "something")
+
+
+    def test_generator(self):
+        """
+        L{defer.ensureDeferred} runs a generator yielding L{defer.Deferred}s,
+        as L{defer.inlineCallbacks} does.
+        """
+        def generator(d):
+            result = yield d
+            defer.returnValue(result * 2)
+        d = defer.Deferred()
+        result = defer.ensureDeferred(generator(d))
+        self.assertNoResult(result)
+        d.callback(21)
+        self.assertEqual(self.successResultOf(result), 42)
+
+
+    def test_awaiter(self):
+        """
+        The iterator an C{await} expression on a L{defer.Deferred} delegates to
+        yields the L{defer.Deferred} once, and ends with the value sent back.
+        """
+        d = defer.Deferred()
+        awaiter = d.__await__()
+        self.assertIs(next(awaiter), d)
+        with self.assertRaises(StopIteration) as e:
+            awaiter.send(42)
+        self.assertEqual(e.exception.args, (42,))
+
+
+    def test_awaiterNone(self):
+        """
+        The iterator an C{await} expression on a L{defer.Deferred} delegates to
+        ends with L{None} when resumed with L{None}, which is sent back with
+        C{__next__}.
+        """
+        awaiter = defer.Deferred().__await__()
+        next(awaiter)
+        with self.assertRaises(StopIteration) as e:
+            next(awaiter)
+        self.assertEqual(e.exception.args, (None,))
+
+
+    def test_await(self):
+        """
+        A coroutine run by L{defer.ensureDeferred} can await
+        L{defer.Deferred}s, which evaluates to their results or raises their
+        exceptions, and its L{defer.Deferred} fires with what it returns.
+        """
+        d = defer.Deferred()
+        result = defer.ensureDeferred(_awaitResults(
+            [defer.succeed(1), d, defer.succeed(None),
+             defer.fail(GenericError())]))
+        self.assertNoResult(result)
+        d.callback(2)
+        one, two, none, error = self.successResultOf(result)
+        self.assertEqual((one, two, none), (1, 2, None))
+        self.assertIsInstance(error, GenericError)
+
+
+    def test_awaitFailure(self):
+        """
+        The L{defer.Deferred} L{defer.ensureDeferred} returns fails with the
+        exception a coroutine raises.
+        """
+        d = defer.Deferred()
+        result = defer.ensureDeferred(_awaitThenRaise(d))
+        d.callback(4)
+        self.assertEqual(
+            self.failureResultOf(result, GenericError).value.args, (4,))
+
+
+    def test_inlineCallbacksYieldingCoroutine(self):
+        """
+        A coroutine yielded by an L{defer.inlineCallbacks} generator is run,
+        and the generator resumed with its result.
+        """
+        @defer.inlineCallbacks
+        def generator(d):
+            results = yield _awaitResults([d])
+            defer.returnValue(results)
+        d = defer.Deferred()
+        result = generator(d)
+        d.callback(3)
+        self.assertEqual(self.successResultOf(result), [3])
+
+    if not _PY3:
+        test_await.skip = test_awaitFailure.skip = (
+            test_inlineCallbacksYieldingCoroutine.skip) = (
+                "Coroutines require Python 3.5 or later.")
+
+
+
+class DeferredFutureAdapterTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{defer.Deferred.asFuture} and L{defer.Deferred.fromFuture}.
+    """
+    if asyncio is None:
+        skip = "asyncio is not available."
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+
+    def runOnce(self):
+        """
+        Run one iteration of the event loop, which runs the done callbacks of
+        the futures done in the meantime.
+        """
+        self.loop.stop()
+        self.loop.run_forever()
+
+
+    def test_asFuture(self):
+        """
+        L{defer.Deferred.asFuture} returns an C{asyncio.Future} with the result
+        the L{defer.Deferred} fires with, which it then fires with L{None}.
+        """
+        d = defer.Deferred()
+        future = d.asFuture(self.loop)
+        self.assertFalse(future.done())
+        d.callback(13)
+        self.assertEqual(future.result(), 13)
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_asFutureFailure(self):
+        """
+        L{defer.Deferred.asFuture} returns an C{asyncio.Future} with the
+        exception the L{defer.Deferred} fails with.
+        """
+        d = defer.Deferred()
+        future = d.asFuture(self.loop)
+        d.errback(GenericError())
+        self.assertRaises(GenericError, future.result)
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_asFutureFired(self):
+        """
+        L{defer.Deferred.asFuture} returns an C{asyncio.Future} done already
+        if the L{defer.Deferred} has fired.
+        """
+        future = defer.succeed(13).asFuture(self.loop)
+        self.assertEqual(future.result(), 13)
+
+
+    def test_asFutureCancel(self):
+        """
+        Cancelling the C{asyncio.Future} L{defer.Deferred.asFuture} returns
+        cancels the L{defer.Deferred}.
+        """
+        cancelled = []
+        d = defer.Deferred(cancelled.append)
+        future = d.asFuture(self.loop)
+        future.cancel()
+        self.runOnce()
+        self.assertEqual(cancelled, [d])
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_fromFuture(self):
+        """
+        L{defer.Deferred.fromFuture} returns a L{defer.Deferred} firing with
+        the result of the C{asyncio.Future} once it is done.
+        """
+        future = self.loop.create_future()
+        d = defer.Deferred.fromFuture(future)
+        future.set_result(13)
+        self.assertNoResult(d)
+        self.runOnce()
+        self.assertEqual(self.successResultOf(d), 13)
+
+
+    def test_fromFutureFailure(self):
+        """
+        L{defer.Deferred.fromFuture} returns a L{defer.Deferred} failing with
+        the exception of the C{asyncio.Future}.
+        """
+        future = self.loop.create_future()
+        d = defer.Deferred.fromFuture(future)
+        future.set_exception(GenericError())
+        self.runOnce()
+        self.failureResultOf(d, GenericError)
+
+
+    def test_fromFutureDone(self):
+        """
+        L{defer.Deferred.fromFuture} returns a L{defer.Deferred} which has
+        fired already if the C{asyncio.Future} is done.
+        """
+        future = self.loop.create_future()
+        future.set_result(13)
+        self.assertEqual(
+            self.successResultOf(defer.Deferred.fromFuture(future)), 13)
+
+
+    def test_fromFutureCancel(self):
+        """
+        Cancelling the L{defer.Deferred} L{defer.Deferred.fromFuture} returns
+        cancels the C{asyncio.Future}.
+        """
+        future = self.loop.create_future()
+        d = defer.Deferred.fromFuture(future)
+        d.cancel()
+        self.assertTrue(future.cancelled())
+        self.runOnce()
+        self.failureResultOf(d, defer.CancelledError)
@@ -295,6 +295,94 @@ class LogTests(unittest.SynchronousTestCase):
 
 
 
+class LazyLoggerContextTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{log._LazyLoggerContext} and L{log._callWithLazyLogger}.
+    """
+    def setUp(self):
+        self.catcher = []
+        log.addObserver(self.catcher.append)
+        self.addCleanup(log.removeObserver, self.catcher.append)
+        self.prefixes = []
+
+
+    def logPrefix(self):
+        self.prefixes.append(None)
+        return "lazy"
+
+
+    def test_system(self):
+        """
+        Events logged while the C{logger} of the lazy context is set have its
+        C{logPrefix} as their C{system}.
+        """
+        def logged(lazyContext):
+            lazyContext.logger = self
+            log.msg("foo")
+        log._callWithLazyLogger(logged)
+        [event] = self.catcher
+        self.assertEqual(event["system"], "lazy")
+
+
+    def test_notLogged(self):
+        """
+        C{logPrefix} is not called if nothing is logged.
+        """
+        def notLogged(lazyContext):
+            lazyContext.logger = self
+        log._callWithLazyLogger(notLogged)
+        self.assertEqual(self.prefixes, [])
+
+
+    def test_enclosingContext(self):
+        """
+        The lazy context inherits the enclosing log context, including its
+        C{system} while it has no C{logger}.
+        """
+        def logged(lazyContext):
+            log.msg("foo")
+            lazyContext.logger = self
+            log.msg("bar")
+        log.callWithContext(
+            {"system": "outer", "other": "value"},
+            log._callWithLazyLogger, logged)
+        self.assertEqual(
+            [(e["system"], e["other"]) for e in self.catcher],
+            [("outer", "value"), ("lazy", "value")])
+
+
+    def test_getSystem(self):
+        """
+        Looking up the C{system} of the lazy context gets the C{logPrefix} of
+        its C{logger}.
+        """
+        lazyContext = log._LazyLoggerContext({"system": "outer"})
+        self.assertEqual(lazyContext.get("system"), "outer")
+        lazyContext.logger = self
+        self.assertEqual(lazyContext["system"], "lazy")
+        self.assertEqual(lazyContext.get("system"), "lazy")
+
+
+    def test_buggyLogPrefix(self):
+        """
+        If C{logPrefix} raises an exception, the exception is logged and
+        events get C{'(buggy logPrefix method)'} as their C{system}.
+        """
+        class Buggy(object):
+            def logPrefix(self):
+                1 // 0
+
+        def logged(lazyContext):
+            lazyContext.logger = Buggy()
+            log.msg("foo")
+        log._callWithLazyLogger(logged)
+        self.assertEqual(len(self.flushLoggedErrors(ZeroDivisionError)), 1)
+        self.assertEqual(
+            [e["system"] for e in self.catcher],
+            ["(buggy logPrefix method)", "(buggy logPrefix method)"])
+
+
+
 class FakeFile(list):
 
     def write(self, bytes):
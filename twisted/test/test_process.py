@@ -1173,6 +1173,8 @@ class PosixProcessBase(object):
             raise RuntimeError("Ouch")
         oldexecvpe = os.execvpe
         os.execvpe = buggyexecvpe
+        # posix_spawn would not call execvpe.
+        self.patch(process.Process, "_usePosixSpawn", False)
         try:
             reactor.spawnProcess(p, cmd, [b'false'], env=None,
                                  usePTY=self.usePTY)
@@ -2141,6 +2143,156 @@ class MockProcessTests(unittest.TestCase):
 
 
 
+class WaitidOS(object):
+    """
+    Fake of the C{os} module reporting exited children through C{waitid}.
+
+    @ivar exited: The pids of the exited children, in the order C{waitid}
+        reports them.
+    @ivar children: Whether there is any child process at all.
+    @ivar calls: The number of calls to C{waitid}.
+    """
+    P_ALL = 0
+    WEXITED = 4
+    WNOHANG = 1
+    WNOWAIT = 0x1000000
+
+    def __init__(self):
+        self.exited = []
+        self.children = True
+        self.calls = 0
+
+
+    def waitid(self, idtype, id, options):
+        """
+        Report the first exited child without reaping it.
+        """
+        self.calls += 1
+        if idtype != self.P_ALL or not options & self.WNOWAIT:
+            raise AssertionError("Unexpected waitid call")
+        if not self.children:
+            raise OSError(errno.ECHILD, "No child processes")
+        if not self.exited:
+            return None
+        return FakeWaitidResult(self.exited[0])
+
+
+
+class FakeWaitidResult(object):
+    """
+    Fake of the result of C{waitid}.
+    """
+    def __init__(self, pid):
+        self.si_pid = pid
+
+
+
+class ReapedProcess(object):
+    """
+    Fake process handler, reaped by L{process.reapAllProcesses}.
+
+    @ivar reaped: The number of calls to C{reapProcess}.
+    @ivar exited: Whether the process has exited.
+    """
+    def __init__(self, fakeOS, pid, exited=False):
+        self.fakeOS = fakeOS
+        self.pid = pid
+        self.exited = exited
+        self.reaped = 0
+
+
+    def reapProcess(self):
+        self.reaped += 1
+        if self.exited:
+            self.fakeOS.exited.remove(self.pid)
+            del process.reapProcessHandlers[self.pid]
+
+
+
+class ReapAllProcessesTests(unittest.TestCase):
+    """
+    Tests for L{process.reapAllProcesses}.
+    """
+    if process is None:
+        skip = "twisted.internet.process is never used on Windows"
+
+    def setUp(self):
+        self.fakeOS = WaitidOS()
+        self.patch(process, "os", self.fakeOS)
+        self.patch(process, "reapProcessHandlers", {})
+
+
+    def register(self, pid, exited=False):
+        """
+        Register a L{ReapedProcess}.
+
+        @return: The registered L{ReapedProcess}.
+        """
+        handler = ReapedProcess(self.fakeOS, pid, exited)
+        process.reapProcessHandlers[pid] = handler
+        if exited:
+            self.fakeOS.exited.append(pid)
+        return handler
+
+
+    def test_onlyExited(self):
+        """
+        Only the registered processes which have exited are reaped.
+        """
+        handlers = [self.register(pid) for pid in range(100, 200)]
+        exited = [self.register(201, True), self.register(202, True)]
+        process.reapAllProcesses()
+        self.assertEqual([handler.reaped for handler in exited], [1, 1])
+        self.assertEqual(sum(handler.reaped for handler in handlers), 0)
+        self.assertEqual(self.fakeOS.calls, 3)
+
+
+    def test_noChildren(self):
+        """
+        No process is reaped when C{waitid} reports that there is no child.
+        """
+        handler = self.register(100)
+        self.fakeOS.children = False
+        process.reapAllProcesses()
+        self.assertEqual(handler.reaped, 0)
+
+
+    def test_unregisteredChild(self):
+        """
+        When an exited child is not registered, it is left alone and every
+        registered process is tried instead.
+        """
+        self.fakeOS.exited.append(99)
+        handlers = [self.register(100), self.register(101, True)]
+        process.reapAllProcesses()
+        self.assertEqual([handler.reaped for handler in handlers], [1, 1])
+        self.assertEqual(self.fakeOS.exited, [99])
+
+
+    def test_notReaped(self):
+        """
+        When a process reported as exited stays registered after a call to its
+        C{reapProcess}, every registered process is tried instead of asking
+        C{waitid} about it again.
+        """
+        handlers = [self.register(100, True), self.register(101)]
+        handlers[0].exited = False
+        process.reapAllProcesses()
+        self.assertEqual([handler.reaped for handler in handlers], [2, 1])
+        self.assertEqual(self.fakeOS.calls, 1)
+
+
+    def test_withoutWaitid(self):
+        """
+        Without C{waitid}, every registered process is tried.
+        """
+        self.patch(process, "os", object())
+        handlers = [self.register(100), self.register(101)]
+        process.reapAllProcesses()
+        self.assertEqual([handler.reaped for handler in handlers], [1, 1])
+
+
+
 class PosixProcessTests(unittest.TestCase, PosixProcessBase):
     # add two non-pty test cases
 
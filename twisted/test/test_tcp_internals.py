@@ -7,7 +7,7 @@ Whitebox tests for TCP APIs.
 
 from __future__ import division, absolute_import
 
-import errno, socket, os
+import errno, socket, os, struct
 
 try:
     import resource
@@ -18,10 +18,12 @@ from twisted.trial.unittest import TestCase
 
 from twisted.python import log
 from twisted.internet.tcp import ECONNABORTED, ENOMEM, ENFILE, EMFILE, ENOBUFS, EINPROGRESS, Port
-from twisted.internet.protocol import ServerFactory
+from twisted.internet.protocol import Protocol, ServerFactory
 from twisted.python.runtime import platform
+from twisted.python import _accept4
 from twisted.internet.defer import maybeDeferred, gatherResults
-from twisted.internet import reactor, interfaces
+from twisted.internet import reactor, interfaces, tcp
+from twisted.test.proto_helpers import MemoryReactorClock
 
 
 class PlatformAssumptionsTests(TestCase):
@@ -249,3 +251,274 @@ if not interfaces.IReactorFDSet.providedBy(reactor):
     PlatformAssumptionsTests.skip = skipMsg
     SelectReactorTests.skip = skipMsg
 
+
+
+
+class AcceptSchedulingTests(TestCase):
+    """
+    Tests for the scheduling of the connections accepted by L{Port}.
+    """
+
+    def setUp(self):
+        self.reactor = MemoryReactorClock()
+        self.protocols = []
+        self.factory = ServerFactory()
+        self.factory.buildProtocol = self.buildProtocol
+        self.port = Port(0, self.factory, interface='127.0.0.1',
+                         reactor=self.reactor)
+        self.port.startListening()
+        self.addCleanup(self.stopListening)
+        self.messages = []
+        log.addObserver(self.messages.append)
+        self.addCleanup(log.removeObserver, self.messages.append)
+
+
+    def buildProtocol(self, addr):
+        protocol = Protocol()
+        self.protocols.append(protocol)
+        return protocol
+
+
+    def stopListening(self):
+        """
+        Stop the port and close the connections it accepted.
+        """
+        self.port.stopListening()
+        self.reactor.advance(0)
+        for protocol in self.protocols:
+            protocol.transport.socket.close()
+
+
+    def connect(self, count):
+        """
+        Connect to the port.
+
+        @param count: The number of connections to make.
+
+        @return: The client sockets.
+        """
+        address = self.port.getHost()
+        clients = []
+        for i in range(count):
+            client = socket.socket()
+            self.addCleanup(client.close)
+            client.connect((address.host, address.port))
+            clients.append(client)
+        return clients
+
+
+    def iterate(self):
+        """
+        Run the calls scheduled for the next reactor iteration, but not
+        those they schedule in turn, as a reactor would.
+        """
+        calls, self.reactor.calls = self.reactor.calls, []
+        for call in calls:
+            call.func(*call.args, **call.kw)
+
+
+    def loggedMessages(self):
+        """
+        @return: The messages logged.
+        """
+        return [' '.join(event['message']) for event in self.messages]
+
+
+    def test_buildsSpreadAcrossIterations(self):
+        """
+        L{Port.doRead} builds protocols for up to C{maxBuildsPerIteration}
+        connections and builds those for the other connections accepted in
+        the next reactor iterations.
+        """
+        self.port.maxBuildsPerIteration = 2
+        self.connect(5)
+        self.port.doRead()
+        self.assertEqual(len(self.protocols), 2)
+        self.assertEqual(len(self.port._pendingConnections), 3)
+        self.iterate()
+        self.assertEqual(len(self.protocols), 4)
+        self.iterate()
+        self.assertEqual(len(self.protocols), 5)
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_maxAccepts(self):
+        """
+        L{Port.doRead} accepts at most C{maxAccepts} connections.
+        """
+        self.port.numberAccepts = self.port.maxAccepts = 2
+        self.connect(3)
+        self.port.doRead()
+        self.assertEqual(len(self.protocols), 2)
+        self.assertEqual(self.port.numberAccepts, 2)
+        self.port.doRead()
+        self.assertEqual(len(self.protocols), 3)
+
+
+    def test_shedConnection(self):
+        """
+        The connections accepted while C{maxPendingConnections} connections
+        are waiting to be built are passed to L{Port.shedConnection}, and
+        the port logs when it starts and stops shedding them.
+        """
+        shed = []
+        self.port.shedConnection = lambda skt, addr: shed.append(skt)
+        self.port.maxBuildsPerIteration = 1
+        self.port.maxPendingConnections = 2
+        clients = self.connect(4)
+        self.port.doRead()
+        self.assertEqual(len(shed), 2)
+        for skt in shed:
+            skt.close()
+        self.assertEqual(len(self.protocols), 1)
+        self.assertEqual(len(self.port._pendingConnections), 1)
+        self.iterate()
+        self.assertEqual(len(self.protocols), 2)
+        self.assertEqual(
+            [protocol.transport.getPeer().port
+             for protocol in self.protocols],
+            [client.getsockname()[1] for client in clients[:2]])
+        messages = self.loggedMessages()
+        prefix = self.port._getLogPrefix(self.factory)
+        self.assertIn(
+            "%s is saturated, shedding new connections" % (prefix,),
+            messages)
+        self.assertIn(
+            "%s stopped shedding new connections, 2 were shed" % (prefix,),
+            messages)
+
+
+    def test_shedConnectionResets(self):
+        """
+        L{Port.shedConnection} resets the connection.
+        """
+        self.port.maxPendingConnections = 0
+        [client] = self.connect(1)
+        self.port.doRead()
+        self.assertEqual(self.protocols, [])
+        exc = self.assertRaises(socket.error, client.recv, 1)
+        self.assertEqual(exc.args[0], errno.ECONNRESET)
+
+
+    def test_pendingConnectionsClosed(self):
+        """
+        The connections still waiting to be built when the port stops
+        listening are closed.
+        """
+        self.port.maxBuildsPerIteration = 1
+        clients = self.connect(2)
+        self.port.doRead()
+        self.port.stopListening()
+        self.reactor.advance(0)
+        self.assertEqual(len(self.protocols), 1)
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+        self.assertEqual(clients[1].recv(1), b"")
+
+
+    def test_accept4(self):
+        """
+        L{Port} accepts connections with L{_accept4.accept} where it is
+        available.
+        """
+        accepted = []
+        def accept(skt):
+            result = _accept4.accept(skt)
+            accepted.append(result)
+            return result
+        self.patch(tcp, "_accept4", accept)
+        self.connect(1)
+        self.port.doRead()
+        [(skt, addr)] = accepted
+        self.assertIs(self.protocols[0].transport.socket, skt)
+    if _accept4.accept is None:
+        test_accept4.skip = "accept4 is not available."
+
+
+
+class Accept4Tests(TestCase):
+    """
+    Tests for L{_accept4.accept}.
+    """
+    if _accept4.accept is None:
+        skip = "accept4 is not available."
+
+    def assertAccepts(self, family, host):
+        """
+        Check that L{_accept4.accept} accepts a connection as a non-blocking
+        socket which is closed on exec, and returns the address of the peer
+        as L{socket.socket.accept} would.
+        """
+        port = socket.socket(family)
+        self.addCleanup(port.close)
+        port.bind((host, 0))
+        port.listen(1)
+        client = socket.socket(family)
+        self.addCleanup(client.close)
+        client.connect(port.getsockname())
+        skt, addr = _accept4.accept(port)
+        self.addCleanup(skt.close)
+        self.assertEqual(addr, skt.getpeername())
+        self.assertEqual(addr, client.getsockname())
+        self.assertEqual(skt.gettimeout(), 0)
+        self.assertEqual(skt.family, family)
+        self.assertEqual(skt.type, socket.SOCK_STREAM)
+        self.assertFalse(os.get_blocking(skt.fileno()))
+        self.assertFalse(skt.get_inheritable())
+
+
+    def test_ipv4(self):
+        """
+        L{_accept4.accept} accepts IPv4 connections.
+        """
+        self.assertAccepts(socket.AF_INET, "127.0.0.1")
+
+
+    def test_ipv6(self):
+        """
+        L{_accept4.accept} accepts IPv6 connections.
+        """
+        self.assertAccepts(socket.AF_INET6, "::1")
+    if not socket.has_ipv6:
+        test_ipv6.skip = "Platform does not support IPv6"
+
+
+    def test_ipv6Scoped(self):
+        """
+        L{_accept4.accept} gives the zone of a scoped IPv6 address, as
+        L{socket.socket.accept} does.
+        """
+        data = (
+            struct.pack("=H", socket.AF_INET6) + struct.pack("!HI", 1234, 0) +
+            socket.inet_pton(socket.AF_INET6, "fe80::1") +
+            struct.pack("=I", 1))
+        host, port, flowInfo, scopeID = _accept4._decodeAddress(
+            socket.AF_INET6, data)
+        self.assertEqual(
+            host, socket.getnameinfo(
+                ("fe80::1", 1234, 0, 1), socket.NI_NUMERICHOST)[0])
+        self.assertEqual((port, flowInfo, scopeID), (1234, 0, 1))
+    if not socket.has_ipv6:
+        test_ipv6Scoped.skip = "Platform does not support IPv6"
+
+
+    def test_withoutAccept4(self):
+        """
+        If the C library has no accept4 function, L{_accept4.accept} accepts
+        connections as non-blocking sockets with L{socket.socket.accept}.
+        """
+        self.patch(_accept4, "_accept4", None)
+        self.assertAccepts(socket.AF_INET, "127.0.0.1")
+
+
+    def test_error(self):
+        """
+        L{_accept4.accept} raises L{socket.error} with the error number
+        accept4 failed with.
+        """
+        port = socket.socket()
+        self.addCleanup(port.close)
+        port.bind(("127.0.0.1", 0))
+        port.listen(1)
+        port.setblocking(False)
+        exc = self.assertRaises(socket.error, _accept4.accept, port)
+        self.assertIn(exc.args[0], (errno.EAGAIN, errno.EWOULDBLOCK))
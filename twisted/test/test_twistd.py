@@ -316,9 +316,46 @@ class ServerOptionsTests(unittest.TestCase):
         self.assertRaises(UsageError, config.parseOptions,
                           ['--umask', 'abcdef'])
 
+
+    def test_workers(self):
+        """
+        The C{workers} option is parsed as an integer and defaults to C{0}.
+        """
+        config = twistd.ServerOptions()
+        self.assertEqual(config['workers'], 0)
+        config.parseOptions(['--workers', '4'])
+        self.assertEqual(config['workers'], 4)
+
+
+    def test_negativeWorkers(self):
+        """
+        A negative number of workers is rejected with a L{UsageError}.
+        """
+        config = twistd.ServerOptions()
+        self.assertRaises(UsageError, config.parseOptions,
+                          ['--workers', '-1'])
+
+
+    def test_workerOptions(self):
+        """
+        When the C{TWISTD_WORKER} environment variable is set, the process is
+        a worker: it runs in the foreground, without a PID file and logging to
+        its standard output, and starts no worker itself.
+        """
+        self.patch(os, "environ", dict(os.environ, TWISTD_WORKER="2"))
+        config = twistd.ServerOptions()
+        config.parseOptions(['--workers', '4', '--pidfile', 'foo.pid',
+                             '--logfile', 'foo.log'])
+        self.assertEqual(config['workers'], 0)
+        self.assertTrue(config['nodaemon'])
+        self.assertEqual(config['pidfile'], '')
+        self.assertEqual(config['logfile'], '-')
+
     if _twistd_unix is None:
         msg = "twistd unix not available"
         test_defaultUmask.skip = test_umask.skip = test_invalidUmask.skip = msg
+        test_workers.skip = test_negativeWorkers.skip = msg
+        test_workerOptions.skip = msg
 
 
     def test_unimportableConfiguredLogObserver(self):
@@ -792,6 +829,150 @@ class UnixApplicationRunnerStartApplicationTests(unittest.TestCase):
 
 
 
+class UnixApplicationRunnerStartWorkersTests(unittest.TestCase):
+    """
+    Tests for L{UnixApplicationRunner.startWorkers}.
+    """
+    if _twistd_unix is None:
+        skip = "twistd unix not available"
+
+    def setUp(self):
+        options = twistd.ServerOptions()
+        options.parseOptions([
+            '--workers', '2',
+            '--umask', '0070',
+            '--chroot', '/foo/chroot',
+            '--rundir', '/foo/rundir',
+            '--pidfile', '/foo/pidfile'])
+        self.runner = UnixApplicationRunner(options)
+
+
+    def test_postApplication(self):
+        """
+        L{UnixApplicationRunner.postApplication} starts the workers rather
+        than the application when the C{workers} option is set.
+        """
+        started = []
+        self.patch(self.runner, 'startWorkers', started.append)
+        self.patch(self.runner, 'startApplication', started.append)
+        self.patch(self.runner, 'startReactor', lambda *a: None)
+        self.patch(self.runner, 'removePID', lambda pidfile: None)
+        self.runner.oldstdout = self.runner.oldstderr = None
+        self.runner.application = service.Application("test_postApplication")
+        self.runner.postApplication()
+        self.assertEqual(started, [2])
+
+
+    def test_startWorkers(self):
+        """
+        L{UnixApplicationRunner.startWorkers} sets up the environment of this
+        process, without changing its root directory, and starts an
+        application monitoring one process per worker, each running twistd
+        with the worker number in C{TWISTD_WORKER}.
+        """
+        args = []
+        def fakeSetupEnvironment(chroot, rundir, nodaemon, umask, pidfile):
+            args.extend((chroot, rundir, nodaemon, umask, pidfile))
+        self.patch(self.runner, 'setupEnvironment', fakeSetupEnvironment)
+        started = []
+        self.patch(app, 'startApplication',
+                   lambda application, save: started.append(
+                       (application, save)))
+        self.patch(self.runner, '_workerArguments',
+                   lambda: ['twistd', '-y', 'app.tac'])
+        self.patch(self.runner, 'shedPrivileges', lambda *args: None)
+        self.runner.application = service.Application("test_startWorkers")
+
+        self.runner.startWorkers(2)
+
+        self.assertEqual(args, [None, '/foo/rundir', False, 56, '/foo/pidfile'])
+        [(application, save)] = started
+        self.assertFalse(save)
+        [monitor] = list(service.IServiceCollection(application))
+        self.assertEqual(sorted(monitor.processes), ['worker-1', 'worker-2'])
+        for number in [1, 2]:
+            arguments, uid, gid, env = monitor.processes[
+                'worker-%d' % (number,)]
+            self.assertEqual(arguments, ['twistd', '-y', 'app.tac'])
+            self.assertEqual(env['TWISTD_WORKER'], str(number))
+            self.assertEqual(env.get('PATH'), os.environ.get('PATH'))
+
+
+    def test_startWorkersRelativeRundir(self):
+        """
+        L{UnixApplicationRunner.startWorkers} gives the workers, which start
+        in the run directory, the relative paths of its arguments as absolute
+        paths, so that a relative run directory is not applied twice.
+        """
+        base = os.path.abspath(self.mktemp())
+        os.makedirs(os.path.join(base, 'run'))
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(base)
+        argv = ['twistd', '--workers', '2', '--rundir', 'run',
+                '--logfile', 'twistd.log', '-y', 'app.tac']
+        self.patch(sys, 'argv', argv)
+        options = twistd.ServerOptions()
+        options.parseOptions(argv[1:])
+        runner = UnixApplicationRunner(options)
+        runner.application = service.Application("test_startWorkers")
+        self.patch(runner, 'setupEnvironment',
+                   lambda chroot, rundir, nodaemon, umask, pidfile:
+                       os.chdir(rundir))
+        self.patch(runner, 'shedPrivileges', lambda *args: None)
+        started = []
+        self.patch(app, 'startApplication',
+                   lambda application, save: started.append(application))
+
+        runner.startWorkers(2)
+
+        self.assertEqual(os.getcwd(), os.path.join(base, 'run'))
+        [monitor] = list(service.IServiceCollection(started[0]))
+        arguments = monitor.processes['worker-1'][0]
+        self.assertEqual(
+            arguments[-3:],
+            ['--rundir=' + os.path.join(base, 'run'),
+             '--python=' + os.path.join(base, 'app.tac'),
+             '--logfile=' + os.path.join(base, 'twistd.log')])
+
+
+    def test_startWorkersShedsPrivileges(self):
+        """
+        L{UnixApplicationRunner.startWorkers} sheds the privileges of this
+        process once the workers are started, like
+        L{UnixApplicationRunner.startApplication}.
+        """
+        options = twistd.ServerOptions()
+        options.parseOptions(['--workers', '2', '--uid', '1000',
+                              '--gid', '1001'])
+        runner = UnixApplicationRunner(options)
+        runner.application = service.Application("test_startWorkers")
+        events = []
+        self.patch(runner, 'setupEnvironment', lambda *args: None)
+        self.patch(runner, '_workerArguments', lambda: ['twistd'])
+        self.patch(app, 'startApplication',
+                   lambda application, save: events.append('started'))
+        self.patch(runner, 'shedPrivileges',
+                   lambda euid, uid, gid: events.append((euid, uid, gid)))
+
+        runner.startWorkers(2)
+
+        self.assertEqual(events, ['started', (False, 1000, 1001)])
+
+
+    def test_workerArguments(self):
+        """
+        The workers run twistd with the arguments of this process.
+        """
+        argv = ['twistd', '--workers', '2', '-y', '/foo/app.tac']
+        self.patch(sys, 'argv', argv)
+        options = twistd.ServerOptions()
+        options.parseOptions(argv[1:])
+        arguments = UnixApplicationRunner(options)._workerArguments()
+        self.assertEqual(arguments[0], sys.executable)
+        self.assertEqual(arguments[-4:], argv[1:])
+
+
+
 class UnixApplicationRunnerRemovePIDTests(unittest.TestCase):
     """
     Tests for L{UnixApplicationRunner.removePID}.
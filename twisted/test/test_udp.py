@@ -8,12 +8,17 @@ Tests for implementations of L{IReactorUDP} and L{IReactorMulticast}.
 
 from __future__ import division, absolute_import
 
+import errno
+import socket
+import struct
+import threading
+
 from twisted.trial import unittest
 
 from twisted.python.compat import intToBytes
 from twisted.internet.defer import Deferred, gatherResults, maybeDeferred
 from twisted.internet import protocol, reactor, error, defer, interfaces, udp
-from twisted.python import runtime
+from twisted.python import runtime, _mmsg
 
 
 class Mixin:
@@ -451,6 +456,457 @@ class UDPTests(unittest.TestCase):
 
 
 
+class FakeDatagramSocket(object):
+    """
+    A fake datagram socket, for L{udp.Port} to read datagrams from and write
+    datagrams to.
+
+    @ivar incoming: The C{(datagram, addr)} tuples left to be read, or
+        exceptions to raise instead.
+    @ivar sent: The C{(datagram, addr)} tuples written, with C{addr} L{None}
+        for the datagrams sent to the connected address.
+    """
+    def __init__(self, incoming=()):
+        self.incoming = list(incoming)
+        self.sent = []
+
+
+    def recvfrom(self, size):
+        if not self.incoming:
+            raise socket.error(udp.EAGAIN, "Resource temporarily unavailable")
+        result = self.incoming.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+    def send(self, datagram):
+        self.sent.append((datagram, None))
+        return len(datagram)
+
+
+    def sendto(self, datagram, addr):
+        self.sent.append((datagram, addr))
+        return len(datagram)
+
+
+
+class BatchingServer(Server):
+    """
+    A L{Server} recording the batches of datagrams given to
+    C{datagramsReceived}.
+    """
+    def __init__(self):
+        Server.__init__(self)
+        self.batches = []
+        self.refused = []
+
+
+    def datagramsReceived(self, datagrams):
+        self.batches.append(datagrams)
+
+
+    def connectionRefused(self):
+        self.refused.append(len(self.batches))
+
+
+
+class BatchedDatagramTests(unittest.TestCase):
+    """
+    Tests for the delivery of the datagrams read by L{udp.Port} in batches,
+    and for L{udp.Port.writeDatagrams}.
+    """
+    datagrams = [(b"one", ("127.0.0.1", 1000)),
+                 (b"two", ("127.0.0.2", 2000)),
+                 (b"three", ("127.0.0.1", 1000))]
+
+    def port(self, protocol, incoming=()):
+        """
+        Make a L{udp.Port} using a L{FakeDatagramSocket}.
+        """
+        port = udp.Port(0, protocol)
+        port.socket = FakeDatagramSocket(incoming)
+        return port
+
+
+    def test_datagramsReceived(self):
+        """
+        L{udp.Port.doRead} gives all the datagrams it reads to the
+        C{datagramsReceived} method of its protocol at once.
+        """
+        server = BatchingServer()
+        self.port(server, self.datagrams).doRead()
+        self.assertEqual(server.batches, [self.datagrams])
+        self.assertEqual(server.packets, [])
+
+
+    def test_maxThroughput(self):
+        """
+        L{udp.Port.doRead} stops reading once it has read C{maxThroughput}
+        bytes.
+        """
+        server = BatchingServer()
+        port = self.port(server, self.datagrams)
+        port.maxThroughput = 6
+        port.doRead()
+        port.doRead()
+        self.assertEqual(
+            server.batches, [self.datagrams[:2], self.datagrams[2:]])
+
+
+    def test_datagramReceived(self):
+        """
+        L{udp.Port.doRead} calls C{datagramReceived} for each datagram if its
+        protocol does not override C{datagramsReceived}, logging the
+        exceptions it raises.
+        """
+        received = []
+        class FailingServer(protocol.DatagramProtocol):
+            def datagramReceived(self, datagram, addr):
+                received.append((datagram, addr))
+                raise BadClientError()
+
+        self.port(FailingServer(), self.datagrams).doRead()
+        self.assertEqual(received, self.datagrams)
+        self.assertEqual(len(self.flushLoggedErrors(BadClientError)), 3)
+
+
+    def test_defaultDatagramsReceived(self):
+        """
+        L{protocol.DatagramProtocol.datagramsReceived} calls
+        C{datagramReceived} for each datagram, logging the exceptions it
+        raises.
+        """
+        received = []
+        class FailingServer(protocol.DatagramProtocol):
+            def datagramReceived(self, datagram, addr):
+                received.append((datagram, addr))
+                raise BadClientError()
+
+        FailingServer().datagramsReceived(self.datagrams)
+        self.assertEqual(received, self.datagrams)
+        self.assertEqual(len(self.flushLoggedErrors(BadClientError)), 3)
+
+
+    def test_datagramReceivedOnly(self):
+        """
+        L{udp.Port.doRead} calls C{datagramReceived} for each datagram if its
+        protocol has no C{datagramsReceived} method.
+        """
+        received = []
+        class MinimalServer(object):
+            def datagramReceived(self, datagram, addr):
+                received.append((datagram, addr))
+
+        self.port(MinimalServer(), self.datagrams).doRead()
+        self.assertEqual(received, self.datagrams)
+
+
+    def test_refusedAfterDelivery(self):
+        """
+        When reading fails because a previous write was refused, the
+        datagrams read before are delivered before C{connectionRefused} is
+        called.
+        """
+        server = BatchingServer()
+        refused = socket.error(udp.ECONNREFUSED, "Connection refused")
+        port = self.port(server, self.datagrams[:1] + [refused])
+        port._connectedAddr = ("127.0.0.1", 1000)
+        port.doRead()
+        self.assertEqual(server.batches, [self.datagrams[:1]])
+        self.assertEqual(server.refused, [1])
+
+
+    def test_errorAfterDelivery(self):
+        """
+        When reading fails with an unexpected error, the datagrams read
+        before are delivered and the error is raised.
+        """
+        server = BatchingServer()
+        failure = socket.error(errno.EBADF, "Bad file descriptor")
+        port = self.port(server, self.datagrams[:1] + [failure])
+        self.assertRaises(socket.error, port.doRead)
+        self.assertEqual(server.batches, [self.datagrams[:1]])
+
+
+    def test_writeDatagrams(self):
+        """
+        L{udp.Port.writeDatagrams} sends each datagram to its address, in
+        order.
+        """
+        port = self.port(Server())
+        port.writeDatagrams(iter(self.datagrams))
+        self.assertEqual(port.socket.sent, self.datagrams)
+
+
+    def test_writeDatagramsInvalidAddress(self):
+        """
+        L{udp.Port.writeDatagrams} raises L{error.InvalidAddressError} and
+        sends nothing if one of the addresses is invalid.
+        """
+        port = self.port(Server())
+        self.assertRaises(
+            error.InvalidAddressError, port.writeDatagrams,
+            self.datagrams + [(b"four", ("example.com", 4000))])
+        self.assertEqual(port.socket.sent, [])
+
+
+    def test_writeDatagramsConnected(self):
+        """
+        L{udp.Port.writeDatagrams} sends the datagrams to the connected
+        address of a connected port.
+        """
+        port = self.port(Server())
+        port._connectedAddr = ("127.0.0.1", 1000)
+        port.writeDatagrams([(b"one", None), (b"two", ("127.0.0.1", 1000))])
+        self.assertEqual(port.socket.sent, [(b"one", None), (b"two", None)])
+
+
+
+class MultipleMessagesTests(unittest.TestCase):
+    """
+    Tests for L{_mmsg.recvmmsg} and L{_mmsg.sendmmsg}, and for their use by
+    L{udp.Port}.
+    """
+    if _mmsg.recvmmsg is None:
+        skip = "recvmmsg and sendmmsg are only used on Linux."
+
+    def socket(self):
+        """
+        Create a non-blocking datagram socket bound to an IPv4 loopback port.
+
+        @rtype: L{socket.socket}
+        """
+        skt = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(skt.close)
+        skt.bind(("127.0.0.1", 0))
+        skt.setblocking(False)
+        return skt
+
+
+    def receiveAll(self, skt):
+        """
+        Read the datagrams waiting on a socket with L{socket.socket.recvfrom}.
+
+        @return: The C{(datagram, addr)} tuples read.
+        """
+        received = []
+        while True:
+            try:
+                received.append(skt.recvfrom(100))
+            except socket.error:
+                return received
+
+
+    def test_recvmmsg(self):
+        """
+        L{_mmsg.recvmmsg} reads all the datagrams waiting, with the addresses
+        of their senders, truncating those longer than the size given.
+        """
+        sender, receiver = self.socket(), self.socket()
+        for datagram in [b"one", b"two", b"three"]:
+            sender.sendto(datagram, receiver.getsockname())
+        self.assertEqual(
+            _mmsg.recvmmsg(receiver, 4),
+            ([(b"one", sender.getsockname()),
+              (b"two", sender.getsockname()),
+              (b"thre", sender.getsockname())], True))
+
+
+    def test_recvmmsgFull(self):
+        """
+        L{_mmsg.recvmmsg} reads as many datagrams as fit in its buffers, and
+        does not tell whether more are waiting then.
+        """
+        self.patch(_mmsg, "_RECEIVE_SIZE", 8)
+        self.patch(_mmsg, "_receiveBuffers", threading.local())
+        sender, receiver = self.socket(), self.socket()
+        for datagram in [b"one", b"two", b"three"]:
+            sender.sendto(datagram, receiver.getsockname())
+        self.assertEqual(
+            _mmsg.recvmmsg(receiver, 5),
+            ([(b"one", sender.getsockname())], False))
+        self.assertEqual(
+            _mmsg.recvmmsg(receiver, 4),
+            ([(b"two", sender.getsockname()),
+              (b"thre", sender.getsockname())], False))
+        self.assertRaises(socket.error, _mmsg.recvmmsg, receiver, 4)
+
+
+    def test_recvmmsgNothing(self):
+        """
+        L{_mmsg.recvmmsg} raises L{socket.error} with C{EAGAIN} when no
+        datagram is waiting.
+        """
+        exc = self.assertRaises(socket.error, _mmsg.recvmmsg, self.socket(), 4)
+        self.assertEqual(exc.args[0], errno.EAGAIN)
+
+
+    def test_sendmmsg(self):
+        """
+        L{_mmsg.sendmmsg} sends the datagrams from the index given, each to
+        its own address or to the connected address, and returns how many
+        it sent.
+        """
+        sender, first, second = self.socket(), self.socket(), self.socket()
+        datagrams = [(b"skipped", first.getsockname()),
+                     (b"one", first.getsockname()),
+                     (b"two", second.getsockname()),
+                     (b"three", first.getsockname())]
+        self.assertEqual(_mmsg.sendmmsg(sender, datagrams, 1), 3)
+        self.assertEqual(
+            self.receiveAll(first),
+            [(b"one", sender.getsockname()), (b"three", sender.getsockname())])
+        self.assertEqual(
+            self.receiveAll(second), [(b"two", sender.getsockname())])
+
+        sender.connect(second.getsockname())
+        self.assertEqual(_mmsg.sendmmsg(sender, [(b"four", None)]), 1)
+        self.assertEqual(
+            self.receiveAll(second), [(b"four", sender.getsockname())])
+
+
+    def test_sendmmsgUnencoded(self):
+        """
+        L{_mmsg.sendmmsg} stops before a datagram whose address it cannot
+        encode, and sends that one with L{socket.socket.sendto}.
+        """
+        sender, receiver = self.socket(), self.socket()
+        port = receiver.getsockname()[1]
+        datagrams = [(b"one", ("127.0.0.1", port)),
+                     (b"two", ("localhost", port))]
+        self.assertEqual(_mmsg.sendmmsg(sender, datagrams), 1)
+        self.assertEqual(_mmsg.sendmmsg(sender, datagrams, 1), 1)
+        self.assertEqual(
+            [datagram for datagram, addr in self.receiveAll(receiver)],
+            [b"one", b"two"])
+
+
+    def test_withoutFunctions(self):
+        """
+        If the C library lacks recvmmsg and sendmmsg, L{_mmsg.recvmmsg} and
+        L{_mmsg.sendmmsg} read and write one datagram at a time.
+        """
+        self.patch(_mmsg, "_recvmmsgFunction", None)
+        self.patch(_mmsg, "_sendmmsgFunction", None)
+        sender, receiver = self.socket(), self.socket()
+        datagrams = [(b"one", receiver.getsockname()),
+                     (b"two", receiver.getsockname())]
+        self.assertEqual(_mmsg.sendmmsg(sender, datagrams), 1)
+        self.assertEqual(_mmsg.sendmmsg(sender, datagrams, 1), 1)
+        self.assertEqual(
+            _mmsg.recvmmsg(receiver, 10),
+            ([(b"one", sender.getsockname())], False))
+        self.assertEqual(
+            _mmsg.recvmmsg(receiver, 10),
+            ([(b"two", sender.getsockname())], False))
+
+
+    def test_encodeAddress(self):
+        """
+        L{_mmsg._encodeAddress} encodes IPv4, broadcast and IPv6 addresses,
+        with the zone of scoped IPv6 addresses, and raises L{ValueError} for
+        host names.
+        """
+        self.assertEqual(
+            _mmsg._encodeAddress(socket.AF_INET, ("127.0.0.1", 1234))[2:8],
+            b"\x04\xd2\x7f\x00\x00\x01")
+        self.assertEqual(
+            _mmsg._encodeAddress(socket.AF_INET, ("<broadcast>", 1))[4:8],
+            b"\xff" * 4)
+        encoded = _mmsg._encodeAddress(socket.AF_INET6, ("fe80::1%3", 1))
+        self.assertEqual(encoded[8:24], socket.inet_pton(
+            socket.AF_INET6, "fe80::1"))
+        self.assertEqual(encoded[24:28], struct.pack("=I", 3))
+        self.assertRaises(
+            ValueError, _mmsg._encodeAddress, socket.AF_INET,
+            ("localhost", 1))
+
+
+    def port(self, protocol):
+        """
+        Create a L{udp.Port} bound to an IPv4 loopback port, without reading
+        from it.
+        """
+        port = udp.Port(0, protocol, "127.0.0.1")
+        port._bindSocket()
+        self.addCleanup(port.socket.close)
+        return port
+
+
+    def test_portReadsBatches(self):
+        """
+        L{udp.Port.doRead} reads datagrams with L{_mmsg.recvmmsg}, until it
+        reads fewer than fit in one call.
+        """
+        batches = []
+        def recvmmsg(skt, size):
+            batch, drained = _mmsg.recvmmsg(skt, size)
+            batches.append(batch)
+            return batch, drained
+        self.patch(udp, "_recvmmsg", recvmmsg)
+
+        server = BatchingServer()
+        port = self.port(server)
+        sender = self.socket()
+        sender.sendto(b"one", port.socket.getsockname())
+        sender.sendto(b"two", port.socket.getsockname())
+        port.doRead()
+        self.assertEqual(batches, [[(b"one", sender.getsockname()),
+                                    (b"two", sender.getsockname())]])
+        self.assertEqual(server.batches, batches)
+
+
+    def test_portWritesBatches(self):
+        """
+        L{udp.Port.writeDatagrams} sends datagrams with L{_mmsg.sendmmsg}.
+        """
+        calls = []
+        def sendmmsg(skt, datagrams, start):
+            calls.append(start)
+            return _mmsg.sendmmsg(skt, datagrams, start)
+        self.patch(udp, "_sendmmsg", sendmmsg)
+
+        port = self.port(Server())
+        receiver = self.socket()
+        port.writeDatagrams(
+            [(b"one", receiver.getsockname()),
+             (b"two", receiver.getsockname())])
+        self.assertEqual(calls, [0])
+        self.assertEqual(
+            [datagram for datagram, addr in self.receiveAll(receiver)],
+            [b"one", b"two"])
+
+
+    def test_portWriteErrors(self):
+        """
+        L{udp.Port.writeDatagrams} skips a datagram refused by the connected
+        address after telling the protocol, and raises
+        L{error.MessageLengthError} for a datagram too long.
+        """
+        failures = [socket.error(udp.ECONNREFUSED, "Connection refused"),
+                    socket.error(udp.EMSGSIZE, "Message too long")]
+        calls = []
+        def sendmmsg(skt, datagrams, start):
+            calls.append(start)
+            if failures:
+                raise failures.pop(0)
+            return len(datagrams) - start
+        self.patch(udp, "_sendmmsg", sendmmsg)
+
+        server = BatchingServer()
+        port = self.port(server)
+        port._connectedAddr = ("127.0.0.1", 1000)
+        self.assertRaises(
+            error.MessageLengthError, port.writeDatagrams,
+            [(b"one", None), (b"two", None), (b"three", None)])
+        self.assertEqual(server.refused, [0])
+        self.assertEqual(calls, [0, 1])
+        port.writeDatagrams([(b"one", None), (b"two", None)])
+        self.assertEqual(calls, [0, 1, 0])
+
+
+
 class ReactorShutdownInteractionTests(unittest.TestCase):
     """Test reactor shutdown interaction"""
 
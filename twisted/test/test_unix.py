@@ -338,6 +338,40 @@ class DatagramUnixSocketTests(unittest.TestCase):
         return d
 
 
+    def test_severalDatagrams(self):
+        """
+        Several datagrams waiting on a datagram UNIX socket are all received,
+        each with the address of its sender, even where IPv4 and IPv6 ports
+        read them several at a time.
+        """
+        clientaddr = self.mktemp()
+        serveraddr = self.mktemp()
+        received = []
+        done = defer.Deferred()
+
+        class Receiver(protocol.DatagramProtocol):
+            def datagramReceived(self, data, addr):
+                received.append((data, addr))
+                if len(received) == 3:
+                    done.callback(None)
+
+        s = reactor.listenUNIXDatagram(serveraddr, Receiver())
+        self.addCleanup(s.stopListening)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(client.close)
+        client.bind(clientaddr)
+        for data in [b"one", b"two", b"three"]:
+            client.sendto(data, serveraddr)
+
+        def _cbReceived(ignored):
+            self.assertEqual(
+                [(b"one", clientaddr), (b"two", clientaddr),
+                 (b"three", clientaddr)],
+                received)
+        done.addCallback(_cbReceived)
+        return done
+
+
     def test_cannotListen(self):
         """
         L{IReactorUNIXDatagram.listenUNIXDatagram} raises
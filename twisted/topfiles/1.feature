@@ -0,0 +1 @@
+twisted.internet.base.ReactorBase.installTimerWheel stores the pending timed calls of a reactor in a hierarchical timer wheel, which schedules, cancels and reschedules them in constant time at the cost of a configurable timing resolution.
@@ -0,0 +1 @@
+Where os.waitid is available, the reactor only reaps the child processes which exited when SIGCHLD arrives, and setting twisted.internet.process.Process.usePidfd makes it reap processes through a pidfd on Linux.
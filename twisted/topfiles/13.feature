@@ -0,0 +1 @@
+twisted.internet.protocol.DatagramProtocol.datagramsReceived receives the datagrams read by a UDP port in one event at once, and twisted.internet.udp.Port.writeDatagrams writes several datagrams to their own addresses; on Linux, UDP ports read and write them with recvmmsg and sendmmsg.
@@ -0,0 +1 @@
+listenTCP, TCP4ServerEndpoint, TCP6ServerEndpoint and tcp: endpoint strings accept reusePort to listen with SO_REUSEPORT, and twistd --workers runs an application in that many worker processes, restarted when they exit.
@@ -0,0 +1 @@
+twisted.internet.epollreactor.install(edgeTriggered=True) installs twisted.internet.epollreactor.EdgeTriggeredEPollReactor, which registers TCP and UNIX connections edge-triggered and needs no epoll_ctl call to start or stop reading or writing.
@@ -0,0 +1 @@
+twisted.internet.iouringreactor.IOUringReactor, also available as twistd --reactor=iouring, drives TCP ports and connections with io_uring requests on Linux.
@@ -0,0 +1 @@
+twisted.internet.asyncioreactor.AsyncioSelectorReactor runs Twisted on an asyncio event loop, and Deferred.fromFuture, Deferred.asFuture and awaiting Deferreds in coroutines run with ensureDeferred bridge Deferreds with asyncio.
@@ -0,0 +1 @@
+twisted.internet.tcp.Port builds at most maxBuildsPerIteration accepted connections per reactor iteration and, once maxPendingConnections are waiting, gives new connections to its shedConnection method, which resets them.
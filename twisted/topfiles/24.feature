@@ -0,0 +1 @@
+twisted.protocols.amp.BoxDispatcher can limit and queue its outstanding requests with maxOutstandingRequests and maxQueuedRequests, failing those beyond with TooManyRequests, keeps per-command statistics in commandStatistics, and pauses the producers given to registerCallProducer while it is congested.
@@ -0,0 +1 @@
+Protocols providing the new twisted.internet.interfaces.IBufferReceiver are given memoryviews of a buffer reused for every read by TCP connections, instead of a new bytes object per read.
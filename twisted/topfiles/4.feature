@@ -0,0 +1 @@
+TCP connections provide the new twisted.internet.interfaces.ISendFileTransport where os.sendfile is available, to send part of a file after the data already written without copying it through Python.
@@ -1357,6 +1357,9 @@ class HTTP11ClientProtocol(Protocol):
 
     @ivar _abortDeferreds: A list of C{Deferred} instances that will fire when
         the connection is lost.
+
+    @ivar _connectionLostCallback: If not L{None}, a callable called with
+        this protocol once its connection is lost.
     """
     _state = 'QUIESCENT'
     _parser = None
@@ -1366,8 +1369,10 @@ class HTTP11ClientProtocol(Protocol):
     _responseDeferred = None
 
 
-    def __init__(self, quiescentCallback=lambda c: None):
+    def __init__(self, quiescentCallback=lambda c: None,
+                 connectionLostCallback=None):
         self._quiescentCallback = quiescentCallback
+        self._connectionLostCallback = connectionLostCallback
         self._abortDeferreds = []
 
 
@@ -1544,12 +1549,22 @@ class HTTP11ClientProtocol(Protocol):
             self._giveUp(Failure())
 
 
-    def connectionLost(self, reason):
+    def _connectionLost(self, reason):
         """
         The underlying transport went away.  If appropriate, notify the parser
         object.
         """
-    connectionLost = makeStatefulDispatcher('connectionLost', connectionLost)
+    _connectionLost = makeStatefulDispatcher('connectionLost', _connectionLost)
+
+
+    def connectionLost(self, reason):
+        """
+        The underlying transport went away.  If appropriate, notify the parser
+        object, then call the connection lost callback, if any.
+        """
+        self._connectionLost(reason)
+        if self._connectionLostCallback is not None:
+            self._connectionLostCallback(self)
 
 
     def _connectionLost_QUIESCENT(self, reason):
@@ -22,7 +22,9 @@ except ImportError:
         return result.encode("charmap")
 
 import zlib
+from collections import deque
 from functools import wraps
+from itertools import count
 
 from zope.interface import implementer
 
@@ -1100,14 +1102,20 @@ class _HTTP11ClientFactory(protocol.Factory):
     @ivar _quiescentCallback: The quiescent callback to be passed to protocol
         instances, used to return them to the connection pool.
 
+    @ivar _connectionLostCallback: If not L{None}, a callable called with a
+        protocol instance once its connection is lost, used to keep track of
+        the connections of the connection pool.
+
     @since: 11.1
     """
-    def __init__(self, quiescentCallback):
+    def __init__(self, quiescentCallback, connectionLostCallback=None):
         self._quiescentCallback = quiescentCallback
+        self._connectionLostCallback = connectionLostCallback
 
 
     def buildProtocol(self, addr):
-        return HTTP11ClientProtocol(self._quiescentCallback)
+        return HTTP11ClientProtocol(
+            self._quiescentCallback, self._connectionLostCallback)
 
 
 
@@ -1176,6 +1184,40 @@ class _RetryingHTTP11ClientProtocol(object):
 
 
 
+# The key of a connection which is not in use.
+_NOT_IN_USE = object()
+
+
+
+class _WaitingRequest(object):
+    """
+    A request for a connection of an L{HTTPConnectionPool} waiting for the
+    number of connections in use to go below the limits of the pool.
+
+    @ivar sequence: The position of the request in the queue of the pool.
+    @type sequence: L{int}
+
+    @ivar endpoint: The endpoint to open a new connection with.
+
+    @ivar queued: When the request was queued, in seconds since the epoch.
+    @type queued: L{float}
+
+    @ivar deferred: The L{defer.Deferred} returned by
+        L{HTTPConnectionPool.getConnection}.
+
+    @ivar connecting: Once the request is no longer waiting, the
+        L{defer.Deferred} of the connection opened or handed over to it.
+    """
+
+    def __init__(self, sequence, endpoint, queued):
+        self.sequence = sequence
+        self.endpoint = endpoint
+        self.queued = queued
+        self.deferred = None
+        self.connecting = None
+
+
+
 class HTTPConnectionPool(object):
     """
     A pool of persistent HTTP connections.
@@ -1183,10 +1225,16 @@ class HTTPConnectionPool(object):
     Features:
      - Cached connections will eventually time out.
      - Limits on maximum number of persistent connections.
+     - Optional limits on the number of connections in use, per destination
+       and for the whole pool, above which requests for a connection wait
+       for one in the order they were made.
 
     Connections are stored using keys, which should be chosen such that any
     connections stored under a given key can be used interchangeably.
 
+    Cached connections are reused most recently used first, so that the
+    connections which are not needed any more are the ones which time out.
+
     Failed requests done using previously cached connections will be retried
     once if they use an idempotent method (e.g. GET), in case the HTTP server
     timed them out.
@@ -1198,6 +1246,16 @@ class HTTPConnectionPool(object):
         connections for a C{host:port} destination.
     @type maxPersistentPerHost: C{int}
 
+    @ivar maxConnectionsPerHost: If not L{None}, the maximum number of
+        connections in use or being opened for a key.  Further requests for
+        a connection with that key wait until one of those connections is
+        returned to the pool or lost.
+    @type maxConnectionsPerHost: L{int} or L{None}
+
+    @ivar maxConnections: If not L{None}, the maximum number of connections
+        in use or being opened for all the keys.
+    @type maxConnections: L{int} or L{None}
+
     @ivar cachedConnectionTimeout: Number of seconds a cached persistent
         connection will stay open before disconnecting.
 
@@ -1207,16 +1265,41 @@ class HTTPConnectionPool(object):
     @ivar _factory: The factory used to connect to the proxy.
 
     @ivar _connections: Map (scheme, host, port) to lists of
-        L{HTTP11ClientProtocol} instances.
+        L{HTTP11ClientProtocol} instances, the most recently cached last.
 
     @ivar _timeouts: Map L{HTTP11ClientProtocol} instances to a
         C{IDelayedCall} instance of their timeout.
 
+    @ivar _inUse: Map the L{HTTP11ClientProtocol} instances given by
+        L{getConnection} and not returned to the pool yet to their key.
+
+    @ivar _active: Map keys to the number of their connections in use or
+        being opened.
+
+    @ivar _activeTotal: The number of connections in use or being opened.
+
+    @ivar _waiting: Map keys to a L{deque} of the L{_WaitingRequest}s for a
+        connection with that key.
+
+    @ivar _waitingSequence: An iterator of the positions of the requests
+        queued in C{_waiting}.
+
+    @ivar _waited: Map keys to a L{list} holding the number of requests which
+        waited for a connection with that key and the total number of
+        seconds they waited.
+
+    @ivar _handingOver: Map the L{HTTP11ClientProtocol} instances returned to
+        the pool while requests were waiting for them to a L{tuple} of the
+        L{_WaitingRequest} they are handed over to and the C{IDelayedCall}
+        doing so.
+
     @since: 12.1
     """
 
     _factory = _HTTP11ClientFactory
     maxPersistentPerHost = 2
+    maxConnectionsPerHost = None
+    maxConnections = None
     cachedConnectionTimeout = 240
     retryAutomatically = True
 
@@ -1225,6 +1308,13 @@ class HTTPConnectionPool(object):
         self.persistent = persistent
         self._connections = {}
         self._timeouts = {}
+        self._inUse = {}
+        self._active = {}
+        self._activeTotal = 0
+        self._waiting = {}
+        self._waitingSequence = count()
+        self._waited = {}
+        self._handingOver = {}
 
 
     def getConnection(self, key, endpoint):
@@ -1239,6 +1329,10 @@ class HTTPConnectionPool(object):
         Afterwards, if the connection is still open, it will automatically be
         added to the pool.
 
+        If no connection is cached for C{key} and as many connections as
+        allowed by C{maxConnectionsPerHost} or C{maxConnections} are in use,
+        the connection is supplied once one of them is available again.
+
         @param key: A unique key identifying connections that can be used
             interchangeably.
 
@@ -1251,18 +1345,53 @@ class HTTPConnectionPool(object):
         # Try to get cached version:
         connections = self._connections.get(key)
         while connections:
-            connection = connections.pop(0)
+            connection = connections.pop()
             # Cancel timeout:
             self._timeouts[connection].cancel()
             del self._timeouts[connection]
             if connection.state == "QUIESCENT":
-                if self.retryAutomatically:
-                    newConnection = lambda: self._newConnection(key, endpoint)
-                    connection = _RetryingHTTP11ClientProtocol(
-                        connection, newConnection)
-                return defer.succeed(connection)
+                return defer.succeed(
+                    self._useConnection(key, endpoint, connection))
+
+        if self._canConnect(key):
+            return self._newConnection(key, endpoint)
 
-        return self._newConnection(key, endpoint)
+        waiting = _WaitingRequest(
+            next(self._waitingSequence), endpoint, self._reactor.seconds())
+        waiting.deferred = defer.Deferred(
+            lambda d: self._cancelWaiting(key, waiting))
+        self._waiting.setdefault(key, deque()).append(waiting)
+        return waiting.deferred
+
+
+    def _canConnect(self, key):
+        """
+        Check whether a new connection may be opened for C{key} without
+        exceeding C{maxConnectionsPerHost} or C{maxConnections}.
+
+        @rtype: L{bool}
+        """
+        if (self.maxConnections is not None and
+                self._activeTotal >= self.maxConnections):
+            return False
+        return (self.maxConnectionsPerHost is None or
+                self._active.get(key, 0) < self.maxConnectionsPerHost)
+
+
+    def _useConnection(self, key, endpoint, connection):
+        """
+        Take a cached connection out of the pool to supply it to a request.
+
+        @return: The connection, or a L{_RetryingHTTP11ClientProtocol}
+            wrapping it.
+        """
+        self._acquire(key)
+        self._inUse[connection] = key
+        if self.retryAutomatically:
+            newConnection = lambda: self._newConnection(key, endpoint)
+            connection = _RetryingHTTP11ClientProtocol(
+                connection, newConnection)
+        return connection
 
 
     def _newConnection(self, key, endpoint):
@@ -1270,11 +1399,112 @@ class HTTPConnectionPool(object):
         Create a new connection.
 
         This implements the new connection code path for L{getConnection}.
+        The connection counts as in use from now on, until it is returned to
+        the pool or lost.
         """
         def quiescentCallback(protocol):
             self._putConnection(key, protocol)
-        factory = self._factory(quiescentCallback)
-        return endpoint.connect(factory)
+        factory = self._factory(quiescentCallback, self._connectionLost)
+        d = endpoint.connect(factory)
+        self._acquire(key)
+
+        def connected(protocol):
+            self._inUse[protocol] = key
+            return protocol
+
+        def failed(reason):
+            self._release(key)
+            return reason
+        return d.addCallbacks(connected, failed)
+
+
+    def _acquire(self, key):
+        """
+        Count one more connection in use for C{key}.
+        """
+        self._active[key] = self._active.get(key, 0) + 1
+        self._activeTotal += 1
+
+
+    def _release(self, key):
+        """
+        Count one connection less in use for C{key}, and open connections for
+        the requests waiting for one which may now be opened.
+        """
+        self._active[key] -= 1
+        if not self._active[key]:
+            del self._active[key]
+        self._activeTotal -= 1
+
+        while self._waiting:
+            candidates = [
+                (queue[0].sequence, waitingKey)
+                for (waitingKey, queue) in self._waiting.items()
+                if self._canConnect(waitingKey)]
+            if not candidates:
+                return
+            key = min(candidates, key=lambda candidate: candidate[0])[1]
+            waiting = self._popWaiting(key)
+            waiting.connecting = self._newConnection(key, waiting.endpoint)
+            waiting.connecting.chainDeferred(waiting.deferred)
+
+
+    def _popWaiting(self, key):
+        """
+        Remove the request which has been waiting the longest for a
+        connection with C{key} from the queue, and account for the time it
+        waited.
+
+        @rtype: L{_WaitingRequest}
+        """
+        queue = self._waiting[key]
+        waiting = queue.popleft()
+        if not queue:
+            del self._waiting[key]
+        waited = self._waited.setdefault(key, [0, 0.0])
+        waited[0] += 1
+        waited[1] += self._reactor.seconds() - waiting.queued
+        return waiting
+
+
+    def _cancelWaiting(self, key, waiting):
+        """
+        Cancel a request for a connection: remove it from the queue if it is
+        still waiting, or cancel the opening of the connection otherwise.
+        """
+        if waiting.connecting is not None:
+            waiting.connecting.cancel()
+            return
+        queue = self._waiting[key]
+        queue.remove(waiting)
+        if not queue:
+            del self._waiting[key]
+
+
+    def _connectionLost(self, connection):
+        """
+        Stop counting a connection as in use once it is lost, or remove it
+        from the cache.
+
+        A connection lost while it is handed over to a waiting request leaves
+        its place to a new connection opened for that request.
+        """
+        key = self._inUse.pop(connection, _NOT_IN_USE)
+        if connection in self._handingOver:
+            waiting, call = self._handingOver.pop(connection)
+            call.cancel()
+            self._active[key] -= 1
+            self._activeTotal -= 1
+            connecting = self._newConnection(key, waiting.endpoint)
+            connecting.chainDeferred(waiting.connecting)
+            waiting.connecting = connecting
+        elif key is not _NOT_IN_USE:
+            self._release(key)
+        elif connection in self._timeouts:
+            self._timeouts.pop(connection).cancel()
+            for connections in itervalues(self._connections):
+                if connection in connections:
+                    connections.remove(connection)
 
 
     def _removeConnection(self, key, connection):
@@ -1290,6 +1520,12 @@ class HTTPConnectionPool(object):
         """
         Return a persistent connection to the pool. This will be called by
         L{HTTP11ClientProtocol} when the connection becomes quiescent.
+
+        The connection is supplied to the request which has been waiting the
+        longest for a connection with the same key, if any, and cached
+        otherwise.  It is supplied in a later reactor iteration, once the
+        protocol is done with the response it just finished, and counts as
+        in use meanwhile.
         """
         if connection.state != "QUIESCENT":
             # Log with traceback for debugging purposes:
@@ -1299,6 +1535,18 @@ class HTTPConnectionPool(object):
             except:
                 log.err()
             return
+        if key in self._waiting:
+            waiting = self._popWaiting(key)
+            if self._inUse.get(connection, _NOT_IN_USE) is _NOT_IN_USE:
+                self._inUse[connection] = key
+                self._acquire(key)
+            waiting.connecting = defer.Deferred(
+                lambda d: self._cancelHandOver(key, connection))
+            waiting.connecting.chainDeferred(waiting.deferred)
+            call = self._reactor.callLater(
+                0, self._handOver, key, connection)
+            self._handingOver[connection] = (waiting, call)
+            return
         connections = self._connections.setdefault(key, [])
         if len(connections) == self.maxPersistentPerHost:
             dropped = connections.pop(0)
@@ -1310,6 +1558,62 @@ class HTTPConnectionPool(object):
                                       self._removeConnection,
                                       key, connection)
         self._timeouts[connection] = cid
+        if self._inUse.pop(connection, _NOT_IN_USE) is not _NOT_IN_USE:
+            self._release(key)
+
+
+    def _handOver(self, key, connection):
+        """
+        Supply a connection returned to the pool to the request it was
+        reserved for by L{_putConnection}.
+        """
+        waiting, call = self._handingOver.pop(connection)
+        del self._inUse[connection]
+        self._active[key] -= 1
+        self._activeTotal -= 1
+        waiting.connecting.callback(
+            self._useConnection(key, waiting.endpoint, connection))
+
+
+    def _cancelHandOver(self, key, connection):
+        """
+        Stop handing a connection over to a request which was cancelled, and
+        return it to the pool again.
+        """
+        waiting, call = self._handingOver.pop(connection)
+        call.cancel()
+        self._putConnection(key, connection)
+
+
+    def stats(self, key=None):
+        """
+        Describe how the connections of the pool are used.
+
+        @param key: The key of the connections to describe, or L{None} to
+            describe the connections of all the keys.
+
+        @return: A L{dict} mapping C{"active"} to the number of connections
+            in use or being opened, C{"idle"} to the number of cached
+            connections, C{"queued"} to the number of requests waiting for a
+            connection, C{"waited"} to the number of requests which had to
+            wait for one and C{"waitTime"} to the total number of seconds
+            they waited.
+        @rtype: L{dict}
+        """
+        if key is None:
+            keys = set(self._active)
+            keys.update(self._connections, self._waiting, self._waited)
+        else:
+            keys = [key]
+        stats = dict(active=0, idle=0, queued=0, waited=0, waitTime=0.0)
+        for key in keys:
+            stats["active"] += self._active.get(key, 0)
+            stats["idle"] += len(self._connections.get(key, ()))
+            stats["queued"] += len(self._waiting.get(key, ()))
+            waited, waitTime = self._waited.get(key, (0, 0.0))
+            stats["waited"] += waited
+            stats["waitTime"] += waitTime
+        return stats
 
 
     def closeCachedConnections(self):
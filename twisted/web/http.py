@@ -50,8 +50,8 @@ __all__ = [
     'urlparse', 'parse_qs', 'datetimeToString', 'datetimeToLogString', 'timegm',
     'stringToDatetime', 'toChunk', 'fromChunk', 'parseContentRange',
 
-    'StringTransport', 'HTTPClient', 'NO_BODY_CODES', 'Request',
-    'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory',
+    'StringTransport', 'HTTPClient', 'NO_BODY_CODES', 'HeaderBlock',
+    'Request', 'PotentialDataLoss', 'HTTPChannel', 'HTTPFactory',
     ]
 
 
@@ -210,14 +210,25 @@ def parse_qs(qs, keep_blank_values=0, strict_parsing=0):
 
 
 
+# The second and the result of the last call to datetimeToString for the
+# current time, as it is made for every response.
+_lastDatetime = (None, None)
+
 def datetimeToString(msSinceEpoch=None):
     """
     Convert seconds since epoch to HTTP datetime string.
 
     @rtype: C{bytes}
     """
+    global _lastDatetime
     if msSinceEpoch == None:
-        msSinceEpoch = time.time()
+        now = time.time()
+        second, s = _lastDatetime
+        if second == int(now):
+            return s
+        s = datetimeToString(now)
+        _lastDatetime = (int(now), s)
+        return s
     year, month, day, hh, mm, ss, wd, y, z = time.gmtime(msSinceEpoch)
     s = networkString("%s, %02d %3s %4d %02d:%02d:%02d GMT" % (
             weekdayname[wd],
@@ -544,6 +555,49 @@ NO_BODY_CODES = (204, 304)
 _QUEUED_SENTINEL = object()
 
 
+
+class HeaderBlock(object):
+    """
+    Response headers which do not change from a response to the next,
+    serialized once to be sent with any number of responses.
+
+    A resource creates a L{HeaderBlock} once, and gives it to each request it
+    renders with L{Request.setHeaderBlock} instead of setting the same headers
+    with L{Request.setHeader} every time.
+
+    @ivar names: The lowercase names of the headers.
+    @type names: L{frozenset} of L{bytes}
+
+    @ivar headers: The headers, as 2-tuples of their capitalized name and of
+        their value.
+    @type headers: L{list} of L{tuple} of L{bytes}
+
+    @ivar encoded: The header lines, as sent in a response.
+    @type encoded: L{bytes}
+    """
+
+    def __init__(self, headers):
+        """
+        @param headers: The headers, as 2-tuples of their name and value.
+        @type headers: iterable of L{tuple} of L{bytes}
+        """
+        rawHeaders = Headers()
+        for name, value in headers:
+            rawHeaders.addRawHeader(name, value)
+        self.names = frozenset(rawHeaders._rawHeaders)
+        self.headers = [
+            (name, value)
+            for name, values in rawHeaders.getAllRawHeaders()
+            for value in values]
+        self.encoded = b"".join(
+            name + b": " + value + b"\r\n" for name, value in self.headers)
+
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.headers)
+
+
+
 @implementer(interfaces.IConsumer)
 class Request:
     """
@@ -578,6 +632,9 @@ class Request:
         which this request was received is closed and which is C{True} after
         that.
     @type _disconnected: C{bool}
+
+    @ivar _headerBlock: The headers given to L{setHeaderBlock}, if any.
+    @type _headerBlock: L{HeaderBlock} or L{None}
     """
     producer = None
     finished = 0
@@ -596,6 +653,7 @@ class Request:
     content = None
     _forceSSL = 0
     _disconnected = False
+    _headerBlock = None
 
     def __init__(self, channel, queued=_QUEUED_SENTINEL):
         """
@@ -902,11 +960,23 @@ class Request:
             reason = self.code_message
             headers = []
 
+            block = self._headerBlock
+            if block is not None:
+                overridden = block.names.intersection(
+                    self.responseHeaders._rawHeaders)
+                if overridden:
+                    # Headers set on the request replace those of the block.
+                    headers.extend(
+                        (name, value) for (name, value) in block.headers
+                        if name.lower() not in overridden)
+                    block = None
+
             # if we don't have a content length, we send data in
             # chunked mode, so that we can support pipelining in
             # persistent connections.
             if ((version == b"HTTP/1.1") and
                 (self.responseHeaders.getRawHeaders(b'content-length') is None) and
+                (block is None or b'content-length' not in block.names) and
                 self.method != b"HEAD" and self.code not in NO_BODY_CODES):
                 headers.append((b'Transfer-Encoding', b'chunked'))
                 self.chunked = 1
@@ -937,7 +1007,15 @@ class Request:
             for cookie in self.cookies:
                 headers.append((b'Set-Cookie', cookie))
 
-            self.channel.writeHeaders(version, code, reason, headers)
+            if block is None:
+                self.channel.writeHeaders(version, code, reason, headers)
+            elif _writesHeaderBlocks(self.channel):
+                self.channel.writeHeaders(
+                    version, code, reason, headers, block.encoded)
+            else:
+                # Other channels only know about headers one at a time.
+                headers.extend(block.headers)
+                self.channel.writeHeaders(version, code, reason, headers)
 
             # if this is a "HEAD" request, we shouldn't return any data
             if self.method == b"HEAD":
@@ -1069,6 +1147,23 @@ class Request:
         self.responseHeaders.setRawHeaders(name, [value])
 
 
+    def setHeaderBlock(self, block):
+        """
+        Set HTTP response headers serialized beforehand.  The headers of the
+        block are sent in addition to those set with L{setHeader}, which
+        replace the headers of the block with the same name.
+
+        The headers of the block are not added to C{responseHeaders}, so code
+        inspecting the response headers of the request does not see them.
+
+        This replaces any block previously set.
+
+        @param block: The headers to send.
+        @type block: L{HeaderBlock}
+        """
+        self._headerBlock = block
+
+
     def redirect(self, url):
         """
         Utility function that does a redirect.
@@ -1588,6 +1683,246 @@ class _ChunkedTransferDecoder(object):
 
 
 
+class _PipelinedRequestChannel(object):
+    """
+    The channel of a request received by an L{HTTPChannel} processing
+    pipelined requests concurrently: the response to the request is
+    buffered until the responses to the requests received before it have
+    been sent.
+
+    Everything but writing the response and registering a producer is
+    delegated to the L{HTTPChannel}.
+
+    @ivar _channel: The L{HTTPChannel} the request was received by.
+
+    @ivar _buffering: Whether the response is buffered, rather than written
+        to the connection.
+    @type _buffering: L{bool}
+
+    @ivar _buffer: The data of the response buffered so far.
+    @type _buffer: L{list} of L{bytes}
+
+    @ivar _finished: Whether the request is finished.
+    @type _finished: L{bool}
+
+    @ivar _producer: The producer registered while the response is
+        buffered, if any.  A streaming producer is paused while the
+        responses buffered by the channel are too large; a pull producer is
+        only registered with the transport once the response is no longer
+        buffered.
+
+    @ivar _streaming: Whether C{_producer} is a streaming producer.
+
+    @ivar _paused: Whether C{_producer} was paused.
+    """
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._buffering = True
+        self._buffer = []
+        self._finished = False
+        self._producer = None
+        self._streaming = False
+        self._paused = False
+
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+
+    def writeHeaders(self, version, code, reason, headers, headerBlock=b""):
+        """
+        Write or buffer the response head.
+
+        @see: L{HTTPChannel.writeHeaders}
+        """
+        if self._buffering:
+            self.write(
+                _responseHead(version, code, reason, headers, headerBlock))
+        elif headerBlock:
+            self._channel.writeHeaders(
+                version, code, reason, headers, headerBlock)
+        else:
+            self._channel.writeHeaders(version, code, reason, headers)
+
+
+    def write(self, data):
+        """
+        Write or buffer some response data.
+
+        @see: L{HTTPChannel.write}
+        """
+        if not self._buffering:
+            self._channel.write(data)
+            return
+        self._buffer.append(data)
+        channel = self._channel
+        channel._pipelineBuffered += len(data)
+        if channel._pipelineBuffered > channel.maxPipelineBufferSize:
+            if self._streaming and not self._paused:
+                self._paused = True
+                self._producer.pauseProducing()
+            channel._updatePipeline()
+
+
+    def writeSequence(self, iovec):
+        """
+        Write or buffer some response data.
+
+        @see: L{HTTPChannel.writeSequence}
+        """
+        if self._buffering:
+            self.write(b"".join(iovec))
+        else:
+            self._channel.writeSequence(iovec)
+
+
+    def _send100Continue(self):
+        """
+        Write or buffer a 100 Continue response.
+
+        @see: L{HTTPChannel._send100Continue}
+        """
+        if self._buffering:
+            self.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        else:
+            self._channel._send100Continue()
+
+
+    def registerProducer(self, producer, streaming):
+        """
+        Register a producer with the transport, or keep it until the
+        response is no longer buffered.
+
+        @see: L{HTTPChannel.registerProducer}
+        """
+        if not self._buffering:
+            return self._channel.registerProducer(producer, streaming)
+        if self._producer is not None:
+            raise RuntimeError(
+                "Cannot register producer %s, because producer %s was never "
+                "unregistered." % (producer, self._producer))
+        self._producer = producer
+        self._streaming = streaming
+        self._paused = False
+        if (streaming and self._channel._pipelineBuffered >
+                self._channel.maxPipelineBufferSize):
+            self._paused = True
+            producer.pauseProducing()
+
+
+    def unregisterProducer(self):
+        """
+        Unregister the producer.
+
+        @see: L{HTTPChannel.unregisterProducer}
+        """
+        if not self._buffering:
+            return self._channel.unregisterProducer()
+        self._producer = None
+
+
+    def _resumeProducing(self):
+        """
+        Resume the streaming producer paused because too much response data
+        was buffered.
+        """
+        if self._paused:
+            self._paused = False
+            self._producer.resumeProducing()
+
+
+    def _release(self):
+        """
+        Stop buffering: write the response buffered so far to the connection
+        and register the producer kept, if any, with the transport.
+        """
+        self._buffering = False
+        data, self._buffer = b"".join(self._buffer), []
+        self._channel._pipelineBuffered -= len(data)
+        if data:
+            self._channel.write(data)
+        producer, self._producer = self._producer, None
+        if producer is not None:
+            self._channel.registerProducer(producer, self._streaming)
+            if self._paused:
+                self._paused = False
+                producer.resumeProducing()
+
+
+
+def _responseHead(version, code, reason, headers, headerBlock):
+    """
+    Serialize the head of a response.
+
+    @see: L{HTTPChannel.writeHeaders}
+
+    @rtype: L{bytes}
+    """
+    responseLine = version + b" " + code + b" " + reason + b"\r\n"
+    headerSequence = [responseLine]
+    headerSequence.extend(
+        name + b': ' + value + b"\r\n" for name, value in headers
+    )
+    headerSequence.append(headerBlock)
+    headerSequence.append(b"\r\n")
+    return b"".join(headerSequence)
+
+
+
+def _writesHeaderBlocks(channel):
+    """
+    Determine whether the C{writeHeaders} method of a channel accepts the
+    serialized headers of a L{HeaderBlock}.  Only that of L{HTTPChannel}
+    does: subclasses overriding it are given the headers of the block one at
+    a time, as their C{writeHeaders} may not take a C{headerBlock} argument.
+
+    @param channel: The channel of a L{Request}.
+
+    @rtype: L{bool}
+    """
+    if isinstance(channel, _PipelinedRequestChannel):
+        channel = channel._channel
+    writeHeaders = getattr(channel.__class__, "writeHeaders", None)
+    return (getattr(writeHeaders, "__func__", writeHeaders) is
+            HTTPChannel.__dict__["writeHeaders"])
+
+
+
+def _requestLine(line):
+    """
+    Split a request line into its method, path and version.
+
+    @param line: The request line, without its delimiter.
+    @type line: L{bytes}
+
+    @return: The method, path and version, or L{None} if C{line} is not a
+        valid request line.
+    @rtype: L{tuple} of L{bytes} or L{None}
+    """
+    parts = line.split()
+    if len(parts) != 3:
+        return None
+    try:
+        parts[0].decode("ascii")
+    except UnicodeDecodeError:
+        return None
+    return parts
+
+
+
+def _methodFunction(method):
+    """
+    Get the function implementing a method looked up on a class.
+
+    @param method: An unbound method on Python 2, a function on Python 3.
+
+    @return: The function.
+    """
+    return getattr(method, '__func__', method)
+
+
+
 @implementer(interfaces.IPushProducer)
 class _NoPushProducer(object):
     """
@@ -1650,6 +1985,53 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         L{interfaces.IPushProducer}. Used to attempt to prevent the transport
         from producing excess data when we're responding to a request.
     @type _producer: L{interfaces.IPushProducer}
+
+    @ivar _parseByLine: Whether requests are parsed one line at a time,
+        through L{lineReceived}, L{headerReceived} and L{rawDataReceived},
+        rather than a whole request head at a time by L{dataReceived}.  This
+        is only the case for subclasses overriding one of these methods.
+    @type _parseByLine: L{bool}
+
+    @ivar _headScanned: The length of C{_buffer} when it was last searched for
+        the end of a request head.
+    @type _headScanned: L{int}
+
+    @ivar _headDelimiters: The number of line delimiters found in C{_buffer}
+        while searching it for the end of a request head.
+    @type _headDelimiters: L{int}
+
+    @ivar _emptyLineSkipped: Whether an empty line was skipped before the
+        request line of the request being received.
+    @type _emptyLineSkipped: L{bool}
+
+    @ivar concurrentPipelining: Whether pipelined requests are processed
+        concurrently, rather than each once the response to the previous one
+        is finished.  The responses are still sent in the order the requests
+        were received: each is buffered until the previous ones are sent.
+        Requests are only processed concurrently if they are parsed a whole
+        head at a time (see C{_parseByLine}).
+    @type concurrentPipelining: L{bool}
+
+    @ivar maxPipelinedRequests: When processing pipelined requests
+        concurrently, the largest number of requests processed at once.  No
+        more requests are read from the connection until one of them is
+        finished.
+    @type maxPipelinedRequests: L{int}
+
+    @ivar maxPipelineBufferSize: When processing pipelined requests
+        concurrently, the largest number of bytes of responses buffered until
+        the previous responses are sent.  Beyond it, no more requests are
+        read from the connection and the streaming producers of the buffered
+        responses are paused.
+    @type maxPipelineBufferSize: L{int}
+
+    @ivar _pipeline: When processing pipelined requests concurrently, the
+        L{_PipelinedRequestChannel} of each request of C{requests}.
+    @type _pipeline: L{list}
+
+    @ivar _pipelineBuffered: The number of bytes of responses buffered by the
+        members of C{_pipeline}.
+    @type _pipelineBuffered: L{int}
     """
 
     maxHeaders = 500
@@ -1668,12 +2050,26 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
     _receivedHeaderCount = 0
     _receivedHeaderSize = 0
 
+    _headScanned = 0
+    _headDelimiters = 0
+    _emptyLineSkipped = False
+
+    concurrentPipelining = False
+    maxPipelinedRequests = 16
+    maxPipelineBufferSize = 2 ** 20
+    _pipelineBuffered = 0
+
     def __init__(self):
         # the request queue
         self.requests = []
         self._handlingRequest = False
         self._dataBuffer = []
         self._transferDecoder = None
+        self._pipeline = []
+        self._parseByLine = any(
+            _methodFunction(getattr(self.__class__, name)) is not
+            _methodFunction(getattr(HTTPChannel, name))
+            for name in ('lineReceived', 'headerReceived', 'rawDataReceived'))
 
 
     def connectionMade(self):
@@ -1683,10 +2079,184 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         )
 
 
+    def dataReceived(self, data):
+        """
+        Parse requests from the data received and dispatch them.
+
+        Unless C{_parseByLine} is set, each request head (request line and
+        headers) is parsed at once, as soon as the empty line ending it has
+        been received, and request bodies are given to the transfer decoder
+        of the request without further buffering.
+
+        @param data: The bytes received from the connection.
+        @type data: L{bytes}
+        """
+        if self._parseByLine:
+            return basic.LineReceiver.dataReceived(self, data)
+
+        self.resetTimeout()
+        self._buffer += data
+        # If we're currently handling a request, keep the data for the next
+        # one.  We shouldn't have received it (we've paused the transport),
+        # but let's be cautious.
+        if self._busyReceiving or self._handlingRequest:
+            return
+
+        self._busyReceiving = True
+        try:
+            while self._buffer and not self._handlingRequest:
+                if self._transferDecoder is None:
+                    if not self._headReceived():
+                        return
+                else:
+                    data, self._buffer = self._buffer, b''
+                    try:
+                        self._transferDecoder.dataReceived(data)
+                    except _MalformedChunkedDataError:
+                        self._respondToBadRequestAndDisconnect()
+                        return
+                if self.transport.disconnecting:
+                    return
+        finally:
+            self._busyReceiving = False
+
+
+    def _headReceived(self):
+        """
+        Parse the request head at the start of C{_buffer}, if all of it has
+        been received, and start the request it belongs to.
+
+        @return: L{True} if a request was started, L{False} if more data is
+            needed or if the request was rejected.
+        @rtype: L{bool}
+        """
+        buffer = self._buffer
+        if not self.persistent:
+            # if this connection is not persistent, drop any data which
+            # the client (illegally) sent after the last request.
+            self._buffer = b''
+            return False
+
+        if buffer[:2] == b'\r\n' and not self._emptyLineSkipped:
+            # IE sends an extraneous empty line (\r\n) after a POST request;
+            # eat up such a line, but only ONCE
+            self._emptyLineSkipped = True
+            buffer = self._buffer = buffer[2:]
+            self._headScanned = self._headDelimiters = 0
+
+        # Only search the part of the buffer which was not searched already,
+        # so that a head received a few bytes at a time is not searched over
+        # and over again.
+        scanned = self._headScanned
+        end = buffer.find(b'\r\n\r\n', max(scanned - 3, 0))
+        if end == -1:
+            delimiters = self._headDelimiters
+            self._headDelimiters += buffer.count(b'\r\n', max(scanned - 1, 0))
+            self._headScanned = len(buffer)
+            if not delimiters and self._headDelimiters:
+                # Reject a bad request line as soon as it is received rather
+                # than once the whole head is.
+                if _requestLine(buffer[:buffer.find(b'\r\n')]) is None:
+                    self._respondToBadRequestAndDisconnect()
+                    return False
+            if (len(buffer) - 2 * self._headDelimiters >
+                    self.totalHeadersSize):
+                self._respondToBadRequestAndDisconnect()
+            return False
+
+        head = buffer[:end]
+        self._buffer = buffer[end + 4:]
+        self._headScanned = self._headDelimiters = 0
+
+        lines = head.split(b'\r\n')
+        self._receivedHeaderSize = len(head) - 2 * (len(lines) - 1)
+        if self._receivedHeaderSize > self.totalHeadersSize:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        # create a new Request object
+        channel = self
+        if self.concurrentPipelining:
+            channel = _PipelinedRequestChannel(self)
+            if not self._pipeline:
+                channel._release()
+            self._pipeline.append(channel)
+        if INonQueuedRequestFactory.providedBy(self.requestFactory):
+            request = self.requestFactory(channel)
+        elif self.concurrentPipelining:
+            # The response is buffered by its channel rather than queued.
+            request = self.requestFactory(channel, 0)
+        else:
+            request = self.requestFactory(channel, len(self.requests))
+        self.requests.append(request)
+
+        parts = _requestLine(lines[0])
+        if parts is None:
+            self._respondToBadRequestAndDisconnect()
+            return False
+        command, path, version = parts
+
+        del lines[0]
+        if b'\r\n ' in head or b'\r\n\t' in head:
+            # Fold the continuation lines of multi line headers.
+            headerLines = []
+            for line in lines:
+                if headerLines and line[:1] in (b' ', b'\t'):
+                    headerLines[-1] = headerLines[-1] + b'\n' + line
+                else:
+                    headerLines.append(line)
+            lines = headerLines
+
+        self._receivedHeaderCount = len(lines)
+        if self._receivedHeaderCount > self.maxHeaders:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        rawHeaders = request.requestHeaders._rawHeaders
+        for line in lines:
+            name, colon, value = line.partition(b':')
+            if not colon:
+                self._respondToBadRequestAndDisconnect()
+                return False
+            name = name.lower()
+            values = rawHeaders.get(name)
+            if values is None:
+                rawHeaders[name] = [value.strip()]
+            else:
+                values.append(value.strip())
+
+        for value in rawHeaders.get(b'transfer-encoding', ()):
+            if value.lower() == b'chunked':
+                self.length = None
+                self._transferDecoder = _ChunkedTransferDecoder(
+                    request.handleContentChunk, self._finishRequestBody)
+                break
+        else:
+            for value in rawHeaders.get(b'content-length', ()):
+                try:
+                    self.length = int(value)
+                except ValueError:
+                    self._respondToBadRequestAndDisconnect()
+                    self.length = None
+                    return False
+            if self.length:
+                self._transferDecoder = _IdentityTransferDecoder(
+                    self.length, request.handleContentChunk,
+                    self._finishRequestBody)
+
+        self._command = command
+        self._path = path
+        self._version = version
+        self.allHeadersReceived()
+        if self.length == 0:
+            self.allContentReceived()
+        return True
+
+
     def lineReceived(self, line):
         """
         Called for each line from request until the end of headers when
-        it enters binary mode.
+        it enters binary mode, if C{_parseByLine} is set.
         """
         self.resetTimeout()
 
@@ -1765,8 +2335,14 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
 
     def _finishRequestBody(self, data):
-        self.allContentReceived()
-        self._dataBuffer.append(data)
+        if self._parseByLine:
+            self.allContentReceived()
+            self._dataBuffer.append(data)
+        else:
+            # The data following the body comes before any data received
+            # while decoding it.
+            self._buffer = data + self._buffer
+            self.allContentReceived()
 
 
     def headerReceived(self, line):
@@ -1829,22 +2405,48 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self._receivedHeaderCount = 0
         self._receivedHeaderSize = 0
         self.__first_line = 1
+        self._emptyLineSkipped = False
         self._transferDecoder = None
         del self._command, self._path, self._version
 
         # Disable the idle timeout, in case this request takes a long
         # time to finish generating output.
-        if self.timeOut:
+        if self.timeOut and len(self.requests) == 1:
             self._savedTimeOut = self.setTimeout(None)
 
-        # Pause the producer if we can. If we can't, that's ok, we'll buffer.
-        self._producer.pauseProducing()
-        self._handlingRequest = True
+        if self._pipeline:
+            # Keep reading requests, unless too many are processed already.
+            self._updatePipeline()
+        else:
+            # Pause the producer if we can. If we can't, that's ok, we'll
+            # buffer.
+            self._producer.pauseProducing()
+            self._handlingRequest = True
 
         req = self.requests[-1]
         req.requestReceived(command, path, version)
 
 
+    def _updatePipeline(self):
+        """
+        When processing pipelined requests concurrently, stop reading
+        requests from the connection if too many are being processed, if
+        their responses buffered are too large, or if the connection is not
+        persistent, and resume reading them otherwise.
+        """
+        if (not self.persistent or
+                len(self.requests) >= self.maxPipelinedRequests or
+                self._pipelineBuffered > self.maxPipelineBufferSize):
+            if not self._handlingRequest:
+                self._handlingRequest = True
+                self._producer.pauseProducing()
+        elif self._handlingRequest:
+            self._handlingRequest = False
+            self._producer.resumeProducing()
+            if self._buffer:
+                self.dataReceived(b'')
+
+
     def rawDataReceived(self, data):
         self.resetTimeout()
 
@@ -1870,7 +2472,12 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         expectContinue = req.requestHeaders.getRawHeaders(b'expect')
         if (expectContinue and expectContinue[0].lower() == b'100-continue' and
             self._version == b'HTTP/1.1'):
-            self._send100Continue()
+            if self.concurrentPipelining:
+                # The interim response must not overtake the responses to
+                # the requests received before this one.
+                self._pipeline[-1]._send100Continue()
+            else:
+                self._send100Continue()
 
 
     def checkPersistence(self, request, version):
@@ -1919,8 +2526,12 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
     def requestDone(self, request):
         """
-        Called by first request in queue when it is done.
+        Called by first request in queue when it is done, or by any request
+        when processing pipelined requests concurrently.
         """
+        if self._pipeline:
+            self._pipelinedRequestDone(request)
+            return
         if request != self.requests[0]: raise TypeError
         del self.requests[0]
 
@@ -1932,13 +2543,43 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
                 self.setTimeout(self._savedTimeOut)
 
             # Receive our buffered data, if any.
-            data = b''.join(self._dataBuffer)
-            self._dataBuffer = []
-            self.setLineMode(data)
+            if self._parseByLine:
+                data = b''.join(self._dataBuffer)
+                self._dataBuffer = []
+                self.setLineMode(data)
+            elif self._buffer:
+                self.dataReceived(b'')
         else:
             self.transport.loseConnection()
 
 
+    def _pipelinedRequestDone(self, request):
+        """
+        Called by a request when it is done, when processing pipelined
+        requests concurrently: send the responses buffered which may now be
+        sent.
+
+        @param request: The request which is done.
+        """
+        self._pipeline[self.requests.index(request)]._finished = True
+        while self._pipeline and self._pipeline[0]._finished:
+            del self.requests[0], self._pipeline[0]
+            if self._pipeline:
+                self._pipeline[0]._release()
+
+        if not self.requests:
+            if not self.persistent:
+                self.transport.loseConnection()
+                return
+            if self._savedTimeOut:
+                self.setTimeout(self._savedTimeOut)
+
+        if self._pipelineBuffered <= self.maxPipelineBufferSize:
+            for channel in self._pipeline:
+                channel._resumeProducing()
+        self._updatePipeline()
+
+
     def timeoutConnection(self):
         log.msg("Timing out client: %s" % str(self.transport.getPeer()))
         policies.TimeoutMixin.timeoutConnection(self)
@@ -1965,7 +2606,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         return False
 
 
-    def writeHeaders(self, version, code, reason, headers):
+    def writeHeaders(self, version, code, reason, headers, headerBlock=b""):
         """
         Called by L{Request} objects to write a complete set of HTTP headers to
         a transport.
@@ -1981,14 +2622,13 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
         @param headers: The headers to write to the transport.
         @type headers: L{twisted.web.http_headers.Headers}
+
+        @param headerBlock: Header lines already serialized, written after
+            C{headers}.
+        @type headerBlock: L{bytes}
         """
-        responseLine = version + b" " + code + b" " + reason + b"\r\n"
-        headerSequence = [responseLine]
-        headerSequence.extend(
-            name + b': ' + value + b"\r\n" for name, value in headers
-        )
-        headerSequence.append(b"\r\n")
-        self.transport.writeSequence(headerSequence)
+        self.transport.write(
+            _responseHead(version, code, reason, headers, headerBlock))
 
 
     def write(self, data):
@@ -25,6 +25,21 @@ def _dashCapitalize(name):
 
 
 
+# Header names capitalized by _dashCapitalize, so that the names of the
+# headers of every response are not capitalized over and over again.  It is
+# seeded with the most common ones and grows up to _MAX_CAPITALIZED entries.
+_capitalized = dict(
+    (name, _dashCapitalize(name)) for name in [
+        b'accept-ranges', b'age', b'allow', b'cache-control', b'connection',
+        b'content-disposition', b'content-encoding', b'content-language',
+        b'content-length', b'content-location', b'content-range',
+        b'content-type', b'date', b'expires', b'keep-alive', b'last-modified',
+        b'location', b'pragma', b'server', b'set-cookie',
+        b'transfer-encoding', b'vary', b'x-powered-by'])
+_MAX_CAPITALIZED = 1000
+
+
+
 @comparable
 class Headers(object):
     """
@@ -269,7 +284,14 @@ class Headers(object):
         @rtype: L{bytes}
         @return: The canonical name of the header.
         """
-        return self._caseMappings.get(name, _dashCapitalize(name))
+        canonical = self._caseMappings.get(name)
+        if canonical is None:
+            canonical = _capitalized.get(name)
+            if canonical is None:
+                canonical = _dashCapitalize(name)
+                if len(_capitalized) < _MAX_CAPITALIZED:
+                    _capitalized[name] = canonical
+        return canonical
 
 
 
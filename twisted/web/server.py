@@ -196,7 +196,9 @@ class Request(Copyable, http.Request, components.Componentized):
             # Content-Type header should be supplied.
             modified = self.code != http.NOT_MODIFIED
             contentType = self.responseHeaders.getRawHeaders(b'content-type')
+            block = self._headerBlock
             if (modified and contentType is None and
+                (block is None or b'content-type' not in block.names) and
                 self.defaultContentType is not None
                     ):
                 self.responseHeaders.setRawHeaders(
@@ -26,7 +26,7 @@ from twisted.python.compat import networkString, intToBytes, nativeString, _PY3
 from twisted.python.compat import escape
 
 from twisted.python import components, filepath, log
-from twisted.internet import abstract, interfaces
+from twisted.internet import abstract, error, interfaces
 from twisted.python.util import InsensitiveDict
 from twisted.python.runtime import platformType
 from twisted.python.url import URL
@@ -548,12 +548,17 @@ class File(resource.Resource, filepath.FilePath):
         @param request: The L{twisted.web.http.Request} object.
         @param fileForReading: The file object containing the resource.
         @return: A L{StaticProducer}.  Calling C{.start()} on this will begin
-            producing the response.
+            producing the response.  When the whole file or a single range of
+            it is requested over a plain connection able to send files (see
+            L{_canSendFile}), this is a L{SendFileStaticProducer}.
         """
         byteRange = request.getHeader(b'range')
         if byteRange is None:
             self._setContentHeaders(request)
             request.setResponseCode(http.OK)
+            if _canSendFile(request, fileForReading):
+                return SendFileStaticProducer(
+                    request, fileForReading, 0, self.getFileSize())
             return NoRangeStaticProducer(request, fileForReading)
         try:
             parsedRanges = self._parseRangeHeader(byteRange)
@@ -561,12 +566,18 @@ class File(resource.Resource, filepath.FilePath):
             log.msg("Ignoring malformed Range header %r" % (byteRange.decode(),))
             self._setContentHeaders(request)
             request.setResponseCode(http.OK)
+            if _canSendFile(request, fileForReading):
+                return SendFileStaticProducer(
+                    request, fileForReading, 0, self.getFileSize())
             return NoRangeStaticProducer(request, fileForReading)
 
         if len(parsedRanges) == 1:
             offset, size = self._doSingleRangeRequest(
                 request, parsedRanges[0])
             self._setContentHeaders(request, size)
+            if size and _canSendFile(request, fileForReading):
+                return SendFileStaticProducer(
+                    request, fileForReading, offset, size)
             return SingleRangeStaticProducer(
                 request, fileForReading, offset, size)
         else:
@@ -823,6 +834,106 @@ class MultipleRangeStaticProducer(StaticProducer):
 
 
 
+def _canSendFile(request, fileObject):
+    """
+    Determine whether the body of a response can be sent with
+    L{interfaces.ISendFileTransport.sendFile} rather than written to the
+    request.
+
+    This is the case when the request's transport provides
+    L{interfaces.ISendFileTransport} and does not use TLS, when the response
+    body is not encoded (for example compressed by
+    L{twisted.web.server.GzipEncoderFactory}) nor buffered until the
+    responses to previous pipelined requests are sent, and when the file is a
+    real file with a file descriptor.
+
+    @param request: The L{twisted.web.http.Request} to respond to.
+    @param fileObject: The file the contents of which to send.
+
+    @rtype: L{bool}
+    """
+    channel = getattr(request, 'channel', None)
+    transport = getattr(channel, 'transport', None)
+    if not interfaces.ISendFileTransport.providedBy(transport):
+        return False
+    if getattr(channel, '_buffering', False):
+        return False
+    if interfaces.ISSLTransport.providedBy(transport):
+        return False
+    if getattr(request, '_encoder', None) is not None:
+        return False
+    try:
+        fileObject.fileno()
+    except (AttributeError, IOError, ValueError):
+        return False
+    return True
+
+
+
+class SendFileStaticProducer(StaticProducer):
+    """
+    A L{StaticProducer} that has the transport send a chunk of a file
+    directly, with L{interfaces.ISendFileTransport.sendFile}, instead of
+    reading it and writing it to the request.
+
+    The response must have a I{Content-Length} header, so that its body is not
+    chunked.
+    """
+
+    def __init__(self, request, fileObject, offset, size):
+        """
+        Initialize the instance.
+
+        @param request: See L{StaticProducer}.
+        @param fileObject: See L{StaticProducer}.
+        @param offset: The offset into the file of the chunk to be written.
+        @param size: The size of the chunk to write.
+        """
+        StaticProducer.__init__(self, request, fileObject)
+        self.offset = offset
+        self.size = size
+
+
+    def start(self):
+        """
+        Write the response headers, then have the transport send the file.
+        """
+        # Writing nothing still sends the status line and the headers.
+        self.request.write(b'')
+        d = self.request.channel.transport.sendFile(
+            self.fileObject, self.offset, self.size)
+        d.addCallbacks(self._sent, self._failed)
+
+
+    def resumeProducing(self):
+        """
+        Do nothing: the transport sends the file on its own.
+        """
+
+
+    def _sent(self, ignored):
+        """
+        Finish the request once the file has been sent.
+        """
+        if self.request is None:
+            return
+        self.request.sentLength += self.size
+        self.request.finish()
+        self.stopProducing()
+
+
+    def _failed(self, reason):
+        """
+        Close the file if it could not be sent, logging the reason unless the
+        connection was simply lost.
+        """
+        if not reason.check(error.ConnectionClosed):
+            log.err(reason, "Failed to send a file.")
+        if self.request is not None:
+            self.stopProducing()
+
+
+
 class ASISProcessor(resource.Resource):
     """
     Serve files exactly as responses without generating a status-line or any
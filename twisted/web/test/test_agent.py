@@ -383,7 +383,7 @@ class DummyFactory(Factory):
     """
     Create C{StubHTTPProtocol} instances.
     """
-    def __init__(self, quiescentCallback):
+    def __init__(self, quiescentCallback, connectionLostCallback=None):
         pass
 
     protocol = StubHTTPProtocol
@@ -570,14 +570,14 @@ class HTTPConnectionPoolTests(TestCase, FakeReactorAndConnectMixin):
             pool._putConnection(key, p)
         self.assertEqual(pool._connections[key], origCached)
 
-        # We close the first one:
-        origCached[0].state = "DISCONNECTED"
+        # We close the most recently cached one, which would be reused first:
+        origCached[1].state = "DISCONNECTED"
 
-        # Now, when we retrive connections we should get the *second* one:
+        # Now, when we retrive connections we should get the *first* one:
         result = []
         self.pool.getConnection(key,
                                 BadEndpoint()).addCallback(result.append)
-        self.assertIdentical(result[0], origCached[1])
+        self.assertIdentical(result[0], origCached[0])
 
         # And both the disconnected and removed connections should be out of
         # the cache:
@@ -697,6 +697,224 @@ class HTTPConnectionPoolTests(TestCase, FakeReactorAndConnectMixin):
                          CancelledError)
 
 
+    def test_getMostRecentlyCached(self):
+        """
+        L{HTTPConnectionPool.getConnection} returns the most recently cached
+        connection first.
+        """
+        key = ("http", b"example.com", 80)
+        cached = [StubHTTPProtocol(), StubHTTPProtocol()]
+        for p in cached:
+            p.makeConnection(StringTransport())
+            self.pool._putConnection(key, p)
+
+        self.assertIdentical(
+            self.successResultOf(self.pool.getConnection(key, BadEndpoint())),
+            cached[1])
+        self.assertIdentical(
+            self.successResultOf(self.pool.getConnection(key, BadEndpoint())),
+            cached[0])
+
+
+
+class HTTPConnectionPoolLimitsTests(TestCase):
+    """
+    Tests for the limits of L{HTTPConnectionPool} on the number of
+    connections in use.
+    """
+    def setUp(self):
+        self.reactor = Clock()
+        self.pool = HTTPConnectionPool(self.reactor)
+        self.pool.retryAutomatically = False
+        self.key = ("http", b"example.com", 80)
+
+
+    def test_maxConnectionsPerHost(self):
+        """
+        Once C{maxConnectionsPerHost} connections are in use for a key,
+        L{HTTPConnectionPool.getConnection} only supplies a connection for
+        that key when one of them is returned to the pool, without limiting
+        other keys.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        waiting = self.pool.getConnection(self.key, BadEndpoint())
+        self.assertNoResult(waiting)
+        self.successResultOf(
+            self.pool.getConnection(("http", b"example.org", 80),
+                                    DummyEndpoint()))
+        self.assertEqual(self.pool.stats(self.key)["queued"], 1)
+
+        self.reactor.advance(3)
+        first._quiescentCallback(first)
+        self.assertNoResult(waiting)
+        self.reactor.advance(0)
+        self.assertIdentical(self.successResultOf(waiting), first)
+        self.assertEqual(
+            self.pool.stats(self.key),
+            dict(active=1, idle=0, queued=0, waited=1, waitTime=3.0))
+
+
+    def test_queuedRequestOverReusedConnection(self):
+        """
+        A request waiting for a connection is sent over the connection
+        returned to the pool once the previous response is finished.
+        """
+        headers = Headers({b"host": [b"example.com"]})
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        secondResponse = self.pool.getConnection(self.key, BadEndpoint())
+        secondResponse.addCallback(lambda second: second.request(
+            Request(b"GET", b"/second", headers, None, persistent=True)))
+        firstResponse = first.request(
+            Request(b"GET", b"/first", headers, None, persistent=True))
+        first.transport.clear()
+        first.dataReceived(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+        self.assertEqual(self.successResultOf(firstResponse).code, 200)
+        self.assertEqual(first.state, "QUIESCENT")
+        self.assertEqual(self.pool.stats(self.key)["active"], 1)
+
+        self.reactor.advance(0)
+        self.assertTrue(
+            first.transport.value().startswith(b"GET /second HTTP/1.1\r\n"))
+        first.dataReceived(b"HTTP/1.1 201 Created\r\nContent-Length: 0\r\n\r\n")
+        self.assertEqual(self.successResultOf(secondResponse).code, 201)
+        self.assertEqual(
+            self.pool.stats(self.key),
+            dict(active=0, idle=1, queued=0, waited=1, waitTime=0.0))
+
+
+    def test_connectionLostWhileHandedOver(self):
+        """
+        If a connection returned to the pool is lost before it is supplied to
+        the request waiting for it, a new connection is opened for that
+        request instead.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        waiting = self.pool.getConnection(self.key, DummyEndpoint())
+        first._quiescentCallback(first)
+        first.connectionLost(Failure(ConnectionDone()))
+
+        second = self.successResultOf(waiting)
+        self.assertNotIdentical(second, first)
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+        self.assertEqual(self.pool.stats(self.key)["active"], 1)
+
+
+    def test_cancelWhileHandedOver(self):
+        """
+        Cancelling a request while a connection is handed over to it returns
+        the connection to the pool.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        waiting = self.pool.getConnection(self.key, BadEndpoint())
+        first._quiescentCallback(first)
+        waiting.cancel()
+
+        self.failureResultOf(waiting, CancelledError)
+        self.assertEqual(
+            self.pool.stats(self.key),
+            dict(active=0, idle=1, queued=0, waited=1, waitTime=0.0))
+        self.assertEqual(len(self.reactor.getDelayedCalls()), 1)
+
+
+    def test_connectionLost(self):
+        """
+        A connection in use no longer counts against the limits of the pool
+        once it is lost: a new connection is opened for the request waiting
+        for one.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        waiting = self.pool.getConnection(self.key, DummyEndpoint())
+
+        first.connectionLost(Failure(ConnectionDone()))
+        second = self.successResultOf(waiting)
+        self.assertNotIdentical(second, first)
+        self.assertEqual(self.pool.stats()["active"], 1)
+
+
+    def test_connectionFailed(self):
+        """
+        A connection which could not be opened does not count against the
+        limits of the pool.
+        """
+        class RefusingEndpoint(object):
+            def connect(self, factory):
+                return defer.fail(ConnectionRefusedError())
+
+        self.pool.maxConnectionsPerHost = 1
+        self.failureResultOf(
+            self.pool.getConnection(self.key, RefusingEndpoint()),
+            ConnectionRefusedError)
+        self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+
+
+    def test_maxConnections(self):
+        """
+        Once C{maxConnections} connections are in use, requests for a
+        connection with any key wait, and are supplied one in the order they
+        were made.
+        """
+        self.pool.maxConnections = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        second = self.pool.getConnection(
+            ("http", b"example.org", 80), DummyEndpoint())
+        third = self.pool.getConnection(
+            ("http", b"example.net", 80), DummyEndpoint())
+        self.assertEqual(self.pool.stats()["queued"], 2)
+
+        first.connectionLost(Failure(ConnectionDone()))
+        self.successResultOf(second)
+        self.assertNoResult(third)
+        self.assertEqual(
+            self.pool.stats(),
+            dict(active=1, idle=0, queued=1, waited=1, waitTime=0.0))
+
+
+    def test_cancelWaiting(self):
+        """
+        Cancelling the L{Deferred} of a request waiting for a connection
+        removes it from the queue.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        first = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        waiting = self.pool.getConnection(self.key, BadEndpoint())
+        waiting.cancel()
+        self.failureResultOf(waiting, CancelledError)
+        self.assertEqual(self.pool.stats()["queued"], 0)
+
+        first.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(self.pool.stats()["active"], 0)
+
+
+    def test_cachedConnectionLost(self):
+        """
+        A cached connection is removed from the pool once it is lost.
+        """
+        connection = self.successResultOf(
+            self.pool.getConnection(self.key, DummyEndpoint()))
+        connection._quiescentCallback(connection)
+        self.assertEqual(
+            self.pool.stats(),
+            dict(active=0, idle=1, queued=0, waited=0, waitTime=0.0))
+
+        connection.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(self.pool.stats()["idle"], 0)
+        self.assertEqual(self.pool._timeouts, {})
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
 
 class AgentTestsMixin(object):
     """
@@ -7,7 +7,7 @@ Test HTTP support.
 
 from __future__ import absolute_import, division
 
-import random, cgi, base64
+import random, cgi, base64, time
 
 try:
     from urlparse import urlparse, urlunsplit, clear_cache
@@ -44,6 +44,28 @@ class DateTimeTests(unittest.TestCase):
             self.assertEqual(time, time2)
 
 
+    def test_currentDatetimeCached(self):
+        """
+        L{http.datetimeToString} only formats the current time once per
+        second.
+        """
+        now = [1000000000.2]
+        class FakeTime(object):
+            gmtime = staticmethod(time.gmtime)
+            def time(self):
+                return now[0]
+        self.patch(http, "time", FakeTime())
+        self.patch(http, "_lastDatetime", (None, None))
+
+        first = http.datetimeToString()
+        self.assertEqual(first, http.datetimeToString(1000000000))
+        now[0] = 1000000000.9
+        self.assertIs(http.datetimeToString(), first)
+        now[0] = 1000000001.1
+        self.assertEqual(
+            http.datetimeToString(), http.datetimeToString(1000000001))
+
+
 
 class DummyHTTPHandler(http.Request):
 
@@ -369,6 +391,192 @@ class PipeliningBodyTests(unittest.TestCase, ResponseTestMixin):
 
 
 
+class ConcurrentPipeliningTests(unittest.TestCase, ResponseTestMixin):
+    """
+    Tests for the concurrent processing of pipelined requests by
+    L{http.HTTPChannel}, enabled by L{http.HTTPChannel.concurrentPipelining}.
+    """
+
+    def connect(self, *paths, **kwargs):
+        """
+        Deliver pipelined I{GET} requests to a channel processing them
+        concurrently.
+
+        @param paths: The paths requested.
+
+        @param kwargs: Attributes of the channel to set.
+
+        @return: The L{http.HTTPChannel}.
+        """
+        channel = http.HTTPChannel()
+        channel.concurrentPipelining = True
+        channel.requestFactory = DelayedHTTPHandler
+        for name, value in kwargs.items():
+            setattr(channel, name, value)
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(b"".join(
+            b"GET " + path + b" HTTP/1.1\r\n\r\n" for path in paths))
+        return channel
+
+
+    def expectedResponse(self, path):
+        """
+        The response of L{DelayedHTTPHandler} to a request.
+
+        @param path: The path requested.
+        """
+        return (
+            b"HTTP/1.1 200 OK",
+            b"Request: " + path,
+            b"Command: GET",
+            b"Version: HTTP/1.1",
+            b"Content-Length: 13",
+            b"'''\nNone\n'''\n")
+
+
+    def test_processedConcurrently(self):
+        """
+        All the pipelined requests are processed at once, and their responses
+        are sent in the order the requests were received.
+        """
+        channel = self.connect(b"/a", b"/b", b"/c")
+        first, second, third = channel.requests
+
+        third.delayedProcess()
+        second.delayedProcess()
+        self.assertEqual(channel.transport.value(), b"")
+
+        first.delayedProcess()
+        self.assertResponseEquals(
+            channel.transport.value(),
+            [self.expectedResponse(b"/a"), self.expectedResponse(b"/b"),
+             self.expectedResponse(b"/c")])
+        self.assertEqual(channel.requests, [])
+        self.assertEqual(channel.transport.producerState, "producing")
+
+
+    def test_firstResponseNotBuffered(self):
+        """
+        The response to the first pending request is written to the
+        connection as soon as it is written to the request.
+        """
+        channel = self.connect(b"/a", b"/b")
+        first, second = channel.requests
+        first.write(b"x")
+        self.assertTrue(channel.transport.value().endswith(b"1\r\nx\r\n"))
+
+
+    def test_maxPipelinedRequests(self):
+        """
+        No more than L{http.HTTPChannel.maxPipelinedRequests} requests are
+        processed at once: further requests are read once one of them is
+        finished.
+        """
+        channel = self.connect(
+            b"/a", b"/b", b"/c", maxPipelinedRequests=2)
+        self.assertEqual(len(channel.requests), 2)
+        self.assertEqual(channel.transport.producerState, "paused")
+
+        channel.requests[0].delayedProcess()
+        self.assertEqual(len(channel.requests), 2)
+        self.assertEqual(channel.transport.producerState, "paused")
+        self.assertEqual(channel.requests[1].path, b"/c")
+
+
+    def test_maxPipelineBufferSize(self):
+        """
+        Once more than L{http.HTTPChannel.maxPipelineBufferSize} bytes of
+        responses are buffered, the transport is paused, as is the streaming
+        producer of a buffered response, until the responses can be sent.
+        """
+        # The head of the chunked response and its first chunk fit, the
+        # second chunk does not.
+        channel = self.connect(b"/a", b"/b", maxPipelineBufferSize=60)
+        first, second = channel.requests
+        producer = DummyProducer()
+        second.registerProducer(producer, True)
+        second.write(b"x" * 5)
+        self.assertEqual(producer.events, [])
+        self.assertEqual(channel.transport.producerState, "producing")
+
+        second.write(b"x" * 10)
+        self.assertEqual(producer.events, ["pause"])
+        self.assertEqual(channel.transport.producerState, "paused")
+        self.assertIdentical(channel.transport.producer, None)
+
+        first.delayedProcess()
+        self.assertEqual(producer.events, ["pause", "resume"])
+        self.assertIdentical(channel.transport.producer, producer)
+        self.assertEqual(channel.transport.producerState, "producing")
+        self.assertTrue(channel.transport.value().endswith(
+            b"5\r\nxxxxx\r\na\r\nxxxxxxxxxx\r\n"))
+
+
+    def test_expectContinue(self):
+        """
+        The 100 Continue response to a pipelined request expecting one is
+        sent after the responses to the requests received before it.
+        """
+        channel = self.connect(b"/a")
+        channel.dataReceived(
+            b"POST /b HTTP/1.1\r\n"
+            b"Content-Length: 5\r\n"
+            b"Expect: 100-continue\r\n"
+            b"\r\n")
+        first, second = channel.requests
+        self.assertEqual(channel.transport.value(), b"")
+
+        channel.dataReceived(b"hello")
+        second.delayedProcess()
+        first.delayedProcess()
+        response = channel.transport.value()
+        continued = response.index(b"HTTP/1.1 100 Continue\r\n\r\n")
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK"))
+        self.assertEqual(response.count(b"HTTP/1.1 200 OK"), 2)
+        self.assertTrue(
+            response.index(b"Request: /a") < continued <
+            response.index(b"Request: /b"))
+
+
+    def test_expectContinueNotBuffered(self):
+        """
+        The 100 Continue response to the first pending request is written to
+        the connection at once.
+        """
+        channel = self.connect()
+        channel.dataReceived(
+            b"POST /a HTTP/1.1\r\n"
+            b"Content-Length: 5\r\n"
+            b"Expect: 100-continue\r\n"
+            b"\r\n")
+        self.assertEqual(
+            channel.transport.value(), b"HTTP/1.1 100 Continue\r\n\r\n")
+
+
+    def test_connectionNotPersistent(self):
+        """
+        Requests received after one asking for the connection to be closed
+        are not processed, and the connection is closed once the responses to
+        the earlier requests are sent.
+        """
+        channel = http.HTTPChannel()
+        channel.concurrentPipelining = True
+        channel.requestFactory = DelayedHTTPHandler
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(
+            b"GET /a HTTP/1.1\r\n\r\n"
+            b"GET /b HTTP/1.1\r\nConnection: close\r\n\r\n"
+            b"GET /c HTTP/1.1\r\n\r\n")
+        first, second = channel.requests
+
+        second.delayedProcess()
+        self.assertFalse(channel.transport.disconnecting)
+        first.delayedProcess()
+        self.assertTrue(channel.transport.disconnecting)
+        self.assertEqual(channel.transport.value().count(b"HTTP/1.1 200"), 2)
+
+
+
 class ShutdownTests(unittest.TestCase):
     """
     Tests that connections can be shut down by L{http.Request} objects.
@@ -1610,6 +1818,108 @@ Hello,
         self.assertTrue(channel.transport.disconnecting)
 
 
+    def test_pipelinedRequestsReceivedAtOnce(self):
+        """
+        When several requests, with and without bodies, are received in a
+        single chunk of data, each of them is processed in turn once the
+        previous one is finished.
+        """
+        processed = []
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append((self.method, self.content.read()))
+                self.finish()
+
+        channel = http.HTTPChannel()
+        channel.requestFactory = MyRequest
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(
+            b"GET / HTTP/1.1\r\n\r\n"
+            b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+            b"PUT / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5\r\nworld\r\n0\r\n\r\n"
+            b"GET / HTTP/1.1\r\n\r\n")
+        self.assertEqual(
+            processed,
+            [(b"GET", b""), (b"POST", b"hello"), (b"PUT", b"world"),
+             (b"GET", b"")])
+        self.assertEqual(channel.requests, [])
+
+
+    def test_foldedHeader(self):
+        """
+        A header value spread over several lines is given to the request as a
+        single value.
+        """
+        processed = []
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append(self)
+                self.finish()
+
+        requestLines = [
+            b"GET / HTTP/1.0",
+            b"X-Multiline: line-0",
+            b"\tline-1",
+            b"Foo: bar",
+            b"",
+            b""]
+        self.runRequest(b"\n".join(requestLines), MyRequest, 0)
+        [request] = processed
+        self.assertEqual(
+            request.requestHeaders.getRawHeaders(b"x-multiline"),
+            [b"line-0\n\tline-1"])
+        self.assertEqual(request.getHeader(b"foo"), b"bar")
+
+
+    def test_chunkedOverridesContentLength(self):
+        """
+        If a request has both a I{Content-Length} header and the I{chunked}
+        transfer encoding, its body is decoded as chunked, as required by RFC
+        7230, section 3.3.3.
+        """
+        processed = []
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append(self.content.read())
+                self.finish()
+
+        channel = http.HTTPChannel()
+        channel.requestFactory = MyRequest
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(
+            b"POST / HTTP/1.1\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Content-Length: 3\r\n"
+            b"\r\n"
+            b"5\r\nhello\r\n0\r\n\r\n")
+        self.assertEqual(processed, [b"hello"])
+
+
+    def test_lineReceivedOverridden(self):
+        """
+        If a subclass of L{HTTPChannel} overrides C{lineReceived}, requests
+        are parsed one line at a time through it.
+        """
+        lines = []
+        processed = []
+        class MyChannel(http.HTTPChannel):
+            def lineReceived(self, line):
+                lines.append(line)
+                return http.HTTPChannel.lineReceived(self, line)
+
+        class MyRequest(http.Request):
+            def process(self):
+                processed.append(self.getHeader(b"foo"))
+                self.finish()
+
+        requestLines = [b"GET / HTTP/1.1", b"Foo: bar", b"", b""]
+        self.runRequest(
+            b"\n".join(requestLines), MyRequest, 0, channel=MyChannel())
+        self.assertEqual(lines, [b"GET / HTTP/1.1", b"Foo: bar", b""])
+        self.assertEqual(processed, [b"bar"])
+
+
 
 class QueryArgumentsTests(unittest.TestCase):
     def testParseqs(self):
@@ -2223,6 +2533,182 @@ class RequestTests(unittest.TestCase, ResponseTestMixin):
               b"5\r\nHello\r\n6\r\nWorld!\r\n")])
 
 
+    def _headerBlockRequest(self, channel=None):
+        """
+        Create a request for an HTTP 1.0 response with a header block setting
+        its I{Content-Type} and I{X-Static} headers.
+
+        @param channel: The channel of the request, an L{http.HTTPChannel}
+            if L{None}.
+
+        @return: A 2-tuple of the request and of the transport the response
+            is written to.
+        """
+        transport = StringTransport()
+        if channel is None:
+            channel = http.HTTPChannel()
+            channel.makeConnection(transport)
+        else:
+            channel.transport = transport
+        req = http.Request(channel, False)
+        req.clientproto = b"HTTP/1.0"
+        req.setHeaderBlock(http.HeaderBlock(
+            [(b"content-type", b"text/plain"), (b"x-static", b"yes")]))
+        return req, transport
+
+
+    def test_headerBlock(self):
+        """
+        The headers of the L{http.HeaderBlock} given to
+        L{http.Request.setHeaderBlock} are sent along with the other response
+        headers.
+        """
+        req, transport = self._headerBlockRequest()
+        req.setHeader(b"test", b"lemur")
+        req.write(b"Hello")
+
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK",
+              b"Test: lemur",
+              b"Content-Type: text/plain",
+              b"X-Static: yes",
+              b"Hello")])
+
+
+    def test_headerBlockOverridden(self):
+        """
+        A header set with L{http.Request.setHeader} replaces the header of the
+        same name of the L{http.HeaderBlock} of the request.
+        """
+        req, transport = self._headerBlockRequest()
+        req.setHeader(b"content-type", b"text/html")
+        req.write(b"Hello")
+
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK",
+              b"Content-Type: text/html",
+              b"X-Static: yes",
+              b"Hello")])
+
+
+    def test_headerBlockContentLength(self):
+        """
+        A response whose length is given by the I{Content-Length} header of its
+        L{http.HeaderBlock} is not chunked.
+        """
+        req, transport = self._headerBlockRequest()
+        req.clientproto = b"HTTP/1.1"
+        req.setHeaderBlock(http.HeaderBlock([(b"content-length", b"5")]))
+        req.write(b"Hello")
+
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.1 200 OK",
+              b"Content-Length: 5",
+              b"Hello")])
+
+
+    def test_headerBlockOtherChannel(self):
+        """
+        The headers of the L{http.HeaderBlock} of a request are given to the
+        C{writeHeaders} method of channels other than L{http.HTTPChannel}
+        along with the other response headers.
+        """
+        req, transport = self._headerBlockRequest(DummyChannel())
+        req.write(b"Hello")
+
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK",
+              b"Content-Type: text/plain",
+              b"X-Static: yes",
+              b"Hello")])
+
+
+    def test_headerBlockChannelWithoutBlocks(self):
+        """
+        The headers of the L{http.HeaderBlock} of a request are given one at a
+        time to the C{writeHeaders} method of an L{http.HTTPChannel} subclass
+        overriding it without its C{headerBlock} parameter.
+        """
+        written = []
+
+        class Channel(http.HTTPChannel):
+            def writeHeaders(self, version, code, reason, headers):
+                written.append(headers)
+                http.HTTPChannel.writeHeaders(
+                    self, version, code, reason, headers)
+
+        req, transport = self._headerBlockRequest(Channel())
+        req.write(b"Hello")
+
+        self.assertEqual(
+            written,
+            [[(b"Content-Type", b"text/plain"), (b"X-Static", b"yes")]])
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK",
+              b"Content-Type: text/plain",
+              b"X-Static: yes",
+              b"Hello")])
+
+
+    def test_headerBlockEncoded(self):
+        """
+        L{http.HTTPChannel.writeHeaders} is given the serialized headers of the
+        L{http.HeaderBlock} of a request rather than the headers one at a
+        time.
+        """
+        req, transport = self._headerBlockRequest()
+        written = []
+        writeHeaders = req.channel.writeHeaders
+
+        def recordHeaders(version, code, reason, headers, headerBlock=b""):
+            written.append((headers, headerBlock))
+            writeHeaders(version, code, reason, headers, headerBlock)
+
+        self.patch(req.channel, "writeHeaders", recordHeaders)
+        req.setHeader(b"test", b"lemur")
+        req.write(b"Hello")
+
+        self.assertEqual(
+            written,
+            [([(b"Test", b"lemur")],
+              b"Content-Type: text/plain\r\nX-Static: yes\r\n")])
+        self.assertResponseEquals(
+            transport.value(),
+            [(b"HTTP/1.0 200 OK",
+              b"Test: lemur",
+              b"Content-Type: text/plain",
+              b"X-Static: yes",
+              b"Hello")])
+
+
+    def test_headerBlockPipelined(self):
+        """
+        The headers of the L{http.HeaderBlock} of a pipelined request
+        processed concurrently are sent with its buffered response.
+        """
+        channel = http.HTTPChannel()
+        channel.concurrentPipelining = True
+        channel.requestFactory = DelayedHTTPHandler
+        channel.makeConnection(StringTransport())
+        channel.dataReceived(
+            b"GET /a HTTP/1.1\r\n\r\nGET /b HTTP/1.1\r\n\r\n")
+        first, second = channel.requests
+        second.setHeaderBlock(http.HeaderBlock([(b"x-static", b"yes")]))
+        second.delayedProcess()
+        self.assertEqual(channel.transport.value(), b"")
+
+        first.delayedProcess()
+        firstResponse, secondResponse = (
+            channel.transport.value().split(b"HTTP/1.1 200 OK")[1:])
+        self.assertNotIn(b"X-Static", firstResponse)
+        self.assertIn(b"\r\nX-Static: yes\r\n", secondResponse)
+
+
     def test_firstWriteLastModified(self):
         """
         For an HTTP 1.0 request for a resource with a known last modified time,
@@ -9,6 +9,7 @@ from __future__ import division, absolute_import
 
 from twisted.trial.unittest import TestCase
 from twisted.python.compat import _PY3
+from twisted.web import http_headers
 from twisted.web.http_headers import Headers
 
 class BytesHeadersTests(TestCase):
@@ -150,6 +151,20 @@ class BytesHeadersTests(TestCase):
                           b"X-XSS-Protection")
 
 
+    def test_canonicalNameCapsCached(self):
+        """
+        L{Headers._canonicalNameCaps} remembers the capitalization of the
+        names it is given, up to a limit.
+        """
+        self.patch(http_headers, "_capitalized", {})
+        self.patch(http_headers, "_MAX_CAPITALIZED", 1)
+        h = Headers()
+        self.assertEqual(h._canonicalNameCaps(b"x-first"), b"X-First")
+        self.assertEqual(h._canonicalNameCaps(b"x-second"), b"X-Second")
+        self.assertEqual(http_headers._capitalized, {b"x-first": b"X-First"})
+        self.assertEqual(h._canonicalNameCaps(b"x-first"), b"X-First")
+
+
     def test_getAllRawHeaders(self):
         """
         L{Headers.getAllRawHeaders} returns an iterable of (k, v) pairs, where
@@ -1645,6 +1645,27 @@ class HTTP11ClientProtocolTests(TestCase):
         self.assertTrue(transport.disconnecting)
 
 
+    def test_connectionLostCallback(self):
+        """
+        The C{connectionLostCallback} given to L{HTTP11ClientProtocol} is
+        called with the protocol once its connection is lost, after the
+        request in progress has failed.
+        """
+        events = []
+        protocol = HTTP11ClientProtocol(
+            connectionLostCallback=lambda p: events.append(p))
+        protocol.makeConnection(StringTransport())
+        requestDeferred = protocol.request(
+            Request(b'GET', b'/', _boringHeaders, None))
+        requestDeferred.addErrback(events.append)
+
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(len(events), 2)
+        events[0].trap(ResponseNeverReceived)
+        self.assertIdentical(events[1], protocol)
+        self.assertEqual(protocol.state, 'CONNECTION_LOST')
+
+
     def test_cancelBeforeResponse(self):
         """
         The L{Deferred} returned by L{HTTP11ClientProtocol.request} will fire
@@ -13,9 +13,12 @@ import re
 
 from io import BytesIO as StringIO
 
+from zope.interface import directlyProvides, implementer
 from zope.interface.verify import verifyObject
 
 from twisted.internet import abstract, interfaces
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionLost
 from twisted.python.runtime import platform
 from twisted.python.filepath import FilePath
 from twisted.python import log
@@ -57,6 +60,19 @@ class StaticDataTests(TestCase):
         self.assertRaises(UnsupportedMethod, data.render, request)
 
 
+    def test_contentType(self):
+        """
+        L{Data.render} sets the I{Content-Type} header of the response, where
+        it is visible in the response headers of the request.
+        """
+        data = static.Data(b"foo", "text/plain")
+        request = DummyRequest([b''])
+        data.render(request)
+        self.assertEqual(
+            request.responseHeaders.getRawHeaders(b"content-type"),
+            [b"text/plain"])
+
+
 
 class StaticFileTests(TestCase):
     """
@@ -447,6 +463,37 @@ class StaticFileTests(TestCase):
 
 
 
+@implementer(interfaces.ISendFileTransport)
+class SendFileTransport(object):
+    """
+    A fake L{interfaces.ISendFileTransport} which records the calls to
+    C{sendFile}.
+
+    @ivar sent: A L{list} of the arguments of each call to C{sendFile}, along
+        with the L{Deferred} it returned.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+
+    def sendFile(self, fileObject, offset, count):
+        d = Deferred()
+        self.sent.append((fileObject, offset, count, d))
+        return d
+
+
+
+class SendFileChannel(object):
+    """
+    A fake HTTP channel whose transport is a L{SendFileTransport}.
+    """
+
+    def __init__(self):
+        self.transport = SendFileTransport()
+
+
+
 class StaticMakeProducerTests(TestCase):
     """
     Tests for L{File.makeProducer}.
@@ -633,6 +680,81 @@ class StaticMakeProducerTests(TestCase):
                 self.contentHeaders(request))
 
 
+    def test_noRangeHeaderGivesSendFileStaticProducer(self):
+        """
+        makeProducer when no Range header is set returns an instance of
+        SendFileStaticProducer covering the whole file if the transport of
+        the request provides L{interfaces.ISendFileTransport}.
+        """
+        resource = self.makeResourceWithContent(b'abcdef')
+        request = DummyRequest([])
+        request.channel = SendFileChannel()
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.SendFileStaticProducer)
+            self.assertEqual((0, 6), (producer.offset, producer.size))
+
+
+    def test_singleRangeGivesSendFileStaticProducer(self):
+        """
+        makeProducer when the Range header requests a single byte range
+        returns an instance of SendFileStaticProducer covering that range if
+        the transport of the request provides L{interfaces.ISendFileTransport}.
+        """
+        request = DummyRequest([])
+        request.channel = SendFileChannel()
+        request.requestHeaders.addRawHeader(b'range', b'bytes=1-3')
+        resource = self.makeResourceWithContent(b'abcdef')
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.SendFileStaticProducer)
+            self.assertEqual((1, 3), (producer.offset, producer.size))
+
+
+    def test_noSendFileOverTLS(self):
+        """
+        makeProducer does not return a SendFileStaticProducer if the
+        transport of the request uses TLS.
+        """
+        request = DummyRequest([])
+        request.channel = SendFileChannel()
+        directlyProvides(request.channel.transport, interfaces.ISSLTransport)
+        resource = self.makeResourceWithContent(b'abcdef')
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.NoRangeStaticProducer)
+
+
+    def test_noSendFileWithEncoder(self):
+        """
+        makeProducer does not return a SendFileStaticProducer if the response
+        body is encoded, for example compressed.
+        """
+        request = DummyRequest([])
+        request.channel = SendFileChannel()
+        request._encoder = object()
+        resource = self.makeResourceWithContent(b'abcdef')
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(producer, static.NoRangeStaticProducer)
+
+
+    def test_multipleRangeNoSendFile(self):
+        """
+        makeProducer when the Range header requests many byte ranges returns
+        an instance of MultipleRangeStaticProducer even if the transport of
+        the request provides L{interfaces.ISendFileTransport}.
+        """
+        request = DummyRequest([])
+        request.channel = SendFileChannel()
+        request.requestHeaders.addRawHeader(b'range', b'bytes=1-3,5-6')
+        resource = self.makeResourceWithContent(b'abcdef')
+        with resource.openForReading() as file:
+            producer = resource.makeProducer(request, file)
+            self.assertIsInstance(
+                producer, static.MultipleRangeStaticProducer)
+
+
     def test_multipleRangeGivesMultipleRangeStaticProducer(self):
         """
         makeProducer when the Range header requests a single byte range
@@ -927,6 +1049,75 @@ class SingleRangeStaticProducerTests(TestCase):
 
 
 
+class SendFileStaticProducerTests(TestCase):
+    """
+    Tests for L{SendFileStaticProducer}.
+    """
+
+    def setUp(self):
+        self.request = DummyRequest([])
+        self.request.sentLength = 0
+        self.request.channel = SendFileChannel()
+        path = FilePath(self.mktemp())
+        path.setContent(b'abcdef')
+        self.fileObject = path.open()
+        self.addCleanup(self.fileObject.close)
+        self.producer = static.SendFileStaticProducer(
+            self.request, self.fileObject, 1, 3)
+
+
+    def test_startSendsFile(self):
+        """
+        L{SendFileStaticProducer.start} writes the response headers, then
+        asks the transport to send the given chunk of the file.
+        """
+        self.producer.start()
+        self.assertEqual([b''], self.request.written)
+        [(fileObject, offset, count, d)] = (
+            self.request.channel.transport.sent)
+        self.assertEqual(
+            (self.fileObject, 1, 3), (fileObject, offset, count))
+
+
+    def test_finishCalledWhenSent(self):
+        """
+        L{SendFileStaticProducer} finishes the request, accounts for the
+        bytes sent and closes the file once the transport has sent it.
+        """
+        finished = []
+        self.request.notifyFinish().addCallback(finished.append)
+        self.producer.start()
+        self.assertEqual([], finished)
+        self.request.channel.transport.sent[0][3].callback(None)
+        self.assertEqual([None], finished)
+        self.assertEqual(3, self.request.sentLength)
+        self.assertTrue(self.fileObject.closed)
+
+
+    def test_connectionLost(self):
+        """
+        If the connection is lost before the file is sent,
+        L{SendFileStaticProducer} closes the file without logging an error.
+        """
+        self.producer.start()
+        self.request.channel.transport.sent[0][3].errback(ConnectionLost())
+        self.assertTrue(self.fileObject.closed)
+        self.assertFalse(self.request.finished)
+        self.assertEqual([], self.flushLoggedErrors())
+
+
+    def test_failureLogged(self):
+        """
+        If the file cannot be sent for another reason,
+        L{SendFileStaticProducer} logs the error and closes the file.
+        """
+        self.producer.start()
+        self.request.channel.transport.sent[0][3].errback(IOError("oops"))
+        self.assertTrue(self.fileObject.closed)
+        self.assertEqual(1, len(self.flushLoggedErrors(IOError)))
+
+
+
 class MultipleRangeStaticProducerTests(TestCase):
     """
     Tests for L{MultipleRangeStaticProducer}.
@@ -0,0 +1 @@
+twisted.web.client.HTTPConnectionPool can limit its connections per host and in total with maxConnectionsPerHost and maxConnections, queueing the requests beyond them, and reports its connections with stats().
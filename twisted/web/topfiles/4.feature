@@ -0,0 +1 @@
+twisted.web.static.File sends the body of whole file and single range responses with sendfile(2) over plain TCP connections.
@@ -0,0 +1 @@
+twisted.web.http.HeaderBlock serializes a fixed set of response headers once, to be sent with any number of responses with twisted.web.http.Request.setHeaderBlock.
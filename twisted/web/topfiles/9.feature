@@ -0,0 +1 @@
+twisted.web.http.HTTPChannel.concurrentPipelining lets pipelined requests be processed concurrently, their responses being buffered and sent in the order of the requests.